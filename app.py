@@ -376,6 +376,7 @@ def setup_environment(app):
         from database.chart_prefs_db import ensure_chart_prefs_tables_exists
         from database.market_calendar_db import ensure_market_calendar_tables_exists
         from database.qty_freeze_db import ensure_qty_freeze_tables_exists
+        from database.history_db import init_db as ensure_history_store_exists
 
         db_init_functions = [
             ('Auth DB', ensure_auth_tables_exists),
@@ -393,6 +394,7 @@ def setup_environment(app):
             ('Chart Prefs DB', ensure_chart_prefs_tables_exists),
             ('Market Calendar DB', ensure_market_calendar_tables_exists),
             ('Qty Freeze DB', ensure_qty_freeze_tables_exists),
+            ('History DB', ensure_history_store_exists),
         ]
 
         db_init_start = time.time()
@@ -496,6 +498,13 @@ with app.app_context():
     except Exception as e:
         logger.debug(f"Cache restoration skipped: {e}")
 
+# Replay webhook orders a previous run journaled but did not finish
+try:
+    from services.order_ingestion_service import order_ingestion_engine
+    order_ingestion_engine.recover()
+except Exception as e:
+    logger.error(f"Webhook order journal recovery failed: {e}")
+
 # Auto-start execution engine and squareoff scheduler if in analyzer mode (parallel startup)
 with app.app_context():
     try:
@@ -5,7 +5,6 @@ from limiter import limiter
 from utils.logging import get_logger
 from sqlalchemy import func
 from collections import defaultdict
-import numpy as np
 from datetime import datetime
 import pytz
 import csv
@@ -31,16 +30,11 @@ def format_ist_time(timestamp):
     return ist_time.strftime('%d-%m-%Y %I:%M:%S %p')
 
 def get_histogram_data(broker=None):
-    """Get histogram data for RTT distribution"""
+    """Get histogram data for RTT distribution (from the rollup sketches)"""
     try:
-        query = OrderLatency.query
-        if broker:
-            query = query.filter_by(broker=broker)
-        
-        # Get all RTT values
-        rtts = [r[0] for r in query.with_entities(OrderLatency.rtt_ms).all()]
-        
-        if not rtts:
+        sketch = OrderLatency.get_rtt_sketch(broker)
+
+        if not sketch.count:
             return {
                 'bins': [],
                 'counts': [],
@@ -48,37 +42,25 @@ def get_histogram_data(broker=None):
                 'min_rtt': 0,
                 'max_rtt': 0
             }
-        
-        # Calculate statistics
-        avg_rtt = sum(rtts) / len(rtts)
-        min_rtt = min(rtts)
-        max_rtt = max(rtts)
-        
+
         # Create histogram bins
         bin_count = 30  # Number of bins
-        bin_width = (max_rtt - min_rtt) / bin_count if max_rtt > min_rtt else 1
-        
-        # Create histogram using numpy
-        counts, bins = np.histogram(rtts, bins=bin_count, range=(min_rtt, max_rtt))
-        
-        # Convert to list for JSON serialization
-        counts = counts.tolist()
-        bins = bins.tolist()
-        
+        bins, counts = sketch.histogram(bin_count)
+
         # Create bin labels (use the start of each bin)
         bin_labels = [f"{bins[i]:.1f}" for i in range(len(bins)-1)]
-        
+
         data = {
             'bins': bin_labels,
             'counts': counts,
-            'avg_rtt': float(avg_rtt),
-            'min_rtt': float(min_rtt),
-            'max_rtt': float(max_rtt)
+            'avg_rtt': float(sketch.mean),
+            'min_rtt': float(sketch.min),
+            'max_rtt': float(sketch.max)
         }
-        
+
         # logger.info(f"Histogram data for broker {broker}: {data}")  # Commented out to reduce log verbosity
         return data
-        
+
     except Exception as e:
         logger.error(f"Error getting histogram data: {e}")
         return {
@@ -135,10 +117,8 @@ def latency_dashboard():
 
     # Get histogram data for each broker
     broker_histograms = {}
-    brokers = [b[0] for b in OrderLatency.query.with_entities(OrderLatency.broker).distinct().all()]
-    for broker in brokers:
-        if broker:  # Skip None values
-            broker_histograms[broker] = get_histogram_data(broker)
+    for broker in stats.get('broker_stats', {}):
+        broker_histograms[broker] = get_histogram_data(broker)
 
     # logger.info(f"Broker histograms data: {broker_histograms}")  # Commented out to reduce log verbosity
 
@@ -162,8 +142,11 @@ def latency_dashboard():
             'timestamp': convert_to_ist(log.timestamp).isoformat()
         })
 
+    from services.order_context_service import get_order_context_stats
+
     return render_template('latency/dashboard.html',
                          stats=stats,
+                         order_context=get_order_context_stats(),
                          logs=recent_logs,
                          logs_json=logs_json,
                          broker_histograms=broker_histograms)
@@ -232,6 +215,58 @@ def get_broker_stats(broker):
         logger.error(f"Error fetching broker stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+@latency_bp.route('/api/timeseries', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_timeseries():
+    """API endpoint to get hourly latency rollups"""
+    try:
+        hours = min(int(request.args.get('hours', 24)), 24 * 90)
+        return jsonify(OrderLatency.get_latency_timeseries(
+            hours=hours,
+            broker=request.args.get('broker'),
+            order_type=request.args.get('order_type')
+        ))
+    except Exception as e:
+        logger.error(f"Error fetching latency timeseries: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@latency_bp.route('/api/ingestion', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_ingestion_stats():
+    """API endpoint to get webhook order queue depth and webhook-to-broker latency"""
+    try:
+        from services.order_ingestion_service import order_ingestion_engine
+        return jsonify(order_ingestion_engine.get_stats())
+    except Exception as e:
+        logger.error(f"Error fetching ingestion stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@latency_bp.route('/api/http', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_http_stats():
+    """API endpoint to get per-broker HTTP pool stats (connection reuse, TLS handshakes, wait time)"""
+    try:
+        from utils.httpx_client import get_http_pool_stats
+        return jsonify(get_http_pool_stats())
+    except Exception as e:
+        logger.error(f"Error fetching HTTP pool stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@latency_bp.route('/api/order-context', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_fast_path_stats():
+    """API endpoint to get order fast path usage and the per-order overhead it saves"""
+    try:
+        from services.order_context_service import get_order_context_stats
+        return jsonify(get_order_context_stats())
+    except Exception as e:
+        logger.error(f"Error fetching order context stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @latency_bp.route('/export', methods=['GET'])
 @check_session_validity
 @limiter.limit("10/minute")
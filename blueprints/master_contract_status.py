@@ -77,6 +77,22 @@ def get_cache_status():
             'message': f'Failed to get cache status: {str(e)}'
         }), 500
 
+@master_contract_status_bp.route('/cache/auth/status', methods=['GET'])
+@check_session_validity
+def get_auth_cache_status():
+    """Get auth/API key cache hit rates and invalidation counts"""
+    try:
+        from database.auth_db import get_auth_cache_stats
+
+        return jsonify(get_auth_cache_stats()), 200
+
+    except Exception as e:
+        logger.error(f"Error getting auth cache status: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Failed to get auth cache status: {str(e)}'
+        }), 500
+
 @master_contract_status_bp.route('/cache/health', methods=['GET'])
 @check_session_validity
 def get_cache_health():
@@ -26,6 +26,10 @@ import threading
 from cryptography.fernet import Fernet
 import base64
 import hashlib
+from services.strategy_supervisor import (
+    StrategySupervisor, WarmInterpreterPool, read_log_chunk, read_log_tail
+)
+from services.strategy_host import get_strategy_host
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +43,9 @@ RUNNING_STRATEGIES = {}  # {strategy_id: {'process': subprocess.Popen, 'started_
 STRATEGY_CONFIGS = {}    # {strategy_id: config_dict}
 SCHEDULER = None
 PROCESS_LOCK = threading.Lock()  # Thread lock for process operations
+SUPERVISOR = StrategySupervisor()  # Resource limits, usage sampling and log rotation
+WARM_POOL = WarmInterpreterPool()  # Pre-imported interpreters for fast strategy starts
+STRATEGY_HOST = get_strategy_host()  # In-process runtime for strategies with runtime 'hosted'
 
 # Timezone configuration - Indian Standard Time
 IST = pytz.timezone('Asia/Kolkata')
@@ -371,9 +378,9 @@ def start_strategy_process(strategy_id):
                 logger.error(f"Cannot write to log directory {log_file.parent}")
                 return False, f"Log directory is not writable. Check permissions for {log_file.parent}"
             
-            # Open log file for writing
+            # Open log file for writing (append mode so rotation and clearing can truncate it)
             try:
-                log_handle = open(log_file, 'w', encoding='utf-8', buffering=1)
+                log_handle = open(log_file, 'a', encoding='utf-8', buffering=1)
             except PermissionError as e:
                 logger.error(f"Permission denied creating log file: {e}")
                 return False, f"Permission denied creating log file. Check directory permissions."
@@ -386,6 +393,10 @@ def start_strategy_process(strategy_id):
             log_handle.write(f"=== Platform: {OS_TYPE} ===\n\n")
             log_handle.flush()
             
+            # Hosted strategies run inside this process on the shared market data feed
+            if config.get('runtime') == 'hosted':
+                return start_hosted_strategy(strategy_id, config, file_path, log_file, log_handle, ist_now)
+            
             # Get platform-specific subprocess arguments
             subprocess_args = create_subprocess_args()
             subprocess_args['stdout'] = log_handle
@@ -393,25 +404,34 @@ def start_strategy_process(strategy_id):
             subprocess_args['cwd'] = str(Path.cwd())
             
             # Load and set environment variables
+            # Start with current environment
+            process_env = os.environ.copy()
             env_vars = load_env_variables(strategy_id)
             if env_vars:
-                # Start with current environment
-                process_env = os.environ.copy()
                 # Add strategy-specific environment variables
                 process_env.update(env_vars)
                 subprocess_args['env'] = process_env
                 logger.info(f"Loaded {len(env_vars)} environment variables for strategy {strategy_id}")
             
+            # Prefer an idle warm interpreter (imports already done); it writes to the log itself
+            process = None
+            if not IS_WINDOWS:
+                process = WARM_POOL.launch(file_path.absolute(), log_file, process_env, subprocess_args['cwd'])
+                if process:
+                    log_handle.close()
+                    log_handle = None
+                    logger.info(f"Started strategy {strategy_id} on warm interpreter PID {process.pid}")
+            
             # Start the process
             # Use Python unbuffered mode for real-time output
             cmd = [get_python_executable(), '-u', str(file_path.absolute())]
             
-            # Log the command being executed for debugging
-            logger.info(f"Executing command: {' '.join(cmd)}")
-            logger.debug(f"Working directory: {subprocess_args.get('cwd', 'current')}")
-            
             try:
-                process = subprocess.Popen(cmd, **subprocess_args)
+                if process is None:
+                    # Log the command being executed for debugging
+                    logger.info(f"Executing command: {' '.join(cmd)}")
+                    logger.debug(f"Working directory: {subprocess_args.get('cwd', 'current')}")
+                    process = subprocess.Popen(cmd, **subprocess_args)
             except PermissionError as e:
                 log_handle.close()
                 logger.error(f"Permission denied executing strategy: {e}")
@@ -438,10 +458,19 @@ def start_strategy_process(strategy_id):
                 'log_handle': log_handle  # Keep file handle open
             }
             
+            # Apply resource limits and start tracking usage
+            limits = SUPERVISOR.attach(
+                strategy_id, process.pid, str(log_file),
+                config.get('max_memory_mb'), config.get('max_cpu_percent')
+            )
+            if limits['enforced_by'] != 'none':
+                logger.info(f"Strategy {strategy_id} limits: {limits}")
+            
             # Update config with IST time
             STRATEGY_CONFIGS[strategy_id]['is_running'] = True
             STRATEGY_CONFIGS[strategy_id]['last_started'] = ist_now.isoformat()
             STRATEGY_CONFIGS[strategy_id]['pid'] = process.pid
+            STRATEGY_CONFIGS[strategy_id]['pid_create_time'] = get_process_create_time(process.pid)
             # Clear any previous error state
             STRATEGY_CONFIGS[strategy_id].pop('is_error', None)
             STRATEGY_CONFIGS[strategy_id].pop('error_message', None)
@@ -455,6 +484,47 @@ def start_strategy_process(strategy_id):
             logger.error(f"Failed to start strategy {strategy_id}: {e}")
             return False, f"Failed to start strategy: {str(e)}"
 
+def start_hosted_strategy(strategy_id, config, file_path, log_file, log_handle, ist_now):
+    """Start a Strategy subclass on the in-process host (called with PROCESS_LOCK held)"""
+    from database.auth_db import get_api_key_for_tradingview
+    
+    env_vars = load_env_variables(strategy_id)
+    api_key = env_vars.get('OPENALGO_APIKEY') or get_api_key_for_tradingview(config.get('user_id'))
+    if not api_key:
+        log_handle.close()
+        return False, "No API key found. Generate one from the API Key page to run hosted strategies."
+    
+    try:
+        # The host owns the log handle from here and closes it when the strategy stops
+        runner = STRATEGY_HOST.start(
+            strategy_id, file_path, config.get('user_id'), api_key,
+            params=env_vars, name=config.get('name'), log_handle=log_handle
+        )
+    except Exception as e:
+        log_handle.write(f"Failed to start: {e}\n")
+        log_handle.close()
+        logger.error(f"Failed to start hosted strategy {strategy_id}: {e}")
+        return False, f"Failed to start hosted strategy: {str(e)}"
+    
+    RUNNING_STRATEGIES[strategy_id] = {
+        'process': runner,
+        'pid': None,
+        'started_at': ist_now,
+        'log_file': str(log_file),
+        'log_handle': None
+    }
+    
+    STRATEGY_CONFIGS[strategy_id]['is_running'] = True
+    STRATEGY_CONFIGS[strategy_id]['last_started'] = ist_now.isoformat()
+    STRATEGY_CONFIGS[strategy_id]['pid'] = None
+    STRATEGY_CONFIGS[strategy_id].pop('is_error', None)
+    STRATEGY_CONFIGS[strategy_id].pop('error_message', None)
+    STRATEGY_CONFIGS[strategy_id].pop('error_time', None)
+    save_configs()
+    
+    logger.info(f"Started hosted strategy {strategy_id} at {ist_now.strftime('%H:%M:%S IST')}")
+    return True, f"Strategy started in-process at {ist_now.strftime('%H:%M:%S IST')}"
+
 def stop_strategy_process(strategy_id):
     """Stop a running strategy process - cross-platform implementation"""
     with PROCESS_LOCK:  # Thread-safe operation
@@ -517,7 +587,7 @@ def stop_strategy_process(strategy_id):
                         except ProcessLookupError:
                             pass  # Process already dead
             elif hasattr(process, 'terminate'):
-                # For psutil.Process objects
+                # For psutil.Process objects and hosted strategies
                 try:
                     process.terminate()
                     process.wait(timeout=5)
@@ -539,6 +609,7 @@ def stop_strategy_process(strategy_id):
             
             # Remove from running strategies
             del RUNNING_STRATEGIES[strategy_id]
+            SUPERVISOR.detach(strategy_id)
             
             # Update config with IST time
             ist_now = get_ist_time()
@@ -593,6 +664,25 @@ def check_process_status(pid):
         pass
     return False
 
+def get_process_create_time(pid):
+    """Process start time, used to recognise our process after a restart even if the PID is reused"""
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+def handle_resource_limit(strategy_id, reason):
+    """Stop a strategy that went over a hard resource limit and record why"""
+    success, message = stop_strategy_process(strategy_id)
+    if strategy_id in STRATEGY_CONFIGS:
+        STRATEGY_CONFIGS[strategy_id]['is_error'] = True
+        STRATEGY_CONFIGS[strategy_id]['error_message'] = reason
+        STRATEGY_CONFIGS[strategy_id]['error_time'] = get_ist_time().isoformat()
+        save_configs()
+    logger.warning(f"Strategy {strategy_id} stopped by supervisor ({reason}): {message}")
+
+SUPERVISOR.on_limit_exceeded = handle_resource_limit
+
 def cleanup_dead_processes():
     """Clean up strategies with dead processes"""
     with PROCESS_LOCK:  # Thread-safe operation
@@ -633,15 +723,41 @@ def cleanup_dead_processes():
                         pass
         
         for strategy_id in dead_strategies:
-            del RUNNING_STRATEGIES[strategy_id]
+            info = RUNNING_STRATEGIES.pop(strategy_id)
+            SUPERVISOR.detach(strategy_id)
             if strategy_id in STRATEGY_CONFIGS:
                 STRATEGY_CONFIGS[strategy_id]['is_running'] = False
                 STRATEGY_CONFIGS[strategy_id]['pid'] = None
+                # Hosted strategies stop themselves after repeated callback errors
+                error = getattr(info['process'], 'error', None)
+                if error:
+                    STRATEGY_CONFIGS[strategy_id]['is_error'] = True
+                    STRATEGY_CONFIGS[strategy_id]['error_message'] = error
+                    STRATEGY_CONFIGS[strategy_id]['error_time'] = get_ist_time().isoformat()
         
         if dead_strategies:
             save_configs()
             logger.info(f"Cleaned up {len(dead_strategies)} dead processes")
 
+def is_weekday_market_holiday(day):
+    """True on a weekday when every exchange is closed (weekend days in a schedule were chosen explicitly)"""
+    if day.weekday() >= 5:
+        return False
+    try:
+        from database.market_calendar_db import is_market_holiday, SUPPORTED_EXCHANGES
+        return all(is_market_holiday(day, exchange) for exchange in SUPPORTED_EXCHANGES)
+    except Exception as e:
+        logger.warning(f"Market calendar unavailable, not skipping scheduled start: {e}")
+        return False
+
+def run_scheduled_start(strategy_id):
+    """Scheduled start, skipped on market holidays"""
+    today = datetime.now(IST).date()
+    if is_weekday_market_holiday(today):
+        logger.info(f"Skipping scheduled start of strategy {strategy_id}: {today} is a market holiday")
+        return
+    start_strategy_process(strategy_id)
+
 def schedule_strategy(strategy_id, start_time, stop_time=None, days=None):
     """Schedule a strategy to run at specific times (IST)"""
     if not days:
@@ -660,7 +776,7 @@ def schedule_strategy(strategy_id, start_time, stop_time=None, days=None):
     # Schedule start (time is already in IST from frontend)
     hour, minute = map(int, start_time.split(':'))
     SCHEDULER.add_job(
-        func=lambda: start_strategy_process(strategy_id),
+        func=lambda: run_scheduled_start(strategy_id),
         trigger=CronTrigger(hour=hour, minute=minute, day_of_week=','.join(days), timezone=IST),
         id=start_job_id,
         replace_existing=True
@@ -792,11 +908,13 @@ def new_strategy():
             
             # Get form data
             strategy_name = request.form.get('strategy_name', Path(file.filename).stem)
+            runtime = 'hosted' if request.form.get('runtime') == 'hosted' else 'process'
             
             # Save configuration (no params needed)
             STRATEGY_CONFIGS[strategy_id] = {
                 'name': strategy_name,
                 'file_path': str(file_path),
+                'runtime': runtime,
                 'is_running': False,
                 'is_scheduled': False,
                 'created_at': ist_now.isoformat(),
@@ -883,6 +1001,44 @@ def schedule_strategy_route(strategy_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@python_strategy_bp.route('/limits/<strategy_id>', methods=['GET', 'POST'])
+@check_session_validity
+def strategy_limits(strategy_id):
+    """Get or set a strategy's memory/CPU limits (0 = unlimited, null = server default)"""
+    user_id = session.get('user')
+    if not user_id:
+        return jsonify({'success': False, 'message': 'Session expired'}), 401
+
+    # Verify ownership
+    is_owner, error_response = verify_strategy_ownership(strategy_id, user_id)
+    if not is_owner:
+        return error_response
+
+    config = STRATEGY_CONFIGS[strategy_id]
+    if request.method == 'POST':
+        data = request.json or {}
+        try:
+            for key, cast in (('max_memory_mb', int), ('max_cpu_percent', float)):
+                if key in data:
+                    value = data[key]
+                    if value is None:
+                        config.pop(key, None)
+                    elif cast(value) < 0:
+                        return jsonify({'success': False, 'message': f'{key} cannot be negative'}), 400
+                    else:
+                        config[key] = cast(value)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Limits must be numbers'}), 400
+        save_configs()
+
+    return jsonify({
+        'success': True,
+        'max_memory_mb': config.get('max_memory_mb'),
+        'max_cpu_percent': config.get('max_cpu_percent'),
+        'usage': SUPERVISOR.get_usage(strategy_id),
+        'message': 'Limits apply from the next start' if request.method == 'POST' and config.get('is_running') else None
+    })
+
 @python_strategy_bp.route('/unschedule/<strategy_id>', methods=['POST'])
 @check_session_validity
 def unschedule_strategy_route(strategy_id):
@@ -980,20 +1136,53 @@ def view_logs(strategy_id):
     # Sort by modified time (newest first)
     log_files.sort(key=lambda x: x['modified'], reverse=True)
 
-    # Get latest log content if requested
+    # Get the end of the latest log if requested; the page tails it from log_offset
     log_content = None
+    log_tail = None
     if log_files and request.args.get('latest'):
         latest_log = LOGS_DIR / log_files[0]['name']
         try:
-            with open(latest_log, 'r', encoding='utf-8', errors='ignore') as f:
-                log_content = f.read()
+            log_tail = read_log_tail(latest_log)
+            log_content = log_tail['content']
         except Exception as e:
             log_content = f"Error reading log file: {e}"
 
     return render_template('python_strategy/logs.html',
                          strategy_id=strategy_id,
                          log_files=log_files,
-                         log_content=log_content)
+                         log_content=log_content,
+                         log_file_name=log_files[0]['name'] if log_tail else None,
+                         log_offset=log_tail['offset'] if log_tail else 0,
+                         log_size=log_tail['size'] if log_tail else 0,
+                         log_truncated=log_tail['truncated'] if log_tail else False)
+
+@python_strategy_bp.route('/logs/<strategy_id>/tail')
+@check_session_validity
+def tail_logs(strategy_id):
+    """Return log output written after ?offset= (or the end of the log without one)"""
+    user_id = session.get('user')
+    if not user_id:
+        return jsonify({'success': False, 'message': 'Session expired'}), 401
+
+    # Verify ownership
+    is_owner, error_response = verify_strategy_ownership(strategy_id, user_id)
+    if not is_owner:
+        return error_response
+
+    file_name = secure_filename(request.args.get('file', ''))
+    if not file_name.startswith(f"{strategy_id}_") or not file_name.endswith('.log'):
+        return jsonify({'success': False, 'message': 'Invalid log file'}), 400
+    log_file = LOGS_DIR / file_name
+    if not log_file.exists():
+        return jsonify({'success': False, 'message': 'Log file not found'}), 404
+
+    try:
+        offset = request.args.get('offset', type=int)
+        chunk = read_log_tail(log_file) if offset is None else read_log_chunk(log_file, max(0, offset))
+        return jsonify({'success': True, 'file': file_name, **chunk})
+    except Exception as e:
+        logger.error(f"Error tailing log {file_name}: {e}")
+        return jsonify({'success': False, 'message': f'Error reading log file: {str(e)}'}), 500
 
 @python_strategy_bp.route('/logs/<strategy_id>/clear', methods=['POST'])
 @check_session_validity
@@ -1012,8 +1201,8 @@ def clear_logs(strategy_id):
         cleared_count = 0
         total_size = 0
         
-        # Find all log files for this strategy
-        log_files = list(LOGS_DIR.glob(f"{strategy_id}_*.log"))
+        # Find all log files for this strategy, including rotated copies (.log.1, .log.2, ...)
+        log_files = list(LOGS_DIR.glob(f"{strategy_id}_*.log")) + list(LOGS_DIR.glob(f"{strategy_id}_*.log.*"))
         
         if not log_files:
             return jsonify({'success': False, 'message': 'No log files found to clear'})
@@ -1125,7 +1314,10 @@ def status():
                 'id': sid,
                 'name': config.get('name'),
                 'is_running': config.get('is_running', False),
-                'is_scheduled': config.get('is_scheduled', False)
+                'is_scheduled': config.get('is_scheduled', False),
+                'runtime': config.get('runtime', 'process'),
+                'resources': SUPERVISOR.get_usage(sid),
+                'events': STRATEGY_HOST.get_stats(sid)
             }
             for sid, config in STRATEGY_CONFIGS.items()
         ]
@@ -1397,6 +1589,8 @@ def cleanup_on_exit():
                 stop_strategy_process(strategy_id)
             except:
                 pass
+    SUPERVISOR.stop()
+    WARM_POOL.shutdown()
     logger.info("Cleanup complete")
 
 # Register cleanup handler
@@ -1435,20 +1629,24 @@ def restore_strategy_states():
     cleaned_count = 0
     
     for strategy_id, config in STRATEGY_CONFIGS.items():
-        if config.get('is_running') and config.get('pid'):
+        # Hosted strategies have no process to find and are always restarted
+        if config.get('is_running') and (config.get('pid') or config.get('runtime') == 'hosted'):
             pid = config.get('pid')
             strategy_restored = False
             
             try:
                 # Check if process is still running
-                if psutil.pid_exists(pid):
+                if pid and psutil.pid_exists(pid):
                     process = psutil.Process(pid)
                     
                     # Check if it's actually our strategy process
                     cmdline = ' '.join(process.cmdline())
                     strategy_file = config.get('file_path', '')
                     
-                    if strategy_file and strategy_file in cmdline:
+                    # Warm-started strategies run as strategy_worker.py; their create time identifies them
+                    recorded_create_time = config.get('pid_create_time')
+                    same_process = recorded_create_time is not None and abs(process.create_time() - recorded_create_time) < 1
+                    if (strategy_file and strategy_file in cmdline) or same_process:
                         # Process is still running, restore it to RUNNING_STRATEGIES
                         ist_now = get_ist_time()
                         
@@ -1465,6 +1663,10 @@ def restore_strategy_states():
                             'log_handle': None  # We can't restore the file handle
                         }
                         
+                        SUPERVISOR.attach(
+                            strategy_id, pid, str(current_log) if current_log else None,
+                            config.get('max_memory_mb'), config.get('max_cpu_percent')
+                        )
                         logger.info(f"Restored running strategy {strategy_id} (PID: {pid})")
                         restored_count += 1
                         strategy_restored = True
@@ -1578,6 +1780,11 @@ def initialize_with_app_context():
     _initialized = True
 
     try:
+        # Resource monitoring, log rotation and warm interpreters for upcoming starts
+        SUPERVISOR.start()
+        if not IS_WINDOWS:
+            WARM_POOL.fill()
+
         # Now safe to restore strategy states (requires database)
         restore_strategy_states()
 
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, render_template, request, flash, redirect, url_for
-from database.traffic_db import IPBan, Error404Tracker, InvalidAPIKeyTracker, logs_session
+from database.traffic_db import IPBan, Error404Tracker, InvalidAPIKeyTracker, logs_session, flush_security_counters
 from database.settings_db import get_security_settings, set_security_settings
 from utils.session import check_session_validity
 from limiter import limiter
@@ -213,10 +213,7 @@ def clear_404_tracker():
         if not ip_address:
             return jsonify({'error': 'IP address is required'}), 400
 
-        tracker = Error404Tracker.query.filter_by(ip_address=ip_address).first()
-        if tracker:
-            logs_session.delete(tracker)
-            logs_session.commit()
+        if Error404Tracker.clear_ip(ip_address):
             logger.info(f"Cleared 404 tracker for IP: {ip_address}")
             return jsonify({'success': True, 'message': f'404 tracker cleared for {ip_address}'})
         else:
@@ -233,6 +230,9 @@ def clear_404_tracker():
 def security_stats():
     """Get security statistics"""
     try:
+        # Write pending in-memory 404 hits before counting
+        flush_security_counters()
+
         # Count banned IPs
         total_bans = IPBan.query.count()
         permanent_bans = IPBan.query.filter_by(is_permanent=True).count()
@@ -15,14 +15,9 @@ from datetime import datetime, time
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from utils.logging import get_logger
-import requests
+from services.order_ingestion_service import queue_webhook_order
 import os
 import uuid
-import time as time_module
-import queue
-import threading
-from collections import deque
-from time import time
 import re
 
 logger = get_logger(__name__)
@@ -44,9 +39,6 @@ scheduler = BackgroundScheduler(
 )
 scheduler.start()
 
-# Get base URL from environment or default to localhost
-BASE_URL = os.getenv('HOST_SERVER', 'http://127.0.0.1:5000')
-
 # Valid exchanges
 VALID_EXCHANGES = ['NSE', 'BSE', 'NFO', 'CDS', 'BFO', 'BCD', 'MCX', 'NCDEX']
 
@@ -66,94 +58,12 @@ EXCHANGE_PRODUCTS = {
 DEFAULT_EXCHANGE = 'NSE'
 DEFAULT_PRODUCT = 'MIS'
 
-# Separate queues for different order types
-regular_order_queue = queue.Queue()  # For placeorder (up to 10/sec)
-smart_order_queue = queue.Queue()    # For placesmartorder (1/sec)
-
-# Order processor state
-order_processor_running = False
-order_processor_lock = threading.Lock()
-
-# Rate limiting state for regular orders
-last_regular_orders = deque(maxlen=10)  # Track last 10 regular order timestamps
-
-def process_orders():
-    """Background task to process orders from both queues with rate limiting"""
-    global order_processor_running
-    
-    while True:
-        try:
-            # Process smart orders first (1 per second)
-            try:
-                smart_order = smart_order_queue.get_nowait()
-                if smart_order is None:  # Poison pill
-                    break
-                
-                try:
-                    response = requests.post(f'{BASE_URL}/api/v1/placesmartorder', json=smart_order['payload'])
-                    if response.ok:
-                        logger.info(f'Smart order placed for {smart_order["payload"]["symbol"]} in strategy {smart_order["payload"]["strategy"]}')
-                    else:
-                        logger.error(f'Error placing smart order for {smart_order["payload"]["symbol"]}: {response.text}')
-                except Exception as e:
-                    logger.error(f'Error placing smart order: {str(e)}')
-                
-                # Always wait 1 second after smart order
-                time_module.sleep(1)
-                continue  # Start next iteration
-                
-            except queue.Empty:
-                pass  # No smart orders, continue to regular orders
-            
-            # Process regular orders (up to 10 per second)
-            now = time()
-            
-            # Clean up old timestamps
-            while last_regular_orders and now - last_regular_orders[0] > 1:
-                last_regular_orders.popleft()
-            
-            # Process regular orders if under rate limit
-            if len(last_regular_orders) < 10:
-                try:
-                    regular_order = regular_order_queue.get_nowait()
-                    if regular_order is None:  # Poison pill
-                        break
-                    
-                    try:
-                        response = requests.post(f'{BASE_URL}/api/v1/placeorder', json=regular_order['payload'])
-                        if response.ok:
-                            logger.info(f'Regular order placed for {regular_order["payload"]["symbol"]} in strategy {regular_order["payload"]["strategy"]}')
-                            last_regular_orders.append(now)
-                        else:
-                            logger.error(f'Error placing regular order for {regular_order["payload"]["symbol"]}: {response.text}')
-                    except Exception as e:
-                        logger.error(f'Error placing regular order: {str(e)}')
-                    
-                except queue.Empty:
-                    pass  # No regular orders
-            
-            # Small sleep to prevent CPU spinning
-            time_module.sleep(0.1)
-            
-        except Exception as e:
-            logger.error(f'Error in order processor: {str(e)}')
-            time_module.sleep(1)  # Sleep on error to prevent rapid retries
-
-def ensure_order_processor():
-    """Ensure the order processor is running"""
-    global order_processor_running
-    with order_processor_lock:
-        if not order_processor_running:
-            threading.Thread(target=process_orders, daemon=True).start()
-            order_processor_running = True
-
-def queue_order(endpoint, payload):
-    """Add order to appropriate queue"""
-    ensure_order_processor()
-    if endpoint == 'placesmartorder':
-        smart_order_queue.put({'payload': payload})
-    else:
-        regular_order_queue.put({'payload': payload})
+def queue_order(endpoint, payload, webhook_id=None, delivery_id=None):
+    """
+    Journal order on the shared ingestion engine (per-user rate limits, parallel across strategies).
+    Returns False if the same delivery from this webhook was already queued.
+    """
+    return queue_webhook_order(endpoint, payload, source='strategy', webhook_id=webhook_id, delivery_id=delivery_id)
 
 def validate_strategy_times(start_time, end_time, squareoff_time):
     """Validate strategy time settings"""
@@ -246,6 +156,7 @@ def squareoff_positions(strategy_id):
             
         # Get all symbol mappings
         mappings = get_symbol_mappings(strategy_id)
+        today = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
         
         for mapping in mappings:
             # Use placesmartorder with quantity=0 and position_size=0 for squareoff
@@ -265,7 +176,9 @@ def squareoff_positions(strategy_id):
             }
             
             # Queue the order instead of executing directly
-            queue_order('placesmartorder', payload)
+            # Keyed per day so a squareoff fired by several workers is placed once
+            queue_order('placesmartorder', payload, webhook_id=f'squareoff-{strategy_id}',
+                        delivery_id=f'{today}:{mapping.symbol}:{mapping.exchange}')
             
     except Exception as e:
         logger.error(f'Error in squareoff_positions for strategy {strategy_id}: {str(e)}')
@@ -746,8 +659,10 @@ def webhook(webhook_id):
                 })
                 endpoint = 'placeorder'
             
-        # Queue the order
-        queue_order(endpoint, payload)
+        # Queue the order; an Idempotency-Key header or alert_id field identifies retried alerts
+        delivery_id = request.headers.get('Idempotency-Key') or data.get('alert_id')
+        if not queue_order(endpoint, payload, webhook_id=webhook_id, delivery_id=delivery_id):
+            return jsonify({'message': f'Duplicate alert ignored for {data["symbol"]}'}), 200
         return jsonify({'message': f'Order queued successfully for {data["symbol"]}'}), 200
             
     except Exception as e:
@@ -2,7 +2,6 @@ from flask import Blueprint, jsonify, render_template, request, session, Respons
 from database.traffic_db import TrafficLog, logs_session
 from utils.session import check_session_validity
 from limiter import limiter
-from sqlalchemy import func
 import logging
 from datetime import datetime
 import pytz
@@ -101,22 +100,10 @@ def get_logs():
 def get_stats():
     """API endpoint to get traffic statistics"""
     try:
-        # Get overall stats
-        all_logs = TrafficLog.query
-        overall_stats = {
-            'total_requests': all_logs.count(),
-            'error_requests': all_logs.filter(TrafficLog.status_code >= 400).count(),
-            'avg_duration': round(float(all_logs.with_entities(func.avg(TrafficLog.duration_ms)).scalar() or 0), 2)
-        }
-        
-        # Get API-specific stats
-        api_logs = TrafficLog.query.filter(TrafficLog.path.like('/api/v1/%'))
-        api_stats = {
-            'total_requests': api_logs.count(),
-            'error_requests': api_logs.filter(TrafficLog.status_code >= 400).count(),
-            'avg_duration': round(float(api_logs.with_entities(func.avg(TrafficLog.duration_ms)).scalar() or 0), 2)
-        }
-        
+        # All numbers come from the hourly rollups (O(buckets), not O(requests))
+        overall_stats = TrafficLog.get_stats()
+        api_stats = TrafficLog.get_stats(endpoint='api')
+
         # Get endpoint usage stats
         endpoint_stats = {}
         for endpoint in [
@@ -125,14 +112,13 @@ def get_stats():
             'tradebook', 'positionbook', 'holdings', 'basketorder', 'splitorder',
             'orderstatus', 'openposition'
         ]:
-            path = f'/api/v1/{endpoint}'
-            endpoint_logs = TrafficLog.query.filter(TrafficLog.path.like(f'{path}%'))
+            stats = TrafficLog.get_stats(endpoint=endpoint)
             endpoint_stats[endpoint] = {
-                'total': endpoint_logs.count(),
-                'errors': endpoint_logs.filter(TrafficLog.status_code >= 400).count(),
-                'avg_duration': round(float(endpoint_logs.with_entities(func.avg(TrafficLog.duration_ms)).scalar() or 0), 2)
+                'total': stats['total_requests'],
+                'errors': stats['error_requests'],
+                'avg_duration': stats['avg_duration']
             }
-        
+
         return jsonify({
             'overall': overall_stats,
             'api': api_stats,
@@ -142,6 +128,18 @@ def get_stats():
         logger.error(f"Error fetching traffic stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+@traffic_bp.route('/api/timeseries', methods=['GET'])
+@check_session_validity
+@limiter.limit("60/minute")
+def get_timeseries():
+    """API endpoint to get hourly traffic rollups"""
+    try:
+        hours = min(int(request.args.get('hours', 24)), 24 * 90)
+        return jsonify(TrafficLog.get_timeseries(hours=hours, endpoint=request.args.get('endpoint')))
+    except Exception as e:
+        logger.error(f"Error fetching traffic timeseries: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @traffic_bp.route('/export', methods=['GET'])
 @check_session_validity
 @limiter.limit("10/minute")
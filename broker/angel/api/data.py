@@ -3,10 +3,11 @@ import json
 import os
 import pandas as pd
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 import urllib.parse
 from database.token_db import get_br_symbol, get_token, get_oa_symbol
 from utils.httpx_client import get_httpx_client
+from utils.history_chunker import plan_history_chunks, fetch_history_chunks
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -60,6 +61,20 @@ def get_api_response(endpoint, auth, method="GET", payload=''):
         raise Exception(f"Failed to parse API response (status {response.status_code})")
 
 class BrokerData:  
+    # Maximum days per historical data request (Angel SmartAPI limits)
+    HISTORY_CHUNK_DAYS = {
+        '1m': 30,    # ONE_MINUTE
+        '3m': 60,    # THREE_MINUTE
+        '5m': 100,   # FIVE_MINUTE
+        '10m': 100,  # TEN_MINUTE
+        '15m': 200,  # FIFTEEN_MINUTE
+        '30m': 200,  # THIRTY_MINUTE
+        '1h': 400,   # ONE_HOUR
+        'D': 2000    # ONE_DAY
+    }
+    # Historical data API rate limit (requests per second)
+    HISTORY_RATE_LIMIT = 2
+
     def __init__(self, auth_token):
         """Initialize Angel data handler with authentication token"""
         self.auth_token = auth_token
@@ -376,32 +391,12 @@ class BrokerData:
                 # For past dates, set end time to 23:59
                 to_date = to_date.replace(hour=23, minute=59)
             
-            # Initialize empty list to store DataFrames
-            dfs = []
-            
-            # Set chunk size based on interval as per Angel API documentation
-            interval_limits = {
-                '1m': 30,    # ONE_MINUTE
-                '3m': 60,    # THREE_MINUTE
-                '5m': 100,   # FIVE_MINUTE
-                '10m': 100,  # TEN_MINUTE
-                '15m': 200,  # FIFTEEN_MINUTE
-                '30m': 200,  # THIRTY_MINUTE
-                '1h': 400,   # ONE_HOUR
-                'D': 2000    # ONE_DAY
-            }
-            
-            chunk_days = interval_limits.get(interval)
+            chunk_days = self.HISTORY_CHUNK_DAYS.get(interval)
             if not chunk_days:
-                supported = list(interval_limits.keys())
+                supported = list(self.HISTORY_CHUNK_DAYS.keys())
                 raise Exception(f"Interval '{interval}' not supported. Supported intervals: {', '.join(supported)}")
             
-            # Process data in chunks
-            current_start = from_date
-            while current_start <= to_date:
-                # Calculate chunk end date
-                current_end = min(current_start + timedelta(days=chunk_days-1), to_date)
-                
+            def fetch_chunk(current_start, current_end):
                 # Prepare payload for historical data API
                 payload = {
                     "exchange": exchange,
@@ -423,37 +418,28 @@ class BrokerData:
                     # Check if response is empty or invalid
                     if not response:
                         logger.debug(f"Debug - Empty response for chunk {current_start} to {current_end}")
-                        current_start = current_end + timedelta(days=1)
-                        continue
+                        return None
                     
                     if not response.get('status'):
                         logger.info(f"Debug - Error response: {response.get('message', 'Unknown error')}")
-                        current_start = current_end + timedelta(days=1)
-                        continue
+                        return None
                         
                 except Exception as chunk_error:
                     logger.error(f"Debug - Error fetching chunk {current_start} to {current_end}: {str(chunk_error)}")
-                    current_start = current_end + timedelta(days=1)
-                    continue
-                
-                if not response.get('status'):
-                    raise Exception(f"Error from Angel API: {response.get('message', 'Unknown error')}")
+                    return None
                 
                 # Extract candle data and create DataFrame
                 data = response.get('data', [])
-                if data:
-                    chunk_df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                    dfs.append(chunk_df)
-                    logger.debug(f"Debug - Received {len(data)} candles for chunk")
-                else:
+                if not data:
                     logger.debug("Debug - No data received for chunk")
-                
-                # Move to next chunk
-                current_start = current_end + timedelta(days=1)
-
-                # Rate limit delay between chunks (0.5 seconds)
-                if current_start <= to_date:
-                    time.sleep(0.5)
+                    return None
+                logger.debug(f"Debug - Received {len(data)} candles for chunk")
+                return pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            
+            # Fetch chunks in parallel within Angel's historical rate limit
+            chunks = plan_history_chunks(from_date, to_date, chunk_days)
+            dfs = fetch_history_chunks('angel', chunks, fetch_chunk, calls_per_second=self.HISTORY_RATE_LIMIT)
+            dfs = [df for df in dfs if df is not None]
 
             # If no data was found, return empty DataFrame
             if not dfs:
@@ -543,31 +529,12 @@ class BrokerData:
                 # For past dates, set end time to 23:59
                 to_date = to_date.replace(hour=23, minute=59)
             
-            # Initialize empty list to store DataFrames
-            dfs = []
-            
-            # Set chunk size based on interval (same as candle data)
-            interval_limits = {
-                '1m': 30,    # ONE_MINUTE
-                '3m': 60,    # THREE_MINUTE
-                '5m': 100,   # FIVE_MINUTE
-                '10m': 100,  # TEN_MINUTE
-                '15m': 200,  # FIFTEEN_MINUTE
-                '30m': 200,  # THIRTY_MINUTE
-                '1h': 400,   # ONE_HOUR
-                'D': 2000    # ONE_DAY
-            }
-            
-            chunk_days = interval_limits.get(interval)
+            # Chunk size based on interval (same as candle data)
+            chunk_days = self.HISTORY_CHUNK_DAYS.get(interval)
             if not chunk_days:
                 raise Exception(f"Interval '{interval}' not supported for OI data")
             
-            # Process data in chunks
-            current_start = from_date
-            while current_start <= to_date:
-                # Calculate chunk end date
-                current_end = min(current_start + timedelta(days=chunk_days-1), to_date)
-                
+            def fetch_chunk(current_start, current_end):
                 # Prepare payload for OI data API
                 payload = {
                     "exchange": exchange,
@@ -585,28 +552,25 @@ class BrokerData:
                     
                     if not response or not response.get('status'):
                         logger.debug(f"Debug - No OI data for chunk {current_start} to {current_end}")
-                        current_start = current_end + timedelta(days=1)
-                        continue
+                        return None
                         
                 except Exception as chunk_error:
                     logger.error(f"Debug - Error fetching OI chunk: {str(chunk_error)}")
-                    current_start = current_end + timedelta(days=1)
-                    continue
+                    return None
                 
                 # Extract OI data and create DataFrame
                 data = response.get('data', [])
-                if data:
-                    chunk_df = pd.DataFrame(data)
-                    # Rename 'time' to 'timestamp' for consistency
-                    chunk_df.rename(columns={'time': 'timestamp'}, inplace=True)
-                    dfs.append(chunk_df)
-                
-                # Move to next chunk
-                current_start = current_end + timedelta(days=1)
-
-                # Rate limit delay between chunks (0.5 seconds)
-                if current_start <= to_date:
-                    time.sleep(0.5)
+                if not data:
+                    return None
+                chunk_df = pd.DataFrame(data)
+                # Rename 'time' to 'timestamp' for consistency
+                chunk_df.rename(columns={'time': 'timestamp'}, inplace=True)
+                return chunk_df
+            
+            # Fetch chunks in parallel within Angel's historical rate limit
+            chunks = plan_history_chunks(from_date, to_date, chunk_days)
+            dfs = fetch_history_chunks('angel', chunks, fetch_chunk, calls_per_second=self.HISTORY_RATE_LIMIT)
+            dfs = [df for df in dfs if df is not None]
 
             # If no data was found, return empty DataFrame
             if not dfs:
@@ -5,8 +5,9 @@ import urllib.parse
 from database.token_db import get_br_symbol, get_oa_symbol
 from broker.zerodha.database.master_contract_db import SymToken, db_session
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from utils.httpx_client import get_httpx_client
+from utils.history_chunker import plan_history_chunks, fetch_history_chunks, merge_history_chunks
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -119,6 +120,21 @@ def get_api_response(endpoint, auth, method="GET", payload=None):
         raise ZerodhaAPIError(f"API request failed: {error_msg}")
 
 class BrokerData:
+    # Maximum days per historical data request (Kite Connect limits)
+    HISTORY_CHUNK_DAYS = {
+        '1m': 60,
+        '3m': 100,
+        '5m': 100,
+        '10m': 100,
+        '15m': 200,
+        '30m': 200,
+        '60m': 400,
+        '1h': 400,
+        'D': 2000
+    }
+    # Historical data API rate limit (requests per second)
+    HISTORY_RATE_LIMIT = 3
+
     def __init__(self, auth_token):
         """Initialize Zerodha data handler with authentication token"""
         self.auth_token = auth_token
@@ -439,15 +455,9 @@ class BrokerData:
             start_date = pd.to_datetime(from_date)
             end_date = pd.to_datetime(to_date)
             
-            # Initialize empty list to store DataFrames
-            dfs = []
-            
-            # Process data in 60-day chunks
-            current_start = start_date
-            while current_start <= end_date:
-                # Calculate chunk end date (60 days or remaining period)
-                current_end = min(current_start + timedelta(days=59), end_date)
-                
+            columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi']
+
+            def fetch_chunk(current_start, current_end):
                 # Format dates for API call
                 from_str = current_start.strftime('%Y-%m-%d+00:00:00')
                 to_str = current_end.strftime('%Y-%m-%d+23:59:59')
@@ -468,19 +478,20 @@ class BrokerData:
                 
                 # Convert to DataFrame
                 candles = response.get('data', {}).get('candles', [])
-                if candles:
-                    df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
-                    dfs.append(df)
-                
-                # Move to next chunk
-                current_start = current_end + timedelta(days=1)
+                if not candles:
+                    return None
+                return pd.DataFrame(candles, columns=columns)
+
+            # Fetch the range in parallel chunks within Kite's per-request span limit
+            chunks = plan_history_chunks(start_date, end_date, self.HISTORY_CHUNK_DAYS.get(timeframe, 60))
+            dfs = fetch_history_chunks('zerodha', chunks, fetch_chunk, calls_per_second=self.HISTORY_RATE_LIMIT)
+
+            # Combine all chunks in order, dropping duplicate boundary candles
+            final_df = merge_history_chunks(dfs, columns)
                 
             # If no data was found, return empty DataFrame
-            if not dfs:
-                return pd.DataFrame(columns=['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi'])
-            
-            # Combine all chunks
-            final_df = pd.concat(dfs, ignore_index=True)
+            if final_df.empty:
+                return final_df
             
             # Convert timestamp to epoch properly using ISO format
             final_df['timestamp'] = pd.to_datetime(final_df['timestamp'], format='ISO8601')
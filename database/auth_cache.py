@@ -0,0 +1,127 @@
+"""
+Per-user TTL caches for authentication data.
+
+Each entry remembers the user it belongs to, so a key regeneration, login or
+logout only evicts that user's entries instead of clearing the cache for
+everyone. Caches keep hit/miss/invalidation counters for diagnostics.
+
+The caches support the dict operations the rest of the code base already
+uses on the plain TTLCache objects they replace (`in`, `[]`, `del`, `len`).
+"""
+
+import threading
+from typing import Any, Dict, Hashable, Optional, Set
+
+from cachetools import TTLCache
+
+_MISSING = object()
+
+
+class UserScopedCache:
+    """Thread-safe TTLCache with a per-user index and hit/miss statistics"""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.RLock()
+        self._key_owner: Dict[Hashable, str] = {}
+        self._owner_keys: Dict[str, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value, counting the lookup as a hit or miss"""
+        with self._lock:
+            try:
+                value = self._cache[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, user_id: Optional[str] = None) -> None:
+        """Store a value, optionally owned by user_id for targeted invalidation"""
+        with self._lock:
+            self._cache[key] = value
+            self._unlink(key)
+            if user_id is not None:
+                self._key_owner[key] = user_id
+                self._owner_keys.setdefault(user_id, set()).add(key)
+            if len(self._key_owner) > 2 * self._cache.maxsize:
+                self._prune_index()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            self._unlink(key)
+            return self._cache.pop(key, default)
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Remove every entry owned by user_id. Returns the number removed."""
+        with self._lock:
+            removed = 0
+            for key in self._owner_keys.pop(user_id, set()):
+                self._key_owner.pop(key, None)
+                if self._cache.pop(key, _MISSING) is not _MISSING:
+                    removed += 1
+            self.invalidations += removed
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._cache)
+            self._cache.clear()
+            self._key_owner.clear()
+            self._owner_keys.clear()
+
+    def _unlink(self, key: Hashable) -> None:
+        owner = self._key_owner.pop(key, None)
+        if owner is not None:
+            keys = self._owner_keys.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._owner_keys[owner]
+
+    def _prune_index(self) -> None:
+        """Drop index entries for keys the TTLCache has already expired or evicted"""
+        for key in [k for k in self._key_owner if k not in self._cache]:
+            self._unlink(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._cache),
+                'maxsize': self._cache.maxsize,
+                'ttl': self._cache.ttl,
+                'users': len(self._owner_keys),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': f"{(self.hits / total * 100) if total else 0.0:.2f}%",
+                'invalidations': self.invalidations,
+            }
+
+    # Dict-style access (no hit/miss accounting)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            return self._cache[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._lock:
+            if key not in self._cache:
+                raise KeyError(key)
+            self.pop(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
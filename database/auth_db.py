@@ -2,18 +2,25 @@
 
 import os
 import base64
+import hashlib
+import hmac
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from sqlalchemy import create_engine, UniqueConstraint, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, select
 from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
-from cachetools import TTLCache
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from database.auth_cache import UserScopedCache
 from utils.logging import get_logger
 
 # Initialize logger
@@ -92,18 +99,28 @@ def get_session_based_cache_ttl():
         logger.warning(f"Could not calculate session-based cache TTL, using 5-minute default: {e}")
         return 300  # Fallback to 5 minutes
 
+# All user-owned entries are invalidated per user (see invalidate_user_cache / invalidate_user_tokens)
 # Define auth token cache with TTL until session expiry to minimize DB hits
-auth_cache = TTLCache(maxsize=1024, ttl=get_session_based_cache_ttl())
+# Holds CachedAuth entries with decrypted tokens, keyed by "auth-{name}"
+auth_cache = UserScopedCache('auth', maxsize=1024, ttl=get_session_based_cache_ttl())
 # Define feed token cache with same TTL
-feed_token_cache = TTLCache(maxsize=1024, ttl=get_session_based_cache_ttl())
-# Define a cache for broker names with a 5-minute TTL (longer since broker rarely changes)
-broker_cache = TTLCache(maxsize=1024, ttl=3000)
-# Define a cache for verified API keys with 24-hour TTL
+feed_token_cache = UserScopedCache('feed_token', maxsize=1024, ttl=get_session_based_cache_ttl())
+# Define a cache for broker names with a 50-minute TTL (longer since broker rarely changes)
+broker_cache = UserScopedCache('broker', maxsize=1024, ttl=3000)
+# Define a cache for verified API keys with 10-hour TTL
 # Security: Only caches user_id (not sensitive), invalidated on key regeneration
 # Long TTL is safe because cache is invalidated when keys are regenerated
-verified_api_key_cache = TTLCache(maxsize=1024, ttl=36000)  # 10 hours
+verified_api_key_cache = UserScopedCache('verified_api_key', maxsize=1024, ttl=36000)  # 10 hours
 # Define a cache for invalid API keys with shorter 5-minute TTL (prevent cache poisoning)
-invalid_api_key_cache = TTLCache(maxsize=512, ttl=300)  # 5 minutes
+invalid_api_key_cache = UserScopedCache('invalid_api_key', maxsize=512, ttl=300)  # 5 minutes
+# Per-user order contexts for the place order fast path (see services/order_context_service.py)
+# Evicted with the user's tokens; holds no order or analyze mode, which are read per order
+order_context_cache = UserScopedCache('order_context', maxsize=1024, ttl=3000)
+
+# Cross-process invalidation for multi-worker deployments (gunicorn -w N)
+# Invalidations are written to the auth_cache_events table and replayed by other workers
+AUTH_CACHE_SYNC = os.getenv('AUTH_CACHE_SYNC', 'FALSE').upper() == 'TRUE'
+AUTH_CACHE_SYNC_INTERVAL = float(os.getenv('AUTH_CACHE_SYNC_INTERVAL', '1'))
 
 # Conditionally create engine based on DB type
 if DATABASE_URL and 'sqlite' in DATABASE_URL:
@@ -150,6 +167,7 @@ class ApiKeys(Base):
     user_id = Column(String, nullable=False, unique=True)
     api_key_hash = Column(Text, nullable=False)  # For verification
     api_key_encrypted = Column(Text, nullable=False)  # For retrieval
+    api_key_fingerprint = Column(String(64), nullable=True)  # HMAC-SHA256 with pepper, for indexed lookup
     created_at = Column(DateTime(timezone=True), default=func.now())
     order_mode = Column(String(20), default='auto')  # 'auto' or 'semi_auto'
 
@@ -157,8 +175,30 @@ class ApiKeys(Base):
     __table_args__ = (
         Index('idx_api_keys_order_mode', 'order_mode'),    # Speeds up filtering by order mode
         Index('idx_api_keys_created_at', 'created_at'),    # Speeds up time-based queries
+        Index('idx_api_keys_fingerprint', 'api_key_fingerprint', unique=True),  # Single-row API key lookup
     )
 
+class AuthCacheEvent(Base):
+    """Auth cache invalidation published by one worker for the others"""
+    __tablename__ = 'auth_cache_events'
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String(255), nullable=False)
+    scope = Column(String(20), nullable=False)  # 'user' (API key + tokens) or 'tokens'
+    created_at = Column(DateTime(timezone=True), default=func.now())
+
+    __table_args__ = (
+        Index('idx_auth_cache_events_created_at', 'created_at'),
+    )
+
+@dataclass(frozen=True)
+class CachedAuth:
+    """Decrypted auth record kept in memory so hot paths skip decrypt_token"""
+    name: str
+    auth_token: Optional[str]
+    feed_token: Optional[str]
+    broker: str
+    user_id: Optional[str]
+
 def init_db():
     from database.db_init_helper import init_db_with_logging
     init_db_with_logging(Base, engine, "Auth DB", logger)
@@ -196,48 +236,80 @@ def upsert_auth(name, auth_token, broker, feed_token=None, user_id=None, revoke=
         db_session.add(auth_obj)
     db_session.commit()
 
-    # Update cache after successful database operation
-    cache_key_auth = f"auth-{name}"
-    cache_key_feed = f"feed-{name}"
+    # Drop this user's cached tokens (here and in other workers) after the database update
+    invalidate_user_tokens(name)
 
     if revoke:
-        # Clear cache entries when revoking
-        if cache_key_auth in auth_cache:
-            del auth_cache[cache_key_auth]
-        if cache_key_feed in feed_token_cache:
-            del feed_token_cache[cache_key_feed]
         logger.info(f"Cleared cache entries for revoked tokens of user: {name}")
     else:
         # Populate cache immediately on login/update for faster subsequent access
-        auth_cache[cache_key_auth] = auth_obj
-        if auth_obj.feed_token:
-            feed_token_cache[cache_key_feed] = auth_obj
+        cache_auth_record(auth_obj)
         logger.debug(f"Auth cache populated for user: {name}")
 
     return auth_obj.id
 
+def cache_auth_record(auth_obj):
+    """Decrypt an Auth row once and cache it for get_auth_token/get_feed_token"""
+    entry = CachedAuth(
+        name=auth_obj.name,
+        auth_token=decrypt_token(auth_obj.auth),
+        feed_token=decrypt_token(auth_obj.feed_token) if auth_obj.feed_token else None,
+        broker=auth_obj.broker,
+        user_id=auth_obj.user_id
+    )
+    auth_cache.set(f"auth-{entry.name}", entry, user_id=entry.name)
+    if entry.feed_token:
+        feed_token_cache.set(f"feed-{entry.name}", entry, user_id=entry.name)
+    return entry
+
+def _get_cached_auth(name):
+    """Cached auth entry for a user, loading it from the database on a miss"""
+    entry = auth_cache.get(f"auth-{name}")
+    if entry is None:
+        auth_obj = get_auth_token_dbquery(name)
+        if not isinstance(auth_obj, Auth):
+            return None
+        entry = cache_auth_record(auth_obj)
+    return entry
+
 def get_auth_token(name):
     """Get decrypted auth token"""
     # Handle None or empty name gracefully
     if not name:
         logger.debug("get_auth_token called with empty/None name, returning None")
         return None
-        
-    cache_key = f"auth-{name}"
-    if cache_key in auth_cache:
-        auth_obj = auth_cache[cache_key]
-        if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
-            return decrypt_token(auth_obj.auth)
-        else:
-            del auth_cache[cache_key]
-            return None
-    else:
-        auth_obj = get_auth_token_dbquery(name)
-        if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
-            auth_cache[cache_key] = auth_obj
-            return decrypt_token(auth_obj.auth)
+
+    sync_auth_cache()
+    entry = _get_cached_auth(name)
+    return entry.auth_token if entry else None
+
+def is_auth_revoked(name):
+    """
+    Whether a user's broker session is revoked (logout) or gone, read from the database.
+
+    One indexed single-column query, so hot paths serving cached tokens can run
+    it on every request: a logout handled by another worker takes effect at
+    once, whether or not AUTH_CACHE_SYNC is enabled. A revoked session's
+    cached tokens are evicted from this process.
+    """
+    try:
+        row = db_session.query(Auth.is_revoked).filter_by(name=name).first()
+        revoked = row is None or bool(row[0])
+    except Exception as e:
+        logger.error(f"Error checking revocation status for '{name}': {e}")
+        return True  # Don't serve cached tokens we cannot vouch for
+    if revoked:
+        _invalidate_local(name, 'tokens')
+    return revoked
+
+def get_auth_entry(name):
+    """Cached decrypted auth record (tokens and broker) for a user, or None"""
+    if not name:
         return None
 
+    sync_auth_cache()
+    return _get_cached_auth(name)
+
 def get_auth_token_dbquery(name):
     try:
         # Handle None or empty name gracefully
@@ -263,21 +335,15 @@ def get_feed_token(name):
     if not name:
         logger.debug("get_feed_token called with empty/None name, returning None")
         return None
-        
-    cache_key = f"feed-{name}"
-    if cache_key in feed_token_cache:
-        auth_obj = feed_token_cache[cache_key]
-        if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
-            return decrypt_token(auth_obj.feed_token) if auth_obj.feed_token else None
-        else:
-            del feed_token_cache[cache_key]
-            return None
-    else:
+
+    sync_auth_cache()
+    entry = feed_token_cache.get(f"feed-{name}")
+    if entry is None:
         auth_obj = get_feed_token_dbquery(name)
-        if isinstance(auth_obj, Auth) and not auth_obj.is_revoked:
-            feed_token_cache[cache_key] = auth_obj
-            return decrypt_token(auth_obj.feed_token) if auth_obj.feed_token else None
-        return None
+        if not isinstance(auth_obj, Auth):
+            return None
+        entry = cache_auth_record(auth_obj)
+    return entry.feed_token
 
 def get_feed_token_dbquery(name):
     try:
@@ -316,21 +382,103 @@ def get_user_id(name):
         logger.error(f"Error while querying the database for user_id: {e}")
         return None
 
+def _invalidate_local(user_id, scope):
+    """Evict a user's entries from this process's caches"""
+    removed = auth_cache.invalidate_user(user_id)
+    removed += feed_token_cache.invalidate_user(user_id)
+    removed += broker_cache.invalidate_user(user_id)
+    removed += order_context_cache.invalidate_user(user_id)
+    if scope == 'user':
+        removed += verified_api_key_cache.invalidate_user(user_id)
+    return removed
+
 def invalidate_user_cache(user_id):
     """
     Invalidate all cached data for a user when their credentials change.
     Security: Ensures old API keys/tokens are not usable after regeneration.
+    Other users' cache entries are left untouched.
     """
-    # Clear all caches that might contain this user's data
-    auth_cache.clear()
-    broker_cache.clear()
-    feed_token_cache.clear()
-    verified_api_key_cache.clear()
-    invalid_api_key_cache.clear()
-    logger.info(f"Cleared all caches for user_id: {user_id}")
+    removed = _invalidate_local(user_id, 'user')
+    _publish_invalidation(user_id, 'user')
+    logger.info(f"Cleared {removed} cache entries for user_id: {user_id}")
+
+def invalidate_user_tokens(user_id):
+    """Invalidate a user's cached auth/feed tokens and broker (login, logout, revoke)"""
+    _invalidate_local(user_id, 'tokens')
+    _publish_invalidation(user_id, 'tokens')
+
+_sync_lock = threading.Lock()
+_sync_state = {'last_event_id': None, 'last_check': 0.0, 'own_events': set()}
+
+def _publish_invalidation(user_id, scope):
+    """Record an invalidation so other workers can apply it (AUTH_CACHE_SYNC only)"""
+    if not AUTH_CACHE_SYNC:
+        return
+    try:
+        with engine.begin() as conn:
+            result = conn.execute(AuthCacheEvent.__table__.insert().values(user_id=user_id, scope=scope))
+            _sync_state['own_events'].add(result.inserted_primary_key[0])
+            # Events only need to outlive the slowest worker's sync interval
+            cutoff = datetime.now(timezone.utc) - timedelta(days=1)
+            conn.execute(AuthCacheEvent.__table__.delete().where(AuthCacheEvent.created_at < cutoff))
+    except Exception as e:
+        logger.warning(f"Could not publish auth cache invalidation for {user_id}: {e}")
+
+def sync_auth_cache(force=False):
+    """Apply invalidations published by other workers (at most once per AUTH_CACHE_SYNC_INTERVAL)"""
+    if not AUTH_CACHE_SYNC:
+        return
+    now = time.monotonic()
+    if not force and now - _sync_state['last_check'] < AUTH_CACHE_SYNC_INTERVAL:
+        return
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        _sync_state['last_check'] = now
+        table = AuthCacheEvent.__table__
+        with engine.connect() as conn:
+            if _sync_state['last_event_id'] is None:
+                # First sync: start from the latest event, caches are already fresh
+                _sync_state['last_event_id'] = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar()
+                return
+            events = conn.execute(
+                table.select().where(table.c.id > _sync_state['last_event_id']).order_by(table.c.id)
+            ).fetchall()
+
+        for event in events:
+            _sync_state['last_event_id'] = event.id
+            if event.id in _sync_state['own_events']:
+                _sync_state['own_events'].discard(event.id)
+                continue
+            _invalidate_local(event.user_id, event.scope)
+            logger.debug(f"Applied {event.scope} cache invalidation from another worker for {event.user_id}")
+    except Exception as e:
+        logger.warning(f"Auth cache sync failed: {e}")
+    finally:
+        _sync_lock.release()
+
+def get_auth_cache_stats():
+    """Hit/miss/invalidation statistics for the auth caches"""
+    caches = [auth_cache, feed_token_cache, broker_cache, verified_api_key_cache, invalid_api_key_cache,
+              order_context_cache]
+    return {
+        'caches': {cache.name: cache.stats() for cache in caches},
+        'cross_process_sync': {
+            'enabled': AUTH_CACHE_SYNC,
+            'interval_seconds': AUTH_CACHE_SYNC_INTERVAL,
+            'last_event_id': _sync_state['last_event_id'],
+        }
+    }
+
+def compute_api_key_fingerprint(api_key):
+    """
+    Keyed, non-reversible fingerprint of an API key (HMAC-SHA256 with the pepper).
+    Used only to find the candidate row; the Argon2 hash is still verified.
+    """
+    return hmac.new(PEPPER.encode(), api_key.encode(), hashlib.sha256).hexdigest()
 
 def upsert_api_key(user_id, api_key):
-    """Store both hashed and encrypted API key"""
+    """Store hashed, encrypted and fingerprinted API key"""
     # Hash with Argon2 for verification
     peppered_key = api_key + PEPPER
     hashed_key = ph.hash(peppered_key)
@@ -338,15 +486,20 @@ def upsert_api_key(user_id, api_key):
     # Encrypt for retrieval
     encrypted_key = encrypt_token(api_key)
 
+    # Fingerprint for indexed lookup
+    fingerprint = compute_api_key_fingerprint(api_key)
+
     api_key_obj = ApiKeys.query.filter_by(user_id=user_id).first()
     if api_key_obj:
         api_key_obj.api_key_hash = hashed_key
         api_key_obj.api_key_encrypted = encrypted_key
+        api_key_obj.api_key_fingerprint = fingerprint
     else:
         api_key_obj = ApiKeys(
             user_id=user_id,
             api_key_hash=hashed_key,
-            api_key_encrypted=encrypted_key
+            api_key_encrypted=encrypted_key,
+            api_key_fingerprint=fingerprint
         )
         db_session.add(api_key_obj)
     db_session.commit()
@@ -376,6 +529,44 @@ def get_api_key_for_tradingview(user_id):
         logger.error(f"Error while querying the database for API key: {e}")
         return None
 
+def _find_api_key_owner(provided_api_key):
+    """
+    Find the user_id owning an API key.
+
+    Looks up the single row matching the key's fingerprint and verifies its
+    Argon2 hash. Rows created before fingerprints existed (no migration run
+    yet) are scanned as a fallback and backfilled on a match, so once every
+    row has a fingerprint an unknown key costs no Argon2 verifications.
+    """
+    peppered_key = provided_api_key + PEPPER
+    fingerprint = compute_api_key_fingerprint(provided_api_key)
+
+    api_key_obj = ApiKeys.query.filter_by(api_key_fingerprint=fingerprint).first()
+    if api_key_obj:
+        try:
+            ph.verify(api_key_obj.api_key_hash, peppered_key)
+            return api_key_obj.user_id
+        except VerifyMismatchError:
+            return None
+
+    # Legacy rows without a fingerprint
+    for api_key_obj in ApiKeys.query.filter(ApiKeys.api_key_fingerprint.is_(None)).all():
+        try:
+            ph.verify(api_key_obj.api_key_hash, peppered_key)
+        except VerifyMismatchError:
+            continue
+
+        api_key_obj.api_key_fingerprint = fingerprint
+        try:
+            db_session.commit()
+            logger.info(f"Backfilled API key fingerprint for user_id: {api_key_obj.user_id}")
+        except Exception as e:
+            db_session.rollback()
+            logger.warning(f"Could not backfill API key fingerprint: {e}")
+        return api_key_obj.user_id
+
+    return None
+
 def verify_api_key(provided_api_key):
     """
     Verify an API key using Argon2 with intelligent caching.
@@ -386,11 +577,13 @@ def verify_api_key(provided_api_key):
     - Invalid keys cached for 5min (prevents brute force)
     - Valid keys cached for 1hr (balances security vs performance)
     - Cache invalidated on key regeneration
+    - Cache misses do one indexed fingerprint lookup and at most one Argon2 check
     """
     from flask import request, has_request_context
     from utils.ip_helper import get_real_ip
     from database.traffic_db import InvalidAPIKeyTracker
-    import hashlib
+
+    sync_auth_cache()
 
     # Generate secure cache key (SHA256 hash of API key)
     # Security: Never store plaintext API key in cache
@@ -402,31 +595,22 @@ def verify_api_key(provided_api_key):
         return None
 
     # Step 2: Check valid cache (fast path for legitimate requests)
-    if cache_key in verified_api_key_cache:
-        user_id = verified_api_key_cache[cache_key]
+    user_id = verified_api_key_cache.get(cache_key)
+    if user_id:
         logger.debug(f"API key verified from cache for user_id: {user_id}")
         return user_id
 
-    # Step 3: Cache miss - perform expensive Argon2 verification
-    peppered_key = provided_api_key + PEPPER
+    # Step 3: Cache miss - fingerprint lookup plus a single Argon2 verification
     try:
-        # Query all API keys
-        api_keys = ApiKeys.query.all()
-
-        # Try to verify against each stored hash
-        for api_key_obj in api_keys:
-            try:
-                ph.verify(api_key_obj.api_key_hash, peppered_key)
-                # Valid key found - cache it
-                verified_api_key_cache[cache_key] = api_key_obj.user_id
-                logger.debug(f"API key verified and cached for user_id: {api_key_obj.user_id}")
-                return api_key_obj.user_id
-            except VerifyMismatchError:
-                continue
+        user_id = _find_api_key_owner(provided_api_key)
+        if user_id:
+            verified_api_key_cache.set(cache_key, user_id, user_id=user_id)
+            logger.debug(f"API key verified and cached for user_id: {user_id}")
+            return user_id
 
         # If we reach here, the API key is invalid
-        # Cache the invalid result to prevent repeated expensive verifications
-        invalid_api_key_cache[cache_key] = True
+        # Cache the invalid result to prevent repeated lookups
+        invalid_api_key_cache.set(cache_key, True)
         logger.debug(f"Invalid API key cached")
 
         # Track the invalid attempt
@@ -438,7 +622,7 @@ def verify_api_key(provided_api_key):
                 client_ip = '127.0.0.1'
 
             # Hash the API key for tracking (don't store plaintext)
-            api_key_hash = hashlib.sha256(provided_api_key.encode()).hexdigest()[:16]
+            api_key_hash = cache_key[:16]
 
             # Track the invalid API key attempt
             InvalidAPIKeyTracker.track_invalid_api_key(client_ip, api_key_hash)
@@ -457,20 +641,22 @@ def get_username_by_apikey(provided_api_key):
 
 def get_broker_name(provided_api_key):
     """Get only the broker name for a valid API key with caching"""
-    # Check if broker name is in cache
-    if provided_api_key in broker_cache:
-        return broker_cache[provided_api_key]
-    
+    # Security: Never use the plaintext API key as a cache key
+    cache_key = hashlib.sha256(provided_api_key.encode()).hexdigest()
+    broker = broker_cache.get(cache_key)
+    if broker:
+        return broker
+
     # Not in cache, need to look it up
     user_id = verify_api_key(provided_api_key)
-    
+
     if user_id:
         try:
-            auth_obj = Auth.query.filter_by(name=user_id).first()
-            if auth_obj and not auth_obj.is_revoked:
+            entry = _get_cached_auth(user_id)
+            if entry:
                 # Cache the broker name
-                broker_cache[provided_api_key] = auth_obj.broker
-                return auth_obj.broker
+                broker_cache.set(cache_key, entry.broker, user_id=user_id)
+                return entry.broker
             else:
                 logger.warning(f"No valid broker found for user_id '{user_id}'.")
                 return None
@@ -484,54 +670,23 @@ def get_auth_token_broker(provided_api_key, include_feed_token=False):
     Get auth token, feed token (optional) and broker for a valid API key with caching.
 
     Security measures:
-    - Always checks is_revoked status (even for cached data)
-    - Cache cleared on credential changes
+    - Always checks is_revoked status (even for cached data), so a logout in
+      another worker is honoured without AUTH_CACHE_SYNC
+    - Cache cleared per user on credential changes
     - TTL based on session expiry time
     """
-    import hashlib
-
-    # Generate cache key
-    cache_key = f"{hashlib.sha256(provided_api_key.encode()).hexdigest()}_{include_feed_token}"
-
-    # Check cache first (but still verify revocation status)
-    if cache_key in auth_cache:
-        cached_result = auth_cache[cache_key]
-        # Security: Still check if auth is revoked even with cached data
-        user_id = verify_api_key(provided_api_key)
-        if user_id:
-            try:
-                auth_obj = Auth.query.filter_by(name=user_id).first()
-                if auth_obj and auth_obj.is_revoked:
-                    # Token was revoked, remove from cache
-                    del auth_cache[cache_key]
-                    logger.warning(f"Cached auth token was revoked for user_id '{user_id}'.")
-                    return (None, None, None) if include_feed_token else (None, None)
-                # Not revoked, return cached result
-                logger.debug(f"Auth token retrieved from cache for user_id: {user_id}")
-                return cached_result
-            except Exception as e:
-                logger.error(f"Error checking revocation status: {e}")
-                # On error, don't use cache
-                del auth_cache[cache_key]
-
-    # Cache miss or revocation check failed - fetch from database
     user_id = verify_api_key(provided_api_key)
 
     if user_id:
         try:
-            auth_obj = Auth.query.filter_by(name=user_id).first()
-            if auth_obj and not auth_obj.is_revoked:
-                decrypted_token = decrypt_token(auth_obj.auth)
+            if f"auth-{user_id}" in auth_cache and is_auth_revoked(user_id):
+                logger.warning(f"Cached auth token was revoked for user_id '{user_id}'.")
+                return (None, None, None) if include_feed_token else (None, None)
+            entry = _get_cached_auth(user_id)
+            if entry:
                 if include_feed_token:
-                    decrypted_feed_token = decrypt_token(auth_obj.feed_token) if auth_obj.feed_token else None
-                    result = (decrypted_token, decrypted_feed_token, auth_obj.broker)
-                else:
-                    result = (decrypted_token, auth_obj.broker)
-
-                # Cache the result
-                auth_cache[cache_key] = result
-                logger.debug(f"Auth token cached for user_id: {user_id}")
-                return result
+                    return (entry.auth_token, entry.feed_token, entry.broker)
+                return (entry.auth_token, entry.broker)
             else:
                 logger.warning(f"No valid auth token or broker found for user_id '{user_id}'.")
                 return (None, None, None) if include_feed_token else (None, None)
@@ -124,12 +124,7 @@ def restore_auth_cache() -> dict:
     start_time = time.time()
 
     try:
-        from database.auth_db import (
-            Auth,
-            auth_cache,
-            feed_token_cache,
-            broker_cache
-        )
+        from database.auth_db import Auth, cache_auth_record
 
         # Get all non-revoked auth records
         auth_records = Auth.query.filter_by(is_revoked=False).all()
@@ -146,14 +141,8 @@ def restore_auth_cache() -> dict:
             try:
                 name = auth_record.name
 
-                # Populate auth cache
-                cache_key_auth = f"auth-{name}"
-                auth_cache[cache_key_auth] = auth_record
-
-                # Populate feed token cache if available
-                if auth_record.feed_token:
-                    cache_key_feed = f"feed-{name}"
-                    feed_token_cache[cache_key_feed] = auth_record
+                # Populate auth and feed token caches (tokens decrypted once here)
+                cache_auth_record(auth_record)
 
                 # Note: Broker cache is not restored here because it uses hashed API key as key,
                 # which we can't reconstruct without the actual API key.
@@ -0,0 +1,397 @@
+# database/history_db.py
+
+"""
+Local OHLCV candle store backed by DuckDB.
+
+Candles are stored per (symbol, exchange, interval) together with a coverage
+table that records which date ranges have already been downloaded from the
+broker. History requests are answered from the local store and only the
+missing date ranges are fetched from the broker.
+
+A successful fetch covers the whole range it asked for, even when the
+broker returned no candles (before a listing, weekly and monthly intervals
+that only have candles on period starts); a failed fetch raises and records
+nothing. Existing candles are only replaced on days the fetch returned
+candles for, so an empty response never wipes stored data.
+
+A day only becomes permanently covered once it had ended at the time it was
+fetched. Days that were still trading (the live day) are served from the
+store only while their last fetch is younger than HISTORY_CACHE_LIVE_TTL
+seconds.
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+import pytz
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+HISTORY_DATABASE_PATH = os.getenv('HISTORY_DATABASE_PATH', 'db/history.duckdb')
+HISTORY_CACHE_ENABLED = os.getenv('HISTORY_CACHE_ENABLED', 'TRUE').upper() == 'TRUE'
+HISTORY_CACHE_LIVE_TTL = int(os.getenv('HISTORY_CACHE_LIVE_TTL', '60'))
+
+IST = pytz.timezone('Asia/Kolkata')
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'oi']
+
+DateLike = Union[str, date, datetime]
+
+_conn = None
+_conn_lock = threading.RLock()
+_disabled_reason = None
+
+
+def _get_connection():
+    """Open the DuckDB store lazily. Returns None if the store is unavailable."""
+    global _conn, _disabled_reason
+
+    if _conn is not None or _disabled_reason is not None:
+        return _conn
+
+    with _conn_lock:
+        if _conn is not None or _disabled_reason is not None:
+            return _conn
+        try:
+            import duckdb
+
+            directory = os.path.dirname(HISTORY_DATABASE_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            conn = duckdb.connect(HISTORY_DATABASE_PATH)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    symbol VARCHAR NOT NULL,
+                    exchange VARCHAR NOT NULL,
+                    interval VARCHAR NOT NULL,
+                    timestamp BIGINT NOT NULL,
+                    open DOUBLE,
+                    high DOUBLE,
+                    low DOUBLE,
+                    close DOUBLE,
+                    volume BIGINT,
+                    oi BIGINT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    symbol VARCHAR NOT NULL,
+                    exchange VARCHAR NOT NULL,
+                    interval VARCHAR NOT NULL,
+                    start_date DATE NOT NULL,
+                    end_date DATE NOT NULL,
+                    fetched_at DOUBLE NOT NULL
+                )
+            """)
+            _conn = conn
+            logger.debug(f"History DB: Store ready at {HISTORY_DATABASE_PATH}")
+        except Exception as e:
+            # DuckDB allows a single writer process; other workers fall back to the broker
+            _disabled_reason = str(e)
+            logger.warning(f"History DB: Local candle store unavailable, using broker directly: {e}")
+
+    return _conn
+
+
+def init_db():
+    """Initialize the history candle store"""
+    if HISTORY_CACHE_ENABLED:
+        _get_connection()
+
+
+def is_cache_available() -> bool:
+    """Check whether the local candle store can be used"""
+    return HISTORY_CACHE_ENABLED and _get_connection() is not None
+
+
+def to_date(value: DateLike) -> date:
+    """Normalize a YYYY-MM-DD string, date or datetime to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def today_ist() -> date:
+    """Current trading date in IST"""
+    return datetime.now(IST).date()
+
+
+def split_coverage(start: date, end: date, fetched_at: float) -> Tuple[Optional[Tuple[date, date]], Optional[Tuple[date, date]]]:
+    """
+    Split a coverage row into its complete and live parts.
+
+    Days that had already ended when the range was fetched are complete and
+    never need refetching. Later days were still trading at fetch time.
+
+    Returns:
+        Tuple of (complete_range, live_range); either may be None
+    """
+    fetched_date = datetime.fromtimestamp(fetched_at, IST).date()
+    complete_end = min(end, fetched_date - timedelta(days=1))
+    live_start = max(start, fetched_date)
+    complete = (start, complete_end) if start <= complete_end else None
+    live = (live_start, end) if live_start <= end else None
+    return complete, live
+
+
+def compute_missing_ranges(
+    start: date,
+    end: date,
+    covered: List[Tuple[date, date, float]],
+    today: date,
+    now: float,
+    live_ttl: int = HISTORY_CACHE_LIVE_TTL
+) -> List[Tuple[date, date]]:
+    """
+    Compute the date ranges within [start, end] that are not covered.
+
+    Args:
+        start: First requested date
+        end: Last requested date
+        covered: List of (start_date, end_date, fetched_at) coverage rows
+        today: Current trading date
+        now: Current epoch time, used to age coverage of live days
+        live_ttl: Seconds for which coverage of a live day stays valid
+
+    Returns:
+        Sorted list of (gap_start, gap_end) date ranges, inclusive
+    """
+    # Nothing exists beyond today, so never ask the broker for future dates
+    end = min(end, today)
+    if start > end:
+        return []
+
+    intervals = []
+    for cov_start, cov_end, fetched_at in covered:
+        complete, live = split_coverage(cov_start, cov_end, fetched_at)
+        if complete:
+            intervals.append(complete)
+        if live and now - fetched_at <= live_ttl:
+            intervals.append(live)
+    intervals.sort()
+
+    gaps = []
+    cursor = start
+    for cov_start, cov_end in intervals:
+        if cov_end < cursor:
+            continue
+        if cov_start > end:
+            break
+        if cov_start > cursor:
+            gaps.append((cursor, min(cov_start - timedelta(days=1), end)))
+        cursor = max(cursor, cov_end + timedelta(days=1))
+        if cursor > end:
+            break
+
+    if cursor <= end:
+        gaps.append((cursor, end))
+
+    return gaps
+
+
+def get_missing_ranges(symbol: str, exchange: str, interval: str,
+                       start_date: DateLike, end_date: DateLike) -> List[Tuple[date, date]]:
+    """Get the date ranges that must still be fetched from the broker"""
+    start, end = to_date(start_date), to_date(end_date)
+    conn = _get_connection()
+    if conn is None:
+        return [(start, end)]
+
+    with _conn_lock:
+        rows = conn.execute(
+            "SELECT start_date, end_date, fetched_at FROM coverage "
+            "WHERE symbol = ? AND exchange = ? AND interval = ? AND end_date >= ? AND start_date <= ?",
+            [symbol, exchange, interval, start, end]
+        ).fetchall()
+
+    return compute_missing_ranges(start, end, rows, today_ist(), time.time())
+
+
+def _day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Consecutive days grouped into inclusive (first, last) runs"""
+    runs = []
+    for day in sorted(days):
+        if runs and runs[-1][1] == day - timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _epoch_bounds(start: date, end: date) -> Tuple[int, int]:
+    """Epoch seconds for IST midnight of start and of the day after end"""
+    lower = IST.localize(datetime.combine(start, datetime.min.time()))
+    upper = IST.localize(datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return int(lower.timestamp()), int(upper.timestamp())
+
+
+def store_candles(symbol: str, exchange: str, interval: str, df: pd.DataFrame,
+                  start_date: DateLike, end_date: DateLike) -> None:
+    """
+    Store the candles of a successfully fetched range and mark the range covered.
+
+    Existing candles are only replaced on days the fetch returned candles
+    for, so an empty response never wipes stored data; the whole range is
+    recorded as covered either way, so ranges without data are not fetched
+    again on every request.
+
+    Args:
+        symbol: Trading symbol
+        exchange: Exchange
+        interval: Interval as requested (e.g., 1m, D)
+        df: DataFrame returned by BrokerData.get_history (epoch-second timestamps)
+        start_date: First date that was fetched
+        end_date: Last date that was fetched
+    """
+    conn = _get_connection()
+    if conn is None:
+        return
+
+    start, end = to_date(start_date), to_date(end_date)
+
+    frame = pd.DataFrame(df, copy=True)
+    if 'oi' not in frame.columns:
+        frame['oi'] = 0
+    frame = frame[CANDLE_COLUMNS].dropna(subset=['timestamp'])
+    frame['timestamp'] = frame['timestamp'].astype('int64')
+    frame['volume'] = frame['volume'].fillna(0).astype('int64')
+    frame['oi'] = frame['oi'].fillna(0).astype('int64')
+    frame.insert(0, 'interval', interval)
+    frame.insert(0, 'exchange', exchange)
+    frame.insert(0, 'symbol', symbol)
+
+    lower, upper = _epoch_bounds(start, end)
+    frame = frame[(frame['timestamp'] >= lower) & (frame['timestamp'] < upper)]
+    frame = frame.drop_duplicates(subset=['timestamp'], keep='last')
+
+    candle_days = {datetime.fromtimestamp(ts, IST).date() for ts in frame['timestamp'].tolist()}
+
+    with _conn_lock:
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            # Replace the days that came back so corrected candles overwrite stale ones
+            for first_day, last_day in _day_runs(candle_days):
+                day_lower, day_upper = _epoch_bounds(first_day, last_day)
+                conn.execute(
+                    "DELETE FROM candles WHERE symbol = ? AND exchange = ? AND interval = ? "
+                    "AND timestamp >= ? AND timestamp < ?",
+                    [symbol, exchange, interval, day_lower, day_upper]
+                )
+            if not frame.empty:
+                conn.register('incoming_candles', frame)
+                conn.execute("INSERT INTO candles SELECT * FROM incoming_candles")
+                conn.unregister('incoming_candles')
+            conn.execute(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+                [symbol, exchange, interval, start, end, time.time()]
+            )
+            _compact_coverage(conn, symbol, exchange, interval)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _compact_coverage(conn, symbol: str, exchange: str, interval: str) -> None:
+    """Merge complete coverage rows and drop stale live rows so lookups stay small"""
+    now = time.time()
+    rows = conn.execute(
+        "SELECT start_date, end_date, fetched_at FROM coverage "
+        "WHERE symbol = ? AND exchange = ? AND interval = ?",
+        [symbol, exchange, interval]
+    ).fetchall()
+    if len(rows) < 2:
+        return
+
+    complete_rows, live_rows = [], []
+    for start, end, fetched_at in rows:
+        complete, live = split_coverage(start, end, fetched_at)
+        if complete:
+            complete_rows.append(complete)
+        if live and now - fetched_at <= HISTORY_CACHE_LIVE_TTL:
+            live_rows.append((live[0], live[1], fetched_at))
+
+    merged = []
+    for start, end in sorted(complete_rows):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    # Complete rows end before today, so stamping them with the current time
+    # keeps split_coverage treating them as permanent
+    compacted = [(start, end, now) for start, end in merged]
+
+    # Keep only live rows not superseded by a fresher live row covering them
+    kept_live = []
+    for start, end, fetched_at in sorted(live_rows, key=lambda row: row[2], reverse=True):
+        if not any(s <= start and end <= e for s, e, _ in kept_live):
+            kept_live.append((start, end, fetched_at))
+    compacted.extend(kept_live)
+
+    if len(compacted) >= len(rows):
+        return
+
+    conn.execute(
+        "DELETE FROM coverage WHERE symbol = ? AND exchange = ? AND interval = ?",
+        [symbol, exchange, interval]
+    )
+    conn.executemany(
+        "INSERT INTO coverage VALUES (?, ?, ?, ?, ?, ?)",
+        [[symbol, exchange, interval, start, end, fetched_at] for start, end, fetched_at in compacted]
+    )
+
+
+def read_candles(symbol: str, exchange: str, interval: str,
+                 start_date: DateLike, end_date: DateLike) -> Optional[pd.DataFrame]:
+    """
+    Read candles for a date range from the local store.
+
+    Returns:
+        DataFrame with timestamp/open/high/low/close/volume/oi columns sorted by
+        timestamp, or None if the store is unavailable
+    """
+    conn = _get_connection()
+    if conn is None:
+        return None
+
+    lower, upper = _epoch_bounds(to_date(start_date), to_date(end_date))
+    with _conn_lock:
+        return conn.execute(
+            "SELECT timestamp, open, high, low, close, volume, oi FROM candles "
+            "WHERE symbol = ? AND exchange = ? AND interval = ? "
+            "AND timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+            [symbol, exchange, interval, lower, upper]
+        ).df()
+
+
+def is_range_cached(symbol: str, exchange: str, interval: str,
+                    start_date: DateLike, end_date: DateLike) -> bool:
+    """Check whether a request can be served without calling the broker"""
+    if not is_cache_available():
+        return False
+    return not get_missing_ranges(symbol, exchange, interval, start_date, end_date)
+
+
+def clear_history(symbol: Optional[str] = None, exchange: Optional[str] = None) -> None:
+    """Remove cached candles and coverage, optionally for a single symbol"""
+    conn = _get_connection()
+    if conn is None:
+        return
+
+    where, params = '', []
+    if symbol and exchange:
+        where, params = ' WHERE symbol = ? AND exchange = ?', [symbol, exchange]
+
+    with _conn_lock:
+        conn.execute(f"DELETE FROM candles{where}", params)
+        conn.execute(f"DELETE FROM coverage{where}", params)
+    logger.info(f"History DB: Cleared cached candles{f' for {exchange}:{symbol}' if where else ''}")
@@ -1,11 +1,15 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text, Index
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
 import os
+import atexit
 import logging
-from datetime import datetime
+import socket
+import threading
+from datetime import datetime, timedelta
+from utils.quantile_sketch import QuantileSketch, RollupAccumulator
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +37,21 @@ latency_session = scoped_session(sessionmaker(autocommit=False, autoflush=False,
 LatencyBase = declarative_base()
 LatencyBase.query = latency_session.query_property()
 
+# Dashboard rollups: hourly buckets per broker and order type, each holding
+# counters and mergeable quantile sketches. Latencies are buffered in memory
+# and written at most every METRICS_ROLLUP_FLUSH_INTERVAL seconds.
+ROLLUP_BUCKET_SECONDS = 3600
+METRICS_ROLLUP_FLUSH_INTERVAL = float(os.getenv('METRICS_ROLLUP_FLUSH_INTERVAL', '5'))
+
+# Each process writes its own rollup rows, so workers never overwrite each other
+ROLLUP_WRITER = f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+# Order execution types are kept forever; other (data endpoint) types are purged
+ORDER_TYPES = {'PLACE', 'SMART', 'MODIFY', 'CANCEL', 'CLOSE', 'CANCEL_ALL', 'BASKET', 'SPLIT', 'OPTIONS', 'OPTIONS_MULTI'}
+
+_latency_rollups = RollupAccumulator(ROLLUP_BUCKET_SECONDS)
+_rollup_flush_lock = threading.Lock()
+
 class OrderLatency(LatencyBase):
     """Model for tracking end-to-end order execution latency"""
     __tablename__ = 'order_latency'
@@ -84,6 +103,8 @@ class OrderLatency(LatencyBase):
             )
             latency_session.add(log)
             latency_session.commit()
+            _record_latency_rollup(broker, order_type, status, latencies.get('rtt', 0),
+                                   latencies.get('overhead', 0), latencies.get('total', 0))
             return True
         except Exception as e:
             logger.error(f"Error logging latency: {str(e)}")
@@ -101,128 +122,48 @@ class OrderLatency(LatencyBase):
 
     @staticmethod
     def get_latency_stats():
-        """Get latency statistics - optimized with minimal database queries"""
+        """Get latency statistics from the hourly rollups (reads O(buckets), not O(orders))"""
         try:
-            from sqlalchemy import func, case
-            import numpy as np
-
-            # OPTIMIZED: Single query for all overall stats using CASE statements
-            # This replaces 9 separate queries with 1
-            overall_stats = latency_session.query(
-                func.count(OrderLatency.id).label('total'),
-                func.sum(case((OrderLatency.status == 'FAILED', 1), else_=0)).label('failed'),
-                func.avg(OrderLatency.rtt_ms).label('avg_rtt'),
-                func.avg(OrderLatency.overhead_ms).label('avg_overhead'),
-                func.avg(OrderLatency.total_latency_ms).label('avg_total'),
-                func.sum(case((OrderLatency.total_latency_ms < 100, 1), else_=0)).label('under_100'),
-                func.sum(case((OrderLatency.total_latency_ms < 150, 1), else_=0)).label('under_150'),
-                func.sum(case((OrderLatency.total_latency_ms < 200, 1), else_=0)).label('under_200'),
-            ).first()
-
-            total_orders = overall_stats.total or 0
-            failed_orders = overall_stats.failed or 0
-            avg_rtt = overall_stats.avg_rtt or 0
-            avg_overhead = overall_stats.avg_overhead or 0
-            avg_total = overall_stats.avg_total or 0
-            orders_under_100ms = overall_stats.under_100 or 0
-            orders_under_150ms = overall_stats.under_150 or 0
-            orders_under_200ms = overall_stats.under_200 or 0
-
-            # Calculate SLA percentages
-            sla_100ms = (orders_under_100ms / total_orders * 100) if total_orders else 0
-            sla_150ms = (orders_under_150ms / total_orders * 100) if total_orders else 0
-            sla_200ms = (orders_under_200ms / total_orders * 100) if total_orders else 0
-
-            # OPTIMIZED: Single query for percentiles (still need all values for accurate percentiles)
-            # But now we only fetch one column instead of full rows
-            p50_total = p90_total = p95_total = p99_total = 0
-            if total_orders > 0:
-                total_latencies = [row[0] for row in latency_session.query(
-                    OrderLatency.total_latency_ms
-                ).filter(OrderLatency.total_latency_ms.isnot(None)).all()]
-
-                if total_latencies:
-                    p50_total = float(np.percentile(total_latencies, 50))
-                    p90_total = float(np.percentile(total_latencies, 90))
-                    p95_total = float(np.percentile(total_latencies, 95))
-                    p99_total = float(np.percentile(total_latencies, 99))
-
-            # OPTIMIZED: Single GROUP BY query for all broker stats
-            # This replaces N x 7 queries (where N = number of brokers) with just 1
-            broker_agg = latency_session.query(
-                OrderLatency.broker,
-                func.count(OrderLatency.id).label('total'),
-                func.sum(case((OrderLatency.status == 'FAILED', 1), else_=0)).label('failed'),
-                func.avg(OrderLatency.rtt_ms).label('avg_rtt'),
-                func.avg(OrderLatency.overhead_ms).label('avg_overhead'),
-                func.avg(OrderLatency.total_latency_ms).label('avg_total'),
-                func.sum(case((OrderLatency.total_latency_ms < 150, 1), else_=0)).label('under_150'),
-            ).filter(
-                OrderLatency.broker.isnot(None)
-            ).group_by(
-                OrderLatency.broker
-            ).all()
-
-            # Build broker stats dict from aggregated results
-            broker_stats = {}
+            flush_latency_rollups()
+
+            overall = _RollupTotals()
+            brokers = {}
+            for row in OrderLatencyRollup.query.all():
+                overall.add(row)
+                if row.broker:
+                    brokers.setdefault(row.broker, _RollupTotals()).add(row)
 
-            # For percentiles, we need per-broker latency values
-            # OPTIMIZED: Single query to get all latencies grouped by broker
-            broker_latencies = {}
-            if broker_agg:
-                broker_names = [b.broker for b in broker_agg]
-                latency_rows = latency_session.query(
-                    OrderLatency.broker,
-                    OrderLatency.total_latency_ms
-                ).filter(
-                    OrderLatency.broker.in_(broker_names),
-                    OrderLatency.total_latency_ms.isnot(None)
-                ).all()
-
-                # Group latencies by broker
-                for row in latency_rows:
-                    if row.broker not in broker_latencies:
-                        broker_latencies[row.broker] = []
-                    broker_latencies[row.broker].append(row.total_latency_ms)
-
-            # Build final broker stats
-            for broker_row in broker_agg:
-                broker = broker_row.broker
-                broker_total = broker_row.total or 0
-                broker_under_150 = broker_row.under_150 or 0
-                broker_sla = (broker_under_150 / broker_total * 100) if broker_total else 0
-
-                # Calculate percentiles for this broker
-                broker_p50 = broker_p99 = 0
-                if broker in broker_latencies and broker_latencies[broker]:
-                    broker_p50 = float(np.percentile(broker_latencies[broker], 50))
-                    broker_p99 = float(np.percentile(broker_latencies[broker], 99))
+            total_orders = overall.count
+            total_sketch = overall.total_sketch
 
+            # Build broker stats from merged per-bucket sketches
+            broker_stats = {}
+            for broker, totals in brokers.items():
                 broker_stats[broker] = {
-                    'total_orders': broker_total,
-                    'failed_orders': broker_row.failed or 0,
-                    'avg_rtt': float(broker_row.avg_rtt or 0),
-                    'avg_overhead': float(broker_row.avg_overhead or 0),
-                    'avg_total': float(broker_row.avg_total or 0),
-                    'p50_total': broker_p50,
-                    'p99_total': broker_p99,
-                    'sla_150ms': broker_sla
+                    'total_orders': totals.count,
+                    'failed_orders': totals.failed,
+                    'avg_rtt': totals.avg('sum_rtt'),
+                    'avg_overhead': totals.avg('sum_overhead'),
+                    'avg_total': totals.avg('sum_total'),
+                    'p50_total': totals.total_sketch.quantile(0.50),
+                    'p99_total': totals.total_sketch.quantile(0.99),
+                    'sla_150ms': totals.pct('under_150')
                 }
 
             return {
                 'total_orders': total_orders,
-                'failed_orders': failed_orders,
-                'success_rate': ((total_orders - failed_orders) / total_orders * 100) if total_orders else 0,
-                'avg_rtt': float(avg_rtt),
-                'avg_overhead': float(avg_overhead),
-                'avg_total': float(avg_total),
-                'p50_total': float(p50_total),
-                'p90_total': float(p90_total),
-                'p95_total': float(p95_total),
-                'p99_total': float(p99_total),
-                'sla_100ms': float(sla_100ms),
-                'sla_150ms': float(sla_150ms),
-                'sla_200ms': float(sla_200ms),
+                'failed_orders': overall.failed,
+                'success_rate': ((total_orders - overall.failed) / total_orders * 100) if total_orders else 0,
+                'avg_rtt': overall.avg('sum_rtt'),
+                'avg_overhead': overall.avg('sum_overhead'),
+                'avg_total': overall.avg('sum_total'),
+                'p50_total': total_sketch.quantile(0.50),
+                'p90_total': total_sketch.quantile(0.90),
+                'p95_total': total_sketch.quantile(0.95),
+                'p99_total': total_sketch.quantile(0.99),
+                'sla_100ms': overall.pct('under_100'),
+                'sla_150ms': overall.pct('under_150'),
+                'sla_200ms': overall.pct('under_200'),
                 'broker_stats': broker_stats
             }
         except Exception as e:
@@ -244,6 +185,183 @@ class OrderLatency(LatencyBase):
                 'broker_stats': {}
             }
 
+    @staticmethod
+    def get_rtt_sketch(broker=None):
+        """Merged RTT sketch across all buckets, optionally for one broker"""
+        flush_latency_rollups()
+        sketch = QuantileSketch()
+        query = OrderLatencyRollup.query
+        if broker:
+            query = query.filter_by(broker=broker)
+        for row in query.with_entities(OrderLatencyRollup.rtt_sketch).all():
+            sketch.merge(QuantileSketch.from_json(row.rtt_sketch))
+        return sketch
+
+    @staticmethod
+    def get_latency_timeseries(hours=24, broker=None, order_type=None):
+        """Hourly order count, average and percentiles for the last `hours` hours"""
+        try:
+            flush_latency_rollups()
+            cutoff = datetime.utcnow() - timedelta(hours=hours)
+            query = OrderLatencyRollup.query.filter(OrderLatencyRollup.bucket_start >= cutoff)
+            if broker:
+                query = query.filter_by(broker=broker)
+            if order_type:
+                query = query.filter_by(order_type=order_type)
+
+            buckets = {}
+            for row in query.all():
+                buckets.setdefault(row.bucket_start, _RollupTotals()).add(row)
+
+            return [{
+                'bucket_start': start.isoformat(),
+                'total_orders': totals.count,
+                'failed_orders': totals.failed,
+                'avg_total': totals.avg('sum_total'),
+                'p50_total': totals.total_sketch.quantile(0.50),
+                'p95_total': totals.total_sketch.quantile(0.95),
+                'p99_total': totals.total_sketch.quantile(0.99),
+            } for start, totals in sorted(buckets.items())]
+        except Exception as e:
+            logger.error(f"Error getting latency timeseries: {str(e)}")
+            return []
+
+class OrderLatencyRollup(LatencyBase):
+    """Hourly pre-aggregated latency per broker and order type (one row per writer process)"""
+    __tablename__ = 'order_latency_rollups'
+
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)
+    broker = Column(String(50), nullable=False, default='')
+    order_type = Column(String(20), nullable=False, default='')
+    writer = Column(String(100), nullable=False)
+
+    count = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    sum_rtt = Column(Float, nullable=False, default=0)
+    sum_overhead = Column(Float, nullable=False, default=0)
+    sum_total = Column(Float, nullable=False, default=0)
+    under_100 = Column(Integer, nullable=False, default=0)
+    under_150 = Column(Integer, nullable=False, default=0)
+    under_200 = Column(Integer, nullable=False, default=0)
+
+    # Serialized QuantileSketch (JSON)
+    total_sketch = Column(Text)
+    rtt_sketch = Column(Text)
+
+    __table_args__ = (
+        Index('idx_latency_rollup_key', 'bucket_start', 'broker', 'order_type', 'writer', unique=True),
+        Index('idx_latency_rollup_broker', 'broker'),
+    )
+
+ROLLUP_COUNTERS = ('count', 'failed', 'sum_rtt', 'sum_overhead', 'sum_total', 'under_100', 'under_150', 'under_200')
+
+class _RollupTotals:
+    """Sum of rollup rows with merged sketches"""
+
+    def __init__(self):
+        self.counters = dict.fromkeys(ROLLUP_COUNTERS, 0)
+        self.total_sketch = QuantileSketch()
+
+    def add(self, row):
+        for name in ROLLUP_COUNTERS:
+            self.counters[name] += getattr(row, name) or 0
+        self.total_sketch.merge(QuantileSketch.from_json(row.total_sketch))
+
+    @property
+    def count(self):
+        return int(self.counters['count'])
+
+    @property
+    def failed(self):
+        return int(self.counters['failed'])
+
+    def avg(self, name):
+        return float(self.counters[name] / self.count) if self.count else 0.0
+
+    def pct(self, name):
+        return float(self.counters[name] / self.count * 100) if self.count else 0.0
+
+def _record_latency_rollup(broker, order_type, status, rtt_ms, overhead_ms, total_ms, when=None, accumulator=None):
+    """Add one order latency to the in-memory rollups"""
+    total = total_ms or 0
+    (accumulator or _latency_rollups).record(
+        (broker or '', order_type or ''),
+        {'total': total_ms, 'rtt': rtt_ms},
+        when=when,
+        count=1,
+        failed=1 if status == 'FAILED' else 0,
+        sum_rtt=rtt_ms or 0,
+        sum_overhead=overhead_ms or 0,
+        sum_total=total,
+        under_100=1 if total < 100 else 0,
+        under_150=1 if total < 150 else 0,
+        under_200=1 if total < 200 else 0,
+    )
+    if accumulator is None and _latency_rollups.due(METRICS_ROLLUP_FLUSH_INTERVAL):
+        flush_latency_rollups()
+
+def _write_latency_rollups(pending, writer):
+    for (start, (broker, order_type)), delta in pending.items():
+        row = OrderLatencyRollup.query.filter_by(
+            bucket_start=start, broker=broker, order_type=order_type, writer=writer
+        ).first()
+        if row is None:
+            row = OrderLatencyRollup(bucket_start=start, broker=broker, order_type=order_type, writer=writer,
+                                     **dict.fromkeys(ROLLUP_COUNTERS, 0))
+            latency_session.add(row)
+
+        for name, amount in delta.counters.items():
+            setattr(row, name, (getattr(row, name) or 0) + amount)
+        for name in ('total', 'rtt'):
+            column = f'{name}_sketch'
+            sketch = QuantileSketch.from_json(getattr(row, column))
+            if name in delta.sketches:
+                sketch.merge(delta.sketches[name])
+            setattr(row, column, sketch.to_json())
+
+def flush_latency_rollups():
+    """Write buffered latency rollups for this process to the database"""
+    with _rollup_flush_lock:
+        pending = _latency_rollups.drain()
+        if not pending:
+            return 0
+        try:
+            _write_latency_rollups(pending, ROLLUP_WRITER)
+            latency_session.commit()
+            return len(pending)
+        except Exception as e:
+            logger.error(f"Error flushing latency rollups ({len(pending)} buckets dropped): {str(e)}")
+            latency_session.rollback()
+            return 0
+
+def rebuild_latency_rollups(batch_size=5000):
+    """Recompute all rollups from order_latency (used to backfill existing databases)"""
+    try:
+        _latency_rollups.drain()
+        latency_session.query(OrderLatencyRollup).delete(synchronize_session=False)
+
+        accumulator = RollupAccumulator(ROLLUP_BUCKET_SECONDS)
+        rows = 0
+        for log in OrderLatency.query.yield_per(batch_size):
+            _record_latency_rollup(log.broker, log.order_type, log.status, log.rtt_ms, log.overhead_ms,
+                                   log.total_latency_ms, when=_naive(log.timestamp), accumulator=accumulator)
+            rows += 1
+
+        _write_latency_rollups(accumulator.drain(), 'backfill')
+        latency_session.commit()
+        logger.info(f"Rebuilt latency rollups from {rows} rows")
+        return rows
+    except Exception as e:
+        logger.error(f"Error rebuilding latency rollups: {str(e)}")
+        latency_session.rollback()
+        return 0
+
+def _naive(value):
+    return value.replace(tzinfo=None) if value is not None else None
+
+atexit.register(flush_latency_rollups)
+
 def init_latency_db():
     """Initialize the latency database"""
     # Extract directory from database URL and create if it doesn't exist
@@ -260,11 +378,7 @@ def purge_old_data_logs(days=7):
     Purge non-order endpoint latency logs older than specified days.
     Order execution logs (PLACE, SMART, MODIFY, CANCEL, etc.) are kept forever.
     """
-    # Order types to keep forever
-    ORDER_TYPES = {'PLACE', 'SMART', 'MODIFY', 'CANCEL', 'CLOSE', 'CANCEL_ALL', 'BASKET', 'SPLIT', 'OPTIONS', 'OPTIONS_MULTI'}
-
     try:
-        from datetime import timedelta
         cutoff = datetime.utcnow() - timedelta(days=days)
 
         # Delete non-order logs older than cutoff
@@ -273,6 +387,12 @@ def purge_old_data_logs(days=7):
             ~OrderLatency.order_type.in_(ORDER_TYPES)
         ).delete(synchronize_session=False)
 
+        # Drop the matching rollup buckets so dashboard totals keep tracking the raw table
+        latency_session.query(OrderLatencyRollup).filter(
+            OrderLatencyRollup.bucket_start < cutoff - timedelta(seconds=ROLLUP_BUCKET_SECONDS),
+            ~OrderLatencyRollup.order_type.in_(ORDER_TYPES)
+        ).delete(synchronize_session=False)
+
         latency_session.commit()
         logger.debug(f"Purged {deleted} old data endpoint latency logs (older than {days} days)")
         return deleted
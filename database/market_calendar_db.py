@@ -8,6 +8,11 @@ Supports:
 - Trading holidays (full day closed)
 - Special sessions (Muhurat trading, etc.)
 - Partial holidays (some exchanges open with special timings)
+
+Day lookups are served from a calendar precomputed a year at a time (three
+queries per year), so get_market_timings_for_date and is_market_holiday are
+dictionary lookups. services.market_session_service builds its session index
+on top of it.
 """
 
 from sqlalchemy import create_engine, Column, Integer, String, BigInteger, Boolean, Date, Index
@@ -16,16 +21,21 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.pool import NullPool
 from cachetools import TTLCache
 import os
-from datetime import datetime, date
-from typing import List, Dict, Any, Optional
+import threading
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Optional, Callable
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-# Cache for market timings - 1 hour TTL
-_timings_cache = TTLCache(maxsize=500, ttl=3600)
+# Precomputed calendar per year - 1 hour TTL so every worker picks up admin edits
+_year_index = TTLCache(maxsize=10, ttl=3600)
+_year_index_lock = threading.Lock()
 _holidays_cache = TTLCache(maxsize=50, ttl=3600)
 
+# Called after the calendar changes (see add_calendar_listener)
+_calendar_listeners: List[Callable[[], None]] = []
+
 DATABASE_URL = os.getenv('DATABASE_URL')
 
 # Conditionally create engine based on DB type
@@ -560,6 +570,117 @@ def _get_timing_offsets() -> Dict[str, Dict[str, int]]:
     return DEFAULT_MARKET_TIMINGS
 
 
+def _day_timings(query_date: date, midnight_epoch: int, holiday: Optional[Holiday],
+                 exchange_rows: List[HolidayExchange], timing_offsets: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Market timings for one date from its holiday record (if any) and the timing offsets"""
+    # Weekend (Saturday=5, Sunday=6), unless a special session is held
+    if query_date.weekday() >= 5 and not (holiday and holiday.holiday_type == 'SPECIAL_SESSION'):
+        return []
+
+    if holiday:
+        closed_exchanges = set()
+        open_with_timings = {}
+
+        for ex in exchange_rows:
+            if ex.is_open:
+                open_with_timings[ex.exchange_code] = {
+                    'exchange': ex.exchange_code,
+                    'start_time': ex.start_time,
+                    'end_time': ex.end_time
+                }
+            else:
+                closed_exchanges.add(ex.exchange_code)
+
+        # For SPECIAL_SESSION (like Muhurat), return the special timings
+        if holiday.holiday_type == 'SPECIAL_SESSION':
+            return list(open_with_timings.values())
+
+        # For regular TRADING_HOLIDAY, return open exchanges only (closed exchanges
+        # not included); SETTLEMENT_HOLIDAY trades with normal hours below
+        if holiday.holiday_type != 'SETTLEMENT_HOLIDAY':
+            if closed_exchanges == set(SUPPORTED_EXCHANGES) and not open_with_timings:
+                return []
+            return list(open_with_timings.values())
+
+    # Normal trading day - return timings for all exchanges
+    result = []
+    for exchange in SUPPORTED_EXCHANGES:
+        timings = timing_offsets.get(exchange, DEFAULT_MARKET_TIMINGS.get(exchange, {}))
+        if timings:
+            result.append({
+                'exchange': exchange,
+                'start_time': midnight_epoch + timings['start_offset'],
+                'end_time': midnight_epoch + timings['end_offset']
+            })
+    return result
+
+
+def _build_year_index(year: int) -> Dict[str, Dict[date, Any]]:
+    """
+    Precompute a year of the calendar.
+
+    Returns:
+        {'timings': {date: [exchange timings]},
+         'holidays': {date: (holiday_type, {exchange: is_open})}}
+    """
+    first_day, last_day = date(year, 1, 1), date(year, 12, 31)
+    timing_offsets = _get_timing_offsets()
+
+    holidays = {}
+    for holiday in Holiday.query.filter(
+        Holiday.holiday_date >= first_day, Holiday.holiday_date <= last_day
+    ).order_by(Holiday.id).all():
+        holidays.setdefault(holiday.holiday_date, holiday)
+
+    exchange_rows: Dict[int, List[HolidayExchange]] = {}
+    holiday_ids = [holiday.id for holiday in holidays.values()]
+    if holiday_ids:
+        for ex in HolidayExchange.query.filter(
+            HolidayExchange.holiday_id.in_(holiday_ids)
+        ).order_by(HolidayExchange.id).all():
+            exchange_rows.setdefault(ex.holiday_id, []).append(ex)
+
+    timings_by_day = {}
+    day = first_day
+    while day <= last_day:
+        # Midnight of the date in IST (server local time)
+        midnight_epoch = int(datetime.combine(day, datetime.min.time()).timestamp() * 1000)
+        holiday = holidays.get(day)
+        rows = exchange_rows.get(holiday.id, []) if holiday else []
+        timings_by_day[day] = _day_timings(day, midnight_epoch, holiday, rows, timing_offsets)
+        day += timedelta(days=1)
+
+    holiday_info = {}
+    for holiday_date, holiday in holidays.items():
+        exchanges = {}
+        for ex in exchange_rows.get(holiday.id, []):
+            exchanges.setdefault(ex.exchange_code, ex.is_open)
+        holiday_info[holiday_date] = (holiday.holiday_type, exchanges)
+
+    logger.debug(f"Market calendar for {year} built: {len(holidays)} holidays")
+    return {'timings': timings_by_day, 'holidays': holiday_info}
+
+
+def _get_year_index(year: int) -> Dict[str, Dict[date, Any]]:
+    with _year_index_lock:
+        index = _year_index.get(year)
+        if index is None:
+            index = _build_year_index(year)
+            _year_index[year] = index
+        return index
+
+
+def get_market_timings_for_year(year: int) -> Dict[date, List[Dict[str, Any]]]:
+    """
+    Market timings for every date of a year, as get_market_timings_for_date
+    returns them. Treat the result as read-only.
+
+    Raises:
+        Exception: the calendar could not be read from the database
+    """
+    return _get_year_index(year)['timings']
+
+
 def get_market_timings_for_date(query_date: date) -> List[Dict[str, Any]]:
     """
     Get market timings for a specific date
@@ -572,89 +693,8 @@ def get_market_timings_for_date(query_date: date) -> List[Dict[str, Any]]:
     Returns:
         List of exchange timings with start_time and end_time in epoch milliseconds
     """
-    cache_key = f'timings_{query_date.isoformat()}'
-
-    # Check cache first
-    if cache_key in _timings_cache:
-        return _timings_cache[cache_key]
-
     try:
-        # Check if it's a weekend (Saturday=5, Sunday=6)
-        if query_date.weekday() >= 5:
-            _timings_cache[cache_key] = []
-            return []
-
-        # Calculate midnight timestamp for the date in IST
-        midnight_ist = datetime.combine(query_date, datetime.min.time())
-        midnight_epoch = int(midnight_ist.timestamp() * 1000)
-
-        # Get timing offsets from database (or defaults if not in DB)
-        timing_offsets = _get_timing_offsets()
-
-        # Check if it's a holiday
-        holiday = Holiday.query.filter(Holiday.holiday_date == query_date).first()
-
-        if holiday:
-            # Get exchange-specific information
-            exchanges = HolidayExchange.query.filter(HolidayExchange.holiday_id == holiday.id).all()
-
-            closed_exchanges = set()
-            open_with_timings = {}
-
-            for ex in exchanges:
-                if ex.is_open:
-                    open_with_timings[ex.exchange_code] = {
-                        'exchange': ex.exchange_code,
-                        'start_time': ex.start_time,
-                        'end_time': ex.end_time
-                    }
-                else:
-                    closed_exchanges.add(ex.exchange_code)
-
-            # For SPECIAL_SESSION (like Muhurat), return the special timings
-            if holiday.holiday_type == 'SPECIAL_SESSION':
-                result = list(open_with_timings.values())
-                _timings_cache[cache_key] = result
-                return result
-
-            # For SETTLEMENT_HOLIDAY, trading is open with normal hours
-            if holiday.holiday_type == 'SETTLEMENT_HOLIDAY':
-                result = []
-                for exchange in SUPPORTED_EXCHANGES:
-                    timings = timing_offsets.get(exchange, DEFAULT_MARKET_TIMINGS.get(exchange, {}))
-                    if timings:
-                        result.append({
-                            'exchange': exchange,
-                            'start_time': midnight_epoch + timings['start_offset'],
-                            'end_time': midnight_epoch + timings['end_offset']
-                        })
-                _timings_cache[cache_key] = result
-                return result
-
-            # For regular TRADING_HOLIDAY, if all exchanges are closed, return empty
-            if closed_exchanges == set(SUPPORTED_EXCHANGES) and not open_with_timings:
-                _timings_cache[cache_key] = []
-                return []
-
-            # Build result with open exchanges only (closed exchanges not included)
-            result = list(open_with_timings.values())
-            _timings_cache[cache_key] = result
-            return result
-
-        # Normal trading day - return timings for all exchanges from DB
-        result = []
-        for exchange in SUPPORTED_EXCHANGES:
-            timings = timing_offsets.get(exchange, DEFAULT_MARKET_TIMINGS.get(exchange, {}))
-            if timings:
-                result.append({
-                    'exchange': exchange,
-                    'start_time': midnight_epoch + timings['start_offset'],
-                    'end_time': midnight_epoch + timings['end_offset']
-                })
-
-        _timings_cache[cache_key] = result
-        return result
-
+        return _get_year_index(query_date.year)['timings'][query_date]
     except Exception as e:
         logger.error(f"Error fetching market timings for {query_date}: {e}")
         return []
@@ -671,39 +711,50 @@ def is_market_holiday(query_date: date, exchange: str = None) -> bool:
     Returns:
         True if it's a holiday (or weekend), False otherwise
     """
-    # Weekend check
-    if query_date.weekday() >= 5:
-        return True
-
-    holiday = Holiday.query.filter(Holiday.holiday_date == query_date).first()
+    holiday = _get_year_index(query_date.year)['holidays'].get(query_date)
 
     if not holiday:
-        return False
+        # Weekend check
+        return query_date.weekday() >= 5
+
+    holiday_type, exchanges = holiday
 
-    # Special sessions are not full holidays
-    if holiday.holiday_type == 'SPECIAL_SESSION':
+    # Special sessions (even on a weekend) are not full holidays
+    if holiday_type == 'SPECIAL_SESSION':
         return False
 
+    # Weekend check
+    if query_date.weekday() >= 5:
+        return True
+
     if exchange:
         # Check if specific exchange is closed
-        exchange_info = HolidayExchange.query.filter(
-            HolidayExchange.holiday_id == holiday.id,
-            HolidayExchange.exchange_code == exchange.upper()
-        ).first()
-
-        if exchange_info:
-            return not exchange_info.is_open
+        is_open = exchanges.get(exchange.upper())
+        if is_open is not None:
+            return not is_open
         return False  # Exchange not in holiday list means it's open
 
     return True  # It's a holiday
 
 
+def add_calendar_listener(callback: Callable[[], None]) -> None:
+    """Register a callback run (in this process) whenever the calendar caches are cleared"""
+    _calendar_listeners.append(callback)
+
+
 def clear_market_calendar_cache():
     """Clear all market calendar caches"""
-    _timings_cache.clear()
+    with _year_index_lock:
+        _year_index.clear()
     _holidays_cache.clear()
     logger.info("Market calendar cache cleared")
 
+    for callback in list(_calendar_listeners):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in market calendar listener: {e}")
+
 
 def reset_holiday_data():
     """
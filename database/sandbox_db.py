@@ -7,7 +7,9 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, DECIMAL, Date
 from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
-from datetime import datetime
+from datetime import datetime, time
+from decimal import Decimal
+import threading
 from utils.logging import get_logger
 from dotenv import load_dotenv
 
@@ -353,17 +355,90 @@ def init_default_config():
             db_session.rollback()
             logger.error(f"Error adding config {config['config_key']}: {e}")
 
+    reload_config()
+
+
+# In-process config snapshot. Sandbox settings change only through set_config
+# (the sandbox settings page), so every read is served from memory and the
+# snapshot is reloaded after each write.
+_config_lock = threading.Lock()
+_config_values = None   # {config_key: raw string value}
+_typed_values = {}      # {config_key: parsed value}
+
+
+def _parse_time(value):
+    hour, minute = map(int, value.split(':'))
+    return time(hour=hour, minute=minute)
+
+
+# Parsers for settings read on the order path; other keys stay strings
+CONFIG_TYPES = {
+    'starting_capital': Decimal,
+    'equity_mis_leverage': Decimal,
+    'equity_cnc_leverage': Decimal,
+    'futures_leverage': Decimal,
+    'option_buy_leverage': Decimal,
+    'option_sell_leverage': Decimal,
+    'smart_order_delay': Decimal,
+    'order_check_interval': int,
+    'mtm_update_interval': int,
+    'order_rate_limit': int,
+    'api_rate_limit': int,
+    'smart_order_rate_limit': int,
+    'reset_time': _parse_time,
+    'nse_bse_square_off_time': _parse_time,
+    'cds_bcd_square_off_time': _parse_time,
+    'mcx_square_off_time': _parse_time,
+    'ncdex_square_off_time': _parse_time,
+}
+
+
+def reload_config():
+    """Reload the config snapshot from the database; returns False if it could not be read"""
+    global _config_values, _typed_values
+    try:
+        values = {config.config_key: config.config_value for config in SandboxConfig.query.all()}
+    except Exception as e:
+        db_session.rollback()
+        logger.error(f"Error loading sandbox config: {e}")
+        return False
+    with _config_lock:
+        _config_values = values
+        _typed_values = {}
+    return True
+
+
+def _config_snapshot():
+    if _config_values is None:
+        reload_config()
+    return _config_values or {}
+
 
 def get_config(config_key, default=None):
-    """Get configuration value by key"""
-    try:
-        config = SandboxConfig.query.filter_by(config_key=config_key).first()
-        if config:
-            return config.config_value
+    """Get configuration value by key (raw string, served from the in-process snapshot)"""
+    return _config_snapshot().get(config_key, default)
+
+
+def get_typed_config(config_key, default=None):
+    """
+    Get a configuration value parsed to its final type (Decimal, int or time,
+    see CONFIG_TYPES). Returns default when the key is missing or unparsable.
+    """
+    typed = _typed_values
+    if config_key in typed:
+        return typed[config_key]
+
+    raw = _config_snapshot().get(config_key)
+    if raw is None:
         return default
+    parser = CONFIG_TYPES.get(config_key, str)
+    try:
+        value = parser(raw)
     except Exception as e:
-        logger.error(f"Error fetching config {config_key}: {e}")
+        logger.error(f"Invalid value for config {config_key}: {raw!r} ({e})")
         return default
+    typed[config_key] = value
+    return value
 
 
 def set_config(config_key, config_value, description=None):
@@ -382,6 +457,7 @@ def set_config(config_key, config_value, description=None):
             )
             db_session.add(config)
         db_session.commit()
+        reload_config()
         logger.info(f"Updated config: {config_key} = {config_value}")
         return True
     except Exception as e:
@@ -0,0 +1,147 @@
+"""
+In-memory security state for the request path.
+
+BanTable holds the active IP bans so SecurityMiddleware can reject banned
+clients without a database query per request. SlidingWindowTracker counts
+404s and invalid API key attempts per IP in memory; pending hits are drained
+periodically and written to the logs database by a background thread
+(see database/traffic_db.py).
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class BanTable:
+    """Thread-safe map of banned IP -> expiry (None means permanent)"""
+
+    def __init__(self):
+        self._bans: Dict[str, Optional[datetime]] = {}
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+
+    def is_banned(self, ip_address: str, now: Optional[datetime] = None) -> bool:
+        with self._lock:
+            if ip_address not in self._bans:
+                return False
+            expires_at = self._bans[ip_address]
+            if expires_at is None:
+                return True
+            if (now or datetime.utcnow()) < expires_at:
+                return True
+            # Expired: forget it here, the database row is removed on the next refresh
+            del self._bans[ip_address]
+            return False
+
+    def add(self, ip_address: str, expires_at: Optional[datetime]) -> None:
+        with self._lock:
+            self._bans[ip_address] = expires_at
+
+    def remove(self, ip_address: str) -> None:
+        with self._lock:
+            self._bans.pop(ip_address, None)
+
+    def replace(self, entries: Iterable[Tuple[str, Optional[datetime]]]) -> None:
+        """Swap in a fresh snapshot of all bans"""
+        bans = dict(entries)
+        with self._lock:
+            self._bans = bans
+            self.loaded_at = time.monotonic()
+
+    def is_stale(self, max_age: float) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= max_age
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._bans)
+
+
+@dataclass
+class PendingHits:
+    """Hits recorded for one key since the last drain"""
+    count: int = 0
+    first_at: Optional[datetime] = None
+    last_at: Optional[datetime] = None
+    details: List[str] = field(default_factory=list)
+
+
+class SlidingWindowTracker:
+    """Per-key event counter over a sliding time window.
+
+    record() is O(1) amortised and never touches the database. Hits also
+    accumulate in a pending buffer that drain() hands to the flusher.
+    """
+
+    def __init__(self, window_seconds: float, max_events_per_key: int = 1000, max_details: int = 50):
+        self.window_seconds = window_seconds
+        self.max_events_per_key = max_events_per_key
+        self.max_details = max_details
+        self._events: Dict[Hashable, deque] = {}
+        self._pending: Dict[Hashable, PendingHits] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, detail: Optional[str] = None, now: Optional[float] = None) -> int:
+        """Record one hit and return the number of hits for key inside the window"""
+        now = time.time() if now is None else now
+        stamp = datetime.utcfromtimestamp(now)
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.max_events_per_key)
+            events.append(now)
+            self._expire(events, now)
+
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = PendingHits(first_at=stamp)
+            pending.count += 1
+            pending.last_at = stamp
+            if detail and detail not in pending.details and len(pending.details) < self.max_details:
+                pending.details.append(detail)
+            return len(events)
+
+    def count(self, key: Hashable, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0
+            self._expire(events, now)
+            return len(events)
+
+    def reset(self, key: Hashable) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+            self._pending.pop(key, None)
+
+    def drain(self) -> Dict[Hashable, PendingHits]:
+        """Return and clear the hits recorded since the previous drain"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            return pending
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop keys with no hits left in the window. Returns the number dropped."""
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = []
+            for key, events in self._events.items():
+                self._expire(events, now)
+                if not events:
+                    idle.append(key)
+            for key in idle:
+                del self._events[key]
+            return len(idle)
+
+    def _expire(self, events: deque, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while events and events[0] <= cutoff:
+            events.popleft()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._events)
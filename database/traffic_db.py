@@ -4,10 +4,17 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.pool import NullPool
 import os
+import re
+import atexit
 import logging
+import socket
+import threading
+import time
 from datetime import datetime, timedelta
 import json
 from database.settings_db import get_security_settings
+from database.security_cache import BanTable, SlidingWindowTracker
+from utils.quantile_sketch import QuantileSketch, RollupAccumulator
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,31 @@ logs_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bi
 LogBase = declarative_base()
 LogBase.query = logs_session.query_property()
 
+# In-memory security state (see database/security_cache.py)
+# Bans are checked in memory on every request and reloaded from the database
+# every IP_BAN_REFRESH_INTERVAL seconds so bans made by other workers apply.
+# 404 and invalid API key hits are written in batches every SECURITY_FLUSH_INTERVAL seconds.
+IP_BAN_REFRESH_INTERVAL = float(os.getenv('IP_BAN_REFRESH_INTERVAL', '30'))
+SECURITY_FLUSH_INTERVAL = float(os.getenv('SECURITY_FLUSH_INTERVAL', '5'))
+TRACKER_WINDOW_SECONDS = 24 * 60 * 60
+
+_ban_table = BanTable()
+_404_window = SlidingWindowTracker(TRACKER_WINDOW_SECONDS, max_details=50)
+_api_key_window = SlidingWindowTracker(TRACKER_WINDOW_SECONDS, max_details=20)
+_worker_state = {'pid': None, 'thread': None}
+
+# Dashboard rollups: hourly request counts and duration sketches per API endpoint,
+# buffered in memory and written at most every METRICS_ROLLUP_FLUSH_INTERVAL seconds
+ROLLUP_BUCKET_SECONDS = 3600
+METRICS_ROLLUP_FLUSH_INTERVAL = float(os.getenv('METRICS_ROLLUP_FLUSH_INTERVAL', '5'))
+ROLLUP_WRITER = f"{socket.gethostname()}:{os.getpid()}"[:100]
+_API_ENDPOINT_PATTERN = re.compile(r'^/api/v1/([a-z_]{1,40})')
+
+_traffic_rollups = RollupAccumulator(ROLLUP_BUCKET_SECONDS)
+_rollup_flush_lock = threading.Lock()
+_worker_lock = threading.Lock()
+_flush_lock = threading.Lock()
+
 class TrafficLog(LogBase):
     """Model for traffic logging"""
     __tablename__ = 'traffic_logs'
@@ -75,6 +107,7 @@ class TrafficLog(LogBase):
             )
             logs_session.add(log)
             logs_session.commit()
+            _record_traffic_rollup(path, status_code, duration_ms)
             return True
         except Exception as e:
             logger.error(f"Error logging traffic: {str(e)}")
@@ -91,19 +124,39 @@ class TrafficLog(LogBase):
             return []
 
     @staticmethod
-    def get_stats():
-        """Get basic traffic statistics"""
+    def get_stats(endpoint=None):
+        """Get basic traffic statistics from the hourly rollups.
+
+        endpoint=None covers all traffic, 'api' all /api/v1/ traffic, any other
+        value a single /api/v1/<endpoint>.
+        """
         try:
-            from sqlalchemy import func
-            
-            total_requests = TrafficLog.query.count()
-            error_requests = TrafficLog.query.filter(TrafficLog.status_code >= 400).count()
-            avg_duration = logs_session.query(func.avg(TrafficLog.duration_ms)).scalar() or 0
-            
+            flush_traffic_rollups()
+
+            query = TrafficRollup.query
+            if endpoint == 'api':
+                query = query.filter(TrafficRollup.endpoint != '')
+            elif endpoint:
+                query = query.filter_by(endpoint=endpoint)
+
+            total_requests = error_requests = 0
+            total_duration = 0.0
+            sketch = QuantileSketch()
+            for row in query.all():
+                total_requests += row.count or 0
+                error_requests += row.errors or 0
+                total_duration += row.sum_duration or 0
+                sketch.merge(QuantileSketch.from_json(row.duration_sketch))
+
+            avg_duration = total_duration / total_requests if total_requests else 0
+
             return {
                 'total_requests': total_requests,
                 'error_requests': error_requests,
-                'avg_duration': round(float(avg_duration), 2)
+                'avg_duration': round(float(avg_duration), 2),
+                'p50_duration': round(sketch.quantile(0.50), 2),
+                'p95_duration': round(sketch.quantile(0.95), 2),
+                'p99_duration': round(sketch.quantile(0.99), 2)
             }
         except Exception as e:
             logger.error(f"Error getting traffic stats: {str(e)}")
@@ -113,6 +166,53 @@ class TrafficLog(LogBase):
                 'avg_duration': 0
             }
 
+    @staticmethod
+    def get_timeseries(hours=24, endpoint=None):
+        """Hourly request count, error count and duration percentiles for the last `hours` hours"""
+        try:
+            flush_traffic_rollups()
+            cutoff = datetime.utcnow() - timedelta(hours=hours)
+            query = TrafficRollup.query.filter(TrafficRollup.bucket_start >= cutoff)
+            if endpoint:
+                query = query.filter_by(endpoint=endpoint)
+
+            buckets = {}
+            for row in query.all():
+                bucket = buckets.setdefault(row.bucket_start, {'count': 0, 'errors': 0, 'sketch': QuantileSketch()})
+                bucket['count'] += row.count or 0
+                bucket['errors'] += row.errors or 0
+                bucket['sketch'].merge(QuantileSketch.from_json(row.duration_sketch))
+
+            return [{
+                'bucket_start': start.isoformat(),
+                'total_requests': bucket['count'],
+                'error_requests': bucket['errors'],
+                'avg_duration': round(bucket['sketch'].mean, 2),
+                'p50_duration': round(bucket['sketch'].quantile(0.50), 2),
+                'p99_duration': round(bucket['sketch'].quantile(0.99), 2)
+            } for start, bucket in sorted(buckets.items())]
+        except Exception as e:
+            logger.error(f"Error getting traffic timeseries: {str(e)}")
+            return []
+
+class TrafficRollup(LogBase):
+    """Hourly pre-aggregated traffic per API endpoint (one row per writer process)"""
+    __tablename__ = 'traffic_rollups'
+
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)
+    endpoint = Column(String(50), nullable=False, default='')  # '' for non-API paths
+    writer = Column(String(100), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    sum_duration = Column(Float, nullable=False, default=0)
+    duration_sketch = Column(Text)  # Serialized QuantileSketch (JSON)
+
+    __table_args__ = (
+        Index('idx_traffic_rollup_key', 'bucket_start', 'endpoint', 'writer', unique=True),
+        Index('idx_traffic_rollup_endpoint', 'endpoint'),
+    )
+
 class IPBan(LogBase):
     """Model for banned IPs"""
     __tablename__ = 'ip_bans'
@@ -128,31 +228,36 @@ class IPBan(LogBase):
 
     @staticmethod
     def is_ip_banned(ip_address):
-        """Check if an IP is currently banned"""
+        """Check if an IP is currently banned (in-memory, no database query)"""
+        _ensure_security_worker()
+        if _ban_table.loaded_at is None:
+            IPBan.refresh_ban_table()
+        return _ban_table.is_banned(ip_address)
+
+    @staticmethod
+    def refresh_ban_table():
+        """Delete expired bans and reload the in-memory ban table. Returns the active bans."""
         try:
-            ban = IPBan.query.filter_by(ip_address=ip_address).first()
-            if not ban:
-                return False
+            expired = IPBan.query.filter(
+                IPBan.is_permanent == False,
+                IPBan.expires_at < datetime.utcnow()
+            ).all()
 
-            # Check permanent ban
-            if ban.is_permanent:
-                return True
+            for ban in expired:
+                logs_session.delete(ban)
 
-            # Check temporary ban expiry
-            if ban.expires_at:
-                if datetime.utcnow() < ban.expires_at.replace(tzinfo=None):
-                    return True
-                else:
-                    # Ban expired, remove it
-                    logs_session.delete(ban)
-                    logs_session.commit()
-                    return False
+            logs_session.commit()
 
-            return False
+            bans = IPBan.query.all()
+            _ban_table.replace(
+                (ban.ip_address, None if ban.is_permanent else _naive(ban.expires_at))
+                for ban in bans
+            )
+            return bans
         except Exception as e:
-            logger.error(f"Error checking IP ban status: {e}")
+            logger.error(f"Error refreshing IP ban table: {e}")
             logs_session.rollback()
-            return False
+            return []
 
     @staticmethod
     def ban_ip(ip_address, reason, duration_hours=24, permanent=False, created_by='system'):
@@ -168,6 +273,7 @@ class IPBan(LogBase):
             repeat_limit = security_settings['repeat_offender_limit']
 
             existing_ban = IPBan.query.filter_by(ip_address=ip_address).first()
+            ban = existing_ban
 
             if existing_ban:
                 # Increment ban count for repeat offender
@@ -195,6 +301,7 @@ class IPBan(LogBase):
                 logs_session.add(ban)
 
             logs_session.commit()
+            _ban_table.add(ip_address, None if ban.is_permanent else _naive(ban.expires_at))
             logger.info(f"IP {ip_address} banned: {reason}")
             return True
         except Exception as e:
@@ -210,8 +317,10 @@ class IPBan(LogBase):
             if ban:
                 logs_session.delete(ban)
                 logs_session.commit()
+                _ban_table.remove(ip_address)
                 logger.info(f"IP {ip_address} unbanned")
                 return True
+            _ban_table.remove(ip_address)
             return False
         except Exception as e:
             logger.error(f"Error unbanning IP: {e}")
@@ -221,23 +330,8 @@ class IPBan(LogBase):
     @staticmethod
     def get_all_bans():
         """Get all current IP bans"""
-        try:
-            # Remove expired bans first
-            expired = IPBan.query.filter(
-                IPBan.is_permanent == False,
-                IPBan.expires_at < datetime.utcnow()
-            ).all()
-
-            for ban in expired:
-                logs_session.delete(ban)
-
-            logs_session.commit()
-
-            # Return active bans
-            return IPBan.query.all()
-        except Exception as e:
-            logger.error(f"Error getting IP bans: {e}")
-            return []
+        # Removes expired bans and resyncs the in-memory table on the way
+        return IPBan.refresh_ban_table()
 
 class Error404Tracker(LogBase):
     """Track 404 errors per IP for bot detection"""
@@ -258,74 +352,42 @@ class Error404Tracker(LogBase):
 
     @staticmethod
     def track_404(ip_address, path):
-        """Track a 404 error for an IP"""
+        """Track a 404 error for an IP (in memory; written to the database in the background)"""
         try:
             # Check if already banned
             if IPBan.is_ip_banned(ip_address):
                 return False
 
-            # Get security settings from database
-            security_settings = get_security_settings()
-            threshold_404 = security_settings['404_threshold']
-            ban_duration_404 = security_settings['404_ban_duration']
+            # Sliding 24 hour window, flushed to error_404_tracker by the security worker
+            _404_window.record(ip_address, path)
 
-            now = datetime.utcnow()
-            tracker = Error404Tracker.query.filter_by(ip_address=ip_address).first()
+            # Automated bans are disabled; IPs are banned manually from the /security dashboard
+            return True
 
-            if tracker:
-                # Check if tracking period expired (24 hours)
-                if (now - tracker.first_error_at.replace(tzinfo=None)).days >= 1:
-                    # Reset counter for new day
-                    tracker.error_count = 1
-                    tracker.first_error_at = now
-                    tracker.paths_attempted = json.dumps([path])
-                else:
-                    # Increment counter
-                    tracker.error_count += 1
-
-                    # Add path to attempted paths
-                    paths = json.loads(tracker.paths_attempted or '[]')
-                    if path not in paths:
-                        paths.append(path)
-                        tracker.paths_attempted = json.dumps(paths[-50:])  # Keep last 50 paths
-
-                tracker.last_error_at = now
-
-                # Check if threshold reached (configurable, default 20 404s per day)
-                # AUTOMATED BAN DISABLED - Manual ban only via /security dashboard
-                # if tracker.error_count >= threshold_404:
-                #     # Don't ban localhost IPs
-                #     if ip_address not in ['127.0.0.1', '::1', 'localhost']:
-                #         # Ban the IP
-                #         IPBan.ban_ip(
-                #             ip_address=ip_address,
-                #             reason=f"Exceeded 404 threshold: {tracker.error_count} errors in 24 hours",
-                #             duration_hours=ban_duration_404,
-                #             created_by='404_detector'
-                #         )
-                #
-                #         # Clean up tracker entry
-                #         logs_session.delete(tracker)
-            else:
-                # Create new tracker
-                tracker = Error404Tracker(
-                    ip_address=ip_address,
-                    error_count=1,
-                    paths_attempted=json.dumps([path])
-                )
-                logs_session.add(tracker)
+        except Exception as e:
+            logger.error(f"Error tracking 404: {e}")
+            return False
 
+    @staticmethod
+    def clear_ip(ip_address):
+        """Clear the 404 tracker for an IP, in memory and in the database. Returns True if a row existed."""
+        _404_window.reset(ip_address)
+        try:
+            tracker = Error404Tracker.query.filter_by(ip_address=ip_address).first()
+            if not tracker:
+                return False
+            logs_session.delete(tracker)
             logs_session.commit()
             return True
-
         except Exception as e:
-            logger.error(f"Error tracking 404: {e}")
+            logger.error(f"Error clearing 404 tracker: {e}")
             logs_session.rollback()
             return False
 
     @staticmethod
     def get_suspicious_ips(min_errors=5):
         """Get IPs with suspicious 404 activity"""
+        flush_security_counters()
         try:
             # Clean up old entries (older than 24 hours)
             cutoff = datetime.utcnow() - timedelta(days=1)
@@ -365,76 +427,26 @@ class InvalidAPIKeyTracker(LogBase):
 
     @staticmethod
     def track_invalid_api_key(ip_address, api_key_hash=None):
-        """Track an invalid API key attempt"""
+        """Track an invalid API key attempt (in memory; written to the database in the background)"""
         try:
             # Check if already banned
             if IPBan.is_ip_banned(ip_address):
                 return False
 
-            # Get security settings from database
-            security_settings = get_security_settings()
-            threshold_api = security_settings['api_threshold']
-            ban_duration_api = security_settings['api_ban_duration']
-
-            now = datetime.utcnow()
-            tracker = InvalidAPIKeyTracker.query.filter_by(ip_address=ip_address).first()
-
-            if tracker:
-                # Check if tracking period expired (24 hours)
-                if (now - tracker.first_attempt_at.replace(tzinfo=None)).days >= 1:
-                    # Reset counter for new day
-                    tracker.attempt_count = 1
-                    tracker.first_attempt_at = now
-                    tracker.api_keys_tried = json.dumps([api_key_hash] if api_key_hash else [])
-                else:
-                    # Increment counter
-                    tracker.attempt_count += 1
-
-                    # Add API key hash to tried list
-                    if api_key_hash:
-                        keys_tried = json.loads(tracker.api_keys_tried or '[]')
-                        if api_key_hash not in keys_tried:
-                            keys_tried.append(api_key_hash)
-                            tracker.api_keys_tried = json.dumps(keys_tried[-20:])  # Keep last 20 keys
-
-                tracker.last_attempt_at = now
-
-                # Check if threshold reached (configurable, default 10 invalid API keys per day)
-                # AUTOMATED BAN DISABLED - Manual ban only via /security dashboard
-                # if tracker.attempt_count >= threshold_api:
-                #     # Don't ban localhost IPs but keep tracking
-                #     if ip_address not in ['127.0.0.1', '::1', 'localhost']:
-                #         # Ban the IP
-                #         success = IPBan.ban_ip(
-                #             ip_address=ip_address,
-                #             reason=f"Exceeded invalid API key threshold: {tracker.attempt_count} attempts in 24 hours",
-                #             duration_hours=ban_duration_api,  # Configurable hours for API abuse
-                #             created_by='api_key_detector'
-                #         )
-                #
-                #         # Only delete tracker if ban was successful
-                #         if success:
-                #             logs_session.delete(tracker)
-            else:
-                # Create new tracker
-                tracker = InvalidAPIKeyTracker(
-                    ip_address=ip_address,
-                    attempt_count=1,
-                    api_keys_tried=json.dumps([api_key_hash] if api_key_hash else [])
-                )
-                logs_session.add(tracker)
+            # Sliding 24 hour window, flushed to invalid_api_key_tracker by the security worker
+            _api_key_window.record(ip_address, api_key_hash)
 
-            logs_session.commit()
+            # Automated bans are disabled; IPs are banned manually from the /security dashboard
             return True
 
         except Exception as e:
             logger.error(f"Error tracking invalid API key: {e}")
-            logs_session.rollback()
             return False
 
     @staticmethod
     def get_suspicious_api_users(min_attempts=3):
         """Get IPs with suspicious API key activity"""
+        flush_security_counters()
         try:
             # Clean up old entries (older than 24 hours)
             cutoff = datetime.utcnow() - timedelta(days=1)
@@ -455,6 +467,162 @@ class InvalidAPIKeyTracker(LogBase):
             logger.error(f"Error getting suspicious API users: {e}")
             return []
 
+def _traffic_endpoint(path, status_code):
+    """Rollup key for a request path: the /api/v1/ endpoint name, 'other' or '' for non-API paths"""
+    if not path or not path.startswith('/api/v1/'):
+        return ''
+    match = _API_ENDPOINT_PATTERN.match(path)
+    # Unknown endpoints (404s) share one key so random paths cannot grow the table
+    if not match or status_code == 404:
+        return 'other'
+    return match.group(1)
+
+def _record_traffic_rollup(path, status_code, duration_ms, when=None, accumulator=None):
+    """Add one request to the in-memory traffic rollups"""
+    (accumulator or _traffic_rollups).record(
+        _traffic_endpoint(path, status_code),
+        {'duration': duration_ms},
+        when=when,
+        count=1,
+        errors=1 if status_code >= 400 else 0,
+        sum_duration=duration_ms or 0,
+    )
+    if accumulator is None and _traffic_rollups.due(METRICS_ROLLUP_FLUSH_INTERVAL):
+        flush_traffic_rollups()
+
+def _write_traffic_rollups(pending, writer):
+    for (start, endpoint), delta in pending.items():
+        row = TrafficRollup.query.filter_by(bucket_start=start, endpoint=endpoint, writer=writer).first()
+        if row is None:
+            row = TrafficRollup(bucket_start=start, endpoint=endpoint, writer=writer,
+                                count=0, errors=0, sum_duration=0)
+            logs_session.add(row)
+
+        for name, amount in delta.counters.items():
+            setattr(row, name, (getattr(row, name) or 0) + amount)
+        sketch = QuantileSketch.from_json(row.duration_sketch)
+        if 'duration' in delta.sketches:
+            sketch.merge(delta.sketches['duration'])
+        row.duration_sketch = sketch.to_json()
+
+def flush_traffic_rollups():
+    """Write buffered traffic rollups for this process to the logs database"""
+    with _rollup_flush_lock:
+        pending = _traffic_rollups.drain()
+        if not pending:
+            return 0
+        try:
+            _write_traffic_rollups(pending, ROLLUP_WRITER)
+            logs_session.commit()
+            return len(pending)
+        except Exception as e:
+            logger.error(f"Error flushing traffic rollups ({len(pending)} buckets dropped): {str(e)}")
+            logs_session.rollback()
+            return 0
+
+def rebuild_traffic_rollups(batch_size=5000):
+    """Recompute all traffic rollups from traffic_logs (used to backfill existing databases)"""
+    try:
+        _traffic_rollups.drain()
+        logs_session.query(TrafficRollup).delete(synchronize_session=False)
+
+        accumulator = RollupAccumulator(ROLLUP_BUCKET_SECONDS)
+        rows = 0
+        for log in TrafficLog.query.yield_per(batch_size):
+            _record_traffic_rollup(log.path, log.status_code, log.duration_ms,
+                                   when=_naive(log.timestamp), accumulator=accumulator)
+            rows += 1
+
+        _write_traffic_rollups(accumulator.drain(), 'backfill')
+        logs_session.commit()
+        logger.info(f"Rebuilt traffic rollups from {rows} rows")
+        return rows
+    except Exception as e:
+        logger.error(f"Error rebuilding traffic rollups: {str(e)}")
+        logs_session.rollback()
+        return 0
+
+def _naive(value):
+    return value.replace(tzinfo=None) if value is not None else None
+
+def _merge_pending(model, ip_address, pending, count_col, first_col, last_col, details_col, keep):
+    """Apply hits drained from a SlidingWindowTracker to one tracker row"""
+    tracker = model.query.filter_by(ip_address=ip_address).first()
+
+    if tracker is None:
+        tracker = model(ip_address=ip_address)
+        setattr(tracker, count_col, 0)
+        setattr(tracker, first_col, pending.first_at)
+        setattr(tracker, details_col, '[]')
+        logs_session.add(tracker)
+    elif (pending.first_at - _naive(getattr(tracker, first_col))).days >= 1:
+        # Tracking period expired (24 hours), start a new one
+        setattr(tracker, count_col, 0)
+        setattr(tracker, first_col, pending.first_at)
+        setattr(tracker, details_col, '[]')
+
+    setattr(tracker, count_col, (getattr(tracker, count_col) or 0) + pending.count)
+    setattr(tracker, last_col, pending.last_at)
+
+    details = json.loads(getattr(tracker, details_col) or '[]')
+    for detail in pending.details:
+        if detail not in details:
+            details.append(detail)
+    setattr(tracker, details_col, json.dumps(details[-keep:]))
+
+def flush_security_counters():
+    """Write 404 and invalid API key hits recorded in memory to the logs database"""
+    with _flush_lock:
+        pending_404 = _404_window.drain()
+        pending_api = _api_key_window.drain()
+        if not pending_404 and not pending_api:
+            return 0
+
+        try:
+            for ip_address, pending in pending_404.items():
+                _merge_pending(Error404Tracker, ip_address, pending,
+                               'error_count', 'first_error_at', 'last_error_at', 'paths_attempted', 50)
+            for ip_address, pending in pending_api.items():
+                _merge_pending(InvalidAPIKeyTracker, ip_address, pending,
+                               'attempt_count', 'first_attempt_at', 'last_attempt_at', 'api_keys_tried', 20)
+            logs_session.commit()
+            return len(pending_404) + len(pending_api)
+        except Exception as e:
+            logger.error(f"Error flushing security counters ({len(pending_404)} 404 / {len(pending_api)} API key IPs dropped): {e}")
+            logs_session.rollback()
+            return 0
+
+def _security_worker_loop():
+    """Flush tracker hits and keep the ban table fresh"""
+    while True:
+        time.sleep(SECURITY_FLUSH_INTERVAL)
+        try:
+            flush_security_counters()
+            if _ban_table.is_stale(IP_BAN_REFRESH_INTERVAL):
+                IPBan.refresh_ban_table()
+            _404_window.prune()
+            _api_key_window.prune()
+        except Exception as e:
+            logger.error(f"Security state worker error: {e}")
+        finally:
+            logs_session.remove()
+
+def _ensure_security_worker():
+    """Start the background worker once per process (threads do not survive a fork)"""
+    pid = os.getpid()
+    if _worker_state['pid'] == pid:
+        return
+    with _worker_lock:
+        if _worker_state['pid'] == pid:
+            return
+        thread = threading.Thread(target=_security_worker_loop, name='security-state-worker', daemon=True)
+        thread.start()
+        _worker_state['pid'] = pid
+        _worker_state['thread'] = thread
+
+atexit.register(flush_security_counters)
+atexit.register(flush_traffic_rollups)
+
 def init_logs_db():
     """Initialize the logs database"""
     # Extract directory from database URL and create if it doesn't exist
@@ -3,9 +3,21 @@
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
-# Initialize Flask-Limiter without the app object
-limiter = Limiter(
-        key_func=get_remote_address,
-        storage_uri="memory://",
-        strategy="moving-window"
-        )
+from utils.shared_rate_limit import shared_storage_enabled
+
+if shared_storage_enabled():
+    # Counters shared by all workers on this host; fixed window keeps each check O(1)
+    from utils.limiter_storage import get_storage_uri
+
+    limiter = Limiter(
+            key_func=get_remote_address,
+            storage_uri=get_storage_uri(),
+            strategy="fixed-window"
+            )
+else:
+    # Initialize Flask-Limiter without the app object
+    limiter = Limiter(
+            key_func=get_remote_address,
+            storage_uri="memory://",
+            strategy="moving-window"
+            )
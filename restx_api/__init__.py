@@ -45,6 +45,7 @@ from .chart_api import api as chart_ns
 from .market_holidays import api as market_holidays_ns
 from .market_timings import api as market_timings_ns
 from .pnl_symbols import api as pnl_symbols_ns
+from .bars import api as bars_ns
 
 # Add namespaces
 api.add_namespace(place_order_ns, path='/placeorder')
@@ -87,3 +88,4 @@ api.add_namespace(chart_ns, path='/chart')
 api.add_namespace(market_holidays_ns, path='/market/holidays')
 api.add_namespace(market_timings_ns, path='/market/timings')
 api.add_namespace(pnl_symbols_ns, path='/pnl')
+api.add_namespace(bars_ns, path='/bars')
@@ -0,0 +1,52 @@
+from flask_restx import Namespace, Resource
+from flask import request, jsonify, make_response
+from marshmallow import ValidationError
+from limiter import limiter
+import os
+
+from .data_schemas import BarsSchema
+from services.bars_service import get_live_bars
+from utils.logging import get_logger
+
+API_RATE_LIMIT = os.getenv("API_RATE_LIMIT", "10 per second")
+api = Namespace('bars', description='Live OHLCV Bars API')
+
+# Initialize logger
+logger = get_logger(__name__)
+
+# Initialize schema
+bars_schema = BarsSchema()
+
+
+@api.route('/', strict_slashes=False)
+class Bars(Resource):
+    @limiter.limit(API_RATE_LIMIT)
+    def post(self):
+        """Get recent bars built from the live tick stream"""
+        try:
+            # Validate request data
+            bars_data = bars_schema.load(request.json)
+
+            # Call the service function to get bars
+            success, response_data, status_code = get_live_bars(
+                symbol=bars_data['symbol'],
+                exchange=bars_data['exchange'],
+                interval=bars_data['interval'],
+                limit=bars_data.get('limit'),
+                api_key=bars_data['apikey']
+            )
+
+            return make_response(jsonify(response_data), status_code)
+
+        except ValidationError as err:
+            return make_response(jsonify({
+                'status': 'error',
+                'message': err.messages
+            }), 400)
+
+        except Exception as e:
+            logger.exception(f"Unexpected error in bars endpoint: {e}")
+            return make_response(jsonify({
+                'status': 'error',
+                'message': 'An unexpected error occurred'
+            }), 500)
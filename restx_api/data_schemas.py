@@ -134,3 +134,10 @@ class MarketHolidaysSchema(Schema):
 class MarketTimingsSchema(Schema):
     apikey = fields.Str(required=True)      # API Key for authentication
     date = fields.Str(required=True)        # Date in YYYY-MM-DD format
+
+class BarsSchema(Schema):
+    apikey = fields.Str(required=True)      # API Key for authentication
+    symbol = fields.Str(required=True)
+    exchange = fields.Str(required=True)    # Exchange (e.g., NSE, NFO, NSE_INDEX)
+    interval = fields.Str(required=True, validate=validate.OneOf(["1s", "1m", "5m", "15m"]))
+    limit = fields.Int(required=False, validate=validate.Range(min=1, max=5000))  # Most recent completed bars to return (defaults to all buffered)
@@ -11,7 +11,7 @@ Manages the execution engine as a daemon thread that:
 import threading
 import time
 from utils.logging import get_logger
-from database.sandbox_db import get_config
+from database.sandbox_db import get_typed_config
 
 logger = get_logger(__name__)
 
@@ -27,7 +27,7 @@ class ExecutionEngineThread(threading.Thread):
     def __init__(self):
         super().__init__(daemon=True, name="SandboxExecutionEngine")
         self.stop_event = threading.Event()
-        self.check_interval = int(get_config('order_check_interval', '5'))
+        self.check_interval = get_typed_config('order_check_interval', 5)
 
     def run(self):
         """Main thread loop"""
@@ -118,5 +118,5 @@ def get_execution_engine_status():
     return {
         'running': is_execution_engine_running(),
         'thread_name': _execution_thread.name if _execution_thread else None,
-        'check_interval': int(get_config('order_check_interval', '5'))
+        'check_interval': get_typed_config('order_check_interval', 5)
     }
@@ -19,7 +19,7 @@ import os
 import sys
 import threading
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import pytz
 
 # Add parent directory to path
@@ -27,7 +27,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.sandbox_db import (
     SandboxFunds, SandboxPositions, SandboxHoldings,
-    db_session, get_config
+    db_session, get_config, get_typed_config
 )
 from database.token_db import get_symbol_info
 from utils.logging import get_logger
@@ -58,7 +58,7 @@ class FundManager:
 
     def __init__(self, user_id):
         self.user_id = user_id
-        self.starting_capital = Decimal(get_config('starting_capital', '10000000.00'))
+        self.starting_capital = get_typed_config('starting_capital', Decimal('10000000.00'))
 
     def initialize_funds(self):
         """Initialize funds for a new user"""
@@ -146,13 +146,12 @@ class FundManager:
                 last_reset = ist.localize(last_reset)
 
             # Check if it's the configured reset day and we haven't reset today
-            reset_time_str = get_config('reset_time', '00:00')
+            reset_time = get_typed_config('reset_time', time(0, 0))
 
             if now.strftime('%A') == reset_day:
-                reset_hour, reset_minute = map(int, reset_time_str.split(':'))
                 reset_time_today = now.replace(
-                    hour=reset_hour,
-                    minute=reset_minute,
+                    hour=reset_time.hour,
+                    minute=reset_time.minute,
                     second=0,
                     microsecond=0
                 )
@@ -393,23 +392,23 @@ class FundManager:
             # Equity exchanges
             if exchange in ['NSE', 'BSE']:
                 if product == 'MIS':
-                    return Decimal(get_config('equity_mis_leverage', '5'))
+                    return get_typed_config('equity_mis_leverage', Decimal('5'))
                 elif product == 'CNC':
-                    return Decimal(get_config('equity_cnc_leverage', '1'))
+                    return get_typed_config('equity_cnc_leverage', Decimal('1'))
                 else:  # NRML
-                    return Decimal(get_config('equity_cnc_leverage', '1'))
+                    return get_typed_config('equity_cnc_leverage', Decimal('1'))
 
             # Futures (NFO, BFO, MCX, CDS, BCD, NCDEX exchanges with FUT suffix)
             elif is_future(symbol, exchange):
-                return Decimal(get_config('futures_leverage', '10'))
+                return get_typed_config('futures_leverage', Decimal('10'))
 
             # Options (NFO, BFO, MCX, CDS, BCD, NCDEX exchanges with CE/PE suffix)
             elif is_option(symbol, exchange):
                 # Options use different leverage based on BUY vs SELL
                 if action == 'BUY':
-                    return Decimal(get_config('option_buy_leverage', '1'))
+                    return get_typed_config('option_buy_leverage', Decimal('1'))
                 else:  # SELL
-                    return Decimal(get_config('option_sell_leverage', '1'))
+                    return get_typed_config('option_sell_leverage', Decimal('1'))
 
             # Default to 1x leverage
             return Decimal('1')
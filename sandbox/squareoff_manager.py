@@ -20,7 +20,7 @@ from decimal import Decimal
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.sandbox_db import (
-    SandboxPositions, db_session, get_config
+    SandboxPositions, db_session, get_typed_config
 )
 from sandbox.position_manager import PositionManager
 from utils.logging import get_logger
@@ -36,25 +36,16 @@ class SquareOffManager:
 
         # Load square-off times from config
         self.square_off_times = {
-            'NSE': self._parse_time(get_config('nse_bse_square_off_time', '15:15')),
-            'BSE': self._parse_time(get_config('nse_bse_square_off_time', '15:15')),
-            'NFO': self._parse_time(get_config('nse_bse_square_off_time', '15:15')),
-            'BFO': self._parse_time(get_config('nse_bse_square_off_time', '15:15')),
-            'CDS': self._parse_time(get_config('cds_bcd_square_off_time', '16:45')),
-            'BCD': self._parse_time(get_config('cds_bcd_square_off_time', '16:45')),
-            'MCX': self._parse_time(get_config('mcx_square_off_time', '23:30')),
-            'NCDEX': self._parse_time(get_config('ncdex_square_off_time', '17:00')),
+            'NSE': get_typed_config('nse_bse_square_off_time', time(15, 15)),
+            'BSE': get_typed_config('nse_bse_square_off_time', time(15, 15)),
+            'NFO': get_typed_config('nse_bse_square_off_time', time(15, 15)),
+            'BFO': get_typed_config('nse_bse_square_off_time', time(15, 15)),
+            'CDS': get_typed_config('cds_bcd_square_off_time', time(16, 45)),
+            'BCD': get_typed_config('cds_bcd_square_off_time', time(16, 45)),
+            'MCX': get_typed_config('mcx_square_off_time', time(23, 30)),
+            'NCDEX': get_typed_config('ncdex_square_off_time', time(17, 0)),
         }
 
-    def _parse_time(self, time_str):
-        """Parse time string (HH:MM) to time object"""
-        try:
-            hour, minute = map(int, time_str.split(':'))
-            return time(hour=hour, minute=minute)
-        except Exception as e:
-            logger.error(f"Error parsing time '{time_str}': {e}")
-            return time(15, 15)  # Default to 3:15 PM
-
     def check_and_square_off(self):
         """
         Check if it's time to square-off positions and execute
@@ -0,0 +1,379 @@
+"""
+Streaming OHLCV bar builder fed by the live tick stream.
+
+Ticks arrive through MarketDataService subscribers (and from the WebSocket
+proxy for clients subscribed in bar mode). Every instrument gets one forming
+bar per interval; a bar is completed when a tick lands in a later bucket or,
+for quiet instruments, when the flush thread sees its end time has passed.
+Completed bars go into a fixed-size ring buffer per (instrument, interval)
+and are handed to listeners (the proxy publishes them as BAR mode).
+
+Bars are aligned to the exchange session start from market_calendar_db, the
+last bar of a session ends at the session close, and ticks outside the
+session are ignored. When no timings are available bars are aligned to the
+clock.
+
+Feed volume is cumulative for the day, so bar volume is the difference
+between consecutive ticks; it restarts from zero with each new session.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Interval name -> length in seconds
+BAR_INTERVALS = {'1s': 1, '1m': 60, '5m': 300, '15m': 900}
+
+# Subscription mode used by the WebSocket proxy for completed bars
+BAR_MODE = 4
+
+BAR_BUFFER_SIZE = int(os.getenv('BAR_BUFFER_SIZE', '500'))
+# Seconds a bar stays open past its end waiting for late ticks before the flush thread closes it
+BAR_CLOSE_DELAY = float(os.getenv('BAR_CLOSE_DELAY', '2'))
+
+
+def get_bar_intervals() -> List[str]:
+    """Intervals to build, from BAR_INTERVALS (e.g. '1m,5m'); unknown names are ignored"""
+    configured = os.getenv('BAR_INTERVALS', ','.join(BAR_INTERVALS))
+    names = [name.strip() for name in configured.split(',') if name.strip() in BAR_INTERVALS]
+    return names or list(BAR_INTERVALS)
+
+
+def _tick_time(value: Any, now: float) -> float:
+    """Exchange timestamp in epoch seconds (feeds send seconds or milliseconds), else arrival time"""
+    try:
+        ts = float(value)
+    except (TypeError, ValueError):
+        return now
+    if ts > 1e12:
+        return ts / 1000.0
+    if ts > 1e9:
+        return ts
+    return now
+
+
+def _load_sessions(day: date) -> Optional[Dict[str, Tuple[float, float]]]:
+    """{exchange: (start, end)} in epoch seconds for the day, or None if timings are unavailable"""
+    try:
+        from database.market_calendar_db import get_market_timings_for_date
+        timings = get_market_timings_for_date(day)
+    except Exception as e:
+        logger.debug(f"Market timings unavailable for {day}, bars will be clock aligned: {e}")
+        return None
+    return {
+        timing['exchange']: (timing['start_time'] / 1000.0, timing['end_time'] / 1000.0)
+        for timing in timings
+    }
+
+
+class _Bar:
+    """A forming bar"""
+
+    __slots__ = ('start', 'end', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, start: float, end: float, price: float):
+        self.start = start
+        self.end = end
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'timestamp': int(self.start),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': int(self.volume)
+        }
+
+
+class _Instrument:
+    """Per-instrument builder state"""
+
+    __slots__ = ('bars', 'closed_until', 'history', 'last_volume', 'last_tick', 'session_day')
+
+    def __init__(self, intervals: List[str], buffer_size: int):
+        self.bars: Dict[str, Optional[_Bar]] = dict.fromkeys(intervals)
+        # End of the last completed bar per interval; late ticks roll into the next bar
+        self.closed_until: Dict[str, float] = dict.fromkeys(intervals, 0.0)
+        self.history: Dict[str, Deque[Dict[str, Any]]] = {
+            interval: deque(maxlen=buffer_size) for interval in intervals
+        }
+        self.last_volume: Optional[float] = None
+        self.last_tick = 0.0
+        self.session_day: Optional[date] = None
+
+
+class BarAggregator:
+    """Builds OHLCV bars for every instrument seen on the tick stream"""
+
+    def __init__(self, intervals: Optional[List[str]] = None, buffer_size: int = BAR_BUFFER_SIZE,
+                 close_delay: float = BAR_CLOSE_DELAY,
+                 session_loader: Callable[[date], Optional[Dict[str, Tuple[float, float]]]] = _load_sessions):
+        self.intervals = [(name, BAR_INTERVALS[name]) for name in (intervals or get_bar_intervals())]
+        self.buffer_size = buffer_size
+        self.close_delay = close_delay
+        self._session_loader = session_loader
+        self._sessions: Dict[date, Optional[Dict[str, Tuple[float, float]]]] = {}
+
+        self._instruments: Dict[Tuple[str, str], _Instrument] = {}
+        self._lock = threading.Lock()
+
+        self._listeners: Dict[int, Callable] = {}
+        self._listener_snapshot: tuple = ()
+        self._listener_counter = 0
+        self._listener_lock = threading.Lock()
+
+        self._subscriber_id: Optional[int] = None
+        self._flush_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # Sessions
+
+    def _session(self, exchange: str, ts: float) -> Tuple[Optional[date], Optional[Tuple[float, float]], bool]:
+        """(trading day, session bounds, timings known) for a tick time"""
+        day = datetime.fromtimestamp(ts).date()
+        if day not in self._sessions:
+            if len(self._sessions) > 7:
+                self._sessions.clear()
+            self._sessions[day] = self._session_loader(day)
+        sessions = self._sessions[day]
+        if sessions is None:
+            return day, None, False
+        # Index feeds (NSE_INDEX, BSE_INDEX) follow their exchange's session
+        return day, sessions.get(exchange.split('_')[0]), True
+
+    # Ticks
+
+    def on_tick(self, data: Dict[str, Any], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Apply one tick in the MarketDataService message shape.
+
+        Args:
+            data: {'symbol', 'exchange', 'mode', 'data': {'ltp', 'volume', 'timestamp', ...}}
+
+        Returns:
+            Bars completed by this tick
+        """
+        symbol = data.get('symbol')
+        exchange = data.get('exchange')
+        if not symbol or not exchange or data.get('mode') == 3:
+            return []
+        tick = data.get('data') or {}
+        try:
+            price = float(tick.get('ltp') or 0)
+        except (TypeError, ValueError):
+            return []
+        if price <= 0:
+            return []
+
+        now = time.time() if now is None else now
+        ts = _tick_time(tick.get('timestamp'), now)
+        day, session, known = self._session(exchange, ts)
+        if known and (session is None or not session[0] <= ts < session[1]):
+            return []
+
+        try:
+            volume = float(tick.get('volume') or 0)
+        except (TypeError, ValueError):
+            volume = 0.0
+
+        completed = []
+        with self._lock:
+            key = (symbol, exchange)
+            inst = self._instruments.get(key)
+            if inst is None:
+                inst = self._instruments[key] = _Instrument([name for name, _ in self.intervals], self.buffer_size)
+
+            if inst.session_day != day:
+                # New trading day: cumulative volume starts again; before the first day seen it is unknown
+                inst.last_volume = 0.0 if inst.session_day is not None else None
+                inst.session_day = day
+            elif ts < inst.last_tick:
+                return []  # replayed or out-of-order tick
+            inst.last_tick = ts
+
+            delta = 0
+            if volume > 0:
+                if inst.last_volume is not None and volume >= inst.last_volume:
+                    delta = volume - inst.last_volume
+                if inst.last_volume is None or volume >= inst.last_volume:
+                    inst.last_volume = volume
+
+            for name, seconds in self.intervals:
+                t = max(ts, inst.closed_until[name])
+                bar = inst.bars[name]
+                if bar is not None and t >= bar.end:
+                    completed.append(self._complete(inst, symbol, exchange, name, bar))
+                    bar = None
+                    t = max(ts, inst.closed_until[name])
+                if bar is None:
+                    bounds = self._bucket(t, seconds, session)
+                    if bounds is None:
+                        continue
+                    bar = inst.bars[name] = _Bar(bounds[0], bounds[1], price)
+                else:
+                    if price > bar.high:
+                        bar.high = price
+                    elif price < bar.low:
+                        bar.low = price
+                    bar.close = price
+                bar.volume += delta
+
+        self._notify(completed)
+        return completed
+
+    @staticmethod
+    def _bucket(ts: float, seconds: int, session: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+        if session is None:
+            start = ts - ts % seconds
+            return start, start + seconds
+        session_start, session_end = session
+        if ts >= session_end:
+            return None
+        start = session_start + ((ts - session_start) // seconds) * seconds
+        return start, min(start + seconds, session_end)
+
+    def _complete(self, inst: _Instrument, symbol: str, exchange: str, interval: str, bar: _Bar) -> Dict[str, Any]:
+        """Move a forming bar into the ring buffer (called with _lock held)"""
+        result = bar.to_dict()
+        result.update(symbol=symbol, exchange=exchange, interval=interval)
+        inst.history[interval].append(result)
+        inst.bars[interval] = None
+        inst.closed_until[interval] = bar.end
+        return result
+
+    def flush(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Complete bars whose end (plus the close delay) has passed without a newer tick"""
+        cutoff = (time.time() if now is None else now) - self.close_delay
+        completed = []
+        with self._lock:
+            for (symbol, exchange), inst in self._instruments.items():
+                for name, _ in self.intervals:
+                    bar = inst.bars[name]
+                    if bar is not None and bar.end <= cutoff:
+                        completed.append(self._complete(inst, symbol, exchange, name, bar))
+        self._notify(completed)
+        return completed
+
+    # Queries
+
+    def get_bars(self, symbol: str, exchange: str, interval: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Completed bars, oldest first (at most `limit`, newest kept)"""
+        with self._lock:
+            inst = self._instruments.get((symbol, exchange))
+            if inst is None or interval not in inst.history:
+                return []
+            bars = list(inst.history[interval])
+        return bars[-limit:] if limit else bars
+
+    def get_current_bar(self, symbol: str, exchange: str, interval: str) -> Optional[Dict[str, Any]]:
+        """The bar still forming, if any"""
+        with self._lock:
+            inst = self._instruments.get((symbol, exchange))
+            bar = inst.bars.get(interval) if inst is not None else None
+            if bar is None:
+                return None
+            result = bar.to_dict()
+        result.update(symbol=symbol, exchange=exchange, interval=interval)
+        return result
+
+    def clear(self, symbol: Optional[str] = None, exchange: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol and exchange:
+                self._instruments.pop((symbol, exchange), None)
+            else:
+                self._instruments.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'instruments': len(self._instruments),
+                'intervals': [name for name, _ in self.intervals],
+                'buffer_size': self.buffer_size,
+                'listeners': len(self._listeners)
+            }
+
+    # Listeners
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> int:
+        """Register a callback for each completed bar; returns an id for remove_listener"""
+        with self._listener_lock:
+            self._listener_counter += 1
+            self._listeners[self._listener_counter] = callback
+            self._listener_snapshot = tuple(self._listeners.values())
+            return self._listener_counter
+
+    def remove_listener(self, listener_id: int) -> bool:
+        with self._listener_lock:
+            if self._listeners.pop(listener_id, None) is None:
+                return False
+            self._listener_snapshot = tuple(self._listeners.values())
+            return True
+
+    def _notify(self, bars: List[Dict[str, Any]]) -> None:
+        for bar in bars:
+            for callback in self._listener_snapshot:
+                try:
+                    callback(bar)
+                except Exception as e:
+                    logger.error(f"Error in bar listener: {e}")
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Attach to MarketDataService and start the flush thread (idempotent)"""
+        if self._subscriber_id is None:
+            try:
+                from services.market_data_service import get_market_data_service
+                service = get_market_data_service()
+                # 'all' carries LTP and quote ticks; depth messages are skipped in on_tick
+                self._subscriber_id = service.subscribe_to_updates('all', self.on_tick)
+            except Exception as e:
+                logger.error(f"Could not attach bar aggregator to market data service: {e}")
+
+        if self._flush_thread is None or not self._flush_thread.is_alive():
+            self._stop_event.clear()
+            self._flush_thread = threading.Thread(target=self._flush_loop, name="BarAggregatorFlush", daemon=True)
+            self._flush_thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._subscriber_id is not None:
+            try:
+                from services.market_data_service import get_market_data_service
+                get_market_data_service().unsubscribe_from_updates(self._subscriber_id)
+            except Exception as e:
+                logger.debug(f"Error detaching bar aggregator: {e}")
+            self._subscriber_id = None
+
+    def _flush_loop(self) -> None:
+        while not self._stop_event.wait(1.0):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"Error flushing bars: {e}")
+
+
+_bar_aggregator: Optional[BarAggregator] = None
+_bar_aggregator_lock = threading.Lock()
+
+
+def get_bar_aggregator() -> BarAggregator:
+    """The process-wide aggregator, started on first use"""
+    global _bar_aggregator
+    if _bar_aggregator is None:
+        with _bar_aggregator_lock:
+            if _bar_aggregator is None:
+                aggregator = BarAggregator()
+                aggregator.start()
+                _bar_aggregator = aggregator
+    return _bar_aggregator
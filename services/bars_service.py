@@ -0,0 +1,66 @@
+from typing import Tuple, Dict, Any, Optional
+from database.auth_db import verify_api_key
+from services.bar_aggregator import get_bar_aggregator
+from utils.logging import get_logger
+
+# Initialize logger
+logger = get_logger(__name__)
+
+def get_live_bars(
+    symbol: str,
+    exchange: str,
+    interval: str,
+    limit: Optional[int] = None,
+    api_key: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any], int]:
+    """
+    Get recent OHLCV bars built from the live tick stream.
+
+    Only instruments that are streaming (subscribed over the WebSocket) have
+    bars; the buffer holds the most recent BAR_BUFFER_SIZE bars per interval.
+
+    Args:
+        symbol: Trading symbol
+        exchange: Exchange (e.g., NSE, NFO)
+        interval: Bar interval (1s, 1m, 5m, 15m)
+        limit: Maximum number of completed bars to return (newest kept)
+        api_key: OpenAlgo API key
+
+    Returns:
+        Tuple containing:
+        - Success status (bool)
+        - Response data (dict)
+        - HTTP status code (int)
+    """
+    if not verify_api_key(api_key):
+        return False, {
+            'status': 'error',
+            'message': 'Invalid openalgo apikey'
+        }, 403
+
+    try:
+        aggregator = get_bar_aggregator()
+        if interval not in dict(aggregator.intervals):
+            return False, {
+                'status': 'error',
+                'message': f"Interval '{interval}' is not being built. Available: {', '.join(name for name, _ in aggregator.intervals)}"
+            }, 400
+
+        bars = aggregator.get_bars(symbol, exchange, interval, limit)
+        current = aggregator.get_current_bar(symbol, exchange, interval)
+        fields = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+        return True, {
+            'status': 'success',
+            'symbol': symbol,
+            'exchange': exchange,
+            'interval': interval,
+            'data': [{field: bar[field] for field in fields} for bar in bars],
+            'current': {field: current[field] for field in fields} if current else None
+        }, 200
+    except Exception as e:
+        logger.exception(f"Error getting live bars: {e}")
+        return False, {
+            'status': 'error',
+            'message': str(e)
+        }, 500
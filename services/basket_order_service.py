@@ -1,8 +1,6 @@
 import importlib
 import traceback
 import copy
-import time
-import os
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
 from database.apilog_db import async_log_order, executor as log_executor
@@ -20,20 +18,11 @@ from utils.constants import (
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.logging import get_logger
 from services.telegram_alert_service import telegram_alert_service
+from utils.shared_rate_limit import get_order_bucket
 
 # Initialize logger
 logger = get_logger(__name__)
 
-# Get rate limit from environment (default: 10 per second)
-def get_order_rate_limit():
-    """Parse ORDER_RATE_LIMIT and return delay in seconds between orders"""
-    rate_limit_str = os.getenv('ORDER_RATE_LIMIT', '10 per second')
-    try:
-        rate = int(rate_limit_str.split()[0])
-        return 1.0 / rate if rate > 0 else 0.1
-    except (ValueError, IndexError):
-        return 0.1  # Default 100ms delay
-
 def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dict[str, Any]:
     """
     Helper function to emit analyzer error events
@@ -298,13 +287,12 @@ def process_basket_order_with_auth(
 
     results = []
     total_orders = len(sorted_orders)
-    order_delay = get_order_rate_limit()
-    order_count = 0
+    # Per-user ORDER_RATE_LIMIT pacing, shared with split and webhook orders
+    order_bucket = get_order_bucket(api_key or auth_token)
 
     # Process BUY orders first (sequentially with rate limiting)
     for i, order in enumerate(buy_orders):
-        if order_count > 0:
-            time.sleep(order_delay)  # Rate limit delay between orders
+        order_bucket.acquire()  # Rate limit delay between orders
         # Create order with authentication fields without modifying original
         order_with_auth = {**order, 'apikey': api_key, 'strategy': basket_data['strategy']}
         result = place_single_order(
@@ -316,12 +304,10 @@ def process_basket_order_with_auth(
         )
         if result:
             results.append(result)
-        order_count += 1
 
     # Then process SELL orders (sequentially with rate limiting)
     for i, order in enumerate(sell_orders, start=len(buy_orders)):
-        if order_count > 0:
-            time.sleep(order_delay)  # Rate limit delay between orders
+        order_bucket.acquire()  # Rate limit delay between orders
         # Create order with authentication fields without modifying original
         order_with_auth = {**order, 'apikey': api_key, 'strategy': basket_data['strategy']}
         result = place_single_order(
@@ -333,7 +319,6 @@ def process_basket_order_with_auth(
         )
         if result:
             results.append(result)
-        order_count += 1
 
     # Log the basket order results
     response_data = {
@@ -4,6 +4,7 @@ import pandas as pd
 from typing import Tuple, Dict, Any, Optional, List, Union
 from database.auth_db import get_auth_token_broker
 from database.token_db import get_token
+from database import history_db
 from utils.constants import VALID_EXCHANGES
 from utils.logging import get_logger
 
@@ -52,6 +53,52 @@ def import_broker_module(broker_name: str) -> Optional[Any]:
         logger.error(f"Error importing broker module '{module_path}': {error}")
         return None
 
+def get_history_from_cache(
+    data_handler: Any,
+    symbol: str,
+    exchange: str,
+    interval: str,
+    start_date: Union[str, Any],
+    end_date: Union[str, Any]
+) -> pd.DataFrame:
+    """
+    Serve historical data from the local candle store, fetching only the
+    date ranges that are missing from the broker.
+
+    Args:
+        data_handler: Initialized broker BrokerData instance
+        symbol: Trading symbol
+        exchange: Exchange (e.g., NSE, BSE)
+        interval: Time interval (e.g., 1m, 5m, 15m, 1h, D)
+        start_date: Start date (YYYY-MM-DD string or date)
+        end_date: End date (YYYY-MM-DD string or date)
+
+    Returns:
+        DataFrame with timestamp/open/high/low/close/volume/oi columns
+    """
+    gaps = history_db.get_missing_ranges(symbol, exchange, interval, start_date, end_date)
+
+    for gap_start, gap_end in gaps:
+        gap_from = gap_start.strftime('%Y-%m-%d')
+        gap_to = gap_end.strftime('%Y-%m-%d')
+        logger.debug(f"History cache miss for {exchange}:{symbol} {interval} {gap_from} to {gap_to}")
+
+        df = data_handler.get_history(symbol, exchange, interval, gap_from, gap_to)
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("Invalid data format returned from broker")
+
+        try:
+            history_db.store_candles(symbol, exchange, interval, df, gap_start, gap_end)
+        except Exception as e:
+            # Never fail the request because of the cache - answer from the broker instead
+            logger.warning(f"Could not cache history for {exchange}:{symbol}: {e}")
+            return data_handler.get_history(symbol, exchange, interval, start_date, end_date)
+
+    if not gaps:
+        logger.debug(f"History cache hit for {exchange}:{symbol} {interval}")
+
+    return history_db.read_candles(symbol, exchange, interval, start_date, end_date)
+
 def get_history_with_auth(
     auth_token: str,
     feed_token: Optional[str],
@@ -109,14 +156,17 @@ def get_history_with_auth(
             # Fallback to just auth token if we can't inspect
             data_handler = broker_module.BrokerData(auth_token)
 
-        # Call the broker's get_history method
-        df = data_handler.get_history(
-            symbol,
-            exchange,
-            interval,
-            start_date,
-            end_date
-        )
+        if history_db.is_cache_available():
+            df = get_history_from_cache(data_handler, symbol, exchange, interval, start_date, end_date)
+        else:
+            # Call the broker's get_history method
+            df = data_handler.get_history(
+                symbol,
+                exchange,
+                interval,
+                start_date,
+                end_date
+            )
         
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Invalid data format returned from broker")
@@ -9,6 +9,7 @@ from typing import Dict, List, Any, Optional, Callable, Set
 from collections import defaultdict
 from datetime import datetime
 from utils.logging import get_logger
+from .market_data_store import MarketDataStore
 from .websocket_service import register_market_data_callback, get_websocket_connection
 
 # Initialize logger
@@ -36,22 +37,18 @@ class MarketDataService:
             return
             
         self._initialized = True
+        # Guards subscribers and user access tracking; market data has its own locking
         self.data_lock = threading.Lock()
         
-        # Market data cache structure:
-        # {
-        #   'NSE:RELIANCE': {
-        #     'ltp': {'value': 2500.50, 'timestamp': 1234567890},
-        #     'quote': {'open': 2490, 'high': 2510, ...},
-        #     'depth': {'buy': [...], 'sell': [...]},
-        #     'last_update': 1234567890
-        #   }
-        # }
-        self.market_data_cache = {}
+        # Latest LTP/quote/depth per 'EXCHANGE:SYMBOL', in preallocated columns
+        # with lock-free (seqlock) reads, see market_data_store.py
+        self.store = MarketDataStore()
         
         # Subscribers for real-time updates
         # {event_type: {callback_id: callback_function}}
         self.subscribers = defaultdict(dict)
+        # Read-only copy per event type used on the tick path, rebuilt on (un)subscribe
+        self._subscriber_snapshot: Dict[str, tuple] = {}
         self.subscriber_id_counter = 0
         
         # User-specific data tracking
@@ -89,50 +86,8 @@ class MarketDataService:
                 return
                 
             symbol_key = f"{exchange}:{symbol}"
-            timestamp = int(time.time())
-            
-            with self.data_lock:
-                # Initialize cache entry if needed
-                if symbol_key not in self.market_data_cache:
-                    self.market_data_cache[symbol_key] = {
-                        'last_update': timestamp
-                    }
-                
-                cache_entry = self.market_data_cache[symbol_key]
-                
-                # Update based on mode
-                if mode == 1:  # LTP
-                    cache_entry['ltp'] = {
-                        'value': market_data.get('ltp', 0),
-                        'timestamp': market_data.get('timestamp', timestamp),
-                        'volume': market_data.get('volume', 0)
-                    }
-                elif mode == 2:  # Quote
-                    cache_entry['quote'] = {
-                        'open': market_data.get('open', 0),
-                        'high': market_data.get('high', 0),
-                        'low': market_data.get('low', 0),
-                        'close': market_data.get('close', 0),
-                        'ltp': market_data.get('ltp', 0),
-                        'volume': market_data.get('volume', 0),
-                        'timestamp': market_data.get('timestamp', timestamp)
-                    }
-                    # Also update LTP from quote
-                    cache_entry['ltp'] = {
-                        'value': market_data.get('ltp', 0),
-                        'timestamp': market_data.get('timestamp', timestamp),
-                        'volume': market_data.get('volume', 0)
-                    }
-                elif mode == 3:  # Depth
-                    cache_entry['depth'] = {
-                        'buy': market_data.get('depth', {}).get('buy', []),
-                        'sell': market_data.get('depth', {}).get('sell', []),
-                        'ltp': market_data.get('ltp', 0),
-                        'timestamp': market_data.get('timestamp', timestamp)
-                    }
-                
-                cache_entry['last_update'] = timestamp
-                self.metrics['total_updates'] += 1
+            self.store.update(symbol_key, mode, market_data)
+            self.metrics['total_updates'] += 1
             
             # Broadcast to subscribers
             self._broadcast_update(symbol_key, mode, data)
@@ -151,15 +106,12 @@ class MarketDataService:
         Returns:
             LTP data dictionary or None
         """
-        symbol_key = f"{exchange}:{symbol}"
-        
-        with self.data_lock:
+        data = self.store.get_ltp(f"{exchange}:{symbol}")
+        if data is None:
+            self.metrics['cache_misses'] += 1
+        else:
             self.metrics['cache_hits'] += 1
-            if symbol_key in self.market_data_cache:
-                return self.market_data_cache[symbol_key].get('ltp')
-            
-        self.metrics['cache_misses'] += 1
-        return None
+        return data
     
     def get_quote(self, symbol: str, exchange: str) -> Optional[Dict[str, Any]]:
         """
@@ -172,15 +124,12 @@ class MarketDataService:
         Returns:
             Quote data dictionary or None
         """
-        symbol_key = f"{exchange}:{symbol}"
-        
-        with self.data_lock:
+        data = self.store.get_quote(f"{exchange}:{symbol}")
+        if data is None:
+            self.metrics['cache_misses'] += 1
+        else:
             self.metrics['cache_hits'] += 1
-            if symbol_key in self.market_data_cache:
-                return self.market_data_cache[symbol_key].get('quote')
-            
-        self.metrics['cache_misses'] += 1
-        return None
+        return data
     
     def get_market_depth(self, symbol: str, exchange: str) -> Optional[Dict[str, Any]]:
         """
@@ -193,15 +142,12 @@ class MarketDataService:
         Returns:
             Market depth data dictionary or None
         """
-        symbol_key = f"{exchange}:{symbol}"
-        
-        with self.data_lock:
+        data = self.store.get_depth(f"{exchange}:{symbol}")
+        if data is None:
+            self.metrics['cache_misses'] += 1
+        else:
             self.metrics['cache_hits'] += 1
-            if symbol_key in self.market_data_cache:
-                return self.market_data_cache[symbol_key].get('depth')
-            
-        self.metrics['cache_misses'] += 1
-        return None
+        return data
     
     def get_all_data(self, symbol: str, exchange: str) -> Dict[str, Any]:
         """
@@ -214,13 +160,7 @@ class MarketDataService:
         Returns:
             All market data for the symbol
         """
-        symbol_key = f"{exchange}:{symbol}"
-        
-        with self.data_lock:
-            if symbol_key in self.market_data_cache:
-                return dict(self.market_data_cache[symbol_key])
-            
-        return {}
+        return self.store.get_all(f"{exchange}:{symbol}")
     
     def get_multiple_ltps(self, symbols: List[Dict[str, str]]) -> Dict[str, Any]:
         """
@@ -232,20 +172,12 @@ class MarketDataService:
         Returns:
             Dictionary mapping symbol_key to LTP data
         """
-        result = {}
-        
-        with self.data_lock:
-            for symbol_info in symbols:
-                symbol = symbol_info.get('symbol')
-                exchange = symbol_info.get('exchange')
-                if symbol and exchange:
-                    symbol_key = f"{exchange}:{symbol}"
-                    if symbol_key in self.market_data_cache:
-                        ltp_data = self.market_data_cache[symbol_key].get('ltp')
-                        if ltp_data:
-                            result[symbol_key] = ltp_data
-        
-        return result
+        keys = [
+            f"{symbol_info['exchange']}:{symbol_info['symbol']}"
+            for symbol_info in symbols
+            if symbol_info.get('symbol') and symbol_info.get('exchange')
+        ]
+        return self.store.get_ltps(keys)
     
     def subscribe_to_updates(self, event_type: str, callback: Callable, filter_symbols: Optional[Set[str]] = None) -> int:
         """
@@ -267,6 +199,7 @@ class MarketDataService:
                 'callback': callback,
                 'filter': filter_symbols
             }
+            self._rebuild_subscriber_snapshot()
             
         logger.info(f"Added subscriber {subscriber_id} for {event_type} updates")
         return subscriber_id
@@ -285,6 +218,7 @@ class MarketDataService:
             for event_type in self.subscribers:
                 if subscriber_id in self.subscribers[event_type]:
                     del self.subscribers[event_type][subscriber_id]
+                    self._rebuild_subscriber_snapshot()
                     logger.info(f"Removed subscriber {subscriber_id}")
                     return True
         
@@ -330,7 +264,7 @@ class MarketDataService:
             hit_rate = (self.metrics['cache_hits'] / total_requests * 100) if total_requests > 0 else 0
             
             return {
-                'total_symbols': len(self.market_data_cache),
+                'total_symbols': len(self.store),
                 'total_updates': self.metrics['total_updates'],
                 'cache_hits': self.metrics['cache_hits'],
                 'cache_misses': self.metrics['cache_misses'],
@@ -346,16 +280,24 @@ class MarketDataService:
             symbol: Specific symbol to clear (optional)
             exchange: Exchange for the symbol (optional)
         """
-        with self.data_lock:
-            if symbol and exchange:
-                symbol_key = f"{exchange}:{symbol}"
-                if symbol_key in self.market_data_cache:
-                    del self.market_data_cache[symbol_key]
-                    logger.info(f"Cleared cache for {symbol_key}")
-            else:
-                self.market_data_cache.clear()
-                logger.info("Cleared entire market data cache")
+        if symbol and exchange:
+            symbol_key = f"{exchange}:{symbol}"
+            if self.store.remove(symbol_key):
+                logger.info(f"Cleared cache for {symbol_key}")
+        else:
+            self.store.clear()
+            logger.info("Cleared entire market data cache")
     
+    def _rebuild_subscriber_snapshot(self) -> None:
+        """Refresh the per-event subscriber tuples (called with data_lock held)"""
+        everyone = tuple(self.subscribers['all'].values())
+        snapshot = {
+            event_type: tuple(self.subscribers[event_type].values()) + everyone
+            for event_type in ('ltp', 'quote', 'depth')
+        }
+        snapshot['all'] = everyone
+        self._subscriber_snapshot = snapshot
+
     def _broadcast_update(self, symbol_key: str, mode: int, data: Dict[str, Any]) -> None:
         """
         Broadcast updates to subscribers
@@ -368,12 +310,8 @@ class MarketDataService:
         mode_to_event = {1: 'ltp', 2: 'quote', 3: 'depth'}
         event_type = mode_to_event.get(mode, 'all')
         
-        # Broadcast to specific event subscribers
-        with self.data_lock:
-            subscribers = list(self.subscribers[event_type].values())
-            all_subscribers = list(self.subscribers['all'].values())
-        
-        for subscriber in subscribers + all_subscribers:
+        # Broadcast to specific event subscribers, then 'all' subscribers
+        for subscriber in self._subscriber_snapshot.get(event_type, ()):
             try:
                 # Check filter
                 if subscriber['filter'] and symbol_key not in subscriber['filter']:
@@ -393,16 +331,12 @@ class MarketDataService:
                 current_time = time.time()
                 stale_threshold = 3600  # 1 hour
                 
+                # Clean up stale market data (vectorized scan of last_update)
+                stale_symbols = self.store.stale_keys(current_time - stale_threshold)
+                for symbol_key in stale_symbols:
+                    self.store.remove(symbol_key)
+                
                 with self.data_lock:
-                    # Clean up stale market data
-                    stale_symbols = []
-                    for symbol_key, data in self.market_data_cache.items():
-                        if current_time - data.get('last_update', 0) > stale_threshold:
-                            stale_symbols.append(symbol_key)
-                    
-                    for symbol_key in stale_symbols:
-                        del self.market_data_cache[symbol_key]
-                    
                     # Clean up old user access tracking
                     for user_id in list(self.user_access_tracking.keys()):
                         user_data = self.user_access_tracking[user_id]
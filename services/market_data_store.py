@@ -0,0 +1,337 @@
+"""
+Columnar in-memory snapshot store for streaming market data.
+
+Every instrument (exchange:symbol) gets a row id. LTP, OHLC, volume and
+timestamps live in preallocated numpy columns, so a tick overwrites a few
+array slots instead of building new dicts, and stale rows are found with
+one vectorized comparison.
+
+Concurrency:
+- Writers to the same row are serialized by a striped lock (row id % stripes)
+- Readers take no lock. Each row has a sequence counter that writers make
+  odd while updating and even when done (a seqlock); a reader retries if the
+  counter was odd or changed while it copied the row.
+- Growing the columns takes every stripe lock and swaps in new arrays.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MARKET_DATA_STORE_CAPACITY = int(os.getenv('MARKET_DATA_STORE_CAPACITY', '4096'))
+
+LOCK_STRIPES = 64
+
+# Row flags
+HAS_LTP = 1
+HAS_QUOTE = 2
+HAS_DEPTH = 4
+
+# Float columns, in storage order
+FIELDS = ('ltp', 'open', 'high', 'low', 'close', 'volume',
+          'ltp_timestamp', 'quote_timestamp', 'last_update')
+
+_READ_RETRIES = 100
+
+
+def _number(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _int(value: float):
+    """Whole numbers (timestamps, volume) back as int, like the raw feed sent them"""
+    return int(value) if value == int(value) else value
+
+
+class _Columns:
+    """One generation of the column arrays (replaced as a whole on growth)"""
+
+    __slots__ = ('capacity', 'values', 'seq', 'flags')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values = np.zeros((len(FIELDS), capacity), dtype=np.float64)
+        self.seq = np.zeros(capacity, dtype=np.int64)
+        self.flags = np.zeros(capacity, dtype=np.int8)
+
+
+LTP, OPEN, HIGH, LOW, CLOSE, VOLUME, LTP_TS, QUOTE_TS, LAST_UPDATE = range(len(FIELDS))
+
+
+class MarketDataStore:
+    """Array-backed latest-value store indexed by instrument id"""
+
+    def __init__(self, capacity: int = MARKET_DATA_STORE_CAPACITY):
+        self._cols = _Columns(max(16, capacity))
+        self._ids: Dict[str, int] = {}
+        self._keys: List[Optional[str]] = [None] * self._cols.capacity
+        self._depth: List[Optional[dict]] = [None] * self._cols.capacity
+        self._free: List[int] = []
+        self._next_id = 0
+        self._index_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # Row ids
+
+    def instrument_id(self, key: str) -> Optional[int]:
+        return self._ids.get(key)
+
+    def _ensure_id(self, key: str) -> int:
+        row = self._ids.get(key)
+        if row is not None:
+            return row
+        with self._index_lock:
+            row = self._ids.get(key)
+            if row is not None:
+                return row
+            if self._free:
+                row = self._free.pop()
+                with self._stripes[row % LOCK_STRIPES]:
+                    self._cols.values[:, row] = 0
+                    self._cols.flags[row] = 0
+                    self._depth[row] = None
+            else:
+                row = self._next_id
+                self._next_id += 1
+                if row >= self._cols.capacity:
+                    self._grow(row + 1)
+            self._keys[row] = key
+            self._ids[key] = row
+            return row
+
+    def _grow(self, needed: int):
+        """Double the capacity; called with _index_lock held"""
+        for lock in self._stripes:
+            lock.acquire()
+        try:
+            old = self._cols
+            capacity = old.capacity
+            while capacity < needed:
+                capacity *= 2
+            cols = _Columns(capacity)
+            cols.values[:, :old.capacity] = old.values
+            cols.seq[:old.capacity] = old.seq
+            cols.flags[:old.capacity] = old.flags
+            extra = capacity - old.capacity
+            self._keys.extend([None] * extra)
+            self._depth.extend([None] * extra)
+            self._cols = cols
+            logger.debug(f"Market data store grown to {capacity} instruments")
+        finally:
+            for lock in self._stripes:
+                lock.release()
+
+    # Writes
+
+    def update(self, key: str, mode: int, data: Dict[str, Any], now: Optional[float] = None) -> int:
+        """
+        Apply one tick to the instrument's row.
+
+        Args:
+            key: 'EXCHANGE:SYMBOL'
+            mode: 1=LTP, 2=Quote, 3=Depth
+            data: Tick fields from the feed
+
+        Returns:
+            The instrument id
+        """
+        now = int(time.time()) if now is None else now
+        row = self._ensure_id(key)
+        timestamp = _number(data.get('timestamp', now), now)
+
+        with self._stripes[row % LOCK_STRIPES]:
+            cols = self._cols
+            values, seq = cols.values, cols.seq
+            seq[row] += 1  # odd: update in progress
+            if mode == 1 or mode == 2:
+                values[LTP, row] = _number(data.get('ltp', 0))
+                # LTP ticks usually carry no volume; keep the quote's instead of zeroing it
+                if mode == 2 or 'volume' in data:
+                    values[VOLUME, row] = _number(data.get('volume', 0))
+                values[LTP_TS, row] = timestamp
+                flags = HAS_LTP
+                if mode == 2:
+                    values[OPEN, row] = _number(data.get('open', 0))
+                    values[HIGH, row] = _number(data.get('high', 0))
+                    values[LOW, row] = _number(data.get('low', 0))
+                    values[CLOSE, row] = _number(data.get('close', 0))
+                    values[QUOTE_TS, row] = timestamp
+                    flags |= HAS_QUOTE
+                cols.flags[row] |= flags
+            elif mode == 3:
+                depth = data.get('depth', {})
+                self._depth[row] = {
+                    'buy': depth.get('buy', []),
+                    'sell': depth.get('sell', []),
+                    'ltp': data.get('ltp', 0),
+                    'timestamp': data.get('timestamp', now)
+                }
+                cols.flags[row] |= HAS_DEPTH
+            values[LAST_UPDATE, row] = now
+            seq[row] += 1  # even: consistent again
+        return row
+
+    def remove(self, key: str) -> bool:
+        with self._index_lock:
+            row = self._ids.pop(key, None)
+            if row is None:
+                return False
+            with self._stripes[row % LOCK_STRIPES]:
+                cols = self._cols
+                cols.seq[row] += 2
+                cols.values[:, row] = 0
+                cols.flags[row] = 0
+                self._keys[row] = None
+                self._depth[row] = None
+            self._free.append(row)
+            return True
+
+    def clear(self):
+        with self._index_lock:
+            self._ids.clear()
+            for lock in self._stripes:
+                lock.acquire()
+            try:
+                self._cols = _Columns(self._cols.capacity)
+                self._keys = [None] * self._cols.capacity
+                self._depth = [None] * self._cols.capacity
+                self._free = []
+                self._next_id = 0
+            finally:
+                for lock in self._stripes:
+                    lock.release()
+
+    # Reads
+
+    def _read_row(self, key: str) -> Optional[Tuple[np.ndarray, int, Optional[dict]]]:
+        """Consistent copy of (values, flags, depth) for one instrument, without locking"""
+        row = self._ids.get(key)
+        if row is None:
+            return None
+        for _ in range(_READ_RETRIES):
+            cols = self._cols
+            before = cols.seq[row]
+            if before & 1:
+                time.sleep(0)
+                continue
+            values = cols.values[:, row].copy()
+            flags = int(cols.flags[row])
+            depth = self._depth[row]
+            if cols.seq[row] == before and cols is self._cols and self._keys[row] == key:
+                return values, flags, depth
+        # A writer kept the row busy; take the stripe lock for one read
+        with self._stripes[row % LOCK_STRIPES]:
+            if self._keys[row] != key:
+                return None
+            cols = self._cols
+            return cols.values[:, row].copy(), int(cols.flags[row]), self._depth[row]
+
+    @staticmethod
+    def _ltp_dict(values: np.ndarray) -> dict:
+        return {
+            'value': float(values[LTP]),
+            'timestamp': _int(float(values[LTP_TS])),
+            'volume': _int(float(values[VOLUME]))
+        }
+
+    @staticmethod
+    def _quote_dict(values: np.ndarray) -> dict:
+        return {
+            'open': float(values[OPEN]),
+            'high': float(values[HIGH]),
+            'low': float(values[LOW]),
+            'close': float(values[CLOSE]),
+            'ltp': float(values[LTP]),
+            'volume': _int(float(values[VOLUME])),
+            'timestamp': _int(float(values[QUOTE_TS]))
+        }
+
+    def get_ltp(self, key: str) -> Optional[dict]:
+        snapshot = self._read_row(key)
+        if snapshot is None or not snapshot[1] & HAS_LTP:
+            return None
+        return self._ltp_dict(snapshot[0])
+
+    def get_quote(self, key: str) -> Optional[dict]:
+        snapshot = self._read_row(key)
+        if snapshot is None or not snapshot[1] & HAS_QUOTE:
+            return None
+        return self._quote_dict(snapshot[0])
+
+    def get_depth(self, key: str) -> Optional[dict]:
+        snapshot = self._read_row(key)
+        if snapshot is None:
+            return None
+        return snapshot[2]
+
+    def get_all(self, key: str) -> Dict[str, Any]:
+        snapshot = self._read_row(key)
+        if snapshot is None:
+            return {}
+        values, flags, depth = snapshot
+        result = {'last_update': _int(float(values[LAST_UPDATE]))}
+        if flags & HAS_LTP:
+            result['ltp'] = self._ltp_dict(values)
+        if flags & HAS_QUOTE:
+            result['quote'] = self._quote_dict(values)
+        if depth is not None:
+            result['depth'] = depth
+        return result
+
+    def get_ltps(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """
+        Batch LTP read: one gather per column for all rows, then only rows
+        that were being written during the gather are read again.
+        """
+        wanted = [(key, self._ids.get(key)) for key in keys]
+        wanted = [(key, row) for key, row in wanted if row is not None]
+        if not wanted:
+            return {}
+
+        cols = self._cols
+        rows = np.fromiter((row for _, row in wanted), dtype=np.int64, count=len(wanted))
+        before = cols.seq[rows]
+        ltp = cols.values[LTP, rows]
+        ltp_ts = cols.values[LTP_TS, rows]
+        volume = cols.values[VOLUME, rows]
+        flags = cols.flags[rows]
+        after = cols.seq[rows]
+        stable = (before == after) & ((before & 1) == 0) & (cols is self._cols)
+
+        result = {}
+        for i, (key, row) in enumerate(wanted):
+            if stable[i] and self._keys[row] == key:
+                if flags[i] & HAS_LTP:
+                    result[key] = {
+                        'value': float(ltp[i]),
+                        'timestamp': _int(float(ltp_ts[i])),
+                        'volume': _int(float(volume[i]))
+                    }
+            else:
+                data = self.get_ltp(key)
+                if data:
+                    result[key] = data
+        return result
+
+    def stale_keys(self, older_than: float) -> List[str]:
+        """Instruments not updated since the given epoch time (vectorized scan)"""
+        cols = self._cols
+        used = self._next_id
+        rows = np.nonzero(cols.values[LAST_UPDATE, :used] < older_than)[0]
+        return [key for key in (self._keys[row] for row in rows) if key is not None]
+
+    def keys(self) -> List[str]:
+        return list(self._ids)
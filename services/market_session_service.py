@@ -0,0 +1,335 @@
+"""
+Market session index.
+
+Open and close times of every exchange, precomputed a year at a time from the
+market calendar: regular hours, holidays with partial sessions (MCX evening
+trading) and special sessions such as Muhurat trading. "Is the exchange open",
+"when does it next open" and "when does it next close" are answered with a
+few dictionary and list lookups instead of calendar queries:
+
+    sessions = get_market_sessions()
+    sessions.is_open('NSE')
+    sessions.next_close('MCX')        # epoch seconds, or None
+
+Subsystems that act on session boundaries subscribe instead of polling. One
+timer thread sleeps until the next open or close of any subscribed exchange
+and calls each subscriber with:
+
+    {'event': 'open' | 'close', 'exchange': 'NSE', 'timestamp': 1760845500.0, 'date': '2026-10-19'}
+
+The index is rebuilt an hour after loading (matching the calendar cache in
+database.market_calendar_db), and at once when the calendar is edited in this
+process.
+"""
+
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import pytz
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Seconds after which the index is rebuilt from the calendar
+RELOAD_SECONDS = 3600
+# Seconds before retrying after the calendar could not be read
+RETRY_SECONDS = 60
+# Longest sleep of the timer thread, so reloads and clock changes are picked up
+MAX_TIMER_WAIT = 300
+# Boundaries missed by more than this (e.g. after a suspend) are not delivered
+MAX_EVENT_DELAY = 60
+
+# (start, end, trading day) with start and end in epoch seconds
+Session = Tuple[float, float, date]
+SessionCallback = Callable[[Dict[str, Any]], None]
+
+
+def _load_year(year: int) -> Dict[date, List[Dict[str, Any]]]:
+    """{date: [{'exchange', 'start_time', 'end_time'}]} with times in epoch milliseconds"""
+    from database.market_calendar_db import get_market_timings_for_year
+    return get_market_timings_for_year(year)
+
+
+class MarketSessionIndex:
+    """Sessions per exchange with constant-time open/close queries and boundary events"""
+
+    def __init__(self, year_loader: Callable[[int], Dict[date, List[Dict[str, Any]]]] = _load_year,
+                 clock: Callable[[], float] = time.time):
+        self._year_loader = year_loader
+        self._clock = clock
+        self._lock = threading.RLock()
+
+        # Sessions of the loaded years, by year and exchange
+        self._loaded: Dict[int, Dict[str, List[Session]]] = {}
+        self._expires_at = 0.0
+        # Lookup tables rebuilt (never mutated) whenever a year is loaded:
+        # exchange -> sessions sorted by start, and exchange -> day -> index of
+        # the first session on or after that day
+        self._sessions: Dict[str, List[Session]] = {}
+        self._first: Dict[str, Dict[date, int]] = {}
+        self._by_day: Dict[date, Dict[str, Tuple[float, float]]] = {}
+
+        self._subscribers: Dict[int, Tuple[SessionCallback, Optional[FrozenSet[str]]]] = {}
+        self._next_subscriber_id = 0
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cursor = 0.0
+        self._events_fired = 0
+
+    # Loading
+
+    def _ensure_years(self, *years: int) -> None:
+        """Load the years if needed (called with _lock held)"""
+        if time.monotonic() >= self._expires_at and self._loaded:
+            self._loaded = {}
+        missing = [year for year in years if year not in self._loaded]
+        if not missing:
+            return
+        if not self._loaded:
+            self._expires_at = time.monotonic() + RELOAD_SECONDS
+
+        for year in missing:
+            try:
+                days = self._year_loader(year)
+            except Exception as e:
+                logger.error(f"Market calendar for {year} unavailable: {e}")
+                days = {}
+                self._expires_at = min(self._expires_at, time.monotonic() + RETRY_SECONDS)
+            sessions: Dict[str, List[Session]] = {}
+            for day, timings in days.items():
+                for timing in timings:
+                    sessions.setdefault(timing['exchange'], []).append(
+                        (timing['start_time'] / 1000.0, timing['end_time'] / 1000.0, day)
+                    )
+            self._loaded[year] = sessions
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        merged: Dict[str, List[Session]] = {}
+        for year in sorted(self._loaded):
+            for exchange, sessions in self._loaded[year].items():
+                merged.setdefault(exchange, []).extend(sessions)
+
+        by_day: Dict[date, Dict[str, Tuple[float, float]]] = {}
+        first: Dict[str, Dict[date, int]] = {}
+        for exchange, sessions in merged.items():
+            sessions.sort()
+            first[exchange] = {}
+            for position, (start, end, day) in enumerate(sessions):
+                by_day.setdefault(day, {})[exchange] = (start, end)
+                first[exchange].setdefault(day, position)
+
+        # Days without a session of the exchange point at its next session
+        for exchange, sessions in merged.items():
+            positions = first[exchange]
+            following = len(sessions)
+            for year in sorted(self._loaded, reverse=True):
+                day = date(year, 12, 31)
+                while day.year == year:
+                    following = positions.setdefault(day, following)
+                    day = date.fromordinal(day.toordinal() - 1)
+
+        self._sessions, self._first, self._by_day = merged, first, by_day
+        logger.debug(f"Market session index built for {sorted(self._loaded)}: "
+                     f"{sum(len(s) for s in merged.values())} sessions over {len(by_day)} trading days")
+
+    def invalidate(self) -> None:
+        """Drop the loaded calendar; it is reloaded on the next query"""
+        with self._lock:
+            self._loaded = {}
+        self._wake.set()
+
+    def _position(self, exchange: str, timestamp: float,
+                  lookahead: bool = False) -> Tuple[List[Session], int]:
+        """An exchange's sessions and the index of its first session on or after the day of timestamp"""
+        day = datetime.fromtimestamp(timestamp, IST).date()
+        with self._lock:
+            # In December (or when asked) the following year too, so sessions after the year end are known
+            if lookahead or day.month == 12:
+                self._ensure_years(day.year, day.year + 1)
+            else:
+                self._ensure_years(day.year)
+            sessions = self._sessions.get(exchange, [])
+            return sessions, self._first.get(exchange, {}).get(day, len(sessions))
+
+    # Queries
+
+    def _now(self, timestamp: Optional[float]) -> float:
+        return self._clock() if timestamp is None else timestamp
+
+    def current_session(self, exchange: str, timestamp: Optional[float] = None) -> Optional[Session]:
+        """The session in progress at timestamp (default now), or None when closed"""
+        now = self._now(timestamp)
+        sessions, position = self._position(exchange.upper(), now)
+        # The previous day's session can run past midnight (MCX Muhurat)
+        for candidate in (position - 1, position):
+            if 0 <= candidate < len(sessions) and sessions[candidate][0] <= now < sessions[candidate][1]:
+                return sessions[candidate]
+        return None
+
+    def is_open(self, exchange: str, timestamp: Optional[float] = None) -> bool:
+        """Whether the exchange is trading at timestamp (default now)"""
+        return self.current_session(exchange, timestamp) is not None
+
+    def _following(self, exchange: str, now: float, field: int) -> Optional[Session]:
+        """First session whose start (field 0) or end (field 1) is after now"""
+        for lookahead in (False, True):
+            sessions, position = self._position(exchange, now, lookahead)
+            candidate = max(position - 1, 0)
+            while candidate < len(sessions) and sessions[candidate][field] <= now:
+                candidate += 1
+            if candidate < len(sessions):
+                return sessions[candidate]
+        # Nothing left this year (or next): the calendar has no further session
+        return None
+
+    def next_open(self, exchange: str, timestamp: Optional[float] = None) -> Optional[float]:
+        """Epoch seconds of the exchange's next session start after timestamp, None if not in the calendar"""
+        session = self._following(exchange.upper(), self._now(timestamp), 0)
+        return session[0] if session else None
+
+    def next_close(self, exchange: str, timestamp: Optional[float] = None) -> Optional[float]:
+        """Epoch seconds of the exchange's next session end after timestamp (the current session's if open)"""
+        session = self._following(exchange.upper(), self._now(timestamp), 1)
+        return session[1] if session else None
+
+    def session(self, exchange: str, day: date) -> Optional[Tuple[float, float]]:
+        """(start, end) in epoch seconds of the exchange's session on a day, None if it does not trade"""
+        return self.sessions_for(day).get(exchange.upper())
+
+    def sessions_for(self, day: date) -> Dict[str, Tuple[float, float]]:
+        """{exchange: (start, end)} in epoch seconds for every exchange trading on a day"""
+        with self._lock:
+            self._ensure_years(day.year)
+            return dict(self._by_day.get(day, {}))
+
+    def is_trading_day(self, day: date, exchange: Optional[str] = None) -> bool:
+        """Whether the exchange (default: any exchange) has a session on a day"""
+        sessions = self.sessions_for(day)
+        return exchange.upper() in sessions if exchange else bool(sessions)
+
+    # Boundary events
+
+    def subscribe(self, callback: SessionCallback, exchanges: Optional[List[str]] = None) -> int:
+        """
+        Call callback at every session open and close of the exchanges (default all).
+
+        Callbacks run on the shared timer thread and must return quickly.
+
+        Returns:
+            Subscriber id for unsubscribe()
+        """
+        with self._lock:
+            self._next_subscriber_id += 1
+            subscriber_id = self._next_subscriber_id
+            watched = frozenset(exchange.upper() for exchange in exchanges) if exchanges else None
+            self._subscribers[subscriber_id] = (callback, watched)
+            if self._thread is None:
+                self._cursor = self._clock()
+                self._thread = threading.Thread(target=self._run_timer, name='MarketSessionTimer', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int) -> bool:
+        with self._lock:
+            removed = self._subscribers.pop(subscriber_id, None) is not None
+        self._wake.set()
+        return removed
+
+    def _next_boundary(self, exchange: str, after: float) -> Optional[Tuple[float, str, date]]:
+        opening = self._following(exchange, after, 0)
+        closing = self._following(exchange, after, 1)
+        if closing is not None and (opening is None or closing[1] <= opening[0]):
+            return closing[1], 'close', closing[2]
+        if opening is not None:
+            return opening[0], 'open', opening[2]
+        return None
+
+    def _run_timer(self) -> None:
+        while True:
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+                subscribers = list(self._subscribers.values())
+                watched = set()
+                for _, exchanges in subscribers:
+                    if exchanges is None:
+                        self._ensure_years(datetime.fromtimestamp(self._clock(), IST).year)
+                        watched |= set(self._sessions)
+                    else:
+                        watched |= exchanges
+
+            now = self._clock()
+            since = max(self._cursor, now - MAX_EVENT_DELAY)
+            self._cursor = now
+            events = []
+            upcoming = []
+            for exchange in watched:
+                after = since
+                while True:
+                    boundary = self._next_boundary(exchange, after)
+                    if boundary is None:
+                        break
+                    if boundary[0] > now:
+                        upcoming.append(boundary[0])
+                        break
+                    timestamp, kind, day = boundary
+                    events.append({'event': kind, 'exchange': exchange, 'timestamp': timestamp,
+                                   'date': day.isoformat()})
+                    after = timestamp
+
+            events.sort(key=lambda event: (event['timestamp'], event['event'] != 'close'))
+            for event in events:
+                self._dispatch(event, subscribers)
+
+            wait = min(upcoming) - self._clock() if upcoming else MAX_TIMER_WAIT
+            self._wake.wait(min(max(wait, 0), MAX_TIMER_WAIT))
+
+    def _dispatch(self, event: Dict[str, Any],
+                  subscribers: List[Tuple[SessionCallback, Optional[FrozenSet[str]]]]) -> None:
+        self._events_fired += 1
+        for callback, exchanges in subscribers:
+            if exchanges is not None and event['exchange'] not in exchanges:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception(f"Error in market session subscriber: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'years': sorted(self._loaded),
+                'sessions': {exchange: len(sessions) for exchange, sessions in self._sessions.items()},
+                'subscribers': len(self._subscribers),
+                'events_fired': self._events_fired,
+                'timer_running': self._thread is not None,
+            }
+
+
+_market_sessions: Optional[MarketSessionIndex] = None
+_market_sessions_lock = threading.Lock()
+
+
+def get_market_sessions() -> MarketSessionIndex:
+    """The process-wide market session index, reloaded when the calendar is edited"""
+    global _market_sessions
+    if _market_sessions is None:
+        with _market_sessions_lock:
+            if _market_sessions is None:
+                index = MarketSessionIndex()
+                try:
+                    from database.market_calendar_db import add_calendar_listener
+                    add_calendar_listener(index.invalidate)
+                except Exception as e:
+                    logger.warning(f"Market session index will not follow calendar edits: {e}")
+                _market_sessions = index
+    return _market_sessions
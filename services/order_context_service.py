@@ -0,0 +1,143 @@
+"""
+Per-user order context for the place order fast path.
+
+place_order used to resolve the same things on every request: the broker
+order module (importlib) and the auth token, verifying the API key twice
+along the way. An OrderContext holds them, built once per user at login or
+on the first order and kept in auth_db.order_context_cache.
+
+The order mode and analyze mode are not part of the context: they gate
+whether an order reaches the broker at all, so place_order_with_context
+reads them per request, as the regular path does, and a switch to
+semi-auto takes effect in every worker immediately.
+
+Contexts are evicted together with the user's cached tokens, so login,
+logout, revocation and key regeneration rebuild them (in every worker with
+AUTH_CACHE_SYNC). Each hit also checks that the broker session is not
+revoked, so a logout in another worker stops orders at once. Symbol to token lookups need no per-user state: the broker
+order modules resolve them from the in-memory symbol cache in
+database.token_db.
+"""
+
+import importlib
+import threading
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+from database.auth_db import get_auth_entry, is_auth_revoked, order_context_cache, verify_api_key
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class OrderContext:
+    """Everything the order hot path needs to know about a user"""
+    user_id: str
+    broker: str
+    auth_token: str
+    order_api: ModuleType
+    build_ms: float
+
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'hit_seconds': 0.0, 'builds': 0, 'build_seconds': 0.0, 'failures': 0}
+
+
+def _record(kind: str, seconds: float) -> None:
+    with _stats_lock:
+        _stats[f'{kind}s'] += 1
+        _stats[f'{kind}_seconds'] += seconds
+
+
+def _load_order_api(broker: str) -> Optional[ModuleType]:
+    module_path = f'broker.{broker}.api.order_api'
+    try:
+        return importlib.import_module(module_path)
+    except ImportError as error:
+        logger.error(f"Error importing broker module '{module_path}': {error}")
+        return None
+
+
+def build_order_context(user_id: str) -> Optional[OrderContext]:
+    """
+    Resolve and cache the order context for a user.
+
+    Returns None when the user has no active broker session or the broker
+    module cannot be loaded; callers then take the regular order path.
+    """
+    start = time.perf_counter()
+    entry = get_auth_entry(user_id)
+    elapsed = time.perf_counter() - start
+    if entry is None or not entry.auth_token:
+        return None
+
+    # The first import of a broker module is a one-off cost on either path,
+    # so it is kept out of the per-request overhead the context replaces
+    order_api = _load_order_api(entry.broker)
+    if order_api is None:
+        with _stats_lock:
+            _stats['failures'] += 1
+        return None
+
+    context = OrderContext(
+        user_id=user_id,
+        broker=entry.broker,
+        auth_token=entry.auth_token,
+        order_api=order_api,
+        build_ms=elapsed * 1000
+    )
+    order_context_cache.set(user_id, context, user_id=user_id)
+    _record('build', elapsed)
+    logger.debug(f"Order context built for {user_id} ({entry.broker}) in {context.build_ms:.2f}ms")
+    return context
+
+
+def get_order_context(api_key: str) -> Optional[OrderContext]:
+    """Order context for an API key, building it on a cache miss. None for invalid keys."""
+    start = time.perf_counter()
+    user_id = verify_api_key(api_key)
+    if not user_id:
+        return None
+
+    context = order_context_cache.get(user_id)
+    if context is not None:
+        if is_auth_revoked(user_id):
+            return None
+        _record('hit', time.perf_counter() - start)
+        return context
+    return build_order_context(user_id)
+
+
+def prime_order_context(user_id: str) -> None:
+    """Build a user's order context ahead of the first order (called after login)"""
+    try:
+        build_order_context(user_id)
+    except Exception as e:
+        logger.warning(f"Could not prime order context for {user_id}: {e}")
+
+
+def prime_order_context_async(user_id: str) -> None:
+    """prime_order_context on a background thread so login is not delayed"""
+    threading.Thread(target=prime_order_context, args=(user_id,), daemon=True).start()
+
+
+def get_order_context_stats() -> Dict[str, Any]:
+    """Fast path usage and the per-order overhead it saves"""
+    with _stats_lock:
+        stats = dict(_stats)
+    avg_hit_ms = stats['hit_seconds'] * 1000 / stats['hits'] if stats['hits'] else 0.0
+    avg_build_ms = stats['build_seconds'] * 1000 / stats['builds'] if stats['builds'] else 0.0
+    saved_per_order_ms = max(avg_build_ms - avg_hit_ms, 0.0)
+    return {
+        'context_hits': stats['hits'],
+        'context_builds': stats['builds'],
+        'build_failures': stats['failures'],
+        'avg_lookup_us': round(avg_hit_ms * 1000, 2),
+        'avg_build_ms': round(avg_build_ms, 3),
+        'saved_per_order_ms': round(saved_per_order_ms, 3),
+        'saved_total_ms': round(saved_per_order_ms * stats['hits'], 1),
+        'cache': order_context_cache.stats(),
+    }
@@ -0,0 +1,381 @@
+"""
+In-process order ingestion engine for Chartink and TradingView webhooks.
+
+Webhook orders are grouped into lanes keyed by (API key, strategy). Each lane
+is drained in FIFO order by one worker at a time, so orders from the same
+strategy keep their sequence, while different users and strategies are
+processed in parallel. Orders go straight to the place_order and
+place_smart_order services instead of looping back over HTTP, and each user
+is paced by the same ORDER_RATE_LIMIT / SMART_ORDER_RATE_LIMIT buckets as
+basket and split orders (utils.shared_rate_limit.get_order_bucket).
+
+Queued orders live in a durable journal (services.order_journal) rather than
+in memory, so they survive a restart and a burst of alerts does not grow the
+process. The API key in each journaled payload is encrypted like stored auth
+tokens. On startup recover() replays orders a crashed or restarted worker
+left behind, as long as they are recent and their exchange is still open.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import pytz
+
+from services.order_journal import OrderJournal
+from utils.logging import get_logger
+from utils.shared_rate_limit import get_order_bucket
+
+logger = get_logger(__name__)
+
+WEBHOOK_ORDER_WORKERS = int(os.getenv('WEBHOOK_ORDER_WORKERS', '8'))
+WEBHOOK_JOURNAL_PATH = os.getenv('WEBHOOK_JOURNAL_PATH', 'db/webhook_orders.db')
+# How long finished journal entries (and the webhook ids they dedupe) are kept
+WEBHOOK_JOURNAL_RETENTION = float(os.getenv('WEBHOOK_JOURNAL_RETENTION', '86400'))
+# Opt-in: repeats of an identical order from the same webhook within this many seconds
+# are dropped even without a delivery id (0 = only dedupe on delivery ids)
+WEBHOOK_DEDUPE_WINDOW = float(os.getenv('WEBHOOK_DEDUPE_WINDOW', '0'))
+# Orders older than this are not replayed after a restart
+WEBHOOK_REPLAY_MAX_AGE = float(os.getenv('WEBHOOK_REPLAY_MAX_AGE', '300'))
+# A worker that has not renewed its journal lease for this long has died; its claimed
+# orders are replayed (live workers renew every quarter of this, however slow an order)
+WEBHOOK_CLAIM_TIMEOUT = float(os.getenv('WEBHOOK_CLAIM_TIMEOUT', '60'))
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Number of recent webhook-to-broker latencies kept for percentile reporting
+LATENCY_SAMPLE_SIZE = 1000
+
+
+@dataclass
+class OrderJob:
+    """A webhook order waiting to be placed"""
+    endpoint: str
+    payload: Dict[str, Any]
+    source: str
+    received_at: float = field(default_factory=time.time)
+    seq: Optional[int] = None
+
+
+def _load_sessions(day: date) -> Optional[Dict[str, Tuple[float, float]]]:
+    """{exchange: (start, end)} in epoch seconds for the day, or None if timings are unavailable"""
+    try:
+        from database.market_calendar_db import get_market_timings_for_date
+        timings = get_market_timings_for_date(day)
+    except Exception as e:
+        logger.warning(f"Market timings unavailable for {day}, replaying by age only: {e}")
+        return None
+    return {
+        timing['exchange']: (timing['start_time'] / 1000.0, timing['end_time'] / 1000.0)
+        for timing in timings
+    }
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class OrderIngestionEngine:
+    """Parallel, rate-limited executor for journaled webhook orders"""
+
+    def __init__(self, max_workers: int = WEBHOOK_ORDER_WORKERS, journal_path: str = WEBHOOK_JOURNAL_PATH,
+                 session_loader: Callable[[date], Optional[Dict[str, Tuple[float, float]]]] = _load_sessions):
+        self.max_workers = max_workers
+        self.journal_path = journal_path
+        self._journal: Optional[OrderJournal] = None
+        self._heartbeat_pid: Optional[int] = None
+        self._stopped = threading.Event()
+        self._session_loader = session_loader
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active_lanes = set()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'duplicates': 0, 'replayed': 0, 'expired': 0}
+        self._source_counters: Dict[str, int] = {}
+
+    @property
+    def journal(self) -> OrderJournal:
+        """The order journal, opened on first use"""
+        if self._journal is None or self._heartbeat_pid != os.getpid():
+            with self._lock:
+                if self._journal is None:
+                    self._journal = OrderJournal(self.journal_path, retention=WEBHOOK_JOURNAL_RETENTION)
+                if self._heartbeat_pid != os.getpid():
+                    # One lease renewal thread per process (threads do not survive a fork)
+                    self._heartbeat_pid = os.getpid()
+                    threading.Thread(target=self._renew_lease, args=(self._journal,),
+                                     name='order-journal-lease', daemon=True).start()
+        return self._journal
+
+    def _renew_lease(self, journal: OrderJournal) -> None:
+        """Keep this process's claims from being released while it is alive"""
+        interval = max(WEBHOOK_CLAIM_TIMEOUT / 4, 1)
+        while True:
+            try:
+                journal.heartbeat()
+            except Exception as e:
+                logger.warning(f"Could not renew webhook journal lease: {e}")
+            if self._stopped.wait(interval):
+                return
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='order-ingest')
+        return self._executor
+
+    def _get_bucket(self, api_key: str, endpoint: str):
+        """Per-user bucket for the endpoint's rate class"""
+        rate_class = 'smart' if endpoint == 'placesmartorder' else 'regular'
+        return get_order_bucket(api_key, rate_class)
+
+    @staticmethod
+    def _lane_id(payload: Dict[str, Any]) -> str:
+        """Journal lane for a (API key, strategy) pair; the API key itself is never stored in clear"""
+        digest = hashlib.sha256(payload.get('apikey', '').encode()).hexdigest()[:16]
+        return f"{digest}:{payload.get('strategy', '')}"
+
+    def _encode(self, payload: Dict[str, Any]) -> str:
+        """Serialize a payload for the journal with its API key encrypted"""
+        from database.auth_db import encrypt_token
+        stored = dict(payload)
+        stored['apikey'] = encrypt_token(payload.get('apikey', ''))
+        return json.dumps(stored)
+
+    def _decode(self, text: str) -> Dict[str, Any]:
+        from database.auth_db import decrypt_token
+        payload = json.loads(text)
+        payload['apikey'] = decrypt_token(payload.get('apikey', ''))
+        return payload
+
+    def submit(self, endpoint: str, payload: Dict[str, Any], source: str = 'webhook',
+               dedupe_key: Optional[str] = None, dedupe_window: Optional[float] = None) -> bool:
+        """
+        Journal an order for placement.
+
+        Args:
+            endpoint: 'placeorder' or 'placesmartorder'
+            payload: Order payload including apikey and strategy
+            source: Originating webhook ('chartink', 'strategy', ...) for metrics
+            dedupe_key: Delivery identity; an order whose key is already journaled is dropped
+            dedupe_window: Seconds a dedupe key stays in effect (None: the journal retention)
+
+        Returns:
+            False if the order was dropped as a duplicate delivery
+        """
+        lane = self._lane_id(payload)
+        seq = self.journal.append(
+            lane, endpoint, source, self._encode(payload), strategy=payload.get('strategy', ''),
+            dedupe_key=dedupe_key, dedupe_window=dedupe_window
+        )
+        if seq is None:
+            logger.info(f"Dropped duplicate {source} order for {payload.get('symbol')} in strategy {payload.get('strategy')}")
+            with self._lock:
+                self._counters['duplicates'] += 1
+            return False
+
+        with self._lock:
+            self._counters['submitted'] += 1
+            self._source_counters[source] = self._source_counters.get(source, 0) + 1
+        self._schedule(lane)
+        return True
+
+    def _schedule(self, lane: str) -> None:
+        """Start draining a lane unless a worker in this process already is"""
+        with self._lock:
+            if lane in self._active_lanes:
+                return
+            self._active_lanes.add(lane)
+        self._get_executor().submit(self._drain_lane, lane)
+
+    def _drain_lane(self, lane: str) -> None:
+        """Process a lane's orders in order until it is empty"""
+        while True:
+            entry = self.journal.claim(lane)
+            if entry is None:
+                # Re-check under the lock so an order journaled meanwhile is not stranded
+                with self._lock:
+                    entry = self.journal.claim(lane)
+                    if entry is None:
+                        self._active_lanes.discard(lane)
+                        return
+
+            try:
+                job = OrderJob(endpoint=entry.endpoint, payload=self._decode(entry.payload),
+                               source=entry.source, received_at=entry.received_at, seq=entry.seq)
+                result = self._execute(job)
+            except Exception as e:
+                logger.exception(f"Error processing {entry.source} order: {e}")
+                self.journal.complete(entry.seq, success=False, result=str(e))
+                with self._lock:
+                    self._counters['failed'] += 1
+                continue
+            self.journal.complete(entry.seq, result=result)
+
+    def _execute(self, job: OrderJob) -> str:
+        """Place a single order through the order services. Returns the outcome for the journal."""
+        from services.place_order_service import place_order
+        from services.place_smart_order_service import place_smart_order
+
+        payload = job.payload
+        api_key = payload.get('apikey')
+        symbol = payload.get('symbol')
+        strategy = payload.get('strategy')
+
+        self._get_bucket(api_key, job.endpoint).acquire()
+
+        if job.endpoint == 'placesmartorder':
+            # Pacing is handled by the token bucket, so skip the service's fixed delay
+            success, response, status_code = place_smart_order(
+                order_data=payload, api_key=api_key, smart_order_delay='0'
+            )
+        else:
+            success, response, status_code = place_order(order_data=payload, api_key=api_key)
+
+        latency_ms = (time.time() - job.received_at) * 1000
+        with self._lock:
+            self._latencies.append(latency_ms)
+            self._counters['completed' if success else 'failed'] += 1
+
+        order_kind = 'Smart order' if job.endpoint == 'placesmartorder' else 'Regular order'
+        if success:
+            logger.info(f'{order_kind} placed for {symbol} in strategy {strategy} ({latency_ms:.0f}ms from webhook)')
+        else:
+            logger.error(f'Error placing {order_kind.lower()} for {symbol}: {status_code} {response}')
+        return json.dumps({'status_code': status_code, **response}, default=str)
+
+    def _replay_block_reason(self, payload: Dict[str, Any], received_at: float, now: float) -> Optional[str]:
+        """Why a journaled order left by a previous run must not be placed now, or None"""
+        if now - received_at > WEBHOOK_REPLAY_MAX_AGE:
+            return f'not replayed: received {now - received_at:.0f}s before recovery'
+        sessions = self._session_loader(datetime.fromtimestamp(now, IST).date())
+        if sessions is None:
+            return None
+        exchange = (payload.get('exchange') or '').split('_')[0]
+        session = sessions.get(exchange)
+        if session is None or not session[0] <= now < session[1]:
+            return f'not replayed: {exchange or "market"} is closed'
+        return None
+
+    def recover(self) -> Dict[str, int]:
+        """
+        Resume journaled orders after a restart or crash.
+
+        Claims held by stopped workers (see OrderJournal.release_stale) are
+        released, then every pending order is
+        either scheduled again or expired if it is too old or its exchange is
+        closed. Orders a dead worker had already sent to the broker are placed
+        again (at-least-once).
+        """
+        released = self.journal.release_stale(WEBHOOK_CLAIM_TIMEOUT)
+        now = time.time()
+        lanes = set()
+        replayed = expired = 0
+        for entry in self.journal.pending():
+            try:
+                reason = self._replay_block_reason(self._decode(entry.payload), entry.received_at, now)
+            except Exception as e:
+                reason = f'not replayed: unreadable entry ({e})'
+            if reason:
+                self.journal.expire(entry.seq, reason)
+                expired += 1
+            else:
+                lanes.add(entry.lane)
+                replayed += 1
+
+        with self._lock:
+            self._counters['replayed'] += replayed
+            self._counters['expired'] += expired
+        for lane in lanes:
+            self._schedule(lane)
+
+        if replayed or expired:
+            logger.info(f"Webhook order journal recovered: {replayed} orders replayed, {expired} expired "
+                        f"({released} released from stopped workers)")
+        return {'released': released, 'replayed': replayed, 'expired': expired}
+
+    def queue_depth(self) -> int:
+        """Number of orders waiting to be placed"""
+        journal = self.journal.stats()
+        return journal['pending'] + journal['claimed']
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and webhook-to-broker latency"""
+        journal = self.journal.stats()
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'queue_depth': journal['pending'] + journal['claimed'],
+                'active_lanes': len(self._active_lanes),
+                'pending_by_strategy': journal.pop('pending_by_strategy'),
+                'workers': self.max_workers,
+                **self._counters,
+                'by_source': dict(self._source_counters),
+                'journal': journal,
+            }
+
+        stats['latency_ms'] = {
+            'count': len(latencies),
+            'avg': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+            'p50': round(_percentile(latencies, 50), 2),
+            'p95': round(_percentile(latencies, 95), 2),
+            'p99': round(_percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0,
+        }
+        return stats
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting work and release worker threads"""
+        self._stopped.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Shared engine for all webhook blueprints
+order_ingestion_engine = OrderIngestionEngine()
+
+
+def webhook_dedupe_key(source: str, webhook_id: str, delivery_id: Optional[str] = None,
+                       payload: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Dedupe key and window for a webhook order.
+
+    With a delivery id (an id the sender repeats on retries) the key holds for
+    the journal retention. Without one nothing is deduped, since identical
+    orders (pyramiding entries, repeated alerts) are usually meant, unless
+    WEBHOOK_DEDUPE_WINDOW is set: then the order itself is the key and
+    identical orders within that many seconds count as repeats.
+    """
+    if delivery_id:
+        identity, window = f"{source}:{webhook_id}:{delivery_id}", None
+    elif WEBHOOK_DEDUPE_WINDOW <= 0:
+        return None, None
+    else:
+        body = {key: value for key, value in (payload or {}).items() if key != 'apikey'}
+        identity, window = f"{source}:{webhook_id}:{json.dumps(body, sort_keys=True)}", WEBHOOK_DEDUPE_WINDOW
+    return hashlib.sha256(identity.encode()).hexdigest(), window
+
+
+def queue_webhook_order(endpoint: str, payload: Dict[str, Any], source: str = 'webhook',
+                        webhook_id: Optional[str] = None, delivery_id: Optional[str] = None) -> bool:
+    """
+    Journal a webhook order on the shared ingestion engine.
+
+    Returns False if it duplicates an order already received from the same
+    webhook (see webhook_dedupe_key); without a webhook_id nothing is deduped.
+    """
+    dedupe_key = dedupe_window = None
+    if webhook_id:
+        dedupe_key, dedupe_window = webhook_dedupe_key(source, webhook_id, delivery_id, payload)
+    return order_ingestion_engine.submit(endpoint, payload, source, dedupe_key=dedupe_key, dedupe_window=dedupe_window)
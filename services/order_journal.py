@@ -0,0 +1,297 @@
+"""
+Durable journal for webhook orders.
+
+Webhook orders are appended to a small SQLite file (WAL mode) before the
+webhook returns, so a worker restart or crash does not lose them and a burst
+of alerts waits on disk instead of in memory. Every worker process on the
+host reads the journal as one consumer group: an entry is claimed by one
+consumer at a time, and a lane (one user's strategy) is only handed to a
+consumer while no other consumer holds an entry from it, which keeps each
+strategy's orders in sequence across processes.
+
+Entries move pending -> claimed -> done (or failed / expired). Each consumer
+holds a lease it renews with heartbeat() while it runs; a claim is only handed
+back by release_stale() once its consumer is gone (lease expired, or its
+process no longer exists on this host), never because an order is merely slow.
+Processing is at least once: a consumer that dies after placing an order but
+before acknowledging it leaves the entry claimed, and it is replayed on the
+next start. Appends carrying a dedupe key are dropped when
+an entry with the same key is already journaled, which absorbs webhook
+retries and duplicate deliveries.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Finished entries older than the retention are swept every PURGE_EVERY appends
+PURGE_EVERY = 1000
+
+# Longest result text kept per entry
+MAX_RESULT_LENGTH = 500
+
+# Per-process token that tells a restarted process from an earlier one with the same pid
+_process_token = {'pid': None, 'token': None}
+
+
+@dataclass
+class JournalEntry:
+    """A journaled order as handed to a consumer"""
+    seq: int
+    lane: str
+    endpoint: str
+    source: str
+    payload: str
+    received_at: float
+    attempts: int
+
+
+class OrderJournal:
+    """Append-only order journal in a SQLite file shared by every worker on the host"""
+
+    _COLUMNS = 'seq, lane, endpoint, source, payload, received_at, attempts'
+
+    def __init__(self, path: str, retention: float = 86400, timeout: float = 5.0):
+        self.path = path
+        self.retention = retention
+        self.timeout = timeout
+        self._local = threading.local()
+        self._appends = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS webhook_orders ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'lane TEXT NOT NULL, '
+            'strategy TEXT, '
+            'endpoint TEXT NOT NULL, '
+            'source TEXT NOT NULL, '
+            'payload TEXT NOT NULL, '
+            'dedupe_key TEXT, '
+            'received_at REAL NOT NULL, '
+            "state TEXT NOT NULL DEFAULT 'pending', "
+            'consumer TEXT, '
+            'claimed_at REAL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, '
+            'finished_at REAL, '
+            'result TEXT)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_webhook_orders_lane ON webhook_orders (lane, state, seq)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_webhook_orders_state ON webhook_orders (state, seq)')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_webhook_orders_dedupe ON webhook_orders (dedupe_key, received_at) '
+            'WHERE dedupe_key IS NOT NULL'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS journal_consumers ('
+            'consumer TEXT PRIMARY KEY, '
+            'heartbeat REAL NOT NULL)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread, reopened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            # Appends must survive a process crash; NORMAL in WAL mode only risks
+            # the last commits on power loss and keeps appends to one write
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def consumer_id() -> str:
+        """Identity of this process in the consumer group: host, pid and a start token"""
+        pid = os.getpid()
+        if _process_token['pid'] != pid:
+            _process_token['pid'] = pid
+            _process_token['token'] = uuid.uuid4().hex[:12]
+        return f"{socket.gethostname()}:{pid}:{_process_token['token']}"
+
+    def heartbeat(self) -> None:
+        """Renew this consumer's lease on the entries it has claimed"""
+        with self._transaction() as conn:
+            self._renew(conn)
+
+    def _renew(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            'INSERT INTO journal_consumers (consumer, heartbeat) VALUES (?, ?) '
+            'ON CONFLICT(consumer) DO UPDATE SET heartbeat = excluded.heartbeat',
+            (self.consumer_id(), time.time())
+        )
+
+    @staticmethod
+    def _is_gone(consumer: str, heartbeat: Optional[float], lease_timeout: float, now: float) -> bool:
+        """Whether a consumer holding claims has stopped"""
+        if consumer == OrderJournal.consumer_id():
+            return False
+        if heartbeat is None or heartbeat < now - lease_timeout:
+            return True
+        host, _, rest = (consumer or '').partition(':')
+        pid = rest.split(':', 1)[0]
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        try:
+            import psutil
+            return not psutil.pid_exists(int(pid))
+        except ImportError:
+            return False
+
+    def append(self, lane: str, endpoint: str, source: str, payload: str, strategy: str = '',
+               dedupe_key: Optional[str] = None, dedupe_window: Optional[float] = None,
+               received_at: Optional[float] = None) -> Optional[int]:
+        """
+        Journal an order.
+
+        Args:
+            lane: Ordering key; entries of a lane are consumed in sequence
+            endpoint: 'placeorder' or 'placesmartorder'
+            source: Originating webhook, for metrics
+            payload: Serialized order payload
+            strategy: Strategy name, for reporting only
+            dedupe_key: Delivery identity; a repeat of a journaled key is dropped
+            dedupe_window: Only entries received this many seconds back count as
+                repeats (None: everything still retained)
+            received_at: Webhook receive time (defaults to now)
+
+        Returns:
+            The entry's sequence number, or None for a duplicate delivery
+        """
+        now = received_at or time.time()
+        with self._transaction() as conn:
+            if dedupe_key is not None:
+                since = now - dedupe_window if dedupe_window is not None else 0
+                duplicate = conn.execute(
+                    'SELECT 1 FROM webhook_orders WHERE dedupe_key = ? AND received_at >= ? LIMIT 1',
+                    (dedupe_key, since)
+                ).fetchone()
+                if duplicate:
+                    return None
+            seq = conn.execute(
+                'INSERT INTO webhook_orders (lane, strategy, endpoint, source, payload, dedupe_key, received_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (lane, strategy, endpoint, source, payload, dedupe_key, now)
+            ).lastrowid
+            self._appends += 1
+            if self._appends % PURGE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM webhook_orders WHERE state NOT IN ('pending', 'claimed') AND received_at < ?",
+                    (now - self.retention,)
+                )
+        return seq
+
+    def claim(self, lane: str) -> Optional[JournalEntry]:
+        """
+        Claim the oldest pending entry of a lane for this process.
+
+        Returns None when the lane is empty or another consumer is still
+        processing one of its entries (that consumer then carries on with it).
+        """
+        with self._transaction() as conn:
+            busy = conn.execute(
+                "SELECT 1 FROM webhook_orders WHERE lane = ? AND state = 'claimed' LIMIT 1", (lane,)
+            ).fetchone()
+            if busy:
+                return None
+            row = conn.execute(
+                f"SELECT {self._COLUMNS} FROM webhook_orders WHERE lane = ? AND state = 'pending' "
+                'ORDER BY seq LIMIT 1', (lane,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE webhook_orders SET state = 'claimed', consumer = ?, claimed_at = ?, attempts = attempts + 1 "
+                'WHERE seq = ?', (self.consumer_id(), time.time(), row[0])
+            )
+            self._renew(conn)
+        entry = JournalEntry(*row)
+        entry.attempts += 1
+        return entry
+
+    def complete(self, seq: int, success: bool = True, result: Optional[str] = None) -> None:
+        """Acknowledge a claimed entry as done (or failed)"""
+        self._finish(seq, 'done' if success else 'failed', result)
+
+    def expire(self, seq: int, reason: str) -> None:
+        """Drop an entry without processing it"""
+        self._finish(seq, 'expired', reason)
+
+    def _finish(self, seq: int, state: str, result: Optional[str]) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE webhook_orders SET state = ?, finished_at = ?, result = ? WHERE seq = ?',
+                (state, time.time(), result[:MAX_RESULT_LENGTH] if result else result, seq)
+            )
+
+    def release_stale(self, lease_timeout: float) -> int:
+        """
+        Return entries claimed by stopped consumers to pending.
+
+        A consumer has stopped when it has not renewed its lease for
+        lease_timeout seconds, or when it ran on this host and its process no
+        longer exists. Claims of live consumers stay put however old they are.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            owners = conn.execute(
+                'SELECT w.consumer, c.heartbeat FROM webhook_orders w '
+                'LEFT JOIN journal_consumers c ON c.consumer = w.consumer '
+                "WHERE w.state = 'claimed' GROUP BY w.consumer"
+            ).fetchall()
+            released = 0
+            for consumer, heartbeat in owners:
+                if self._is_gone(consumer, heartbeat, lease_timeout, now):
+                    released += conn.execute(
+                        "UPDATE webhook_orders SET state = 'pending', consumer = NULL "
+                        "WHERE state = 'claimed' AND consumer IS ?", (consumer,)
+                    ).rowcount
+                    conn.execute('DELETE FROM journal_consumers WHERE consumer IS ?', (consumer,))
+            conn.execute('DELETE FROM journal_consumers WHERE heartbeat < ?', (now - self.retention,))
+            return released
+
+    def pending(self) -> List[JournalEntry]:
+        """Every pending entry, oldest first"""
+        rows = self._conn().execute(
+            f"SELECT {self._COLUMNS} FROM webhook_orders WHERE state = 'pending' ORDER BY seq"
+        ).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts by state and pending entries by strategy"""
+        conn = self._conn()
+        counts = dict(conn.execute('SELECT state, COUNT(*) FROM webhook_orders GROUP BY state').fetchall())
+        by_strategy = dict(conn.execute(
+            "SELECT strategy, COUNT(*) FROM webhook_orders WHERE state IN ('pending', 'claimed') GROUP BY strategy"
+        ).fetchall())
+        return {
+            'path': self.path,
+            **{state: counts.get(state, 0) for state in ('pending', 'claimed', 'done', 'failed', 'expired')},
+            'pending_by_strategy': by_strategy,
+        }
@@ -2,7 +2,7 @@ import importlib
 import traceback
 import copy
 from typing import Tuple, Dict, Any, Optional
-from database.auth_db import get_auth_token_broker
+from database.auth_db import get_auth_token_broker, get_order_mode
 from database.apilog_db import async_log_order, executor
 from database.settings_db import get_analyze_mode
 from database.analyzer_db import async_log_analyzer
@@ -18,6 +18,7 @@ from utils.constants import (
 from restx_api.schemas import OrderSchema
 from utils.logging import get_logger
 from services.telegram_alert_service import telegram_alert_service
+from services.order_context_service import OrderContext, get_order_context
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -147,10 +148,6 @@ def place_order_with_auth(
         - Response data (dict)
         - HTTP status code (int)
     """
-    order_request_data = copy.deepcopy(original_data)
-    if 'apikey' in order_request_data:
-        order_request_data.pop('apikey', None)
-    
     # If in analyze mode, route to sandbox for virtual trading
     if get_analyze_mode():
         from services.sandbox_service import sandbox_place_order
@@ -178,6 +175,31 @@ def place_order_with_auth(
         executor.submit(async_log_order, 'placeorder', original_data, error_response)
         return False, error_response, 404
 
+    return submit_to_broker(broker_module, order_data, auth_token, original_data, emit_event)
+
+def submit_to_broker(
+    broker_module: Any,
+    order_data: Dict[str, Any],
+    auth_token: str,
+    original_data: Dict[str, Any],
+    emit_event: bool = True
+) -> Tuple[bool, Dict[str, Any], int]:
+    """
+    Send a validated order to the broker module and publish the result.
+
+    Args:
+        broker_module: The broker's order_api module
+        order_data: Validated order data
+        auth_token: Authentication token for the broker API
+        original_data: Original request data for logging
+        emit_event: Whether to emit socket event (default True, set False for batch orders)
+
+    Returns:
+        Tuple containing:
+        - Success status (bool)
+        - Response data (dict)
+        - HTTP status code (int)
+    """
     try:
         # Call the broker's place_order_api function
         res, response_data, order_id = broker_module.place_order_api(order_data, auth_token)
@@ -209,13 +231,16 @@ def place_order_with_auth(
                 }
             )
         order_response_data = {'status': 'success', 'orderid': order_id}
+        # Order payloads are flat, so a filtered copy is enough for the log
+        order_request_data = {key: value for key, value in original_data.items() if key != 'apikey'}
         executor.submit(async_log_order, 'placeorder', order_request_data, order_response_data)
         # Send Telegram alert in background task (non-blocking)
         # Moves DB lookups + formatting off request thread entirely
-        socketio.start_background_task(
-            telegram_alert_service.send_order_alert,
-            'placeorder', order_data, order_response_data, original_data.get('apikey')
-        )
+        if telegram_alert_service.enabled:
+            socketio.start_background_task(
+                telegram_alert_service.send_order_alert,
+                'placeorder', order_data, order_response_data, original_data.get('apikey')
+            )
         return True, order_response_data, 200
     else:
         message = response_data.get('message', 'Failed to place order') if isinstance(response_data, dict) else 'Failed to place order'
@@ -226,6 +251,54 @@ def place_order_with_auth(
         executor.submit(async_log_order, 'placeorder', original_data, error_response)
         return False, error_response, res.status if res.status != 200 else 500
 
+def place_order_with_context(
+    order_data: Dict[str, Any],
+    context: OrderContext,
+    api_key: str,
+    emit_event: bool = True
+) -> Tuple[bool, Dict[str, Any], int]:
+    """
+    Fast path for API key orders: validate, then hand the order to the broker
+    module resolved in the user's order context. The auth token and broker
+    module come from the context, so no module import or API key lookup
+    happens per request; the order mode is still read on every order so a
+    switch to semi-auto applies in all workers at once.
+
+    Args:
+        order_data: Order data containing all required fields
+        context: The user's order context
+        api_key: OpenAlgo API key the context was resolved from
+        emit_event: Whether to emit socket event (default True, set False for batch orders)
+
+    Returns:
+        Tuple containing:
+        - Success status (bool)
+        - Response data (dict)
+        - HTTP status code (int)
+    """
+    order_data['apikey'] = api_key
+    original_data = dict(order_data)
+
+    # Semi-auto mode: route to Action Center
+    if get_order_mode(context.user_id) == 'semi_auto':
+        from services.order_router_service import queue_order
+        return queue_order(api_key, original_data, 'placeorder')
+
+    analyze_mode = get_analyze_mode()
+    is_valid, _, error_message = validate_order_data(order_data)
+    if not is_valid:
+        if analyze_mode:
+            return False, emit_analyzer_error(original_data, error_message), 400
+        error_response = {'status': 'error', 'message': error_message}
+        executor.submit(async_log_order, 'placeorder', original_data, error_response)
+        return False, error_response, 400
+
+    if analyze_mode:
+        from services.sandbox_service import sandbox_place_order
+        return sandbox_place_order(order_data, api_key, original_data)
+
+    return submit_to_broker(context.order_api, order_data, context.auth_token, original_data, emit_event)
+
 def place_order(
     order_data: Dict[str, Any],
     api_key: Optional[str] = None,
@@ -250,6 +323,12 @@ def place_order(
         - Response data (dict)
         - HTTP status code (int)
     """
+    # Fast path: a cached order context replaces the per-request lookups below
+    if api_key and not (auth_token and broker):
+        context = get_order_context(api_key)
+        if context is not None:
+            return place_order_with_context(order_data, context, api_key, emit_event)
+
     original_data = copy.deepcopy(order_data)
     if api_key:
         original_data['apikey'] = api_key
@@ -0,0 +1,645 @@
+"""
+Intraday portfolio P&L curve for the PnL tracker page.
+
+Pipeline:
+1. Trade timestamps are parsed a column at a time, one vectorized pass per
+   known broker format, with the scalar parser only for leftovers.
+2. 1-minute candles for all traded symbols are fetched concurrently through a
+   shared in-process candle cache. Calls that reach the broker still go
+   through the history rate limiter.
+3. Positions become step functions on one minute grid shared by all symbols,
+   so P&L is position x price - cost + realized over a single aligned matrix.
+4. The curve is cached per user and trading day. A refresh with the same
+   trades recomputes only from the last (possibly still forming) minute on.
+"""
+
+import os
+import threading
+import time as time_module
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from database.history_db import is_range_cached
+from services.history_service import get_history
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Concurrent history fetches per P&L request
+PNL_HISTORY_WORKERS = int(os.getenv('PNL_HISTORY_WORKERS', '8'))
+# Seconds before today's candles for a symbol are fetched again
+PNL_CANDLE_TTL = float(os.getenv('PNL_CANDLE_TTL', '30'))
+# (symbol, exchange, day) entries kept in the candle cache
+PNL_CANDLE_CACHE_SIZE = int(os.getenv('PNL_CANDLE_CACHE_SIZE', '500'))
+
+# Trade timestamp formats seen across brokers (order matters - more specific first)
+TRADE_TIME_FORMATS = (
+    '%d-%b-%Y %H:%M:%S',   # AngelOne: "17-Dec-2025 10:54:03"
+    '%H:%M:%S %d-%m-%Y',   # Flattrade: "09:41:01 17-12-2025"
+    '%d-%m-%Y %H:%M:%S',   # "17-12-2025 09:41:01"
+    '%Y-%m-%d %H:%M:%S',   # ISO-like: "2025-12-17 10:30:00"
+    '%Y-%m-%dT%H:%M:%S',   # ISO: "2025-12-17T10:30:00"
+)
+TIME_ONLY_FORMATS = ('%H:%M:%S', '%H:%M')
+
+
+def _empty_result() -> Dict[str, Any]:
+    return {
+        'current_mtm': 0,
+        'max_mtm': 0,
+        'max_mtm_time': None,
+        'min_mtm': 0,
+        'min_mtm_time': None,
+        'max_drawdown': 0,
+        'pnl_series': [],
+        'drawdown_series': []
+    }
+
+
+# Timestamp parsing
+
+def parse_trade_timestamp(timestamp_str, fallback_date=None):
+    """
+    Safely parse trade timestamp from various broker formats.
+
+    Supported formats:
+    - "17-Dec-2025 10:54:03" (AngelOne)
+    - "09:41:01 17-12-2025" (Flattrade)
+    - "10:30:52" (Time only)
+    - Unix timestamp (int/float)
+    - ISO format strings
+
+    Returns: timezone-aware datetime in IST, or None if parsing fails
+    """
+    if timestamp_str is None:
+        return None
+
+    # Handle numeric timestamps (Unix epoch)
+    if isinstance(timestamp_str, (int, float)):
+        try:
+            dt = pd.to_datetime(timestamp_str, unit='s')
+            if dt.tz is None:
+                return dt.tz_localize('UTC').tz_convert(IST)
+            return dt.tz_convert(IST)
+        except Exception as e:
+            logger.warning(f"Failed to parse numeric timestamp {timestamp_str}: {e}")
+            return None
+
+    if not isinstance(timestamp_str, str):
+        return None
+
+    timestamp_str = timestamp_str.strip()
+    if not timestamp_str:
+        return None
+
+    for fmt in TRADE_TIME_FORMATS:
+        try:
+            dt = datetime.strptime(timestamp_str, fmt)
+            return IST.localize(dt)
+        except ValueError:
+            continue
+
+    # Try time-only format: "HH:MM:SS"
+    if ':' in timestamp_str and ' ' not in timestamp_str:
+        try:
+            time_parts = timestamp_str.split(':')
+            if len(time_parts) >= 2 and len(time_parts[0]) <= 2:
+                today = fallback_date or datetime.now(IST).date()
+                dt = datetime.combine(today, dt_time(
+                    int(time_parts[0]),
+                    int(time_parts[1]),
+                    int(time_parts[2]) if len(time_parts) > 2 else 0
+                ))
+                return IST.localize(dt)
+        except (ValueError, IndexError):
+            pass
+
+    # Fallback: try pandas auto-parsing
+    try:
+        dt = pd.to_datetime(timestamp_str)
+        if dt.tz is None:
+            return dt.tz_localize(IST)
+        return dt.tz_convert(IST)
+    except Exception as e:
+        logger.warning(f"Failed to auto-parse timestamp '{timestamp_str}': {e}")
+
+    return None
+
+
+def parse_trade_timestamps(values: Iterable[Any], fallback_date=None) -> pd.Series:
+    """
+    Vectorized parse_trade_timestamp for a whole tradebook column.
+
+    A broker uses one format for all its trades, so each known format is
+    tried once on the values still unparsed. Returns IST timestamps (NaT
+    where parsing failed) in input order.
+    """
+    raw = pd.Series(list(values), dtype=object)
+    result = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns, Asia/Kolkata]')
+    if raw.empty:
+        return result
+
+    numeric = raw.map(lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool))
+    if numeric.any():
+        parsed = pd.to_datetime(raw[numeric].astype(float), unit='s', utc=True, errors='coerce')
+        result[numeric] = parsed.dt.tz_convert(IST)
+
+    text = raw.map(lambda v: v.strip() if isinstance(v, str) else '')
+    pending = ~numeric & (text != '')
+
+    def take(parsed: pd.Series):
+        ok = parsed.notna()
+        if ok.any():
+            rows = ok[ok].index
+            result[rows] = parsed[rows].dt.tz_localize(IST)
+            pending[rows] = False
+
+    for fmt in TRADE_TIME_FORMATS:
+        if not pending.any():
+            break
+        take(pd.to_datetime(text[pending], format=fmt, errors='coerce'))
+
+    if pending.any():
+        day = pd.Timestamp(fallback_date or datetime.now(IST).date())
+        for fmt in TIME_ONLY_FORMATS:
+            if not pending.any():
+                break
+            parsed = pd.to_datetime(text[pending], format=fmt, errors='coerce')
+            take(day + (parsed - parsed.dt.normalize()))
+
+    for row in pending[pending].index:
+        parsed = parse_trade_timestamp(raw[row], fallback_date)
+        if parsed is not None:
+            result[row] = parsed
+    return result
+
+
+def convert_timestamp_to_ist(df, symbol=""):
+    """
+    Convert timestamp to IST with robust handling for different formats.
+    Returns the dataframe with datetime index in IST timezone.
+    """
+    try:
+        # Try different timestamp formats
+        if 'timestamp' in df.columns:
+            # Try as Unix timestamp first (seconds)
+            try:
+                df['datetime'] = pd.to_datetime(df['timestamp'], unit='s', utc=True)
+                df['datetime'] = df['datetime'].dt.tz_convert(IST)
+            except:
+                # Try as milliseconds
+                try:
+                    df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+                    df['datetime'] = df['datetime'].dt.tz_convert(IST)
+                except:
+                    # Try as string datetime
+                    df['datetime'] = pd.to_datetime(df['timestamp'])
+                    if df['datetime'].dt.tz is None:
+                        df['datetime'] = df['datetime'].dt.tz_localize('UTC').dt.tz_convert(IST)
+                    else:
+                        df['datetime'] = df['datetime'].dt.tz_convert(IST)
+        elif 'datetime' in df.columns:
+            df['datetime'] = pd.to_datetime(df['datetime'])
+            if df['datetime'].dt.tz is None:
+                df['datetime'] = df['datetime'].dt.tz_localize('UTC').dt.tz_convert(IST)
+            else:
+                df['datetime'] = df['datetime'].dt.tz_convert(IST)
+        else:
+            logger.warning(f"No timestamp field found for {symbol}")
+            return None
+
+        df.set_index('datetime', inplace=True)
+        df = df.sort_index()
+        return df
+    except Exception as e:
+        logger.warning(f"Error converting timestamps for {symbol}: {e}")
+        return None
+
+
+# Candles
+
+class RateLimiter:
+    """Thread-safe rate limiter for API calls"""
+    def __init__(self, calls_per_second=2):
+        self.calls_per_second = calls_per_second
+        self.min_interval = 1.0 / calls_per_second  # Time between calls
+        self.last_call_time = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Wait if necessary to respect rate limit"""
+        with self.lock:
+            current_time = time_module.time()
+            elapsed = current_time - self.last_call_time
+            if elapsed < self.min_interval:
+                sleep_time = self.min_interval - elapsed
+                time_module.sleep(sleep_time)
+            self.last_call_time = time_module.time()
+
+
+# Global rate limiter instance - 2 calls per second (conservative limit)
+history_rate_limiter = RateLimiter(calls_per_second=2)
+
+
+class CandleCache:
+    """
+    1-minute closes per (symbol, exchange, day), shared by all users.
+
+    Past days never change and are kept until evicted; today's candles are
+    fetched again once they are older than PNL_CANDLE_TTL seconds.
+    """
+
+    def __init__(self, max_entries: int = PNL_CANDLE_CACHE_SIZE, ttl: float = PNL_CANDLE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, pd.Series]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_closes(self, symbol: str, exchange: str, day: str, api_key: str) -> Optional[pd.Series]:
+        key = (symbol, exchange, day)
+        now = time_module.time()
+        is_today = day == datetime.now(IST).strftime('%Y-%m-%d')
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (not is_today or now - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        closes = self._fetch(symbol, exchange, day, api_key)
+        if closes is not None:
+            with self._lock:
+                self._entries[key] = (now, closes)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        elif entry is not None:
+            closes = entry[1]  # keep serving the last good candles if a refresh fails
+        return closes
+
+    @staticmethod
+    def _fetch(symbol: str, exchange: str, day: str, api_key: str) -> Optional[pd.Series]:
+        # Apply rate limiting only when the broker will be hit (2 calls/sec to stay under broker's 3/sec limit)
+        if not is_range_cached(symbol, exchange, '1m', day, day):
+            history_rate_limiter.wait()
+        logger.debug(f"Fetching historical data for {symbol} on {exchange}")
+
+        success, hist_response, _ = get_history(
+            symbol=symbol,
+            exchange=exchange,
+            interval='1m',
+            start_date=day,
+            end_date=day,
+            api_key=api_key
+        )
+        if not success or 'data' not in hist_response:
+            logger.warning(f"Could not get historical data for {symbol}")
+            return None
+
+        df_hist = pd.DataFrame(hist_response['data'])
+        if df_hist.empty:
+            return None
+        df_hist = convert_timestamp_to_ist(df_hist, symbol)
+        if df_hist is None:
+            logger.warning(f"Timestamp conversion failed for {symbol}")
+            return None
+        closes = df_hist['close'].astype(float)
+        return closes[~closes.index.duplicated(keep='last')]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+candle_cache = CandleCache()
+
+
+def fetch_closes(symbols: List[Tuple[str, str]], day: str, api_key: str) -> Dict[Tuple[str, str], pd.Series]:
+    """Closes for every (symbol, exchange), fetched concurrently through the candle cache"""
+    if not symbols:
+        return {}
+
+    def fetch(item):
+        symbol, exchange = item
+        try:
+            return item, candle_cache.get_closes(symbol, exchange, day, api_key)
+        except Exception as e:
+            logger.error(f"Error fetching historical data for {symbol}: {e}")
+            return item, None
+
+    workers = max(1, min(PNL_HISTORY_WORKERS, len(symbols)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pnl-history') as pool:
+        results = list(pool.map(fetch, symbols))
+    return {item: closes for item, closes in results if closes is not None and not closes.empty}
+
+
+# Positions
+
+def build_position_windows(trades_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    FIFO position windows for one symbol's trades (sorted by time).
+    Each window is an entry that is open from start_time until end_time
+    (None while open) at exit_price.
+    """
+    net_position = 0
+    position_windows = []
+
+    for trade in trades_list:
+        try:
+            executed_price = float(trade.get('average_price', 0))
+            action = trade.get('action', '')
+            trade_time = trade.get('parsed_time')
+
+            # Calculate quantity
+            qty = float(trade.get('quantity', 0))
+            if qty == 0 and executed_price > 0:
+                trade_value = float(trade.get('trade_value', 0))
+                if trade_value == executed_price:
+                    qty = 1
+                elif trade_value > 0:
+                    qty = trade_value / executed_price
+
+            if qty <= 0:
+                logger.warning(f"Skipping trade with zero/negative quantity: {trade}")
+                continue
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Error parsing trade values: {e}, trade: {trade}")
+            continue
+
+        if action == 'BUY':
+            position_windows.append({
+                'start_time': trade_time,
+                'end_time': None,
+                'qty': qty,
+                'price': executed_price,
+                'action': 'BUY',
+                'exit_price': None
+            })
+            net_position += qty
+        elif net_position > 0:
+            # SELL closing a long position
+            remaining_qty = qty
+            for window in list(position_windows):
+                if window['action'] == 'BUY' and window['end_time'] is None and remaining_qty > 0:
+                    close_qty = min(window['qty'], remaining_qty)
+                    if close_qty == window['qty']:
+                        window['end_time'] = trade_time
+                        window['exit_price'] = executed_price
+                    else:
+                        # Partial close - split the window
+                        window['qty'] -= close_qty
+                        closed_window = window.copy()
+                        closed_window['qty'] = close_qty
+                        closed_window['end_time'] = trade_time
+                        closed_window['exit_price'] = executed_price
+                        position_windows.append(closed_window)
+                    remaining_qty -= close_qty
+            net_position -= qty
+        else:
+            # SELL opening a short position
+            position_windows.append({
+                'start_time': trade_time,
+                'end_time': None,
+                'qty': qty,
+                'price': executed_price,
+                'action': 'SELL',
+                'exit_price': None
+            })
+            net_position -= qty
+
+    return position_windows
+
+
+def pnl_rows(index: pd.DatetimeIndex, prices: np.ndarray, windows: List[List[Dict[str, Any]]],
+             start_row: int = 0) -> np.ndarray:
+    """
+    Portfolio P&L for rows start_row.. of the aligned grid.
+
+    prices is the T x S close matrix (NaN before a symbol's first candle) and
+    windows[j] the position windows of column j. Each window adds its signed
+    quantity and cost while open and its realized P&L from the first candle
+    after it closes (the last candle if it closed after that), so per row:
+    pnl = position * price - cost + realized, summed across symbols.
+    """
+    rows = len(index)
+    n = rows - start_row
+    symbols = prices.shape[1]
+    position = np.zeros((n + 1, symbols))
+    cost = np.zeros((n + 1, symbols))
+    realized = np.zeros((n + 1, symbols))
+
+    for j, symbol_windows in enumerate(windows):
+        for window in symbol_windows:
+            if window['start_time'] is None:
+                continue
+            signed_qty = window['qty'] if window['action'] == 'BUY' else -window['qty']
+            start = index.searchsorted(window['start_time'], side='left')
+            end = rows if window['end_time'] is None else index.searchsorted(window['end_time'], side='right')
+            closed = window['end_time'] is not None and window.get('exit_price') is not None
+
+            if closed:
+                if end == rows and rows:
+                    end = rows - 1
+                realized[max(end - start_row, 0), j] += signed_qty * (window['exit_price'] - window['price'])
+
+            first, last = max(start - start_row, 0), max(end - start_row, 0)
+            if last > first:
+                position[first, j] += signed_qty
+                position[last, j] -= signed_qty
+                cost[first, j] += signed_qty * window['price']
+                cost[last, j] -= signed_qty * window['price']
+
+    position = np.cumsum(position, axis=0)[:n]
+    cost = np.cumsum(cost, axis=0)[:n]
+    realized = np.cumsum(realized, axis=0)[:n]
+    window_prices = prices[start_row:]
+    pnl = np.where(np.isnan(window_prices), 0.0, position * window_prices - cost + realized)
+    return pnl.sum(axis=1)
+
+
+# Curve
+
+class _CurveState:
+    __slots__ = ('signature', 'index', 'total')
+
+    def __init__(self, signature, index, total):
+        self.signature = signature
+        self.index = index
+        self.total = total
+
+
+_curve_cache: Dict[Tuple[str, str], _CurveState] = {}
+_curve_lock = threading.Lock()
+
+
+def _aligned_prices(closes: Dict[Tuple[str, str], pd.Series], keys: List[Tuple[str, str]],
+                    start, end) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """Union minute grid between start and end, with forward-filled closes per key"""
+    frame = pd.DataFrame({key: closes[key] for key in keys})
+    frame = frame[(frame.index >= start) & (frame.index <= end)].sort_index()
+    return frame.index, frame.ffill().to_numpy(dtype=float)
+
+
+def _incremental_total(cache_key, signature, index, prices, windows) -> np.ndarray:
+    """Reuse the cached curve up to its last minute when trades and earlier minutes are unchanged"""
+    with _curve_lock:
+        state = _curve_cache.get(cache_key)
+
+    start_row = 0
+    if state is not None and state.signature == signature and len(state.index) > 1:
+        keep = len(state.index) - 1  # the last cached minute may have been a forming candle
+        if len(index) > keep and index[:keep].equals(state.index[:keep]):
+            start_row = keep
+
+    fresh = pnl_rows(index, prices, windows, start_row)
+    total = np.concatenate([state.total[:start_row], fresh]) if start_row else fresh
+    logger.debug(f"P&L curve: {len(index) - start_row} of {len(index)} minutes computed")
+
+    with _curve_lock:
+        for key in [key for key in _curve_cache if key[0] == cache_key[0] and key != cache_key]:
+            del _curve_cache[key]
+        _curve_cache[cache_key] = _CurveState(signature, index, total)
+    return total
+
+
+def _curve_result(index: pd.DatetimeIndex, total: np.ndarray) -> Dict[str, Any]:
+    if len(total) == 0:
+        return _empty_result()
+
+    drawdown = total - np.maximum.accumulate(total)
+    times = (index.asi8 // 1_000_000).tolist()
+    pnl_values = np.round(np.nan_to_num(total), 2).tolist()
+    drawdown_values = np.round(np.nan_to_num(drawdown), 2).tolist()
+    max_row, min_row = int(np.argmax(total)), int(np.argmin(total))
+
+    return {
+        'current_mtm': round(float(total[-1]), 2),
+        'max_mtm': round(float(total[max_row]), 2),
+        'max_mtm_time': index[max_row].strftime('%H:%M'),
+        'min_mtm': round(float(total[min_row]), 2),
+        'min_mtm_time': index[min_row].strftime('%H:%M'),
+        'max_drawdown': round(float(drawdown.min()), 2),
+        'pnl_series': [{'time': t, 'value': v} for t, v in zip(times, pnl_values)],
+        'drawdown_series': [{'time': t, 'value': v} for t, v in zip(times, drawdown_values)]
+    }
+
+
+def get_intraday_pnl(user: str, trades: List[Dict[str, Any]], current_positions: Dict[str, Dict[str, float]],
+                     api_key: str, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Intraday MTM curve, drawdown and extremes for the PnL tracker.
+
+    Args:
+        user: Login username (curve cache key)
+        trades: Tradebook rows
+        current_positions: {'SYMBOL_EXCHANGE': {'quantity', 'average_price', 'ltp', 'pnl'}}
+        api_key: OpenAlgo API key for history calls
+
+    Returns:
+        The PnL tracker 'data' payload
+    """
+    now = now or datetime.now(IST)
+    if not trades and not current_positions:
+        return _empty_result()
+
+    # 1. Trade times
+    raw_times = [trade.get('timestamp') or trade.get('fill_timestamp') or trade.get('fill_time') for trade in trades]
+    parsed = parse_trade_timestamps(raw_times)
+    missing = parsed.isna()
+    if missing.any():
+        fill_times = parse_trade_timestamps(
+            [trade.get('fill_time') if missing[i] else None for i, trade in enumerate(trades)])
+        parsed = parsed.fillna(fill_times)
+    for i in np.flatnonzero(parsed.isna().to_numpy()):
+        if raw_times[i]:
+            logger.warning(f"Could not parse trade time for {trades[i].get('symbol')}: {raw_times[i]}")
+
+    if parsed.notna().any():
+        first_trade_time = parsed.min().to_pydatetime()
+        logger.info(f"First trade time: {first_trade_time.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    else:
+        logger.warning("Could not determine first trade time, using market open time")
+        first_trade_time = now.replace(hour=9, minute=15, second=0, microsecond=0)
+
+    # Determine the trading date from first trade time (handles overnight session spanning)
+    trade_date = first_trade_time.strftime('%Y-%m-%d')
+    logger.info(f"Using trade date for historical data: {trade_date}")
+
+    # Group trades by symbol, in time order
+    symbol_trades: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for trade, trade_time in zip(trades, parsed):
+        symbol, exchange = trade.get('symbol', ''), trade.get('exchange', '')
+        if not symbol or not exchange:
+            logger.warning(f"Trade missing symbol or exchange: {trade}")
+            continue
+        trade = dict(trade, parsed_time=None if pd.isna(trade_time) else trade_time.to_pydatetime())
+        symbol_trades.setdefault((symbol, exchange), []).append(trade)
+
+    windows_by_symbol = {}
+    for key, trades_list in symbol_trades.items():
+        trades_list.sort(key=lambda x: x['parsed_time'] or datetime.min.replace(tzinfo=pytz.UTC))
+        windows_by_symbol[key] = build_position_windows(trades_list)
+
+    # 2-4. Candles, aligned matrix, cached curve
+    if windows_by_symbol:
+        closes = fetch_closes(list(windows_by_symbol), trade_date, api_key)
+        keys = [key for key in windows_by_symbol if key in closes]
+        if keys:
+            index, prices = _aligned_prices(closes, keys, first_trade_time, now)
+            signature = ('trades', tuple(
+                (trade.get('symbol'), trade.get('exchange'), trade.get('action'), trade.get('quantity'),
+                 trade.get('average_price'), str(raw_time))
+                for trade, raw_time in zip(trades, raw_times)))
+            total = _incremental_total((user, trade_date), signature, index, prices,
+                                       [windows_by_symbol[key] for key in keys])
+
+            # Zero P&L from market open until the first trade
+            market_open = first_trade_time.replace(hour=9, minute=15, second=0, microsecond=0)
+            if first_trade_time > market_open:
+                pre_trade_index = pd.date_range(start=market_open, end=first_trade_time, freq='1min', tz=IST)[:-1]
+                pre_trade_index = pre_trade_index[pre_trade_index < (index[0] if len(index) else first_trade_time)]
+                if len(pre_trade_index) > 0:
+                    index = pre_trade_index.append(index)
+                    total = np.concatenate([np.zeros(len(pre_trade_index)), total])
+                    logger.info(f"Added {len(pre_trade_index)} minutes of zero PnL before first trade")
+            return _curve_result(index, total)
+
+    # No trade history available: mark open positions to market
+    held = []
+    for pos_key, pos_data in current_positions.items():
+        parts = pos_key.rsplit('_', 1)
+        if len(parts) != 2:
+            logger.warning(f"Could not parse position key: {pos_key}")
+            continue
+        if pos_data['quantity'] != 0:
+            held.append((tuple(parts), pos_data['quantity'], pos_data['average_price']))
+
+    if held:
+        logger.info("No trades found, but positions exist. Fetching historical data for positions.")
+        closes = fetch_closes([key for key, _, _ in held], trade_date, api_key)
+        held = [item for item in held if item[0] in closes]
+        if held:
+            keys = [key for key, _, _ in held]
+            start = min(closes[key].index[0] for key in keys).replace(hour=9, minute=15, second=0, microsecond=0)
+            index, prices = _aligned_prices(closes, keys, start, now)
+            qty = np.array([q for _, q, _ in held], dtype=float)
+            avg = np.array([a for _, _, a in held], dtype=float)
+            total = np.where(np.isnan(prices), 0.0, (prices - avg) * qty).sum(axis=1)
+            return _curve_result(index, total)
+
+    if not current_positions:
+        return _empty_result()
+
+    # No historical data at all: flat line at the current position P&L
+    start_time = now.replace(hour=9, minute=0, second=0, microsecond=0)
+    end_time = now if now > start_time else start_time + timedelta(minutes=1)
+    index = pd.date_range(start=start_time, end=end_time, freq='1min', tz=IST)
+    total_pnl = sum(pos['pnl'] for pos in current_positions.values())
+    return _curve_result(index, np.full(len(index), float(total_pnl)))
@@ -1,8 +1,6 @@
 import importlib
 import traceback
 import copy
-import time
-import os
 from typing import Tuple, Dict, Any, Optional, List
 
 from database.auth_db import get_auth_token_broker
@@ -20,6 +18,7 @@ from utils.constants import (
 )
 from utils.logging import get_logger
 from services.telegram_alert_service import telegram_alert_service
+from utils.shared_rate_limit import get_order_bucket
 
 # Initialize logger
 logger = get_logger(__name__)
@@ -27,16 +26,6 @@ logger = get_logger(__name__)
 # Maximum number of orders allowed
 MAX_ORDERS = 100
 
-# Get rate limit from environment (default: 10 per second)
-def get_order_rate_limit():
-    """Parse ORDER_RATE_LIMIT and return delay in seconds between orders"""
-    rate_limit_str = os.getenv('ORDER_RATE_LIMIT', '10 per second')
-    try:
-        rate = int(rate_limit_str.split()[0])
-        return 1.0 / rate if rate > 0 else 0.1
-    except (ValueError, IndexError):
-        return 0.1  # Default 100ms delay
-
 def emit_analyzer_error(request_data: Dict[str, Any], error_message: str) -> Dict[str, Any]:
     """
     Helper function to emit analyzer error events
@@ -311,12 +300,12 @@ def split_order_with_auth(
 
     # Process orders sequentially with rate limiting
     results = []
-    order_delay = get_order_rate_limit()
+    # Per-user ORDER_RATE_LIMIT pacing, shared with basket and webhook orders
+    order_bucket = get_order_bucket(split_data.get('apikey') or auth_token)
 
     # Place full-size orders
     for i in range(num_full_orders):
-        if i > 0:
-            time.sleep(order_delay)  # Rate limit delay between orders
+        order_bucket.acquire()  # Rate limit delay between orders
         order_data = copy.deepcopy(split_data)
         order_data['quantity'] = str(split_size)
         result = place_single_order(
@@ -330,8 +319,7 @@ def split_order_with_auth(
 
     # Place remaining quantity order if any
     if remaining_qty > 0:
-        if num_full_orders > 0:
-            time.sleep(order_delay)  # Rate limit delay
+        order_bucket.acquire()  # Rate limit delay
         order_data = copy.deepcopy(split_data)
         order_data['quantity'] = str(remaining_qty)
         result = place_single_order(
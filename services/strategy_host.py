@@ -0,0 +1,590 @@
+"""
+In-process, event-driven runtime for Python strategies.
+
+Subprocess strategies poll client.history() over HTTP in a loop, so ten
+strategies on one symbol download the same candles ten times per interval.
+Hosted strategies instead subclass Strategy and get callbacks:
+
+    class MyStrategy(Strategy):
+        symbols = [('NHPC', 'NSE')]
+        bar_intervals = ['1m']
+        warmup_bars = 50
+
+        def on_bar(self, bar):
+            closes = [b['close'] for b in self.ctx.bars('NHPC', 'NSE', '1m')]
+            ...
+            self.ctx.place_smart_order(symbol='NHPC', exchange='NSE', action='BUY', ...)
+
+The host keeps one broker subscription per instrument however many
+strategies use it, takes completed bars from the shared bar aggregator and
+places orders through direct service calls (no HTTP round trip). Strategies
+that implement on_session are told when their exchanges open and close.
+
+Every strategy has its own event thread, so a slow strategy only delays
+itself. Ticks are conflated: a strategy that falls behind gets the latest
+tick per instrument instead of a backlog. Completed bars are never dropped.
+"""
+
+import os
+import importlib.util
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Consecutive callback errors after which a hosted strategy is stopped
+STRATEGY_HOST_MAX_ERRORS = int(os.getenv('STRATEGY_HOST_MAX_ERRORS', '10'))
+# Seconds warm-up history is shared between strategies starting on the same instrument
+STRATEGY_HOST_HISTORY_TTL = int(os.getenv('STRATEGY_HOST_HISTORY_TTL', '60'))
+
+# Approximate trading seconds in a session, used to size warm-up history requests
+SESSION_SECONDS = 22500
+
+Instrument = Tuple[str, str]
+
+
+class Strategy:
+    """
+    Base class for hosted strategies.
+
+    Class attributes declare what the strategy needs; the host fills in
+    `self.ctx` (a StrategyContext) before any callback runs. Callbacks run
+    on the strategy's own thread, one at a time.
+    """
+
+    # Instruments to stream, as (symbol, exchange)
+    symbols: List[Instrument] = []
+    # Completed bar intervals to receive (see bar_aggregator.BAR_INTERVALS)
+    bar_intervals: List[str] = []
+    # Historical bars loaded per instrument and interval before on_start
+    warmup_bars: int = 0
+
+    def __init__(self, ctx: 'StrategyContext'):
+        self.ctx = ctx
+
+    def on_start(self) -> None:
+        pass
+
+    def on_tick(self, tick: Dict[str, Any]) -> None:
+        """LTP/quote update: {'symbol', 'exchange', 'ltp', ...}; treat as read-only"""
+
+    def on_bar(self, bar: Dict[str, Any]) -> None:
+        """Completed bar: {'symbol', 'exchange', 'interval', 'timestamp', 'open', 'high', 'low', 'close', 'volume'}"""
+
+    def on_session(self, event: Dict[str, Any]) -> None:
+        """Session boundary of an exchange in symbols: {'event': 'open' | 'close', 'exchange', 'timestamp', 'date'}"""
+
+    def on_stop(self) -> None:
+        pass
+
+
+def _interval_seconds(interval: str) -> int:
+    from services.bar_aggregator import BAR_INTERVALS
+    return BAR_INTERVALS[interval]
+
+
+def _load_history(api_key: str, symbol: str, exchange: str, interval: str,
+                  start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    from services.history_service import get_history
+    success, response, _ = get_history(symbol, exchange, interval, start_date, end_date, api_key=api_key)
+    if not success:
+        raise RuntimeError(response.get('message', 'History request failed'))
+    return response.get('data', [])
+
+
+def _broker_subscribe(username: str, api_key: str, symbols: List[Dict[str, str]]) -> Tuple[bool, str]:
+    from database.auth_db import get_broker_name
+    from services.websocket_service import subscribe_to_symbols
+    success, response, _ = subscribe_to_symbols(username, get_broker_name(api_key), symbols, 'Quote')
+    return success, response.get('message', '')
+
+
+def _broker_unsubscribe(username: str, api_key: str, symbols: List[Dict[str, str]]) -> None:
+    from database.auth_db import get_broker_name
+    from services.websocket_service import unsubscribe_from_symbols
+    unsubscribe_from_symbols(username, get_broker_name(api_key), symbols, 'Quote')
+
+
+class StrategyContext:
+    """What a hosted strategy can see and do: market data, history, orders and its log"""
+
+    def __init__(self, host: 'StrategyHost', strategy_id: str, name: str, api_key: str,
+                 params: Dict[str, str], log_handle=None):
+        self.host = host
+        self.strategy_id = strategy_id
+        self.name = name
+        self.api_key = api_key
+        # Strategy environment variables (the process environment is shared)
+        self.params = params
+        self._log_handle = log_handle
+        self._warmup: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self.stats = {'ticks': 0, 'bars': 0, 'conflated': 0, 'errors': 0, 'orders': 0}
+
+    def log(self, message: str) -> None:
+        """Write a line to the strategy's log file"""
+        line = f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n"
+        if self._log_handle is None:
+            logger.info(f"[{self.strategy_id}] {message}")
+            return
+        try:
+            self._log_handle.write(line)
+        except ValueError:
+            pass  # Log closed during shutdown
+
+    def close_log(self) -> None:
+        if self._log_handle is not None:
+            try:
+                self._log_handle.close()
+            except Exception:
+                pass
+
+    # Market data
+
+    def ltp(self, symbol: str, exchange: str) -> Optional[float]:
+        """Latest traded price from the streaming feed"""
+        data = self.host.market_data.get_ltp(symbol, exchange)
+        return data.get('value') if data else None
+
+    def bars(self, symbol: str, exchange: str, interval: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Completed bars, oldest first: warm-up history followed by bars built from the live feed"""
+        history = self._warmup.get((symbol, exchange, interval), [])
+        live = self.host.aggregator.get_bars(symbol, exchange, interval)
+        if history:
+            cutoff = history[-1]['timestamp']
+            live = [bar for bar in live if bar['timestamp'] > cutoff]
+        combined = history + live
+        return combined[-limit:] if limit else combined
+
+    def history(self, symbol: str, exchange: str, interval: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Historical candles (served from the shared candle cache where available)"""
+        return self.host.history(self.api_key, symbol, exchange, interval, start_date, end_date)
+
+    # Orders
+
+    def is_market_open(self, exchange: str) -> bool:
+        """Whether the exchange is in a trading session now"""
+        return self.host.sessions.is_open(exchange)
+
+    def place_order(self, **order) -> Dict[str, Any]:
+        from services.place_order_service import place_order
+        order.setdefault('strategy', self.name)
+        _, response, _ = place_order(order, api_key=self.api_key)
+        self.stats['orders'] += 1
+        return response
+
+    def place_smart_order(self, **order) -> Dict[str, Any]:
+        from services.place_smart_order_service import place_smart_order
+        order.setdefault('strategy', self.name)
+        _, response, _ = place_smart_order(order, api_key=self.api_key)
+        self.stats['orders'] += 1
+        return response
+
+
+class HostedStrategy:
+    """
+    A strategy running on the host.
+
+    Looks enough like a process handle (is_running / terminate / wait, pid
+    None) for the strategy manager to treat both runtimes alike.
+    """
+
+    pid = None
+
+    def __init__(self, strategy_id: str, strategy: Strategy, ctx: StrategyContext,
+                 max_errors: int = STRATEGY_HOST_MAX_ERRORS):
+        self.strategy_id = strategy_id
+        self.strategy = strategy
+        self.ctx = ctx
+        self.max_errors = max_errors
+        self.error: Optional[str] = None
+        self.on_exit: Optional[Callable[['HostedStrategy'], None]] = None
+
+        # ('tick', instrument) markers, ('bar', bar) and ('session', event) events; the tick itself is in _ticks
+        self._events: Deque[Tuple[str, Any]] = deque()
+        self._ticks: Dict[Instrument, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # Called from feed threads
+
+    def push_tick(self, instrument: Instrument, tick: Dict[str, Any]) -> None:
+        with self._cond:
+            if instrument in self._ticks:
+                self.ctx.stats['conflated'] += 1
+            else:
+                self._events.append(('tick', instrument))
+            self._ticks[instrument] = tick
+            self._cond.notify()
+
+    def push_bar(self, bar: Dict[str, Any]) -> None:
+        with self._cond:
+            self._events.append(('bar', bar))
+            self._cond.notify()
+
+    def push_session(self, event: Dict[str, Any]) -> None:
+        with self._cond:
+            self._events.append(('session', event))
+            self._cond.notify()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=f"Strategy-{self.strategy_id}", daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def terminate(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.is_running()
+
+    def _next_event(self) -> Optional[Tuple[str, Any]]:
+        with self._cond:
+            while not self._events and not self._stopping:
+                self._cond.wait()
+            if self._stopping:
+                return None
+            kind, payload = self._events.popleft()
+            if kind == 'tick':
+                payload = self._ticks.pop(payload)
+            return kind, payload
+
+    def _run(self) -> None:
+        consecutive_errors = 0
+        try:
+            while True:
+                event = self._next_event()
+                if event is None:
+                    break
+                kind, payload = event
+                try:
+                    if kind == 'tick':
+                        self.ctx.stats['ticks'] += 1
+                        self.strategy.on_tick(payload)
+                    elif kind == 'bar':
+                        self.ctx.stats['bars'] += 1
+                        self.strategy.on_bar(payload)
+                    else:
+                        self.strategy.on_session(payload)
+                    consecutive_errors = 0
+                except Exception as e:
+                    consecutive_errors += 1
+                    self.ctx.stats['errors'] += 1
+                    self.ctx.log(f"Error in on_{kind}: {e}\n{traceback.format_exc()}")
+                    if consecutive_errors >= self.max_errors:
+                        self.error = f"Stopped after {consecutive_errors} consecutive errors, last: {e}"
+                        self.ctx.log(self.error)
+                        break
+            try:
+                self.strategy.on_stop()
+            except Exception as e:
+                self.ctx.log(f"Error in on_stop: {e}")
+        finally:
+            self.ctx.log("=== Strategy stopped ===")
+            if self.on_exit is not None:
+                self.on_exit(self)
+            self.ctx.close_log()
+
+
+class StrategyHost:
+    """Runs hosted strategies and fans one market data feed out to all of them"""
+
+    def __init__(self, market_data=None, aggregator=None,
+                 subscribe: Callable = _broker_subscribe, unsubscribe: Callable = _broker_unsubscribe,
+                 history_loader: Callable = _load_history, sessions=None):
+        self._market_data = market_data
+        self._aggregator = aggregator
+        self._sessions = sessions
+        self._subscribe = subscribe
+        self._unsubscribe = unsubscribe
+        self._history_loader = history_loader
+        self._history_cache = TTLCache(maxsize=256, ttl=STRATEGY_HOST_HISTORY_TTL)
+
+        self._lock = threading.Lock()
+        self._strategies: Dict[str, HostedStrategy] = {}
+        # Read-only routing snapshots used on the feed threads, rebuilt under _lock
+        self._tick_routes: Dict[Instrument, Tuple[HostedStrategy, ...]] = {}
+        self._bar_routes: Dict[Tuple[str, str, str], Tuple[HostedStrategy, ...]] = {}
+        self._session_routes: Dict[str, Tuple[HostedStrategy, ...]] = {}
+        # Broker subscriptions shared by strategies: (username, symbol, exchange) -> count
+        self._subscriptions: Dict[Tuple[str, str, str], int] = {}
+        self._users_with_feed: set = set()
+        self._tick_subscriber_id: Optional[int] = None
+        self._bar_listener_id: Optional[int] = None
+        self._session_subscriber_id: Optional[int] = None
+
+    @property
+    def market_data(self):
+        if self._market_data is None:
+            from services.market_data_service import get_market_data_service
+            self._market_data = get_market_data_service()
+        return self._market_data
+
+    @property
+    def aggregator(self):
+        if self._aggregator is None:
+            from services.bar_aggregator import get_bar_aggregator
+            self._aggregator = get_bar_aggregator()
+        return self._aggregator
+
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            from services.market_session_service import get_market_sessions
+            self._sessions = get_market_sessions()
+        return self._sessions
+
+    # Loading
+
+    @staticmethod
+    def load_strategy_class(file_path, module_name: str) -> type:
+        """Import a strategy file and return its single Strategy subclass"""
+        spec = importlib.util.spec_from_file_location(module_name, str(file_path))
+        if spec is None or spec.loader is None:
+            raise ValueError(f"Cannot load strategy file {file_path}")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            sys.modules.pop(module_name, None)
+            raise
+
+        classes = [
+            obj for obj in vars(module).values()
+            if isinstance(obj, type) and issubclass(obj, Strategy) and obj is not Strategy
+            and obj.__module__ == module_name
+        ]
+        if len(classes) != 1:
+            sys.modules.pop(module_name, None)
+            raise ValueError(f"A hosted strategy file must define exactly one Strategy subclass, found {len(classes)}")
+        return classes[0]
+
+    def history(self, api_key: str, symbol: str, exchange: str, interval: str,
+                start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """History shared for a short time between strategies asking for the same candles"""
+        key = (symbol, exchange, interval, start_date, end_date)
+        rows = self._history_cache.get(key)
+        if rows is None:
+            rows = self._history_loader(api_key, symbol, exchange, interval, start_date, end_date)
+            self._history_cache[key] = rows
+        return rows
+
+    def _warm_up(self, strategy: Strategy, ctx: StrategyContext) -> None:
+        now = time.time()
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        for interval in strategy.bar_intervals:
+            seconds = _interval_seconds(interval)
+            # Enough calendar days to cover the bars, allowing for weekends and holidays
+            days = math.ceil(strategy.warmup_bars * seconds / SESSION_SECONDS) * 7 // 5 + 3
+            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+            for symbol, exchange in strategy.symbols:
+                rows = self.history(ctx.api_key, symbol, exchange, interval, start_date, end_date)
+                # Drop the candle still forming; the live feed completes it
+                rows = [row for row in rows if row['timestamp'] + seconds <= now]
+                ctx._warmup[(symbol, exchange, interval)] = rows[-strategy.warmup_bars:]
+
+    # Lifecycle
+
+    def start(self, strategy_id: str, file_path, username: str, api_key: str,
+              params: Optional[Dict[str, str]] = None, name: Optional[str] = None, log_handle=None) -> HostedStrategy:
+        """
+        Load and start a hosted strategy.
+
+        Raises:
+            ValueError: the file does not define a usable Strategy, or it is already running
+            RuntimeError: the market data subscription failed
+        """
+        with self._lock:
+            if strategy_id in self._strategies:
+                raise ValueError("Strategy already running")
+
+        module_name = f"hosted_strategy_{strategy_id}"
+        strategy_cls = self.load_strategy_class(file_path, module_name)
+        available = dict(self.aggregator.intervals)
+        unknown = [interval for interval in strategy_cls.bar_intervals if interval not in available]
+        if unknown:
+            sys.modules.pop(module_name, None)
+            raise ValueError(f"Bar intervals not built: {', '.join(unknown)}. Available: {', '.join(available)}")
+
+        ctx = StrategyContext(self, strategy_id, name or strategy_id, api_key, dict(params or {}), log_handle)
+        try:
+            strategy = strategy_cls(ctx)
+            if strategy.warmup_bars:
+                self._warm_up(strategy, ctx)
+        except Exception:
+            sys.modules.pop(module_name, None)
+            raise
+
+        runner = HostedStrategy(strategy_id, strategy, ctx)
+        runner.on_exit = lambda finished: self._release(finished, username, module_name)
+        # Subscribe before on_start so no tick is missed; events queue until the thread starts
+        try:
+            self._register(runner, username)
+        except Exception:
+            sys.modules.pop(module_name, None)
+            raise
+        try:
+            strategy.on_start()
+        except Exception:
+            self._release(runner, username, module_name)
+            raise
+
+        runner.start()
+        ctx.log(f"=== Hosted strategy {strategy_cls.__name__} started: "
+                f"{', '.join(f'{s}:{e}' for s, e in strategy.symbols) or 'no instruments'} ===")
+        return runner
+
+    def stop(self, strategy_id: str, timeout: float = 5.0) -> bool:
+        runner = self._strategies.get(strategy_id)
+        if runner is None:
+            return False
+        runner.terminate()
+        return runner.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        for runner in list(self._strategies.values()):
+            runner.terminate()
+        for runner in list(self._strategies.values()):
+            runner.wait(timeout)
+
+    def get_stats(self, strategy_id: str) -> Optional[Dict[str, Any]]:
+        runner = self._strategies.get(strategy_id)
+        if runner is None:
+            return None
+        return dict(runner.ctx.stats, pending_events=len(runner._events))
+
+    # Routing and subscriptions
+
+    def _register(self, runner: HostedStrategy, username: str) -> None:
+        strategy = runner.strategy
+        new_symbols = []
+        with self._lock:
+            if runner.strategy_id in self._strategies:
+                raise ValueError("Strategy already running")
+            for symbol, exchange in strategy.symbols:
+                key = (username, symbol, exchange)
+                if self._subscriptions.get(key, 0) == 0:
+                    new_symbols.append({'symbol': symbol, 'exchange': exchange})
+                self._subscriptions[key] = self._subscriptions.get(key, 0) + 1
+            self._strategies[runner.strategy_id] = runner
+            self._rebuild_routes()
+            self._attach_feeds()
+
+        if not new_symbols:
+            return
+        try:
+            if username not in self._users_with_feed:
+                # Ticks for this user's connection flow into MarketDataService (and from there to us)
+                if self.market_data.register_user_callback(username):
+                    self._users_with_feed.add(username)
+            success, message = self._subscribe(username, runner.ctx.api_key, new_symbols)
+        except Exception as e:
+            success, message = False, str(e)
+        if not success:
+            self._release(runner, username, None)
+            raise RuntimeError(f"Market data subscription failed: {message}")
+
+    def _release(self, runner: HostedStrategy, username: str, module_name: Optional[str]) -> None:
+        stale = []
+        with self._lock:
+            if self._strategies.get(runner.strategy_id) is not runner:
+                return
+            del self._strategies[runner.strategy_id]
+            for symbol, exchange in runner.strategy.symbols:
+                key = (username, symbol, exchange)
+                count = self._subscriptions.get(key, 0) - 1
+                if count <= 0:
+                    self._subscriptions.pop(key, None)
+                    stale.append({'symbol': symbol, 'exchange': exchange})
+                else:
+                    self._subscriptions[key] = count
+            self._rebuild_routes()
+        if module_name:
+            sys.modules.pop(module_name, None)
+        if stale:
+            try:
+                self._unsubscribe(username, runner.ctx.api_key, stale)
+            except Exception as e:
+                logger.warning(f"Error unsubscribing {stale}: {e}")
+
+    def _rebuild_routes(self) -> None:
+        """Refresh the routing snapshots (called with _lock held)"""
+        ticks: Dict[Instrument, List[HostedStrategy]] = {}
+        bars: Dict[Tuple[str, str, str], List[HostedStrategy]] = {}
+        sessions: Dict[str, List[HostedStrategy]] = {}
+        for runner in self._strategies.values():
+            for instrument in runner.strategy.symbols:
+                ticks.setdefault(tuple(instrument), []).append(runner)
+                for interval in runner.strategy.bar_intervals:
+                    bars.setdefault((*instrument, interval), []).append(runner)
+            # Only strategies that handle session events get them
+            if type(runner.strategy).on_session is not Strategy.on_session:
+                for exchange in {exchange for _, exchange in runner.strategy.symbols}:
+                    sessions.setdefault(exchange, []).append(runner)
+        self._tick_routes = {key: tuple(runners) for key, runners in ticks.items()}
+        self._bar_routes = {key: tuple(runners) for key, runners in bars.items()}
+        self._session_routes = {key: tuple(runners) for key, runners in sessions.items()}
+
+    def _attach_feeds(self) -> None:
+        """Subscribe to the tick stream, completed bars and session events once (called with _lock held)"""
+        if self._tick_subscriber_id is None:
+            self._tick_subscriber_id = self.market_data.subscribe_to_updates('all', self.on_tick)
+        if self._bar_listener_id is None:
+            self._bar_listener_id = self.aggregator.add_listener(self.on_bar)
+        if self._session_subscriber_id is None and self._session_routes:
+            self._session_subscriber_id = self.sessions.subscribe(self.on_session)
+
+    def on_tick(self, data: Dict[str, Any]) -> None:
+        """MarketDataService subscriber: hand the tick to every strategy on the instrument"""
+        if data.get('mode') == 3:
+            return
+        instrument = (data.get('symbol'), data.get('exchange'))
+        runners = self._tick_routes.get(instrument)
+        if not runners:
+            return
+        tick = dict(data.get('data') or {}, symbol=instrument[0], exchange=instrument[1])
+        for runner in runners:
+            runner.push_tick(instrument, tick)
+
+    def on_bar(self, bar: Dict[str, Any]) -> None:
+        """Bar aggregator listener"""
+        for runner in self._bar_routes.get((bar['symbol'], bar['exchange'], bar['interval']), ()):
+            runner.push_bar(bar)
+
+    def on_session(self, event: Dict[str, Any]) -> None:
+        """Market session index subscriber"""
+        for runner in self._session_routes.get(event['exchange'], ()):
+            runner.push_session(event)
+
+
+_strategy_host: Optional[StrategyHost] = None
+_strategy_host_lock = threading.Lock()
+
+
+def get_strategy_host() -> StrategyHost:
+    """The process-wide strategy host"""
+    global _strategy_host
+    if _strategy_host is None:
+        with _strategy_host_lock:
+            if _strategy_host is None:
+                _strategy_host = StrategyHost()
+    return _strategy_host
@@ -0,0 +1,440 @@
+"""
+Supervisor for Python strategy processes.
+
+- Resource limits: per-strategy memory and CPU caps. They are enforced by a
+  cgroup v2 group per strategy when STRATEGY_CGROUP_ROOT points to a
+  delegated cgroup directory; otherwise the monitor stops strategies that
+  exceed their memory cap and lowers the priority of ones over their CPU cap.
+- Resource usage: CPU, RSS (process tree), threads and peaks sampled every
+  STRATEGY_MONITOR_INTERVAL seconds.
+- Logs: offset-based tailing for the log viewer and copy-truncate rotation
+  once a running strategy's log exceeds STRATEGY_LOG_MAX_MB.
+- Warm interpreter pool: idle interpreters with pandas/numpy/openalgo already
+  imported, handed a strategy script on start (see strategy_worker.py).
+"""
+
+import os
+import json
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Default caps for strategies without their own (0 = unlimited)
+STRATEGY_MAX_MEMORY_MB = int(os.getenv('STRATEGY_MAX_MEMORY_MB', '0'))
+STRATEGY_MAX_CPU_PERCENT = float(os.getenv('STRATEGY_MAX_CPU_PERCENT', '0'))
+# Delegated cgroup v2 directory to create per-strategy groups in (empty = monitor-enforced)
+STRATEGY_CGROUP_ROOT = os.getenv('STRATEGY_CGROUP_ROOT', '')
+STRATEGY_MONITOR_INTERVAL = float(os.getenv('STRATEGY_MONITOR_INTERVAL', '5'))
+# Rotate a running strategy's log past this size, keeping this many old copies
+STRATEGY_LOG_MAX_MB = float(os.getenv('STRATEGY_LOG_MAX_MB', '50'))
+STRATEGY_LOG_BACKUPS = int(os.getenv('STRATEGY_LOG_BACKUPS', '3'))
+# Idle interpreters kept ready for strategy starts (0 disables the pool)
+STRATEGY_WARM_POOL_SIZE = int(os.getenv('STRATEGY_WARM_POOL_SIZE', '2'))
+
+# Bytes shown when a log is opened, and returned per tail request
+LOG_TAIL_BYTES = 256 * 1024
+LOG_CHUNK_BYTES = 256 * 1024
+
+# Consecutive samples over the CPU cap before the strategy is reniced
+CPU_OVER_LIMIT_SAMPLES = 3
+
+WORKER_SCRIPT = Path(__file__).with_name('strategy_worker.py')
+
+
+# ---------------------------------------------------------------------------
+# Logs
+# ---------------------------------------------------------------------------
+
+def read_log_tail(path, max_bytes: int = LOG_TAIL_BYTES) -> Dict[str, Any]:
+    """
+    Read the end of a log file.
+
+    Returns:
+        dict with content (starting at a line boundary when truncated),
+        offset to continue tailing from, size and whether the head was cut
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    start = max(0, size - max_bytes)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(size - start)
+    if start > 0:
+        newline = data.find(b'\n')
+        if newline != -1:
+            data = data[newline + 1:]
+    return {
+        'content': data.decode('utf-8', errors='replace'),
+        'offset': size,
+        'size': size,
+        'truncated': start > 0
+    }
+
+
+def read_log_chunk(path, offset: int, max_bytes: int = LOG_CHUNK_BYTES) -> Dict[str, Any]:
+    """
+    Read new log output from a byte offset.
+
+    If the file is now shorter than the offset it was rotated or cleared, and
+    reading restarts from the beginning. Chunks end on a line boundary unless
+    a single line is longer than max_bytes.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    rotated = offset > size
+    if rotated:
+        offset = 0
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(min(max_bytes, size - offset))
+
+    if offset + len(data) < size:
+        newline = data.rfind(b'\n')
+        if newline != -1:
+            data = data[:newline + 1]
+
+    return {
+        'content': data.decode('utf-8', errors='replace'),
+        'offset': offset + len(data),
+        'size': size,
+        'rotated': rotated
+    }
+
+
+def rotate_log(path, backups: int = STRATEGY_LOG_BACKUPS) -> bool:
+    """
+    Copy-truncate rotation: log -> log.1 -> log.2 ..., then empty the live file.
+
+    The strategy keeps writing to its open descriptor; log files are opened in
+    append mode so writes continue at the new end of the file.
+    """
+    path = Path(path)
+    try:
+        if backups > 0:
+            for index in range(backups - 1, 0, -1):
+                older = path.with_name(f"{path.name}.{index}")
+                if older.exists():
+                    older.replace(path.with_name(f"{path.name}.{index + 1}"))
+            shutil.copyfile(path, path.with_name(f"{path.name}.1"))
+        with open(path, 'r+b') as f:
+            f.truncate(0)
+        logger.info(f"Rotated strategy log {path.name}")
+        return True
+    except Exception as e:
+        logger.error(f"Error rotating strategy log {path}: {e}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# Resource limits and usage
+# ---------------------------------------------------------------------------
+
+class _CgroupLimiter:
+    """Per-strategy cgroup v2 groups under a delegated root"""
+
+    CPU_PERIOD = 100000
+
+    def __init__(self, root: str):
+        self.root = Path(root) if root else None
+        self.available = bool(
+            self.root
+            and (self.root / 'cgroup.controllers').exists()
+            and os.access(self.root, os.W_OK)
+        )
+        if self.available:
+            try:
+                (self.root / 'cgroup.subtree_control').write_text('+cpu +memory')
+            except OSError as e:
+                logger.debug(f"Could not enable cpu/memory controllers under {self.root}: {e}")
+
+    def apply(self, strategy_id: str, pid: int, max_memory_mb: int, max_cpu_percent: float) -> bool:
+        if not self.available or not (max_memory_mb or max_cpu_percent):
+            return False
+        group = self.root / strategy_id
+        try:
+            group.mkdir(exist_ok=True)
+            if max_cpu_percent:
+                quota = int(self.CPU_PERIOD * max_cpu_percent / 100)
+                (group / 'cpu.max').write_text(f"{quota} {self.CPU_PERIOD}")
+            if max_memory_mb:
+                (group / 'memory.max').write_text(str(int(max_memory_mb) * 1024 * 1024))
+            (group / 'cgroup.procs').write_text(str(pid))
+            return True
+        except OSError as e:
+            logger.warning(f"cgroup limits unavailable for strategy {strategy_id}, monitoring instead: {e}")
+            return False
+
+    def remove(self, strategy_id: str):
+        if not self.available:
+            return
+        try:
+            (self.root / strategy_id).rmdir()
+        except OSError:
+            pass
+
+
+class _Tracked:
+    def __init__(self, pid: int, log_file: Optional[str], max_memory_mb: int,
+                 max_cpu_percent: float, enforced_by: str):
+        self.pid = pid
+        self.log_file = log_file
+        self.max_memory_mb = max_memory_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.enforced_by = enforced_by
+        self.processes: Dict[int, psutil.Process] = {}
+        self.cpu_over = 0
+        self.reniced = False
+        self.limit_hit = False
+        self.usage: Dict[str, Any] = {
+            'cpu_percent': 0.0, 'memory_mb': 0.0, 'threads': 0, 'processes': 0,
+            'peak_cpu_percent': 0.0, 'peak_memory_mb': 0.0, 'sampled_at': None
+        }
+
+
+class StrategySupervisor:
+    """Applies limits to strategy processes and samples their resource usage"""
+
+    def __init__(self, on_limit_exceeded: Optional[Callable[[str, str], None]] = None,
+                 interval: float = STRATEGY_MONITOR_INTERVAL,
+                 cgroup_root: str = STRATEGY_CGROUP_ROOT,
+                 log_max_bytes: int = int(STRATEGY_LOG_MAX_MB * 1024 * 1024),
+                 log_backups: int = STRATEGY_LOG_BACKUPS):
+        self.on_limit_exceeded = on_limit_exceeded
+        self.interval = interval
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        self._cgroups = _CgroupLimiter(cgroup_root)
+        self._tracked: Dict[str, _Tracked] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, strategy_id: str, pid: int, log_file: Optional[str] = None,
+               max_memory_mb: Optional[int] = None, max_cpu_percent: Optional[float] = None) -> Dict[str, Any]:
+        """Start supervising a strategy process; returns the limits in force"""
+        max_memory_mb = int(max_memory_mb if max_memory_mb is not None else STRATEGY_MAX_MEMORY_MB)
+        max_cpu_percent = float(max_cpu_percent if max_cpu_percent is not None else STRATEGY_MAX_CPU_PERCENT)
+
+        if not (max_memory_mb or max_cpu_percent):
+            enforced_by = 'none'
+        elif self._cgroups.apply(strategy_id, pid, max_memory_mb, max_cpu_percent):
+            enforced_by = 'cgroup'
+        else:
+            enforced_by = 'monitor'
+
+        with self._lock:
+            self._tracked[strategy_id] = _Tracked(pid, log_file, max_memory_mb, max_cpu_percent, enforced_by)
+        return {'max_memory_mb': max_memory_mb, 'max_cpu_percent': max_cpu_percent, 'enforced_by': enforced_by}
+
+    def detach(self, strategy_id: str):
+        with self._lock:
+            tracked = self._tracked.pop(strategy_id, None)
+        if tracked and tracked.enforced_by == 'cgroup':
+            self._cgroups.remove(strategy_id)
+
+    def get_usage(self, strategy_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            tracked = self._tracked.get(strategy_id)
+            if tracked is None:
+                return None
+            return dict(tracked.usage,
+                        max_memory_mb=tracked.max_memory_mb,
+                        max_cpu_percent=tracked.max_cpu_percent,
+                        enforced_by=tracked.enforced_by)
+
+    def _sample_one(self, tracked: _Tracked) -> Optional[str]:
+        """Refresh usage for one strategy; returns a reason if it must be stopped"""
+        try:
+            root = tracked.processes.get(tracked.pid) or psutil.Process(tracked.pid)
+            tree = [root] + root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+        # Keep Process objects between samples so cpu_percent measures the interval
+        processes = {p.pid: tracked.processes.get(p.pid, p) for p in tree}
+        tracked.processes = processes
+
+        cpu = rss = threads = 0
+        for process in processes.values():
+            try:
+                with process.oneshot():
+                    cpu += process.cpu_percent(None)
+                    rss += process.memory_info().rss
+                    threads += process.num_threads()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        memory_mb = rss / (1024 * 1024)
+        usage = tracked.usage
+        usage.update(cpu_percent=round(cpu, 1), memory_mb=round(memory_mb, 1), threads=threads,
+                     processes=len(processes), sampled_at=time.time())
+        usage['peak_cpu_percent'] = max(usage['peak_cpu_percent'], usage['cpu_percent'])
+        usage['peak_memory_mb'] = max(usage['peak_memory_mb'], usage['memory_mb'])
+
+        if tracked.enforced_by != 'monitor':
+            return None
+
+        if tracked.max_memory_mb and memory_mb > tracked.max_memory_mb and not tracked.limit_hit:
+            tracked.limit_hit = True
+            return f"Memory limit exceeded: {memory_mb:.0f} MB > {tracked.max_memory_mb} MB"
+
+        if tracked.max_cpu_percent and cpu > tracked.max_cpu_percent:
+            tracked.cpu_over += 1
+            if tracked.cpu_over >= CPU_OVER_LIMIT_SAMPLES and not tracked.reniced:
+                tracked.reniced = True
+                logger.warning(f"Strategy PID {tracked.pid} using {cpu:.0f}% CPU (limit {tracked.max_cpu_percent:.0f}%), lowering its priority")
+                for process in processes.values():
+                    try:
+                        process.nice(10 if os.name != 'nt' else psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        pass
+        else:
+            tracked.cpu_over = 0
+        return None
+
+    def sample(self) -> List[tuple]:
+        """One monitoring pass; returns (strategy_id, reason) for strategies over a hard limit"""
+        with self._lock:
+            tracked_items = list(self._tracked.items())
+
+        exceeded = []
+        for strategy_id, tracked in tracked_items:
+            with self._lock:
+                reason = self._sample_one(tracked)
+            if reason:
+                exceeded.append((strategy_id, reason))
+
+            if tracked.log_file and self.log_max_bytes:
+                try:
+                    if os.path.getsize(tracked.log_file) > self.log_max_bytes:
+                        rotate_log(tracked.log_file, self.log_backups)
+                except OSError:
+                    pass
+        return exceeded
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                for strategy_id, reason in self.sample():
+                    logger.warning(f"Stopping strategy {strategy_id}: {reason}")
+                    if self.on_limit_exceeded:
+                        self.on_limit_exceeded(strategy_id, reason)
+            except Exception as e:
+                logger.error(f"Error in strategy monitor: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="StrategySupervisor")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+# ---------------------------------------------------------------------------
+# Warm interpreter pool
+# ---------------------------------------------------------------------------
+
+class WarmInterpreterPool:
+    """
+    Idle Python interpreters with the usual strategy imports already loaded.
+
+    A strategy start takes an idle worker, sends it the script, log file and
+    environment over stdin, and the worker runs the script as __main__. The
+    pool refills in the background.
+    """
+
+    def __init__(self, size: int = STRATEGY_WARM_POOL_SIZE, python: str = sys.executable,
+                 worker_script: Path = WORKER_SCRIPT):
+        self.size = max(0, size)
+        self.python = python
+        self.worker_script = worker_script
+        self._idle: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._refilling = False
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [self.python, '-u', str(self.worker_script)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=str(Path.cwd()),
+            start_new_session=True
+        )
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    self._idle = [worker for worker in self._idle if worker.poll() is None]
+                    if len(self._idle) >= self.size:
+                        return
+                worker = self._spawn()
+                with self._lock:
+                    self._idle.append(worker)
+        except Exception as e:
+            logger.error(f"Error starting warm strategy interpreter: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def fill(self):
+        """Top the pool up in the background"""
+        if self.size == 0:
+            return
+        with self._lock:
+            if self._refilling:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, daemon=True, name="StrategyWarmPool").start()
+
+    def launch(self, script, log_file, env: Dict[str, str], cwd) -> Optional[subprocess.Popen]:
+        """
+        Run a strategy script on an idle interpreter.
+
+        Returns:
+            The worker process now running the script, or None if no idle
+            worker was available (the caller starts a fresh interpreter)
+        """
+        worker = None
+        with self._lock:
+            while self._idle and worker is None:
+                candidate = self._idle.pop(0)
+                if candidate.poll() is None:
+                    worker = candidate
+        self.fill()
+        if worker is None:
+            return None
+
+        request = {'script': str(script), 'log_file': str(log_file), 'env': env, 'cwd': str(cwd)}
+        try:
+            worker.stdin.write((json.dumps(request) + '\n').encode('utf-8'))
+            worker.stdin.close()
+        except (BrokenPipeError, OSError) as e:
+            logger.warning(f"Warm interpreter {worker.pid} unusable: {e}")
+            worker.kill()
+            return None
+        return worker
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            try:
+                worker.kill()
+            except Exception:
+                pass
@@ -0,0 +1,52 @@
+"""
+Warm interpreter for Python strategies.
+
+Started idle by WarmInterpreterPool with the heavy imports strategies use
+already loaded. It waits for one JSON request on stdin:
+
+    {"script": ..., "log_file": ..., "env": {...}, "cwd": ...}
+
+then points stdout/stderr at the strategy's log file, takes on the
+strategy's environment and runs the script as __main__, exactly like
+`python -u script.py`. The interpreter exits when the script does.
+"""
+
+import json
+import os
+import runpy
+import sys
+
+# Pre-import what strategies typically import; missing packages are fine
+for _module in ('numpy', 'pandas', 'httpx', 'openalgo'):
+    try:
+        __import__(_module)
+    except Exception:
+        pass
+
+
+def main():
+    line = sys.stdin.readline()
+    if not line:
+        return  # Pool shut down before this worker was used
+    request = json.loads(line)
+
+    log_fd = os.open(request['log_file'], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    os.dup2(log_fd, 1)
+    os.dup2(log_fd, 2)
+    os.close(log_fd)
+    stdin_fd = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(stdin_fd, 0)
+    os.close(stdin_fd)
+
+    os.environ.clear()
+    os.environ.update(request['env'])
+    os.chdir(request['cwd'])
+
+    script = request['script']
+    sys.argv = [script]
+    sys.path[0] = os.path.dirname(script)
+    runpy.run_path(script, run_name='__main__')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Alert delivery pipeline for the Telegram bot.
+
+Runs entirely on the bot's event loop. Alerts submitted from any thread are
+buffered per chat for a short window, so a burst (e.g. the legs of a basket
+order) goes out as one digest message. Every message to Telegram - digests,
+direct notifications and broadcasts - passes through token buckets that keep
+the bot inside Telegram's limits (about 30 messages/second overall and one
+per second per chat), and flood-control replies are honoured before retrying.
+"""
+
+import os
+import asyncio
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds alerts for one chat are collected before they are sent
+TELEGRAM_ALERT_BATCH_WINDOW = float(os.getenv('TELEGRAM_ALERT_BATCH_WINDOW', '0.5'))
+# Messages per second across all chats / per chat
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '25'))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))
+# Messages a chat may receive back to back before the per-chat rate applies
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', '3'))
+
+# Telegram rejects longer messages
+TELEGRAM_MESSAGE_LIMIT = 4096
+DIGEST_SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Token bucket handing out reservations: reserve() returns how long to wait"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds: float):
+        """Make the next reservation wait at least `seconds`"""
+        self.reserve()
+        self.tokens = min(self.tokens, 0) + 1 - seconds * self.rate
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds Telegram asked us to wait (telegram.error.RetryAfter), if any"""
+    retry_after = getattr(error, 'retry_after', None)
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after) if retry_after is not None else None
+
+
+def build_digests(messages: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """
+    Combine alerts for one chat into as few messages as Telegram allows.
+
+    A single alert is sent as is; several get a count header and are packed
+    into messages of at most `limit` characters without splitting an alert.
+    """
+    if len(messages) <= 1:
+        return list(messages)
+
+    digests = []
+    current = f"📬 *{len(messages)} alerts*"
+    for message in messages:
+        candidate = current + DIGEST_SEPARATOR + message
+        if len(candidate) > limit and current:
+            digests.append(current)
+            current = message
+        else:
+            current = candidate
+    digests.append(current)
+    return digests
+
+
+class AlertDispatcher:
+    """Coalesces alerts per chat and rate-limits all sends on the bot loop"""
+
+    def __init__(self, send_message: Callable[[int, str], Awaitable[None]],
+                 on_undelivered: Optional[Callable[[int, str], None]] = None,
+                 batch_window: float = TELEGRAM_ALERT_BATCH_WINDOW,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 chat_rate: float = TELEGRAM_CHAT_RATE,
+                 chat_burst: int = TELEGRAM_CHAT_BURST):
+        self.send_message = send_message
+        self.on_undelivered = on_undelivered
+        self.batch_window = batch_window
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._global_bucket = TokenBucket(global_rate, global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        # Loop-owned state, only touched on the bot loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, List[str]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._flush_now: Optional[asyncio.Event] = None
+        self.stats = {'submitted': 0, 'sent': 0, 'digests': 0, 'failed': 0, 'retry_after': 0}
+
+    # Called from any thread
+
+    def submit(self, loop: asyncio.AbstractEventLoop, chat_id: int, message: str) -> bool:
+        """
+        Queue an alert for a chat without blocking the caller.
+
+        Returns:
+            False if the bot loop is not accepting work; the caller keeps the alert
+        """
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            loop.call_soon_threadsafe(self._enqueue, chat_id, message)
+            return True
+        except RuntimeError:
+            # Loop closed between the check and the call
+            return False
+
+    # Bot loop only
+
+    def _enqueue(self, chat_id: int, message: str):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Bot restarted on a new loop; workers of the old loop are gone
+            self._loop = loop
+            self._pending.clear()
+            self._workers.clear()
+            self._flush_now = asyncio.Event()
+
+        self.stats['submitted'] += 1
+        self._pending.setdefault(chat_id, []).append(message)
+        if chat_id not in self._workers:
+            self._workers[chat_id] = loop.create_task(self._drain(chat_id))
+
+    async def _drain(self, chat_id: int):
+        """Deliver a chat's alerts; anything queued while waiting joins the next digest"""
+        outgoing: List[str] = []
+        try:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.batch_window)
+            except asyncio.TimeoutError:
+                pass
+            while self._pending.get(chat_id):
+                messages = self._pending.pop(chat_id)
+                outgoing = build_digests(messages)
+                if len(messages) > 1:
+                    self.stats['digests'] += 1
+                while outgoing:
+                    text = outgoing.pop(0)
+                    if not await self.send(chat_id, text):
+                        self._undelivered(chat_id, text)
+        except asyncio.CancelledError:
+            for text in outgoing + build_digests(self._pending.pop(chat_id, [])):
+                self._undelivered(chat_id, text)
+            raise
+        finally:
+            self._workers.pop(chat_id, None)
+
+    def _undelivered(self, chat_id: int, text: str):
+        if self.on_undelivered is None:
+            return
+        try:
+            self.on_undelivered(chat_id, text)
+        except Exception as e:
+            logger.error(f"Could not keep undelivered alert for {chat_id}: {e}")
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def send(self, chat_id: int, text: str) -> bool:
+        """Send one message within the rate limits, honouring one flood-control retry"""
+        await asyncio.sleep(self._chat_bucket(chat_id).reserve())
+        for attempt in range(2):
+            await asyncio.sleep(self._global_bucket.reserve())
+            try:
+                await self.send_message(chat_id, text)
+                self.stats['sent'] += 1
+                return True
+            except Exception as e:
+                retry_after = _retry_after(e)
+                if retry_after is not None and attempt == 0:
+                    # Flood control applies to the whole bot: hold every send, then retry
+                    self.stats['retry_after'] += 1
+                    logger.warning(f"Telegram flood control for {chat_id}, retrying in {retry_after}s")
+                    self._global_bucket.pause(retry_after)
+                    continue
+                self.stats['failed'] += 1
+                logger.error(f"Error sending Telegram message to {chat_id}: {e}")
+                return False
+        return False
+
+    async def close(self, timeout: float = 5.0):
+        """Flush queued alerts now; whatever is still unsent afterwards is handed to on_undelivered"""
+        if not self._workers:
+            return
+        # Cut the batch window short
+        self._flush_now.set()
+        _, still_running = await asyncio.wait(list(self._workers.values()), timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            await asyncio.wait(still_running)
@@ -3,11 +3,13 @@ Telegram Alert Service for Order Notifications
 Handles asynchronous sending of order-related alerts to users via Telegram
 """
 
-from typing import Dict, Any, Optional, List
-from concurrent.futures import ThreadPoolExecutor
+import os
+import hashlib
+from typing import Dict, Any, Optional, List, Tuple
 import time
 from datetime import datetime
 import json
+from cachetools import TTLCache
 from database.telegram_db import (
     get_telegram_user_by_username,
     get_all_telegram_users,
@@ -39,8 +41,10 @@ def _get_telegram_bot_service():
 
 logger = get_logger(__name__)
 
-# Thread pool for async operations
-alert_executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="telegram_alert")
+# API key -> (username, telegram_id or None when no chat should get alerts), so a
+# burst of orders does one lookup. Short TTL so linking or muting applies quickly.
+TELEGRAM_ALERT_CHAT_TTL = int(os.getenv('TELEGRAM_ALERT_CHAT_TTL', '60'))
+_alert_chat_cache = TTLCache(maxsize=10000, ttl=TELEGRAM_ALERT_CHAT_TTL)
 
 class TelegramAlertService:
     """Service for sending order-related alerts via Telegram"""
@@ -251,11 +255,66 @@ class TelegramAlertService:
             add_notification(telegram_id, message, priority=8)
             return False
 
+    def _resolve_alert_chat(self, api_key: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+        """
+        OpenAlgo username for an API key and the telegram_id that should get its alerts.
+
+        Either may be None: no user for the key, or no linked chat with notifications on.
+        """
+        if not api_key:
+            logger.warning("No API key provided for telegram alert")
+            return None, None
+
+        # Security: Never use the plaintext API key as a cache key
+        cache_key = hashlib.sha256(api_key.encode()).hexdigest()
+        if cache_key in _alert_chat_cache:
+            return _alert_chat_cache[cache_key]
+
+        telegram_id = None
+        username = get_username_by_apikey(api_key)
+        if not username:
+            logger.warning("No username found for telegram alert API key")
+        else:
+            telegram_user = get_telegram_user_by_username(username)
+            if not telegram_user:
+                logger.info(f"No telegram user linked for username: {username}")
+            elif not telegram_user.get('notifications_enabled'):
+                logger.info(f"Notifications disabled for telegram user: {username}")
+            else:
+                telegram_id = telegram_user['telegram_id']
+
+        _alert_chat_cache[cache_key] = (username, telegram_id)
+        return username, telegram_id
+
+    def _session_telegram_id(self) -> Optional[int]:
+        """Fallback for alerts whose API key is unknown but raised inside a logged-in UI request"""
+        try:
+            from flask import has_request_context, session
+            if has_request_context() and session.get('user'):
+                telegram_user = get_telegram_user_by_username(session.get('user'))
+                if telegram_user and telegram_user.get('notifications_enabled'):
+                    return telegram_user['telegram_id']
+        except Exception:
+            pass
+        return None
+
+    def queue_alert(self, telegram_id: int, message: str) -> bool:
+        """Hand an alert to the bot's dispatcher, or keep it in the DB queue while the bot is down"""
+        bot_service = _get_telegram_bot_service()
+        if bot_service.is_running and hasattr(bot_service, 'queue_alert') and bot_service.queue_alert(telegram_id, message):
+            return True
+        logger.debug("Telegram bot is not running, queueing notification")
+        add_notification(telegram_id, message, priority=8)
+        return False
+
     def send_order_alert(self, order_type: str, order_data: Dict[str, Any],
                         response: Dict[str, Any], api_key: Optional[str] = None):
         """
         Send order alert to telegram user (non-blocking)
 
+        Alerts for the same chat that arrive close together (e.g. the legs of
+        a basket order) are delivered as a single digest message.
+
         Args:
             order_type: Type of order (placeorder, basketorder, etc.)
             order_data: Original order data
@@ -263,65 +322,26 @@ class TelegramAlertService:
             api_key: API key to identify user
         """
         try:
-            logger.info(f"Telegram alert triggered for {order_type}, response: {response.get('status', 'unknown')}")
+            logger.debug(f"Telegram alert triggered for {order_type}, response: {response.get('status', 'unknown')}")
 
             # Skip if alerts are disabled
             if not self.enabled:
                 logger.debug("Telegram alerts are disabled globally")
                 return
 
-            # Get username from API key
-            username = None
-            api_key_used = api_key or order_data.get('apikey')
-
-            if api_key_used:
-                logger.debug(f"Looking up username for API key (first 10 chars): {api_key_used[:10] if api_key_used else 'None'}...")
-                username = get_username_by_apikey(api_key_used)
-                logger.debug(f"Username lookup result: {username}")
-            else:
-                logger.warning("No API key provided for telegram alert")
-
+            username, telegram_id = self._resolve_alert_chat(api_key or order_data.get('apikey'))
             if not username:
-                logger.warning(f"No username found for telegram alert - api_key present: {bool(api_key_used)}, api_key_length: {len(api_key_used) if api_key_used else 0}")
-                # Try to get username from session if available
-                try:
-                    from flask import has_request_context, session
-                    if has_request_context() and session.get('user'):
-                        username = session.get('user')
-                        logger.info(f"Using username from session: {username}")
-                except:
-                    pass
-
-                if not username:
-                    return
-
-            # Get telegram user
-            telegram_user = get_telegram_user_by_username(username)
-            if not telegram_user:
-                logger.info(f"No telegram user linked for username: {username}")
-                return
-            if not telegram_user.get('notifications_enabled'):
-                logger.info(f"Notifications disabled for telegram user: {username}")
+                telegram_id = self._session_telegram_id()
+            if telegram_id is None:
                 return
 
-            logger.info(f"Sending telegram alert to user {username} (telegram_id: {telegram_user['telegram_id']})")
-
             # Format message
             template = self.alert_templates.get(order_type, '📊 *Order Update*\n{details}')
             details = self.format_order_details(order_type, order_data, response)
             message = template.format(details=details)
 
-            # Send alert asynchronously (non-blocking)
-            telegram_id = telegram_user['telegram_id']
-
-            # Get telegram bot service
-            bot_service = _get_telegram_bot_service()
-
-            # Use thread pool executor for non-blocking execution
-            logger.info(f"Queueing alert via thread pool for telegram_id: {telegram_id}")
-            alert_executor.submit(self.send_alert_sync, telegram_id, message)
-
-            logger.info(f"Telegram alert queued successfully for {order_type}")
+            self.queue_alert(telegram_id, message)
+            logger.debug(f"Telegram alert queued for {order_type} (telegram_id: {telegram_id})")
 
         except Exception as e:
             # Log error but don't raise - we don't want to affect order processing
@@ -337,8 +357,7 @@ class TelegramAlertService:
 
             for user in users:
                 if user.get('notifications_enabled'):
-                    telegram_id = user['telegram_id']
-                    alert_executor.submit(self._send_alert_sync_wrapper, telegram_id, message)
+                    self.queue_alert(user['telegram_id'], message)
 
         except Exception as e:
             logger.error(f"Error sending broadcast alert: {e}")
@@ -3,6 +3,7 @@ import asyncio
 import logging
 import sys
 import concurrent.futures
+import functools
 from typing import Dict, List, Optional, Tuple, Any
 
 # Import the original threading module to run the bot in a real OS thread,
@@ -20,8 +21,6 @@ from telegram.ext import Application, CommandHandler, CallbackQueryHandler, Mess
 from telegram.constants import ParseMode
 import telegram.error
 import json
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pandas as pd
 import io
 import base64
@@ -37,13 +36,36 @@ from database.telegram_db import (
     get_command_stats,
     get_all_telegram_users,
     delete_telegram_user,
-    get_user_credentials
+    get_user_credentials,
+    add_notification
 )
 from database.auth_db import get_username_by_apikey
+from services.funds_service import get_funds
+from services.holdings_service import get_holdings
+from services.orderbook_service import get_orderbook
+from services.positionbook_service import get_positionbook
+from services.quotes_service import get_quotes
+from services.tradebook_service import get_tradebook
+from services.telegram_alert_dispatcher import AlertDispatcher
+from services.telegram_chart_renderer import build_chart_payload, chart_renderer
+from utils.httpx_client import create_async_httpx_client
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Threads for blocking API calls made on behalf of bot users
+TELEGRAM_API_WORKERS = int(os.getenv('TELEGRAM_API_WORKERS', '8'))
+
+# SDK method -> in-process service function taking api_key (same functions the REST API calls)
+DIRECT_API_CALLS = {
+    'orderbook': get_orderbook,
+    'tradebook': get_tradebook,
+    'positionbook': get_positionbook,
+    'holdings': get_holdings,
+    'funds': get_funds,
+    'quotes': get_quotes,
+}
+
 class TelegramBotService:
     """Service class for managing Telegram bot operations with OpenAlgo SDK integration"""
 
@@ -55,17 +77,23 @@ class TelegramBotService:
         self.http_client = None  # Will be created in thread
         self.bot_thread = None
         self.bot_loop = None  # Store the bot's event loop
-        self.sdk_clients = {}  # Cache for OpenAlgo SDK clients per user
+        self.sdk_clients = {}  # telegram_id -> ((api_key, host_url), SDK client) for remote hosts
+        self._sdk_lock = original_threading.Lock()
+        # Bounded pool for blocking API calls so command bursts cannot pile up threads
+        self.api_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=TELEGRAM_API_WORKERS, thread_name_prefix="telegram_api"
+        )
         self._stop_event = original_threading.Event()  # Thread-safe stop signal
+        # All outgoing messages go through the dispatcher's rate limits; unsent alerts are queued in the DB
+        self.alert_dispatcher = AlertDispatcher(
+            self._send_markdown,
+            on_undelivered=lambda telegram_id, message: add_notification(telegram_id, message, priority=8)
+        )
 
     def _get_sdk_client(self, telegram_id: int) -> Optional[openalgo_api]:
         """Get or create OpenAlgo SDK client for a user"""
         try:
-            # Check if client already exists
-            if telegram_id in self.sdk_clients:
-                return self.sdk_clients[telegram_id]
-
-            # Get user credentials
+            # Get user credentials (cached in telegram_db)
             credentials = get_user_credentials(telegram_id)
             if not credentials or not credentials.get('api_key'):
                 logger.error(f"No valid credentials for telegram_id: {telegram_id}")
@@ -74,36 +102,94 @@ class TelegramBotService:
             host_url = credentials['host_url'].rstrip('/')
             api_key = credentials['api_key']
 
-            # Create SDK client
-            client = openalgo_api(api_key=api_key, host=host_url)
-
-            # Cache the client
-            self.sdk_clients[telegram_id] = client
+            # Reuse the cached client unless the user relinked with other credentials
+            with self._sdk_lock:
+                cached = self.sdk_clients.get(telegram_id)
+                if cached and cached[0] == (api_key, host_url):
+                    return cached[1]
 
-            return client
+                client = openalgo_api(api_key=api_key, host=host_url)
+                self.sdk_clients[telegram_id] = ((api_key, host_url), client)
+                return client
 
         except Exception as e:
             logger.error(f"Error creating SDK client: {e}")
             return None
 
-    async def _make_sdk_call(self, telegram_id: int, method: str, **kwargs) -> Optional[Dict]:
-        """Make an SDK call in async context"""
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call on the bot's bounded API executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.api_executor, functools.partial(func, *args, **kwargs))
+
+    async def _api_call(self, telegram_id: int, method: str, **params) -> Optional[Dict]:
+        """
+        Call an OpenAlgo API method for a linked user.
+
+        Accounts on this server are served in-process through the same
+        services.* functions the REST API uses, skipping the HTTP loopback
+        and JSON round-trip. Accounts linked to another host use the SDK.
+
+        Args:
+            telegram_id: Telegram user ID
+            method: SDK method name (orderbook, tradebook, positionbook, holdings, funds, quotes)
+            **params: Method arguments, e.g. symbol and exchange for quotes
+
+        Returns:
+            The API response dict, or None if the call could not be made
+        """
         try:
+            credentials = get_user_credentials(telegram_id)
+            if not credentials or not credentials.get('api_key'):
+                logger.error(f"No valid credentials for telegram_id: {telegram_id}")
+                return None
+
+            api_key = credentials['api_key']
+            service = DIRECT_API_CALLS.get(method)
+            if service and get_username_by_apikey(api_key):
+                _, response, _ = await self._run_blocking(service, api_key=api_key, **params)
+                return response
+
             client = self._get_sdk_client(telegram_id)
             if not client:
                 return None
+            return await self._run_blocking(getattr(client, method), **params)
 
-            # Run the SDK method in a thread pool since it's synchronous
-            loop = asyncio.get_event_loop()
-            sdk_method = getattr(client, method)
-            result = await loop.run_in_executor(None, sdk_method, *kwargs.values())
-
-            return result
+        except Exception as e:
+            logger.error(f"Error calling {method} for telegram_id {telegram_id}: {e}")
+            return None
 
+    async def _fetch_chart_data(self, client, symbol: str, exchange: str, interval: str,
+                                start_date: datetime, end_date: datetime) -> Optional[pd.DataFrame]:
+        """Fetch OHLCV history for a chart without blocking the event loop"""
+        try:
+            history_data = await self._run_blocking(
+                client.history,
+                symbol=symbol,
+                exchange=exchange,
+                interval=interval,
+                start_date=start_date.strftime("%Y-%m-%d"),
+                end_date=end_date.strftime("%Y-%m-%d")
+            )
         except Exception as e:
-            logger.error(f"Error making SDK call: {e}")
+            logger.error(f"History fetch for chart failed: {e}")
+            return None
+
+        # Check if we got data
+        if history_data is None or (isinstance(history_data, pd.DataFrame) and history_data.empty):
+            logger.error("No data available for chart generation")
             return None
 
+        # The API returns a DataFrame directly with timestamp as index
+        df = history_data if isinstance(history_data, pd.DataFrame) else pd.DataFrame(history_data)
+
+        # Reset index to get timestamp as a column
+        df = df.reset_index()
+        # After reset_index(), the index becomes a column named 'index'
+        # Rename it to 'timestamp' for clarity
+        if 'index' in df.columns:
+            df.rename(columns={'index': 'timestamp'}, inplace=True)
+        return df
+
     async def _generate_intraday_chart(self, symbol: str, exchange: str, interval: str, days: int, telegram_id: int) -> Optional[bytes]:
         """Generate intraday chart with specified interval"""
         try:
@@ -118,137 +204,18 @@ class TelegramBotService:
 
             logger.debug(f"Generating intraday chart for {symbol} on {exchange} with interval {interval}")
 
-            # Get historical data - be robust about event loops
-            history_data = None
-
-            # Try async first if we have a loop
-            if hasattr(self, 'bot_loop') and self.bot_loop:
-                try:
-                    logger.debug("Using bot's event loop for intraday history")
-                    history_data = await self.bot_loop.run_in_executor(
-                        None,
-                        lambda: client.history(
-                            symbol=symbol,
-                            exchange=exchange,
-                            interval=interval,
-                            start_date=start_date.strftime("%Y-%m-%d"),
-                            end_date=end_date.strftime("%Y-%m-%d")
-                        )
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to fetch via bot loop: {e}")
-
-            # If that didn't work, try direct sync call
-            if history_data is None:
-                try:
-                    logger.debug("Using synchronous history fetch for intraday")
-                    history_data = client.history(
-                        symbol=symbol,
-                        exchange=exchange,
-                        interval=interval,
-                        start_date=start_date.strftime("%Y-%m-%d"),
-                        end_date=end_date.strftime("%Y-%m-%d")
-                    )
-                except Exception as e:
-                    logger.error(f"Synchronous history fetch failed: {e}")
-                    return None
-
-            # Check if we got data
-            if history_data is None or (isinstance(history_data, pd.DataFrame) and history_data.empty):
-                logger.error("No data available for chart generation")
+            df = await self._fetch_chart_data(client, symbol, exchange, interval, start_date, end_date)
+            if df is None or df.empty:
                 return None
 
-            # The API returns a DataFrame directly with timestamp as index
-            df = history_data if isinstance(history_data, pd.DataFrame) else pd.DataFrame(history_data)
-
-            # Reset index to get timestamp as a column
-            df = df.reset_index()
-            # After reset_index(), the index becomes a column named 'index'
-            # Rename it to 'timestamp' for clarity
-            if 'index' in df.columns:
-                df.rename(columns={'index': 'timestamp'}, inplace=True)
-
-            # Create candlestick chart with volume
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                subplot_titles=(f'{symbol} - {days} Day Intraday ({interval})', None),
-                row_heights=[0.7, 0.3]
-            )
-
-            # Add candlestick chart (following sample code exactly)
-            fig.add_trace(
-                go.Candlestick(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    open=df['open'],
-                    high=df['high'],
-                    low=df['low'],
-                    close=df['close'],
-                    name='Price',
-                    increasing_line_color='green',
-                    decreasing_line_color='red'
-                ),
-                row=1, col=1
-            )
-
-            # Add volume bar chart
-            colors = ['red' if close < open else 'green'
-                     for close, open in zip(df['close'], df['open'])]
-
-            fig.add_trace(
-                go.Bar(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    y=df['volume'],
-                    marker_color=colors,
-                    name='Volume',
-                    showlegend=False
-                ),
-                row=2, col=1
-            )
-
-            # Update layout - simplified like the sample code
-            fig.update_layout(
-                xaxis_rangeslider_visible=False,
-                height=600,
-                template='plotly_white',
-                showlegend=False,
-                hovermode='x unified'
+            # Same data up to the same last bar renders the same image
+            key = (symbol, exchange, interval, days, str(df['timestamp'].iloc[-1]))
+            payload = build_chart_payload(
+                df, f'{symbol} - {days} Day Intraday ({interval})',
+                tick_format='%d %b %H:%M',  # "22 SEP 09:15"
+                tick_count=8
             )
-
-            # Apply category type to both x-axes to avoid gaps
-            # Reduce tick density - show only every Nth tick
-            tick_spacing = max(1, len(df) // 8)  # Show approximately 8 ticks
-            # Format timestamps as "22 SEP 09:15"
-            tick_labels = []
-            for i in range(0, len(df), tick_spacing):
-                if pd.notna(df['timestamp'].iloc[i]):
-                    ts = pd.to_datetime(df['timestamp'].iloc[i])
-                    tick_labels.append(ts.strftime('%d %b %H:%M').upper())
-                else:
-                    tick_labels.append('')
-
-            fig.update_xaxes(
-                type='category',
-                row=2, col=1,  # Apply to bottom subplot
-                tickmode='array',
-                tickvals=list(range(0, len(df), tick_spacing)),
-                ticktext=tick_labels,
-                tickangle=45
-            )
-            # Hide ticks on top subplot
-            fig.update_xaxes(
-                type='category',
-                row=1, col=1,  # Apply to top subplot
-                showticklabels=False
-            )
-
-            # Clean up axes
-            fig.update_yaxes(title_text="")
-
-            # Convert to image bytes
-            img_bytes = fig.to_image(format="png", engine="kaleido")
-            return img_bytes
+            return await chart_renderer.render(key, payload)
 
         except Exception as e:
             logger.error(f"Error generating intraday chart: {e}")
@@ -269,141 +236,20 @@ class TelegramBotService:
 
             logger.debug(f"Generating daily chart for {symbol} on {exchange} with interval {interval}")
 
-            # Get historical data - be robust about event loops
-            history_data = None
-
-            # Try async first if we have a loop
-            if hasattr(self, 'bot_loop') and self.bot_loop:
-                try:
-                    logger.debug("Using bot's event loop for daily history")
-                    history_data = await self.bot_loop.run_in_executor(
-                        None,
-                        lambda: client.history(
-                            symbol=symbol,
-                            exchange=exchange,
-                            interval=interval,
-                            start_date=start_date.strftime("%Y-%m-%d"),
-                            end_date=end_date.strftime("%Y-%m-%d")
-                        )
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to fetch daily via bot loop: {e}")
-
-            # If that didn't work, try direct sync call
-            if history_data is None:
-                try:
-                    logger.debug("Using synchronous history fetch for daily")
-                    history_data = client.history(
-                        symbol=symbol,
-                        exchange=exchange,
-                        interval=interval,
-                        start_date=start_date.strftime("%Y-%m-%d"),
-                        end_date=end_date.strftime("%Y-%m-%d")
-                    )
-                except Exception as e:
-                    logger.error(f"Synchronous daily history fetch failed: {e}")
-                    return None
-
-            # Check if we got data
-            if history_data is None or (isinstance(history_data, pd.DataFrame) and history_data.empty):
-                logger.error("No data available for chart generation")
+            df = await self._fetch_chart_data(client, symbol, exchange, interval, start_date, end_date)
+            if df is None or df.empty:
                 return None
 
-            # The API returns a DataFrame directly with timestamp as index
-            df = history_data if isinstance(history_data, pd.DataFrame) else pd.DataFrame(history_data)
-
-            # Reset index to get timestamp as a column
-            df = df.reset_index()
-            # After reset_index(), the index becomes a column named 'index'
-            # Rename it to 'timestamp' for clarity
-            if 'index' in df.columns:
-                df.rename(columns={'index': 'timestamp'}, inplace=True)
-
             # Keep last N trading days
             df = df.tail(days)
 
-            # Create candlestick chart with volume
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                subplot_titles=(f'{symbol} - Daily Chart ({days} Days)', None),
-                row_heights=[0.7, 0.3]
-            )
-
-            # Add candlestick chart (following sample code exactly)
-            fig.add_trace(
-                go.Candlestick(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    open=df['open'],
-                    high=df['high'],
-                    low=df['low'],
-                    close=df['close'],
-                    name='Price',
-                    increasing_line_color='green',
-                    decreasing_line_color='red'
-                ),
-                row=1, col=1
-            )
-
-
-            # Add volume bar chart
-            colors = ['red' if close < open else 'green'
-                     for close, open in zip(df['close'], df['open'])]
-
-            fig.add_trace(
-                go.Bar(
-                    x=df['timestamp'],  # x-axis as timestamp
-                    y=df['volume'],
-                    marker_color=colors,
-                    name='Volume',
-                    showlegend=False
-                ),
-                row=2, col=1
+            key = (symbol, exchange, interval, days, str(df['timestamp'].iloc[-1]))
+            payload = build_chart_payload(
+                df, f'{symbol} - Daily Chart ({days} Days)',
+                tick_format='%d %b',  # "22 SEP"
+                tick_count=10
             )
-
-            # Update layout - simplified like the sample code
-            fig.update_layout(
-                xaxis_rangeslider_visible=False,
-                height=600,
-                template='plotly_white',
-                showlegend=False,
-                hovermode='x unified'
-            )
-
-            # Apply category type to both x-axes to avoid gaps
-            # Reduce tick density for daily charts - show only every Nth tick
-            tick_spacing = max(1, len(df) // 10)  # Show approximately 10 ticks for daily
-            # Format dates for display as "22 SEP"
-            tick_labels = []
-            for i in range(0, len(df), tick_spacing):
-                if pd.notna(df['timestamp'].iloc[i]):
-                    ts = pd.to_datetime(df['timestamp'].iloc[i])
-                    tick_labels.append(ts.strftime('%d %b').upper())
-                else:
-                    tick_labels.append('')
-
-            fig.update_xaxes(
-                type='category',
-                row=2, col=1,  # Apply to bottom subplot
-                tickmode='array',
-                tickvals=list(range(0, len(df), tick_spacing)),
-                ticktext=tick_labels,
-                tickangle=45
-            )
-            # Hide ticks on top subplot
-            fig.update_xaxes(
-                type='category',
-                row=1, col=1,  # Apply to top subplot
-                showticklabels=False
-            )
-
-            # Clean up axes
-            fig.update_yaxes(title_text="")
-
-            # Convert to image bytes
-            img_bytes = fig.to_image(format="png", engine="kaleido")
-            return img_bytes
+            return await chart_renderer.render(key, payload)
 
         except Exception as e:
             logger.error(f"Error generating daily chart: {e}")
@@ -528,7 +374,7 @@ class TelegramBotService:
 
         try:
             # Create HTTP client in this thread's event loop
-            self.http_client = httpx.AsyncClient(timeout=30.0)
+            self.http_client = create_async_httpx_client('telegram', timeout=30.0)
 
             # Run the bot
             loop.run_until_complete(self._start_bot_isolated())
@@ -598,7 +444,8 @@ class TelegramBotService:
                 self.application.add_handler(CommandHandler("funds", self.cmd_funds))
                 self.application.add_handler(CommandHandler("pnl", self.cmd_pnl))
                 self.application.add_handler(CommandHandler("quote", self.cmd_quote))
-                self.application.add_handler(CommandHandler("chart", self.cmd_chart))
+                # Charts take seconds; run them as background tasks so other commands are not queued behind them
+                self.application.add_handler(CommandHandler("chart", self.cmd_chart, block=False))
                 self.application.add_handler(CommandHandler("menu", self.cmd_menu))
 
                 # Add callback query handler for inline buttons
@@ -633,6 +480,9 @@ class TelegramBotService:
                 logger.debug("Stop signal received, shutting down bot...")
                 self.is_running = False
 
+                # Send alerts still being batched while the bot can still reach Telegram
+                await self.alert_dispatcher.close()
+
                 # Stop the updater and wait for tasks to complete
                 if self.application and self.application.updater.running:
                     await self.application.updater.stop()
@@ -730,6 +580,7 @@ class TelegramBotService:
             self.bot_thread = None
             self.application = None
             self.bot_loop = None  # Clear the loop reference
+            chart_renderer.shutdown()
 
             # Update database
             update_bot_config({'is_active': False})
@@ -834,8 +685,7 @@ class TelegramBotService:
             test_client = openalgo_api(api_key=api_key, host=host_url)
 
             # Test with a simple call
-            loop = asyncio.get_event_loop()
-            test_response = await loop.run_in_executor(None, test_client.funds)
+            test_response = await self._run_blocking(test_client.funds)
 
             if test_response and test_response.get('status') == 'success':
                 # Valid credentials, save them
@@ -909,8 +759,8 @@ class TelegramBotService:
 
         if delete_telegram_user(user.id):
             # Clear SDK client cache
-            if user.id in self.sdk_clients:
-                del self.sdk_clients[user.id]
+            with self._sdk_lock:
+                self.sdk_clients.pop(user.id, None)
 
             await update.message.reply_text(
                 "✅ Account unlinked successfully.\n"
@@ -931,21 +781,12 @@ class TelegramBotService:
         telegram_user = get_telegram_user(user.id)
 
         if telegram_user:
-            # Test connection using SDK
-            client = self._get_sdk_client(user.id)
-            if client:
-                try:
-                    loop = asyncio.get_event_loop()
-                    test_response = await loop.run_in_executor(None, client.funds)
-
-                    if test_response and test_response.get('status') == 'success':
-                        status = "🟢 Connected"
-                    else:
-                        status = "🔴 Connection Failed"
-                except:
-                    status = "🔴 Connection Failed"
+            # Test connection
+            test_response = await self._api_call(user.id, 'funds')
+            if test_response and test_response.get('status') == 'success':
+                status = "🟢 Connected"
             else:
-                status = "🔴 Client Error"
+                status = "🔴 Connection Failed"
 
             await update.message.reply_text(
                 f"*Account Status*\n"
@@ -974,14 +815,8 @@ class TelegramBotService:
             await update.message.reply_text("❌ Please link your account first using /link")
             return
 
-        # Get orderbook using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, client.orderbook)
+        # Get orderbook
+        response = await self._api_call(user.id, 'orderbook')
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text("❌ Failed to fetch orderbook")
@@ -1086,14 +921,8 @@ class TelegramBotService:
             await update.message.reply_text("❌ Please link your account first using /link")
             return
 
-        # Get tradebook using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, client.tradebook)
+        # Get tradebook
+        response = await self._api_call(user.id, 'tradebook')
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text("❌ Failed to fetch tradebook")
@@ -1167,14 +996,8 @@ class TelegramBotService:
             await update.message.reply_text("❌ Please link your account first using /link")
             return
 
-        # Get positions using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, client.positionbook)
+        # Get positions
+        response = await self._api_call(user.id, 'positionbook')
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text("❌ Failed to fetch positions")
@@ -1253,14 +1076,8 @@ class TelegramBotService:
             await update.message.reply_text("❌ Please link your account first using /link")
             return
 
-        # Get holdings using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, client.holdings)
+        # Get holdings
+        response = await self._api_call(user.id, 'holdings')
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text("❌ Failed to fetch holdings")
@@ -1348,14 +1165,8 @@ class TelegramBotService:
             await update.message.reply_text("❌ Please link your account first using /link")
             return
 
-        # Get funds using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, client.funds)
+        # Get funds
+        response = await self._api_call(user.id, 'funds')
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text("❌ Failed to fetch funds")
@@ -1404,14 +1215,8 @@ class TelegramBotService:
             await update.message.reply_text("❌ Please link your account first using /link")
             return
 
-        # Get P&L from funds using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, client.funds)
+        # Get P&L from funds
+        response = await self._api_call(user.id, 'funds')
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text("❌ Failed to fetch P&L")
@@ -1472,17 +1277,8 @@ class TelegramBotService:
         symbol = context.args[0].upper()
         exchange = context.args[1].upper() if len(context.args) > 1 else 'NSE'
 
-        # Get quote using SDK
-        client = self._get_sdk_client(user.id)
-        if not client:
-            await update.message.reply_text("❌ Failed to connect to OpenAlgo")
-            return
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: client.quotes(symbol=symbol, exchange=exchange)
-        )
+        # Get quote
+        response = await self._api_call(user.id, 'quotes', symbol=symbol, exchange=exchange)
 
         if not response or response.get('status') != 'success':
             await update.message.reply_text(f"❌ Failed to fetch quote for {symbol}")
@@ -1586,36 +1382,31 @@ class TelegramBotService:
 
         try:
             charts_generated = []
+            renders = []
 
             if chart_type in ['both', 'intraday', 'i']:
                 # Generate intraday chart
                 intraday_interval = interval or '5m'
                 intraday_days = days or 5
-                intraday_chart = await self._generate_intraday_chart(
-                    symbol, exchange, intraday_interval, intraday_days, user.id
-                )
-                if intraday_chart:
-                    charts_generated.append(
-                        InputMediaPhoto(
-                            intraday_chart,
-                            caption=f"{symbol} - {intraday_days} Day Intraday Chart ({intraday_interval} intervals)"
-                        )
-                    )
+                renders.append((
+                    self._generate_intraday_chart(symbol, exchange, intraday_interval, intraday_days, user.id),
+                    f"{symbol} - {intraday_days} Day Intraday Chart ({intraday_interval} intervals)"
+                ))
 
             if chart_type in ['both', 'daily', 'd']:
                 # Generate daily chart
                 daily_interval = 'D' if chart_type == 'both' else (interval or 'D')
                 daily_days = 252 if chart_type == 'both' else (days or 252)
-                daily_chart = await self._generate_daily_chart(
-                    symbol, exchange, daily_interval, daily_days, user.id
-                )
-                if daily_chart:
-                    charts_generated.append(
-                        InputMediaPhoto(
-                            daily_chart,
-                            caption=f"{symbol} - Daily Chart ({daily_days} days)"
-                        )
-                    )
+                renders.append((
+                    self._generate_daily_chart(symbol, exchange, daily_interval, daily_days, user.id),
+                    f"{symbol} - Daily Chart ({daily_days} days)"
+                ))
+
+            # Render both charts in parallel on the chart worker pool
+            images = await asyncio.gather(*(render for render, _ in renders))
+            for image, (_, caption) in zip(images, renders):
+                if image:
+                    charts_generated.append(InputMediaPhoto(image, caption=caption))
 
             # Delete loading message
             await loading_msg.delete()
@@ -1708,6 +1499,24 @@ class TelegramBotService:
 
             await handler(fake_update, context)
 
+    async def _send_markdown(self, telegram_id: int, message: str) -> None:
+        """Send a Markdown message; errors are handled by the alert dispatcher"""
+        await self.application.bot.send_message(
+            chat_id=telegram_id,
+            text=message,
+            parse_mode='Markdown'
+        )
+
+    def queue_alert(self, telegram_id: int, message: str) -> bool:
+        """
+        Queue an alert from any thread; alerts arriving together for a chat are sent as one digest.
+
+        Returns False if the bot is not running, in which case the caller keeps the alert.
+        """
+        if not self.is_running or not self.application:
+            return False
+        return self.alert_dispatcher.submit(self.bot_loop, telegram_id, message)
+
     async def send_notification(self, telegram_id: int, message: str) -> bool:
         """Send a notification to a specific Telegram user."""
         try:
@@ -1715,16 +1524,10 @@ class TelegramBotService:
                 logger.error("Bot not initialized or not running")
                 return False
 
-            # Get the bot from the application
-            bot = self.application.bot
-
-            await bot.send_message(
-                chat_id=telegram_id,
-                text=message,
-                parse_mode='Markdown'
-            )
-            logger.debug(f"Notification sent to telegram_id: {telegram_id}")
-            return True
+            success = await self.alert_dispatcher.send(telegram_id, message)
+            if success:
+                logger.debug(f"Notification sent to telegram_id: {telegram_id}")
+            return success
         except Exception as e:
             logger.error(f"Error sending notification to {telegram_id}: {str(e)}")
             return False
@@ -1747,25 +1550,14 @@ class TelegramBotService:
                 if filters.get('openalgo_username'):
                     users = [u for u in users if u.get('openalgo_username') == filters['openalgo_username']]
 
-            success_count = 0
-            fail_count = 0
+            telegram_ids = [user.get('telegram_id') for user in users if user.get('telegram_id')]
 
-            for user in users:
-                try:
-                    telegram_id = user.get('telegram_id')
-                    if telegram_id:
-                        bot = self.application.bot
-                        await bot.send_message(
-                            chat_id=telegram_id,
-                            text=message,
-                            parse_mode='Markdown'
-                        )
-                        success_count += 1
-                        # Add small delay to avoid rate limits
-                        await asyncio.sleep(0.1)
-                except Exception as e:
-                    logger.error(f"Failed to send broadcast to {user.get('telegram_id')}: {str(e)}")
-                    fail_count += 1
+            # Sent concurrently; the dispatcher's global rate limit paces them
+            results = await asyncio.gather(
+                *(self.alert_dispatcher.send(telegram_id, message) for telegram_id in telegram_ids)
+            )
+            success_count = sum(1 for sent in results if sent)
+            fail_count = len(results) - success_count
 
             logger.debug(f"Broadcast complete: {success_count} success, {fail_count} failed")
             return success_count, fail_count
@@ -1774,6 +1566,5 @@ class TelegramBotService:
             logger.error(f"Error in broadcast: {str(e)}")
             return 0, 0
 
-
 # Create global instance
 telegram_bot_service = TelegramBotService()
\ No newline at end of file
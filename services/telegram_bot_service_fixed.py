@@ -4,7 +4,6 @@ import logging
 import threading
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
-import httpx
 from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 from telegram.constants import ParseMode
@@ -28,6 +27,7 @@ from database.telegram_db import (
     delete_telegram_user,
     get_user_credentials
 )
+from utils.httpx_client import create_async_httpx_client
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -42,7 +42,7 @@ class TelegramBotService:
         self.bot_token = None
         self.webhook_url = None
         self.polling_mode = True  # Default to polling mode
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        self.http_client = create_async_httpx_client('telegram', timeout=30.0)
         self.bot_thread = None
         self.bot_loop = None
         self.sdk_clients = {}  # Cache for OpenAlgo SDK clients per user
@@ -0,0 +1,355 @@
+"""
+Chart rendering for the Telegram bot.
+
+Plotly/Kaleido rendering takes seconds of CPU, so it runs in a small pool of
+dedicated worker processes (telegram_chart_worker.py) instead of on the bot's
+event loop. The workers are started as their own entrypoint rather than with
+multiprocessing, which would re-import the app's __main__ module (and start
+the whole app again) in every worker. Rendered PNGs are cached by
+(symbol, exchange, interval, days, last-bar timestamp): repeated /chart
+requests for a chart whose data has not moved are served from memory, and
+identical requests that arrive while a render is running share that render.
+"""
+
+import os
+import asyncio
+import pickle
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from services.telegram_chart_worker import read_frame, write_frame
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Worker processes rendering charts in parallel
+TELEGRAM_CHART_WORKERS = int(os.getenv('TELEGRAM_CHART_WORKERS', '2'))
+# Rendered charts kept in memory
+TELEGRAM_CHART_CACHE_SIZE = int(os.getenv('TELEGRAM_CHART_CACHE_SIZE', '64'))
+# Renders running or queued at once; further requests are turned away
+TELEGRAM_CHART_MAX_PENDING = int(os.getenv('TELEGRAM_CHART_MAX_PENDING', '8'))
+# Seconds to wait for a single render
+TELEGRAM_CHART_TIMEOUT = float(os.getenv('TELEGRAM_CHART_TIMEOUT', '60'))
+
+WORKER_MODULE = 'services.telegram_chart_worker'
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def build_chart_payload(df, title: str, tick_format: str, tick_count: int) -> Dict[str, Any]:
+    """
+    Reduce an OHLCV DataFrame to the plain data a worker process needs.
+
+    Args:
+        df: DataFrame with timestamp, open, high, low, close and volume columns
+        title: Chart title
+        tick_format: strftime format for the x-axis labels
+        tick_count: Approximate number of x-axis labels
+
+    Returns:
+        Picklable dict accepted by render_chart_png
+    """
+    return {
+        'title': title,
+        'tick_format': tick_format,
+        'tick_count': tick_count,
+        'timestamp': df['timestamp'].tolist(),
+        'open': df['open'].tolist(),
+        'high': df['high'].tolist(),
+        'low': df['low'].tolist(),
+        'close': df['close'].tolist(),
+        'volume': df['volume'].tolist(),
+    }
+
+
+def render_chart_png(payload: Dict[str, Any]) -> bytes:
+    """
+    Render a candlestick chart with a volume panel to PNG bytes.
+
+    Runs inside a worker process; plotly is imported here so the parent
+    process never pays for it on the bot's thread.
+    """
+    import pandas as pd
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    timestamps = payload['timestamp']
+    opens, closes = payload['open'], payload['close']
+
+    # Create candlestick chart with volume
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        subplot_titles=(payload['title'], None),
+        row_heights=[0.7, 0.3]
+    )
+
+    fig.add_trace(
+        go.Candlestick(
+            x=timestamps,
+            open=opens,
+            high=payload['high'],
+            low=payload['low'],
+            close=closes,
+            name='Price',
+            increasing_line_color='green',
+            decreasing_line_color='red'
+        ),
+        row=1, col=1
+    )
+
+    # Add volume bar chart
+    colors = ['red' if close < open else 'green' for close, open in zip(closes, opens)]
+
+    fig.add_trace(
+        go.Bar(
+            x=timestamps,
+            y=payload['volume'],
+            marker_color=colors,
+            name='Volume',
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+
+    fig.update_layout(
+        xaxis_rangeslider_visible=False,
+        height=600,
+        template='plotly_white',
+        showlegend=False,
+        hovermode='x unified'
+    )
+
+    # Category axes avoid gaps for non-trading periods; label only every Nth bar
+    tick_spacing = max(1, len(timestamps) // payload['tick_count'])
+    tick_labels = []
+    for i in range(0, len(timestamps), tick_spacing):
+        if pd.notna(timestamps[i]):
+            tick_labels.append(pd.to_datetime(timestamps[i]).strftime(payload['tick_format']).upper())
+        else:
+            tick_labels.append('')
+
+    fig.update_xaxes(
+        type='category',
+        row=2, col=1,
+        tickmode='array',
+        tickvals=list(range(0, len(timestamps), tick_spacing)),
+        ticktext=tick_labels,
+        tickangle=45
+    )
+    fig.update_xaxes(
+        type='category',
+        row=1, col=1,
+        showticklabels=False
+    )
+    fig.update_yaxes(title_text="")
+
+    return fig.to_image(format="png", engine="kaleido")
+
+
+class ChartWorkerPool(Executor):
+    """
+    Executor running module-level functions in dedicated worker processes.
+
+    Each of max_workers threads owns one `python -m services.telegram_chart_worker`
+    process, started on its first call and replaced if it dies. A call that
+    loses its worker raises BrokenProcessPool; one still running after
+    timeout seconds has its worker killed (so the thread is free for the next
+    call) and raises TimeoutError.
+    """
+
+    def __init__(self, max_workers: int, timeout: Optional[float] = None,
+                 worker_module: str = WORKER_MODULE):
+        self.timeout = timeout
+        self.worker_module = worker_module
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chart-render')
+        self._local = threading.local()
+        self._workers: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+
+    def _worker(self) -> subprocess.Popen:
+        worker = getattr(self._local, 'worker', None)
+        if worker is None or worker.poll() is not None:
+            worker = subprocess.Popen(
+                [sys.executable, '-m', self.worker_module],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=str(REPO_ROOT)
+            )
+            self._local.worker = worker
+            with self._lock:
+                self._workers = [w for w in self._workers if w.poll() is None]
+                self._workers.append(worker)
+            logger.debug(f"Started chart worker pid {worker.pid}")
+        return worker
+
+    def _call(self, fn: Callable, args: tuple):
+        worker = self._worker()
+        expired = threading.Event()
+        deadline = None
+        if self.timeout:
+            # Killing the worker ends the blocking read below with EOF
+            deadline = threading.Timer(self.timeout, lambda: (expired.set(), worker.kill()))
+            deadline.daemon = True
+            deadline.start()
+        try:
+            write_frame(worker.stdin, pickle.dumps((fn, args), protocol=pickle.HIGHEST_PROTOCOL))
+            ok, value = pickle.loads(read_frame(worker.stdout))
+        except (OSError, EOFError, ValueError) as e:
+            self._local.worker = None
+            worker.kill()
+            worker.wait()
+            if expired.is_set():
+                raise TimeoutError(f"Chart worker pid {worker.pid} killed after {self.timeout}s")
+            raise BrokenProcessPool(f"Chart worker pid {worker.pid} exited: {e}")
+        finally:
+            if deadline is not None:
+                deadline.cancel()
+            if expired.is_set():
+                self._local.worker = None
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self._threads.submit(self._call, fn, args)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._threads.shutdown(wait=False, cancel_futures=cancel_futures)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            try:
+                # Stops a worker mid-render too; its caller gets BrokenProcessPool
+                worker.stdin.close()
+                worker.kill()
+                if wait:
+                    worker.wait(timeout=5)
+            except Exception as e:
+                logger.debug(f"Error stopping chart worker pid {worker.pid}: {e}")
+
+
+class ChartRenderer:
+    """Worker-process chart renderer with an LRU cache of rendered PNGs"""
+
+    def __init__(self, max_workers: int = TELEGRAM_CHART_WORKERS,
+                 cache_size: int = TELEGRAM_CHART_CACHE_SIZE,
+                 max_pending: int = TELEGRAM_CHART_MAX_PENDING,
+                 timeout: float = TELEGRAM_CHART_TIMEOUT,
+                 executor=None,
+                 render_fn: Callable[[Dict[str, Any]], bytes] = render_chart_png):
+        self.max_workers = max(1, max_workers)
+        self.cache_size = max(0, cache_size)
+        self.max_pending = max(1, max_pending)
+        self.timeout = timeout
+        self.render_fn = render_fn
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._cache: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'renders': 0, 'cache_hits': 0, 'shared': 0, 'rejected': 0, 'failures': 0}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Worker processes import only the renderer, not the Flask app or the bot
+                self._executor = ChartWorkerPool(max_workers=self.max_workers, timeout=self.timeout)
+                logger.debug(f"Started chart renderer pool with {self.max_workers} workers")
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_cached(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+            return image
+
+    def _store(self, key: Hashable, image: bytes):
+        if self.cache_size == 0:
+            return
+        with self._lock:
+            self._cache[key] = image
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    async def render(self, key: Hashable, payload: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Render a chart off the event loop, or return it from the cache.
+
+        Args:
+            key: Cache key; must change whenever the chart's data changes
+            payload: Output of build_chart_payload
+
+        Returns:
+            PNG bytes, or None if the render failed, timed out or the pool was busy
+        """
+        image = self.get_cached(key)
+        if image is not None:
+            self.stats['cache_hits'] += 1
+            return image
+
+        # Join an identical render that is already running
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats['shared'] += 1
+            return await asyncio.shield(pending)
+
+        if len(self._inflight) >= self.max_pending:
+            self.stats['rejected'] += 1
+            logger.warning(f"Chart renderer busy ({len(self._inflight)} renders pending), rejecting {key}")
+            return None
+
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+        self._inflight[key] = result
+        image = None
+        try:
+            image = await asyncio.wait_for(
+                loop.run_in_executor(self._get_executor(), self.render_fn, payload),
+                timeout=self.timeout
+            )
+            self.stats['renders'] += 1
+            self._store(key, image)
+        except asyncio.TimeoutError:
+            # The pool kills a worker still rendering at its own deadline
+            self.stats['failures'] += 1
+            logger.error(f"Chart render timed out after {self.timeout}s for {key}")
+        except BrokenProcessPool:
+            self.stats['failures'] += 1
+            logger.error("Chart renderer pool died, restarting it on the next request")
+            if self._owns_executor:
+                self._reset_executor()
+        except Exception as e:
+            self.stats['failures'] += 1
+            logger.error(f"Error rendering chart {key}: {e}")
+        finally:
+            del self._inflight[key]
+            result.set_result(image)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        """Stop the worker processes; the pool restarts on the next render"""
+        if self._owns_executor:
+            self._reset_executor()
+
+
+# Shared renderer instance
+chart_renderer = ChartRenderer()
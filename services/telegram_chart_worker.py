@@ -0,0 +1,58 @@
+"""
+Chart rendering worker for the Telegram bot.
+
+Started by ChartWorkerPool as `python -m services.telegram_chart_worker`
+from the repository root, so only the renderer module is imported, never the
+Flask app. It answers requests on stdin until stdin is closed:
+
+    request:  4-byte big-endian length + pickle of (function, args)
+    response: 4-byte big-endian length + pickle of (ok, result or error text)
+
+stdout carries only responses; anything a library prints goes to stderr.
+"""
+
+import os
+import pickle
+import struct
+import sys
+
+_LENGTH = struct.Struct('>I')
+
+
+def read_frame(stream) -> bytes:
+    """Read one length-prefixed frame; raises EOFError when the stream is closed"""
+    header = stream.read(_LENGTH.size)
+    if len(header) < _LENGTH.size:
+        raise EOFError('stream closed')
+    size, = _LENGTH.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError('stream closed mid-frame')
+    return data
+
+
+def write_frame(stream, data: bytes):
+    stream.write(_LENGTH.pack(len(data)) + data)
+    stream.flush()
+
+
+def main():
+    requests = sys.stdin.buffer
+    responses = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+
+    while True:
+        try:
+            request = read_frame(requests)
+        except EOFError:
+            return  # Pool shut down
+        try:
+            function, args = pickle.loads(request)
+            reply = (True, function(*args))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        write_frame(responses, pickle.dumps(reply, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+if __name__ == '__main__':
+    main()
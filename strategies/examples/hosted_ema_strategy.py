@@ -0,0 +1,60 @@
+"""
+Hosted EMA Crossover Strategy Example
+The same crossover as simple_ema_strategy.py, written for the in-process
+strategy host: upload it with the "Hosted" runtime. Instead of polling
+history every 15 seconds it reacts to each completed 1-minute bar built from
+the live feed, which the host shares with every other strategy on NHPC.
+"""
+import pandas as pd
+
+from services.strategy_host import Strategy
+
+symbol = 'NHPC'  # OpenAlgo Symbol
+exchange = "NSE"
+product = "MIS"
+quantity = 1
+
+# EMA periods
+fast_period = 5
+slow_period = 10
+
+
+class EMACrossover(Strategy):
+    symbols = [(symbol, exchange)]
+    bar_intervals = ['1m']
+    # Enough history for the slow EMA to settle before the first live bar
+    warmup_bars = slow_period * 5
+
+    def on_start(self):
+        self.position = 0
+        self.ctx.log(f"Starting {fast_period}/{slow_period} EMA Crossover Strategy...")
+
+    def on_bar(self, bar):
+        close = pd.Series([b['close'] for b in self.ctx.bars(symbol, exchange, '1m')]).round(2)
+        if len(close) < slow_period + 1:
+            return
+
+        ema_fast = close.ewm(span=fast_period, adjust=False).mean()
+        ema_slow = close.ewm(span=slow_period, adjust=False).mean()
+        crossover = ema_fast.iloc[-2] < ema_slow.iloc[-2] and ema_fast.iloc[-1] > ema_slow.iloc[-1]
+        crossunder = ema_fast.iloc[-2] > ema_slow.iloc[-2] and ema_fast.iloc[-1] < ema_slow.iloc[-1]
+
+        if crossover and self.position <= 0:
+            self.position = quantity
+            response = self.ctx.place_smart_order(
+                symbol=symbol, action="BUY", exchange=exchange, pricetype="MARKET",
+                product=product, quantity=quantity, position_size=self.position
+            )
+            self.ctx.log(f"Buy Order Response: {response}")
+        elif crossunder and self.position >= 0:
+            self.position = -quantity
+            response = self.ctx.place_smart_order(
+                symbol=symbol, action="SELL", exchange=exchange, pricetype="MARKET",
+                product=product, quantity=quantity, position_size=self.position
+            )
+            self.ctx.log(f"Sell Order Response: {response}")
+
+        self.ctx.log(
+            f"Close: {close.iloc[-1]} | Fast EMA: {ema_fast.iloc[-1]:.2f} | "
+            f"Slow EMA: {ema_slow.iloc[-1]:.2f} | Position: {self.position}"
+        )
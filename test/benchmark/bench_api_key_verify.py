@@ -0,0 +1,99 @@
+"""
+Benchmark API key verification cost against the number of users.
+
+Compares the fingerprint lookup in database.auth_db (one indexed query and at
+most one Argon2 check) with the legacy path, where rows without a
+fingerprint are Argon2-verified one by one. The legacy path is what every
+cache miss did before migrate_api_key_fingerprint.py.
+
+Runs against a throwaway SQLite database and a random pepper, so it never
+touches db/openalgo.db:
+
+    python test/benchmark/bench_api_key_verify.py --users 10,50,200 --repeat 5
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+_tmp_dir = tempfile.mkdtemp(prefix='openalgo-apikey-bench-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ['API_KEY_PEPPER'] = secrets.token_hex(32)
+
+from sqlalchemy import text  # noqa: E402
+
+from database import auth_db  # noqa: E402
+
+
+def time_lookup(api_key, repeat, legacy):
+    """Median milliseconds for one uncached owner lookup"""
+    samples = []
+    for _ in range(repeat):
+        if legacy:
+            # Simulate a database that has not been migrated yet
+            with auth_db.engine.begin() as conn:
+                conn.execute(text("UPDATE api_keys SET api_key_fingerprint = NULL"))
+        auth_db.db_session.remove()
+
+        start = time.perf_counter()
+        auth_db._find_api_key_owner(api_key)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    if legacy:
+        restore_fingerprints()
+    return statistics.median(samples)
+
+
+def restore_fingerprints():
+    with auth_db.engine.begin() as conn:
+        for row_id, encrypted in conn.execute(text("SELECT id, api_key_encrypted FROM api_keys")).fetchall():
+            fingerprint = auth_db.compute_api_key_fingerprint(auth_db.decrypt_token(encrypted))
+            conn.execute(text("UPDATE api_keys SET api_key_fingerprint = :f WHERE id = :id"),
+                         {'f': fingerprint, 'id': row_id})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API key verification cost vs user count')
+    parser.add_argument('--users', default='10,50,200', help='Comma separated user counts')
+    parser.add_argument('--repeat', type=int, default=5, help='Lookups per measurement')
+    args = parser.parse_args()
+
+    counts = sorted(int(c) for c in args.users.split(','))
+    auth_db.init_db()
+
+    print(f"{'Users':>6} | {'Indexed valid':>14} {'Indexed invalid':>16} | {'Legacy valid':>13} {'Legacy invalid':>15}")
+    print("-" * 76)
+
+    keys = []
+    for count in counts:
+        while len(keys) < count:
+            api_key = secrets.token_hex(32)
+            auth_db.upsert_api_key(f"bench_user_{len(keys)}", api_key)
+            keys.append(api_key)
+
+        # Last user is the worst case for the legacy scan
+        valid_key = keys[-1]
+        invalid_key = secrets.token_hex(32)
+
+        results = [
+            time_lookup(valid_key, args.repeat, legacy=False),
+            time_lookup(invalid_key, args.repeat, legacy=False),
+            time_lookup(valid_key, args.repeat, legacy=True),
+            time_lookup(invalid_key, args.repeat, legacy=True),
+        ]
+        print(f"{count:>6} | {results[0]:>12.2f}ms {results[1]:>14.2f}ms | "
+              f"{results[2]:>11.2f}ms {results[3]:>13.2f}ms")
+
+    print("\nMedian ms per uncached lookup. Legacy cost grows with users; indexed cost stays flat.")
+    print(f"Temporary database: {_tmp_dir}")
+
+
+if __name__ == '__main__':
+    main()
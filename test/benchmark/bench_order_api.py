@@ -0,0 +1,274 @@
+"""
+Load test and latency benchmark for the order placement API.
+
+Fires concurrent requests at a running OpenAlgo instance and reports
+throughput and client-side latency percentiles per endpoint, plus each
+endpoint's server-side stage breakdown (broker round trip, validation,
+response processing, overhead) recorded by the latency monitor in the
+latency DB. Endpoints run one after another in whole-second windows, so the
+latency DB rows of each endpoint can be told apart.
+
+Run OpenAlgo against the mock broker so results are repeatable:
+
+    python test/benchmark/mock_broker.py --port 9100
+    BROKER_HTTP_OVERRIDE_URL=http://127.0.0.1:9100 python app.py
+    python test/benchmark/bench_order_api.py --apikey <key> --concurrency 20 --requests 500
+
+Save a baseline once and compare later runs against it; the script exits
+with status 1 when any endpoint's p95 regresses beyond the tolerance:
+
+    python test/benchmark/bench_order_api.py --apikey <key> --save-baseline baseline.json
+    python test/benchmark/bench_order_api.py --apikey <key> --baseline baseline.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = ['placeorder', 'placesmartorder', 'basketorder', 'splitorder', 'optionsmultiorder']
+
+STAGE_COLUMNS = ['rtt_ms', 'validation_latency_ms', 'response_latency_ms', 'overhead_ms', 'total_latency_ms']
+
+
+def build_payload(endpoint, apikey, symbol, exchange):
+    """Request body for an endpoint"""
+    base = {'apikey': apikey, 'strategy': 'Benchmark'}
+    order = {
+        'exchange': exchange,
+        'symbol': symbol,
+        'action': 'BUY',
+        'quantity': 1,
+        'pricetype': 'MARKET',
+        'product': 'MIS',
+    }
+
+    if endpoint == 'placeorder':
+        return {**base, **order}
+    if endpoint == 'placesmartorder':
+        return {**base, **order, 'position_size': 1}
+    if endpoint == 'basketorder':
+        return {**base, 'orders': [order, {**order, 'action': 'SELL'}]}
+    if endpoint == 'splitorder':
+        return {**base, **order, 'quantity': 10, 'splitsize': 5}
+    if endpoint == 'optionsmultiorder':
+        return {
+            **base,
+            'underlying': 'NIFTY',
+            'exchange': 'NSE_INDEX',
+            'legs': [
+                {'offset': 'OTM2', 'option_type': 'CE', 'action': 'BUY', 'quantity': 75},
+                {'offset': 'OTM2', 'option_type': 'PE', 'action': 'BUY', 'quantity': 75},
+            ],
+        }
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'avg': round(sum(values) / len(values), 2) if values else 0,
+        'p50': round(percentile(values, 50), 2),
+        'p95': round(percentile(values, 95), 2),
+        'p99': round(percentile(values, 99), 2),
+        'max': round(values[-1], 2) if values else 0,
+    }
+
+
+def run_endpoint(host, endpoint, payload, concurrency, total_requests, timeout):
+    """Send total_requests to one endpoint with the given concurrency"""
+    url = f"{host.rstrip('/')}/api/v1/{endpoint}"
+    latencies = []
+    status_counts = {}
+    lock = threading.Lock()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    with httpx.Client(timeout=timeout, limits=limits) as client:
+        def send(_):
+            start = time.perf_counter()
+            try:
+                status = client.post(url, json=payload).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed_ms)
+                status_counts[status] = status_counts.get(status, 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(send, range(total_requests)))
+        duration = time.perf_counter() - started
+
+    return {
+        'requests': total_requests,
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(total_requests / duration, 2) if duration else 0,
+        'status': {str(k): v for k, v in status_counts.items()},
+        'latency_ms': summarize(latencies),
+    }
+
+
+def latency_db_path():
+    """Path of the SQLite latency DB from LATENCY_DATABASE_URL"""
+    url = os.getenv('LATENCY_DATABASE_URL', 'sqlite:///db/latency.db')
+    if not url.startswith('sqlite:///'):
+        return None
+    path = url[len('sqlite:///'):]
+    return path if os.path.isabs(path) else os.path.join(ROOT_DIR, path)
+
+
+def next_second():
+    """Wait for the next whole UTC second and return it (latency DB timestamps have second resolution)"""
+    now = datetime.now(timezone.utc)
+    boundary = now.replace(microsecond=0) + timedelta(seconds=1)
+    time.sleep((boundary - now).total_seconds())
+    return boundary
+
+
+def stage_breakdown(since_utc, until_utc):
+    """Server-side stage percentiles for orders logged in [since_utc, until_utc)"""
+    path = latency_db_path()
+    if not path or not os.path.exists(path):
+        return {}
+
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT {', '.join(STAGE_COLUMNS)} FROM order_latency WHERE timestamp >= ? AND timestamp < ?",
+            (since_utc.strftime('%Y-%m-%d %H:%M:%S'), until_utc.strftime('%Y-%m-%d %H:%M:%S'))
+        ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Could not read latency DB: {e}")
+        return {}
+    finally:
+        conn.close()
+
+    return {
+        column: summarize([row[i] for row in rows if row[i] is not None])
+        for i, column in enumerate(STAGE_COLUMNS)
+    }
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Return a list of regression messages (p95 and throughput)"""
+    regressions = []
+    for endpoint, result in results.items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if not previous:
+            continue
+
+        old_p95 = previous['latency_ms']['p95']
+        new_p95 = result['latency_ms']['p95']
+        if old_p95 and new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {old_p95}ms -> {new_p95}ms")
+
+        old_rps = previous['throughput_rps']
+        new_rps = result['throughput_rps']
+        if old_rps and new_rps < old_rps * (1 - tolerance):
+            regressions.append(f"{endpoint}: throughput {old_rps} -> {new_rps} req/s")
+    return regressions
+
+
+def print_report(results, stages):
+    print("\n" + "=" * 88)
+    print(f"{'Endpoint':<20}{'Req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Max ms':>10}  Status")
+    print("-" * 88)
+    for endpoint, result in results.items():
+        lat = result['latency_ms']
+        print(f"{endpoint:<20}{result['throughput_rps']:>10}{lat['p50']:>10}{lat['p95']:>10}"
+              f"{lat['p99']:>10}{lat['max']:>10}  {result['status']}")
+
+    for endpoint, endpoint_stages in stages.items():
+        if not endpoint_stages:
+            continue
+        print(f"\nServer-side stages for {endpoint} (latency DB)")
+        print("-" * 88)
+        print(f"{'Stage':<24}{'Count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for column, summary in endpoint_stages.items():
+            print(f"{column:<24}{summary['count']:>8}{summary['p50']:>10}{summary['p95']:>10}{summary['p99']:>10}")
+    print("=" * 88)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAlgo order API load test')
+    parser.add_argument('--host', default='http://127.0.0.1:5000')
+    parser.add_argument('--apikey', default=os.getenv('OPENALGO_API_KEY'), required=not os.getenv('OPENALGO_API_KEY'))
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help='Comma separated endpoints to benchmark')
+    parser.add_argument('--symbol', default='SBIN')
+    parser.add_argument('--exchange', default='NSE')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--save-baseline', metavar='FILE')
+    parser.add_argument('--baseline', metavar='FILE')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed fractional regression vs baseline (default 0.10)')
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    run_started = datetime.now(timezone.utc).replace(microsecond=0)
+    results = {}
+    windows = {}
+    for endpoint in endpoints:
+        print(f"Benchmarking {endpoint}: {args.requests} requests, concurrency {args.concurrency}")
+        payload = build_payload(endpoint, args.apikey, args.symbol, args.exchange)
+        # Each endpoint gets its own whole-second window; the next one starts after it closes
+        started = next_second()
+        results[endpoint] = run_endpoint(args.host, endpoint, payload, args.concurrency,
+                                         args.requests, args.timeout)
+        windows[endpoint] = (started, next_second())
+
+    stages = {endpoint: stage_breakdown(since, until) for endpoint, (since, until) in windows.items()}
+    print_report(results, stages)
+
+    report = {
+        'run_at': run_started.isoformat(),
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'endpoints': results,
+        'stages': stages,
+    }
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
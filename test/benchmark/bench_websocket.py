@@ -0,0 +1,460 @@
+"""
+Tick-replay benchmark for the WebSocket streaming path.
+
+Replays recorded broker frames, or synthetic ticks, through a broker adapter
+and the shared ZeroMQ publisher into WebSocketProxy, and out to N simulated
+WebSocket clients. No live broker feed or API key is needed.
+
+    adapter (ReplayAdapter) -> SharedZmqPublisher -> WebSocketProxy -> N clients
+
+The proxy runs in a child process, the same way it runs inside OpenAlgo, so
+its CPU time and memory can be measured apart from the clients. The report
+covers:
+    - end-to-end tick latency (adapter publish -> client receive) p50/p95/p99
+    - proxy process CPU time per published tick
+    - dropped messages (expected deliveries that never arrived)
+    - proxy RSS growth over the replay
+
+Usage:
+    # 500 synthetic symbols, 5000 ticks/s for 10s, 20 clients
+    python test/benchmark/bench_websocket.py --symbols 500 --rate 5000 --duration 10 --clients 20
+
+    # Replay a recording (one JSON object per line)
+    python test/benchmark/bench_websocket.py --recording ticks.jsonl --speed 2 --clients 50
+
+Recording format (JSONL):
+    {"t": 0.0012, "exchange": "NSE", "symbol": "SBIN", "mode": "QUOTE", "data": {"ltp": 812.5, ...}}
+
+"t" is the offset in seconds from the first frame. Without it frames are
+paced at --rate. Use QUOTE or DEPTH frames to measure drops: LTP updates are
+throttled by the proxy (50ms per symbol) and show up as drops.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+
+BENCH_BROKER = 'replay'
+BENCH_USER = 'bench_user'
+MODE_NAMES = {'LTP': 'LTP', 'QUOTE': 'Quote', 'DEPTH': 'Depth'}
+
+
+# =============================================================================
+# Frames
+# =============================================================================
+
+def synthetic_frames(symbols, rate, duration, mode='QUOTE', exchange='NSE'):
+    """Round-robin ticks over `symbols` synthetic symbols at `rate` ticks/s"""
+    total = int(rate * duration)
+    names = [f"BENCH{i:04d}" for i in range(symbols)]
+    frames = []
+    for i in range(total):
+        symbol = names[i % symbols]
+        price = 100.0 + (i % 200) * 0.05
+        data = {
+            'symbol': symbol,
+            'exchange': exchange,
+            'mode': mode.lower(),
+            'ltp': price,
+            'open': 100.0,
+            'high': 110.0,
+            'low': 95.0,
+            'close': 99.5,
+            'volume': 1000 + i,
+            'timestamp': 0,
+        }
+        if mode == 'DEPTH':
+            data['depth'] = {
+                'buy': [{'price': price - 0.05 * (n + 1), 'quantity': 100, 'orders': 1} for n in range(5)],
+                'sell': [{'price': price + 0.05 * (n + 1), 'quantity': 100, 'orders': 1} for n in range(5)],
+            }
+        frames.append({'t': i / rate, 'exchange': exchange, 'symbol': symbol, 'mode': mode, 'data': data})
+    return frames
+
+
+def load_recording(path):
+    """Read recorded frames from a JSONL file"""
+    frames = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                frame = json.loads(line)
+                frame['mode'] = frame.get('mode', 'QUOTE').upper()
+                frames.append(frame)
+    return frames
+
+
+def build_frames(args):
+    if args.recording:
+        return load_recording(args.recording)
+    return synthetic_frames(args.symbols, args.rate, args.duration, args.mode)
+
+
+def frame_keys(frames):
+    """Distinct (exchange, symbol, mode) keys in replay order"""
+    seen = {}
+    for frame in frames:
+        seen.setdefault((frame['exchange'], frame['symbol'], frame['mode']), None)
+    return list(seen)
+
+
+# =============================================================================
+# Proxy side (child process)
+# =============================================================================
+
+def serve(args):
+    """Run WebSocketProxy with the replay adapter until terminated"""
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(ROOT_DIR, '.env'))
+
+    os.environ['ENABLE_CONNECTION_POOLING'] = 'false' if args.no_pooling else 'true'
+    os.environ['ZMQ_PORT'] = str(args.zmq_port)
+
+    import psutil
+    from websocket_proxy.base_adapter import BaseBrokerWebSocketAdapter
+    from websocket_proxy.broker_factory import create_broker_adapter, register_adapter
+    from websocket_proxy.connection_manager import SharedZmqPublisher
+    from websocket_proxy.server import WebSocketProxy
+
+    class ReplayAdapter(BaseBrokerWebSocketAdapter):
+        """Broker adapter that publishes replayed frames instead of a live feed"""
+
+        instances = []
+
+        def __init__(self):
+            super().__init__()
+            self.subscribed = set()
+            ReplayAdapter.instances.append(self)
+
+        def initialize(self, broker_name, user_id, auth_data=None):
+            return {'success': True}
+
+        def connect(self):
+            self.connected = True
+            return {'success': True}
+
+        def disconnect(self):
+            self.connected = False
+            self.cleanup_zmq()
+
+        def subscribe(self, symbol, exchange, mode=2, depth_level=5):
+            self.subscribed.add((exchange, symbol))
+            return self._create_success_response(f'Subscribed to {exchange}:{symbol}', actual_depth=depth_level)
+
+        def unsubscribe(self, symbol, exchange, mode=2):
+            self.subscribed.discard((exchange, symbol))
+            return self._create_success_response(f'Unsubscribed from {exchange}:{symbol}')
+
+    register_adapter(BENCH_BROKER, ReplayAdapter)
+
+    frames = build_frames(args)
+    process = psutil.Process()
+    state = {}
+
+    def replay(on_done):
+        # Publish each frame through the adapter that owns the symbol
+        routes = {}
+        for adapter in ReplayAdapter.instances:
+            for key in adapter.subscribed:
+                routes[key] = adapter
+        fallback = ReplayAdapter.instances[0]
+
+        state['cpu_start'] = process.cpu_times()
+        state['rss_start'] = process.memory_info().rss
+        counts = {}
+        start = time.perf_counter()
+        for seq, frame in enumerate(frames):
+            target = start + frame.get('t', seq / args.rate) / args.speed
+            delay = target - time.perf_counter()
+            if delay > 0.001:
+                time.sleep(delay)
+
+            data = dict(frame['data'])
+            data['bench_seq'] = seq
+            data['bench_ts'] = time.time()
+            topic = f"{frame['exchange']}_{frame['symbol']}_{frame['mode']}"
+            adapter = routes.get((frame['exchange'], frame['symbol']), fallback)
+            adapter.publish_market_data(topic, data)
+            counts[topic] = counts.get(topic, 0) + 1
+
+        on_done({
+            'published': len(frames),
+            'duration_s': round(time.perf_counter() - start, 3),
+            'topics': counts,
+        })
+
+    class ReplayProxy(WebSocketProxy):
+        """WebSocketProxy with benchmark auth and replay control actions"""
+
+        async def authenticate_client(self, client_id, data):
+            self.user_mapping[client_id] = BENCH_USER
+            self.user_broker_mapping[BENCH_USER] = BENCH_BROKER
+            if BENCH_USER not in self.broker_adapters:
+                adapter = create_broker_adapter(BENCH_BROKER)
+                adapter.initialize(BENCH_BROKER, BENCH_USER)
+                adapter.connect()
+                self.broker_adapters[BENCH_USER] = adapter
+            await self.send_message(client_id, {'type': 'auth', 'status': 'success', 'broker': BENCH_BROKER})
+
+        async def process_client_message(self, client_id, message):
+            data = json.loads(message)
+            action = data.get('action')
+            if action == 'bench_replay':
+                loop = asyncio.get_running_loop()
+
+                def on_done(result):
+                    asyncio.run_coroutine_threadsafe(
+                        self.send_message(client_id, {'type': 'bench_replay_done', **result}), loop
+                    )
+
+                threading.Thread(target=replay, args=(on_done,), daemon=True).start()
+            elif action == 'bench_stats':
+                cpu_end = process.cpu_times()
+                cpu_s = (cpu_end.user + cpu_end.system) - (state['cpu_start'].user + state['cpu_start'].system)
+                await self.send_message(client_id, {
+                    'type': 'bench_stats',
+                    'cpu_s': cpu_s,
+                    'rss_start': state['rss_start'],
+                    'rss_end': process.memory_info().rss,
+                })
+            else:
+                await super().process_client_message(client_id, message)
+
+    if not args.no_pooling:
+        # Bind the shared publisher first so the proxy subscribes to the right port
+        SharedZmqPublisher().bind(args.zmq_port)
+
+    proxy = ReplayProxy(host='127.0.0.1', port=args.ws_port)
+    try:
+        asyncio.run(proxy.start())
+    finally:
+        asyncio.run(proxy.stop())
+
+
+# =============================================================================
+# Client side (driver process)
+# =============================================================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class BenchClient:
+    """Simulated WebSocket client recording tick latency and counts"""
+
+    def __init__(self, index, keys):
+        self.index = index
+        self.keys = keys
+        self.ws = None
+        self.latencies = []
+        self.received = 0
+        self.last_message = time.monotonic()
+        self.control = asyncio.Queue()
+
+    async def connect(self, uri, timeout):
+        import websockets
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.ws = await websockets.connect(uri, max_size=None)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.25)
+
+        await self.ws.send(json.dumps({'action': 'authenticate', 'api_key': BENCH_USER}))
+        await self._wait_for('auth')
+
+        by_mode = {}
+        for exchange, symbol, mode in self.keys:
+            by_mode.setdefault(mode, []).append({'symbol': symbol, 'exchange': exchange})
+        for mode, symbols in by_mode.items():
+            await self.ws.send(json.dumps({'action': 'subscribe', 'symbols': symbols, 'mode': MODE_NAMES[mode]}))
+            await self._wait_for('subscribe')
+
+    async def _wait_for(self, message_type):
+        while True:
+            message = json.loads(await self.ws.recv())
+            if message.get('type') == message_type:
+                return message
+            if message.get('status') == 'error':
+                raise RuntimeError(f"Client {self.index}: {message.get('message')}")
+
+    async def listen(self):
+        try:
+            async for raw in self.ws:
+                now = time.time()
+                message = json.loads(raw)
+                if message.get('type') == 'market_data':
+                    sent = message['data'].get('bench_ts')
+                    if sent:
+                        self.latencies.append((now - sent) * 1000)
+                    self.received += 1
+                    self.last_message = time.monotonic()
+                else:
+                    await self.control.put(message)
+        except Exception:
+            pass
+
+
+async def drive(args, keys):
+    uri = f"ws://127.0.0.1:{args.ws_port}"
+    per_client = args.symbols_per_client or len(keys)
+
+    clients = []
+    for i in range(args.clients):
+        offset = (i * per_client) % len(keys)
+        subset = (keys[offset:] + keys[:offset])[:per_client]
+        clients.append(BenchClient(i, subset))
+
+    for client in clients:
+        await client.connect(uri, timeout=args.startup_timeout)
+    print(f"{len(clients)} clients connected, {per_client} subscriptions each")
+
+    listeners = [asyncio.create_task(client.listen()) for client in clients]
+    controller = clients[0]
+
+    await controller.ws.send(json.dumps({'action': 'bench_replay'}))
+    replay = await asyncio.wait_for(controller.control.get(), timeout=args.duration * 10 + 600)
+    print(f"Replayed {replay['published']} frames in {replay['duration_s']}s")
+
+    # Wait for in-flight messages to drain
+    while time.monotonic() - max(c.last_message for c in clients) < args.drain:
+        await asyncio.sleep(0.1)
+
+    await controller.ws.send(json.dumps({'action': 'bench_stats'}))
+    stats = await asyncio.wait_for(controller.control.get(), timeout=30)
+
+    for client in clients:
+        await client.ws.close()
+    await asyncio.gather(*listeners, return_exceptions=True)
+
+    topics = replay['topics']
+    expected = sum(
+        topics.get(f"{exchange}_{symbol}_{mode}", 0)
+        for client in clients
+        for exchange, symbol, mode in client.keys
+    )
+    received = sum(client.received for client in clients)
+    latencies = sorted(lat for client in clients for lat in client.latencies)
+
+    return {
+        'clients': len(clients),
+        'subscriptions_per_client': per_client,
+        'published': replay['published'],
+        'replay_duration_s': replay['duration_s'],
+        'publish_rate': round(replay['published'] / replay['duration_s'], 1) if replay['duration_s'] else 0,
+        'expected_deliveries': expected,
+        'received': received,
+        'dropped': max(0, expected - received),
+        'drop_pct': round(100 * max(0, expected - received) / expected, 3) if expected else 0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3) if latencies else 0,
+        },
+        'proxy_cpu_s': round(stats['cpu_s'], 3),
+        'proxy_cpu_us_per_tick': round(stats['cpu_s'] * 1e6 / replay['published'], 2) if replay['published'] else 0,
+        'proxy_rss_start_mb': round(stats['rss_start'] / 1048576, 1),
+        'proxy_rss_end_mb': round(stats['rss_end'] / 1048576, 1),
+        'proxy_rss_growth_mb': round((stats['rss_end'] - stats['rss_start']) / 1048576, 1),
+    }
+
+
+def print_report(result):
+    lat = result['latency_ms']
+    print("\n" + "=" * 60)
+    print("WEBSOCKET STREAMING BENCHMARK")
+    print("=" * 60)
+    print(f"Clients:              {result['clients']} x {result['subscriptions_per_client']} subscriptions")
+    print(f"Ticks published:      {result['published']} in {result['replay_duration_s']}s "
+          f"({result['publish_rate']}/s)")
+    print(f"Deliveries:           {result['received']} / {result['expected_deliveries']} "
+          f"(dropped {result['dropped']}, {result['drop_pct']}%)")
+    print(f"Latency ms:           p50 {lat['p50']}  p95 {lat['p95']}  p99 {lat['p99']}  max {lat['max']}")
+    print(f"Proxy CPU:            {result['proxy_cpu_s']}s ({result['proxy_cpu_us_per_tick']} us/tick)")
+    print(f"Proxy RSS:            {result['proxy_rss_start_mb']} -> {result['proxy_rss_end_mb']} MB "
+          f"(+{result['proxy_rss_growth_mb']} MB)")
+    print("=" * 60)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Replay ticks through the WebSocket proxy')
+    parser.add_argument('--recording', help='JSONL file of recorded frames')
+    parser.add_argument('--symbols', type=int, default=100, help='Synthetic symbols')
+    parser.add_argument('--rate', type=float, default=1000, help='Ticks per second')
+    parser.add_argument('--duration', type=float, default=10, help='Synthetic replay length in seconds')
+    parser.add_argument('--mode', default='QUOTE', choices=['LTP', 'QUOTE', 'DEPTH'])
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier')
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--symbols-per-client', type=int, default=0,
+                        help='Subscriptions per client (default: all symbols)')
+    parser.add_argument('--no-pooling', action='store_true', help='Disable the adapter connection pool')
+    parser.add_argument('--drain', type=float, default=2.0,
+                        help='Seconds without messages before the run is considered drained')
+    parser.add_argument('--startup-timeout', type=float, default=30.0)
+    parser.add_argument('--output', help='Write the result as JSON to this file')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--ws-port', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--zmq-port', type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    args.ws_port = args.ws_port or free_port()
+    args.zmq_port = args.zmq_port or free_port()
+    keys = frame_keys(build_frames(args))
+    if not keys:
+        print("No frames to replay")
+        sys.exit(1)
+
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve',
+                               '--ws-port', str(args.ws_port), '--zmq-port', str(args.zmq_port)]
+                              + sys.argv[1:], cwd=ROOT_DIR)
+    try:
+        result = asyncio.run(drive(args, keys))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Result written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Mock broker HTTP server for order API load testing.
+
+Serves recorded broker responses from a JSON file so OpenAlgo can be
+benchmarked end to end without touching a real broker. Start OpenAlgo with
+BROKER_HTTP_OVERRIDE_URL pointing at this server and every broker request
+made through the shared httpx client is answered locally.
+
+Usage:
+    python test/benchmark/mock_broker.py --port 9100 --recording test/benchmark/recordings/zerodha.json
+
+Recording format:
+    {
+      "routes": [
+        {"method": "POST", "path": "^/orders/regular$", "status": 200,
+         "body": {"status": "success", "data": {"order_id": "{order_id}"}},
+         "delay_ms": 25}
+      ]
+    }
+
+"{order_id}" anywhere in a body is replaced with an incrementing order id.
+A route with "handler": "quote" echoes the requested i= instruments with a
+synthetic quote so quote/ltp lookups used by smart orders succeed.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_RECORDING = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings', 'zerodha.json')
+
+
+class Route:
+    """A recorded response matched by method and path regex"""
+
+    def __init__(self, spec):
+        self.method = spec.get('method', 'GET').upper()
+        self.pattern = re.compile(spec['path'])
+        self.status = spec.get('status', 200)
+        self.body = spec.get('body', {})
+        self.delay_ms = spec.get('delay_ms', 0)
+        self.handler = spec.get('handler')
+
+    def matches(self, method, path):
+        return self.method == method and self.pattern.search(path) is not None
+
+
+class MockBroker:
+    """Route table plus request counters shared by all handler threads"""
+
+    def __init__(self, recording_path, delay_override=None):
+        with open(recording_path) as f:
+            recording = json.load(f)
+        self.routes = [Route(spec) for spec in recording.get('routes', [])]
+        self.delay_override = delay_override
+        self.order_ids = itertools.count(int(time.time()) * 1000)
+        self.lock = threading.Lock()
+        self.hits = {}
+
+    def resolve(self, method, path, query):
+        """Return (status, body, delay_ms) for a request"""
+        for route in self.routes:
+            if not route.matches(method, path):
+                continue
+
+            with self.lock:
+                self.hits[route.pattern.pattern] = self.hits.get(route.pattern.pattern, 0) + 1
+
+            delay = self.delay_override if self.delay_override is not None else route.delay_ms
+            if route.handler == 'quote':
+                return route.status, self._quote_body(query), delay
+
+            body = json.dumps(route.body)
+            if '{order_id}' in body:
+                body = body.replace('{order_id}', str(next(self.order_ids)))
+            return route.status, body, delay
+
+        return 404, json.dumps({'status': 'error', 'message': f'No recording for {method} {path}'}), 0
+
+    @staticmethod
+    def _quote_body(query):
+        instruments = parse_qs(query).get('i', [])
+        data = {}
+        for instrument in instruments:
+            data[instrument] = {
+                'instrument_token': 0,
+                'last_price': 100.0,
+                'volume': 1000,
+                'oi': 0,
+                'ohlc': {'open': 99.0, 'high': 101.0, 'low': 98.5, 'close': 99.5},
+                'depth': {
+                    'buy': [{'price': 99.95, 'quantity': 100, 'orders': 1}] * 5,
+                    'sell': [{'price': 100.05, 'quantity': 100, 'orders': 1}] * 5,
+                },
+            }
+        return json.dumps({'status': 'success', 'data': data})
+
+
+def make_handler(broker):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _serve(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+
+            parsed = urlparse(self.path)
+            status, body, delay_ms = broker.resolve(self.command, parsed.path, parsed.query)
+            if delay_ms:
+                time.sleep(delay_ms / 1000)
+
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded broker responses for load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--recording', default=DEFAULT_RECORDING)
+    parser.add_argument('--delay-ms', type=float, default=None,
+                        help='Override the recorded delay for every route')
+    args = parser.parse_args()
+
+    broker = MockBroker(args.recording, args.delay_ms)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(broker))
+    server.daemon_threads = True
+    print(f"Mock broker listening on http://{args.host}:{args.port} ({len(broker.routes)} routes)")
+    print(f"Start OpenAlgo with BROKER_HTTP_OVERRIDE_URL=http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("Requests served:")
+        for path, count in sorted(broker.hits.items()):
+            print(f"  {path}: {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# test/sandbox/test_config_cache.py
+"""
+Test suite for the in-process sandbox config snapshot
+
+Tests:
+- Typed values (Decimal, int, time) parsed once
+- Reads served without database queries
+- Snapshot refreshed by set_config
+"""
+
+import os
+import sys
+import tempfile
+from datetime import time
+from decimal import Decimal
+
+# Use a throwaway sandbox database for this module
+os.environ['SANDBOX_DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'sandbox.db')}"
+
+# Add parent directories to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import event
+from database import sandbox_db
+from database.sandbox_db import get_config, get_typed_config, set_config
+
+
+def _count_queries():
+    counter = {'queries': 0}
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['queries'] += 1
+
+    event.listen(sandbox_db.engine, 'before_cursor_execute', before_execute)
+    return counter, lambda: event.remove(sandbox_db.engine, 'before_cursor_execute', before_execute)
+
+
+def test_typed_values():
+    """Defaults are parsed into their final types"""
+    sandbox_db.init_db()
+
+    assert get_typed_config('starting_capital') == Decimal('10000000.00')
+    assert get_typed_config('equity_mis_leverage') == Decimal('5')
+    assert get_typed_config('order_check_interval') == 5
+    assert get_typed_config('nse_bse_square_off_time') == time(15, 15)
+    assert get_typed_config('reset_day') == 'Never'
+    assert get_typed_config('missing_key', 42) == 42
+    print("✅ PASSED: Typed values")
+
+
+def test_reads_do_not_query():
+    """Once loaded, config reads never touch the database"""
+    sandbox_db.init_db()
+    counter, stop = _count_queries()
+    try:
+        for _ in range(100):
+            get_typed_config('futures_leverage')
+            get_config('reset_time')
+    finally:
+        stop()
+    assert counter['queries'] == 0
+    print("✅ PASSED: Reads served from memory")
+
+
+def test_set_config_refreshes_snapshot():
+    """A write is visible to the next read, both raw and typed"""
+    sandbox_db.init_db()
+    assert get_typed_config('futures_leverage') == Decimal('10')
+
+    assert set_config('futures_leverage', '12')
+    assert get_config('futures_leverage') == '12'
+    assert get_typed_config('futures_leverage') == Decimal('12')
+
+    assert set_config('mcx_square_off_time', '23:00')
+    assert get_typed_config('mcx_square_off_time') == time(23, 0)
+
+    # Unparsable values fall back to the caller's default
+    assert set_config('order_check_interval', 'soon')
+    assert get_typed_config('order_check_interval', 5) == 5
+
+    set_config('futures_leverage', '10')
+    set_config('mcx_square_off_time', '23:30')
+    set_config('order_check_interval', '5')
+    print("✅ PASSED: set_config refreshes the snapshot")
+
+
+if __name__ == '__main__':
+    test_typed_values()
+    test_reads_do_not_query()
+    test_set_config_refreshes_snapshot()
+    print("All sandbox config cache tests passed")
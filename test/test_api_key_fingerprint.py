@@ -0,0 +1,57 @@
+"""
+Tests for fingerprint-indexed API key verification
+"""
+
+import os
+import secrets
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp(prefix='openalgo-apikey-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+
+from sqlalchemy import text
+
+from database import auth_db
+
+auth_db.init_db()
+
+
+def test_fingerprint_is_keyed_and_stable():
+    key = secrets.token_hex(32)
+    assert auth_db.compute_api_key_fingerprint(key) == auth_db.compute_api_key_fingerprint(key)
+    assert auth_db.compute_api_key_fingerprint(key) != auth_db.compute_api_key_fingerprint(key + 'x')
+    assert key not in auth_db.compute_api_key_fingerprint(key)
+
+
+def test_lookup_by_fingerprint():
+    key = secrets.token_hex(32)
+    auth_db.upsert_api_key('fp_user', key)
+
+    row = auth_db.ApiKeys.query.filter_by(user_id='fp_user').first()
+    assert row.api_key_fingerprint == auth_db.compute_api_key_fingerprint(key)
+    assert auth_db._find_api_key_owner(key) == 'fp_user'
+    assert auth_db._find_api_key_owner(secrets.token_hex(32)) is None
+
+
+def test_legacy_row_is_backfilled_on_use():
+    key = secrets.token_hex(32)
+    auth_db.upsert_api_key('legacy_user', key)
+    with auth_db.engine.begin() as conn:
+        conn.execute(text("UPDATE api_keys SET api_key_fingerprint = NULL WHERE user_id = 'legacy_user'"))
+    auth_db.db_session.remove()
+
+    assert auth_db._find_api_key_owner(key) == 'legacy_user'
+    row = auth_db.ApiKeys.query.filter_by(user_id='legacy_user').first()
+    assert row.api_key_fingerprint == auth_db.compute_api_key_fingerprint(key)
+
+
+if __name__ == "__main__":
+    test_fingerprint_is_keyed_and_stable()
+    test_lookup_by_fingerprint()
+    test_legacy_row_is_backfilled_on_use()
+    print("All API key fingerprint tests passed")
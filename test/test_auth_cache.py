@@ -0,0 +1,66 @@
+"""
+Tests for the per-user auth cache
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.auth_cache import UserScopedCache
+
+
+def test_invalidate_user_only_removes_that_user():
+    cache = UserScopedCache('test', maxsize=16, ttl=60)
+    cache.set('key-a1', 'alice', user_id='alice')
+    cache.set('key-a2', 'alice', user_id='alice')
+    cache.set('key-b', 'bob', user_id='bob')
+
+    assert cache.invalidate_user('alice') == 2
+    assert 'key-a1' not in cache
+    assert 'key-a2' not in cache
+    assert cache.get('key-b') == 'bob'
+    assert cache.invalidate_user('alice') == 0
+
+
+def test_hit_miss_stats():
+    cache = UserScopedCache('test', maxsize=16, ttl=60)
+    cache.set('k', 1, user_id='u')
+    cache.get('k')
+    cache.get('k')
+    cache.get('missing')
+
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+    assert stats['users'] == 1
+    assert stats['size'] == 1
+
+
+def test_reassigned_key_moves_to_new_owner():
+    cache = UserScopedCache('test', maxsize=16, ttl=60)
+    cache.set('k', 'old', user_id='alice')
+    cache.set('k', 'new', user_id='bob')
+
+    assert cache.invalidate_user('alice') == 0
+    assert cache['k'] == 'new'
+    assert cache.invalidate_user('bob') == 1
+
+
+def test_dict_style_access():
+    cache = UserScopedCache('test', maxsize=16, ttl=60)
+    cache['k'] = 'v'
+    assert 'k' in cache
+    assert cache['k'] == 'v'
+    assert len(cache) == 1
+    del cache['k']
+    assert 'k' not in cache
+
+
+if __name__ == "__main__":
+    test_invalidate_user_only_removes_that_user()
+    test_hit_miss_stats()
+    test_reassigned_key_moves_to_new_owner()
+    test_dict_style_access()
+    print("All auth cache tests passed")
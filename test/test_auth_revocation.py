@@ -0,0 +1,63 @@
+"""
+Tests that a broker session revoked in one worker process stops being served
+from another worker's token cache, with AUTH_CACHE_SYNC left off
+"""
+
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import types
+
+# Add parent directory to path for imports
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_tmp_dir = tempfile.mkdtemp(prefix='openalgo-auth-revocation-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+for _name in ('LOGS', 'LATENCY', 'SANDBOX'):
+    os.environ[f'{_name}_DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, _name.lower() + '.db')}"
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+os.environ['AUTH_CACHE_SYNC'] = 'FALSE'
+
+from database import auth_db, settings_db
+from services import order_context_service
+
+auth_db.init_db()
+settings_db.init_db()
+
+# Stand-in broker order module, resolved through importlib like a real broker
+sys.modules['broker.revokebroker.api.order_api'] = types.ModuleType('broker.revokebroker.api.order_api')
+
+
+def _in_other_worker(code: str):
+    """Run auth_db code in a separate process sharing the database"""
+    subprocess.run(
+        [sys.executable, '-c', f"from database import auth_db\n{code}"],
+        cwd=REPO_ROOT, env=dict(os.environ, DATABASE_URL=auth_db.DATABASE_URL), check=True, timeout=60
+    )
+
+
+def test_logout_in_another_worker_stops_cached_tokens():
+    api_key = secrets.token_hex(32)
+    auth_db.upsert_api_key('revoke_user', api_key)
+    auth_db.upsert_auth('revoke_user', 'token-1', 'revokebroker')
+
+    assert auth_db.get_auth_token_broker(api_key) == ('token-1', 'revokebroker')
+    assert order_context_service.get_order_context(api_key).auth_token == 'token-1'
+
+    _in_other_worker("auth_db.upsert_auth('revoke_user', '', 'revokebroker', revoke=True)")
+
+    assert auth_db.get_auth_token_broker(api_key) == (None, None)
+    assert auth_db.get_auth_token_broker(api_key, include_feed_token=True) == (None, None, None)
+    assert order_context_service.get_order_context(api_key) is None
+
+    # Logging in again (in the other worker) is picked up on the next request
+    _in_other_worker("auth_db.upsert_auth('revoke_user', 'token-2', 'revokebroker')")
+    assert auth_db.get_auth_token_broker(api_key) == ('token-2', 'revokebroker')
+
+
+if __name__ == "__main__":
+    test_logout_in_another_worker_stops_cached_tokens()
+    print("All auth revocation tests passed")
@@ -0,0 +1,106 @@
+"""
+Tests for the streaming OHLCV bar aggregator
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bar_aggregator import BarAggregator
+
+# 2025-01-06 09:15 and 15:30 local time, like market_calendar_db computes them
+SESSION_START = datetime(2025, 1, 6, 9, 15).timestamp()
+SESSION_END = datetime(2025, 1, 6, 15, 30).timestamp()
+
+
+def _sessions(day):
+    offset = (datetime(day.year, day.month, day.day).timestamp() - datetime(2025, 1, 6).timestamp())
+    return {'NSE': (SESSION_START + offset, SESSION_END + offset)}
+
+
+def _tick(ts, ltp, volume=0, exchange='NSE', symbol='RELIANCE'):
+    return {'symbol': symbol, 'exchange': exchange, 'mode': 2,
+            'data': {'ltp': ltp, 'volume': volume, 'timestamp': int(ts * 1000)}}
+
+
+def test_ohlcv_and_volume_deltas():
+    """Ticks inside one minute form one bar; volume is the change in cumulative volume"""
+    agg = BarAggregator(intervals=['1m', '5m'], session_loader=_sessions)
+    t = SESSION_START
+    agg.on_tick(_tick(t + 1, 100, volume=1000))     # first tick only sets the volume baseline
+    agg.on_tick(_tick(t + 10, 105, volume=1200))
+    agg.on_tick(_tick(t + 20, 98, volume=1500))
+    agg.on_tick(_tick(t + 30, 101, volume=1500))
+    completed = agg.on_tick(_tick(t + 61, 102, volume=1600))
+
+    assert len(completed) == 1
+    bar = completed[0]
+    assert bar['interval'] == '1m' and bar['timestamp'] == int(t)
+    assert (bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']) == (100, 105, 98, 101, 500)
+    assert agg.get_bars('RELIANCE', 'NSE', '1m') == [bar]
+
+    current = agg.get_current_bar('RELIANCE', 'NSE', '5m')
+    assert (current['open'], current['close'], current['volume']) == (100, 102, 600)
+
+    # A replayed older tick changes nothing
+    assert agg.on_tick(_tick(t + 30, 50, volume=1500)) == []
+    assert agg.get_current_bar('RELIANCE', 'NSE', '1m')['low'] == 102
+
+
+def test_session_boundaries():
+    """Bars align to the session open, the last bar ends at the close, outside ticks are ignored"""
+    agg = BarAggregator(intervals=['15m'], session_loader=_sessions)
+    assert agg.on_tick(_tick(SESSION_START - 60, 100)) == []
+    assert agg.get_current_bar('RELIANCE', 'NSE', '15m') is None
+
+    agg.on_tick(_tick(SESSION_END - 5, 100, volume=10))
+    current = agg.get_current_bar('RELIANCE', 'NSE', '15m')
+    assert current['timestamp'] == int(SESSION_END - 900)
+
+    # After the close the flush completes the bar; post-close ticks start nothing
+    assert agg.on_tick(_tick(SESSION_END + 5, 101, volume=20)) == []
+    completed = agg.flush(now=SESSION_END + 10)
+    assert [bar['timestamp'] for bar in completed] == [int(SESSION_END - 900)]
+    assert agg.get_current_bar('RELIANCE', 'NSE', '15m') is None
+
+    # Index feeds follow their exchange; exchanges without a session that day are closed
+    agg.on_tick(_tick(SESSION_START + 1, 23000, exchange='NSE_INDEX', symbol='NIFTY'))
+    assert agg.get_current_bar('NIFTY', 'NSE_INDEX', '15m') is not None
+    assert agg.on_tick(_tick(SESSION_START + 1, 70000, exchange='MCX', symbol='GOLD')) == []
+
+
+def test_new_session_resets_volume_and_listeners_get_bars():
+    """Cumulative volume restarts each day; completed bars reach listeners"""
+    received = []
+    agg = BarAggregator(intervals=['1m'], session_loader=_sessions)
+    agg.add_listener(received.append)
+
+    agg.on_tick(_tick(SESSION_START + 1, 100, volume=5000))
+    agg.on_tick(_tick(SESSION_START + 2, 100, volume=9000))
+    next_day = SESSION_START + 86400
+    agg.on_tick(_tick(next_day + 1, 110, volume=300))
+    agg.on_tick(_tick(next_day + 70, 111, volume=400))
+
+    assert [bar['volume'] for bar in received] == [4000, 300]
+    assert received[1]['timestamp'] == int(next_day)
+
+
+def test_clock_aligned_without_timings():
+    """Without calendar data bars align to the clock and the ring buffer keeps the newest"""
+    agg = BarAggregator(intervals=['1s'], buffer_size=3, session_loader=lambda day: None)
+    for i in range(6):
+        agg.on_tick(_tick(1700000000 + i + 0.5, 100 + i))
+
+    bars = agg.get_bars('RELIANCE', 'NSE', '1s')
+    assert [bar['timestamp'] for bar in bars] == [1700000002, 1700000003, 1700000004]
+    assert [bar['close'] for bar in agg.get_bars('RELIANCE', 'NSE', '1s', limit=1)] == [104]
+
+
+if __name__ == "__main__":
+    test_ohlcv_and_volume_deltas()
+    test_session_boundaries()
+    test_new_session_resets_volume_and_listeners_get_bars()
+    test_clock_aligned_without_timings()
+    print("All bar aggregator tests passed")
@@ -0,0 +1,105 @@
+"""
+Tests for the local history candle store gap computation
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the candle store out of the repo's db/ folder
+os.environ['HISTORY_DATABASE_PATH'] = os.path.join(
+    tempfile.mkdtemp(prefix='openalgo-history-test-'), 'history.duckdb')
+
+from database import history_db
+from database.history_db import IST, compute_missing_ranges
+
+
+def _epoch(day, hour=0, minute=0):
+    """Epoch seconds for an IST wall-clock time"""
+    return IST.localize(datetime(day.year, day.month, day.day, hour, minute)).timestamp()
+
+
+TODAY = date(2025, 12, 17)
+NOW = _epoch(TODAY, 11, 0)
+
+
+def test_empty_store_fetches_everything():
+    gaps = compute_missing_ranges(date(2025, 12, 1), date(2025, 12, 10), [], TODAY, NOW)
+    assert gaps == [(date(2025, 12, 1), date(2025, 12, 10))]
+
+
+def test_fully_covered_closed_range():
+    covered = [(date(2025, 11, 1), date(2025, 12, 10), _epoch(date(2025, 12, 12)))]
+    gaps = compute_missing_ranges(date(2025, 12, 1), date(2025, 12, 10), covered, TODAY, NOW)
+    assert gaps == []
+
+
+def test_gaps_between_covered_ranges():
+    covered = [
+        (date(2025, 12, 3), date(2025, 12, 4), _epoch(date(2025, 12, 12))),
+        (date(2025, 12, 7), date(2025, 12, 8), _epoch(date(2025, 12, 12))),
+    ]
+    gaps = compute_missing_ranges(date(2025, 12, 1), date(2025, 12, 10), covered, TODAY, NOW)
+    assert gaps == [
+        (date(2025, 12, 1), date(2025, 12, 2)),
+        (date(2025, 12, 5), date(2025, 12, 6)),
+        (date(2025, 12, 9), date(2025, 12, 10)),
+    ]
+
+
+def test_future_dates_are_clamped_to_today():
+    gaps = compute_missing_ranges(TODAY, TODAY + timedelta(days=5), [], TODAY, NOW)
+    assert gaps == [(TODAY, TODAY)]
+    assert compute_missing_ranges(TODAY + timedelta(days=1), TODAY + timedelta(days=5), [], TODAY, NOW) == []
+
+
+def test_live_day_expires_after_ttl():
+    covered = [(date(2025, 12, 15), TODAY, NOW - 30)]
+    assert compute_missing_ranges(date(2025, 12, 15), TODAY, covered, TODAY, NOW, live_ttl=60) == []
+
+    covered = [(date(2025, 12, 15), TODAY, NOW - 120)]
+    gaps = compute_missing_ranges(date(2025, 12, 15), TODAY, covered, TODAY, NOW, live_ttl=60)
+    assert gaps == [(TODAY, TODAY)]
+
+
+def test_day_fetched_while_trading_is_refetched_next_day():
+    # Fetched at 14:00 on the 16th, so the 16th was incomplete
+    covered = [(date(2025, 12, 15), date(2025, 12, 16), _epoch(date(2025, 12, 16), 14, 0))]
+    gaps = compute_missing_ranges(date(2025, 12, 15), date(2025, 12, 16), covered, TODAY, NOW)
+    assert gaps == [(date(2025, 12, 16), date(2025, 12, 16))]
+
+
+def test_store_covers_the_fetched_range():
+    """Sparse (weekly) and empty fetches cover their range; an empty fetch keeps stored candles"""
+    start, end = date(2025, 1, 1), date(2025, 2, 28)
+    mondays = [date(2025, 1, 6) + timedelta(weeks=i) for i in range(8)]
+    weekly = pd.DataFrame({
+        'timestamp': [_epoch(day, 9, 15) for day in mondays],
+        'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 100,
+    })
+    history_db.store_candles('SBIN', 'NSE', 'W', weekly, start, end)
+    assert history_db.get_missing_ranges('SBIN', 'NSE', 'W', start, end) == []
+
+    history_db.store_candles('SBIN', 'NSE', 'W', weekly.iloc[0:0], start, end)
+    assert len(history_db.read_candles('SBIN', 'NSE', 'W', start, end)) == 8
+
+    # Before the listing: nothing comes back, and it is not asked for again
+    history_db.store_candles('NEWCO', 'NSE', 'D', weekly.iloc[0:0], start, end)
+    assert history_db.get_missing_ranges('NEWCO', 'NSE', 'D', start, end) == []
+
+
+if __name__ == "__main__":
+    test_empty_store_fetches_everything()
+    test_fully_covered_closed_range()
+    test_gaps_between_covered_ranges()
+    test_future_dates_are_clamped_to_today()
+    test_live_day_expires_after_ttl()
+    test_day_fetched_while_trading_is_refetched_next_day()
+    test_store_covers_the_fetched_range()
+    print("All history cache tests passed")
@@ -0,0 +1,104 @@
+"""
+Tests for the broker history chunk planner and concurrent fetcher
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.history_chunker import (
+    HistoryRateLimiter,
+    fetch_history_chunks,
+    merge_history_chunks,
+    plan_history_chunks,
+)
+
+
+def test_plan_splits_range_into_inclusive_chunks():
+    chunks = plan_history_chunks('2025-01-01', '2025-03-15', 30)
+    assert [(s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for s, e in chunks] == [
+        ('2025-01-01', '2025-01-30'),
+        ('2025-01-31', '2025-03-01'),
+        ('2025-03-02', '2025-03-15'),
+    ]
+
+
+def test_plan_single_day_and_empty_range():
+    assert len(plan_history_chunks('2025-01-01', '2025-01-01', 60)) == 1
+    assert plan_history_chunks('2025-01-02', '2025-01-01', 60) == []
+
+
+def test_fetch_preserves_chunk_order():
+    chunks = plan_history_chunks('2025-01-01', '2025-01-10', 2)
+
+    def fetch(start, end):
+        # Later chunks finish first
+        time.sleep(0.01 * (10 - start.day))
+        return pd.DataFrame({'timestamp': [start.day, end.day]})
+
+    frames = fetch_history_chunks('test-order', chunks, fetch, calls_per_second=1000, max_workers=5)
+    assert [int(df['timestamp'].iloc[0]) for df in frames] == [1, 3, 5, 7, 9]
+
+
+def test_fetch_reraises_chunk_errors():
+    chunks = plan_history_chunks('2025-01-01', '2025-01-04', 1)
+
+    def fetch(start, end):
+        if start.day == 3:
+            raise RuntimeError("broker error")
+        return None
+
+    try:
+        fetch_history_chunks('test-error', chunks, fetch, calls_per_second=1000)
+    except RuntimeError as e:
+        assert str(e) == "broker error"
+    else:
+        raise AssertionError("Expected chunk error to propagate")
+
+
+def test_merge_drops_boundary_duplicates():
+    first = pd.DataFrame({'timestamp': [1, 2, 3], 'close': [10, 11, 12]})
+    second = pd.DataFrame({'timestamp': [3, 4], 'close': [13, 14]})
+    merged = merge_history_chunks([first, None, second], columns=['timestamp', 'close'])
+    assert merged['timestamp'].tolist() == [1, 2, 3, 4]
+    assert merged['close'].tolist() == [10, 11, 13, 14]
+
+    empty = merge_history_chunks([None], columns=['timestamp', 'close'])
+    assert empty.empty and list(empty.columns) == ['timestamp', 'close']
+
+
+def test_rate_limiter_spaces_concurrent_calls():
+    limiter = HistoryRateLimiter(calls_per_second=20)
+    stamps = []
+    lock = threading.Lock()
+
+    def call():
+        limiter.wait()
+        with lock:
+            stamps.append(time.monotonic())
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stamps.sort()
+    # 5 calls at 20/sec need at least 4 intervals of 50ms
+    assert stamps[-1] - stamps[0] >= 0.19
+
+
+if __name__ == "__main__":
+    test_plan_splits_range_into_inclusive_chunks()
+    test_plan_single_day_and_empty_range()
+    test_fetch_preserves_chunk_order()
+    test_fetch_reraises_chunk_errors()
+    test_merge_drops_boundary_duplicates()
+    test_rate_limiter_spaces_concurrent_calls()
+    print("All history chunker tests passed")
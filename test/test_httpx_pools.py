@@ -0,0 +1,126 @@
+"""
+Tests for the per-broker httpx connection pools and their per-host metrics
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The local test server speaks plain HTTP/1.1
+os.environ['APP_MODE'] = 'standalone'
+
+from utils import httpx_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/'
+
+
+def test_pools_are_per_broker():
+    """Each broker gets its own client; the same broker reuses it"""
+    zerodha = httpx_client.get_httpx_client('zerodha')
+    assert httpx_client.get_httpx_client('Zerodha') is zerodha
+    assert httpx_client.get_httpx_client('angel') is not zerodha
+    assert httpx_client.get_httpx_client() is httpx_client.get_httpx_client('default')
+    httpx_client.cleanup_httpx_client()
+
+
+def test_broker_limits_override():
+    """<BROKER>_HTTP_MAX_CONNECTIONS overrides the default for one pool"""
+    os.environ['TESTBROKER_HTTP_MAX_CONNECTIONS'] = '7'
+    try:
+        assert httpx_client._pool_limits('testbroker').max_connections == 7
+        assert httpx_client._pool_limits('other').max_connections == httpx_client.BROKER_HTTP_MAX_CONNECTIONS
+    finally:
+        del os.environ['TESTBROKER_HTTP_MAX_CONNECTIONS']
+
+
+def test_metrics_count_connection_reuse():
+    """Keep-alive requests reuse one connection and are counted per host"""
+    server, url = _serve()
+    try:
+        client = httpx_client.get_httpx_client('metricsbroker')
+        for _ in range(5):
+            assert client.get(url).status_code == 200
+
+        host = httpx_client.get_http_pool_stats()['metricsbroker']['hosts']['127.0.0.1']
+        assert host['requests'] == 5
+        assert host['connections_opened'] == 1
+        assert host['reused'] == 4
+        assert host['tls_handshakes'] == 0
+    finally:
+        httpx_client.cleanup_httpx_client()
+        server.shutdown()
+
+
+def test_metrics_are_exact_under_concurrent_requests():
+    """Counters updated from many request threads do not lose increments"""
+    server, url = _serve()
+    try:
+        client = httpx_client.get_httpx_client('threadedbroker')
+
+        def worker():
+            for _ in range(25):
+                assert client.get(url).status_code == 200
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        host = httpx_client.get_http_pool_stats()['threadedbroker']['hosts']['127.0.0.1']
+        assert host['requests'] == 200
+        assert host['reused'] == 200 - host['connections_opened']
+    finally:
+        httpx_client.cleanup_httpx_client()
+        server.shutdown()
+
+
+def test_async_client_records_metrics():
+    """The async twin is cached per loop and feeds the same metrics"""
+    server, url = _serve()
+
+    async def run():
+        client = httpx_client.get_async_httpx_client('asyncbroker')
+        assert httpx_client.get_async_httpx_client('asyncbroker') is client
+        for _ in range(3):
+            await client.get(url)
+        await httpx_client.cleanup_async_httpx_clients()
+
+    try:
+        asyncio.run(run())
+        host = httpx_client.get_http_pool_stats()['asyncbroker']['hosts']['127.0.0.1']
+        assert host['requests'] == 3
+        assert host['connections_opened'] == 1
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_pools_are_per_broker()
+    test_broker_limits_override()
+    test_metrics_count_connection_reuse()
+    test_metrics_are_exact_under_concurrent_requests()
+    test_async_client_records_metrics()
+    print("All httpx pool tests passed")
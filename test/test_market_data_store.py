@@ -0,0 +1,101 @@
+"""
+Tests for the columnar market data store behind MarketDataService
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_data_store import MarketDataStore
+
+
+def test_modes_update_their_fields():
+    """LTP, quote and depth ticks fill the same row; reads return the old dict shapes"""
+    store = MarketDataStore(capacity=16)
+    store.update('NSE:RELIANCE', 1, {'ltp': 2500.5, 'timestamp': 1700000000000, 'volume': 10}, now=100)
+    assert store.get_ltp('NSE:RELIANCE') == {'value': 2500.5, 'timestamp': 1700000000000, 'volume': 10}
+    assert store.get_quote('NSE:RELIANCE') is None
+
+    store.update('NSE:RELIANCE', 2, {'ltp': 2501, 'open': 2490, 'high': 2510, 'low': 2480,
+                                     'close': 2495, 'volume': 20}, now=101)
+    quote = store.get_quote('NSE:RELIANCE')
+    assert quote['high'] == 2510 and quote['ltp'] == 2501 and quote['timestamp'] == 101
+    assert store.get_ltp('NSE:RELIANCE')['value'] == 2501
+
+    # An LTP tick without volume keeps the quote's volume
+    store.update('NSE:RELIANCE', 1, {'ltp': 2502}, now=101)
+    assert store.get_quote('NSE:RELIANCE')['volume'] == 20 and store.get_ltp('NSE:RELIANCE')['value'] == 2502
+
+    store.update('NSE:RELIANCE', 3, {'ltp': 2501, 'depth': {'buy': [{'price': 2500}], 'sell': []}}, now=102)
+    everything = store.get_all('NSE:RELIANCE')
+    assert everything['depth']['buy'] == [{'price': 2500}]
+    assert everything['last_update'] == 102
+    assert set(everything) == {'ltp', 'quote', 'depth', 'last_update'}
+
+
+def test_batch_reads_and_growth():
+    """Rows beyond the initial capacity keep their data; batch reads skip unknown keys"""
+    store = MarketDataStore(capacity=16)
+    for i in range(100):
+        store.update(f'NFO:OPT{i}', 1, {'ltp': i, 'volume': i * 10})
+
+    ltps = store.get_ltps([f'NFO:OPT{i}' for i in range(0, 100, 10)] + ['NFO:MISSING'])
+    assert len(ltps) == 10
+    assert ltps['NFO:OPT90'] == {'value': 90.0, 'timestamp': ltps['NFO:OPT90']['timestamp'], 'volume': 900}
+    assert store.get_ltp('NFO:OPT3')['value'] == 3
+
+
+def test_stale_rows_are_removed_and_reused():
+    """Stale scan finds old rows; removed ids are reused without leaking old values"""
+    store = MarketDataStore(capacity=16)
+    store.update('NSE:OLD', 2, {'ltp': 1, 'open': 5}, now=100)
+    store.update('NSE:NEW', 1, {'ltp': 2}, now=1000)
+
+    assert store.stale_keys(500) == ['NSE:OLD']
+    old_id = store.instrument_id('NSE:OLD')
+    assert store.remove('NSE:OLD')
+    assert store.get_ltp('NSE:OLD') is None
+
+    store.update('NSE:REUSED', 1, {'ltp': 3}, now=1001)
+    assert store.instrument_id('NSE:REUSED') == old_id
+    assert store.get_quote('NSE:REUSED') is None
+    assert store.get_ltp('NSE:REUSED')['value'] == 3
+
+
+def test_reads_are_consistent_under_concurrent_writes():
+    """Lock-free readers never see a half-written row"""
+    store = MarketDataStore(capacity=16)
+    stop = threading.Event()
+    torn = []
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            store.update('NSE:HOT', 1, {'ltp': i, 'volume': i, 'timestamp': i})
+
+    def read():
+        while not stop.is_set():
+            for data in (store.get_ltp('NSE:HOT'), store.get_ltps(['NSE:HOT']).get('NSE:HOT')):
+                if data and not data['value'] == data['volume'] == data['timestamp']:
+                    torn.append(data)
+
+    threads = [threading.Thread(target=write) for _ in range(2)] + [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert not torn
+
+
+if __name__ == "__main__":
+    test_modes_update_their_fields()
+    test_batch_reads_and_growth()
+    test_stale_rows_are_removed_and_reused()
+    test_reads_are_consistent_under_concurrent_writes()
+    print("All market data store tests passed")
@@ -0,0 +1,142 @@
+"""
+Tests for the market session index: open/close queries across holidays,
+special sessions running past midnight and year ends, and session boundary
+events
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.market_session_service import IST, MarketSessionIndex
+
+
+def _epoch_ms(day, hour, minute):
+    return int(IST.localize(datetime(day.year, day.month, day.day, hour, minute)).timestamp() * 1000)
+
+
+def _calendar(year):
+    """Weekdays trade NSE 09:15-15:30 and MCX 09:00-23:55; two holidays and a Muhurat session"""
+    days = {}
+    day = date(year, 1, 1)
+    while day.year == year:
+        if day.weekday() < 5:
+            days[day] = [
+                {'exchange': 'NSE', 'start_time': _epoch_ms(day, 9, 15), 'end_time': _epoch_ms(day, 15, 30)},
+                {'exchange': 'MCX', 'start_time': _epoch_ms(day, 9, 0), 'end_time': _epoch_ms(day, 23, 55)},
+            ]
+        else:
+            days[day] = []
+        day += timedelta(days=1)
+    if year == 2026:
+        # Full holiday, then an MCX-only evening session
+        days[date(2026, 10, 2)] = []
+        days[date(2026, 10, 21)] = [
+            {'exchange': 'MCX', 'start_time': _epoch_ms(date(2026, 10, 21), 17, 0),
+             'end_time': _epoch_ms(date(2026, 10, 21), 23, 55)}]
+        # Muhurat: MCX runs past midnight
+        muhurat = date(2026, 10, 20)
+        days[muhurat] = [
+            {'exchange': 'NSE', 'start_time': _epoch_ms(muhurat, 18, 0), 'end_time': _epoch_ms(muhurat, 19, 15)},
+            {'exchange': 'MCX', 'start_time': _epoch_ms(muhurat, 18, 0),
+             'end_time': _epoch_ms(muhurat + timedelta(days=1), 0, 15)},
+        ]
+    return days
+
+
+def _at(day, hour, minute):
+    return _epoch_ms(day, hour, minute) / 1000.0
+
+
+def test_open_and_next_boundaries():
+    loaded = []
+    index = MarketSessionIndex(year_loader=lambda year: loaded.append(year) or _calendar(year))
+    monday = date(2026, 10, 19)
+
+    assert index.is_open('NSE', _at(monday, 10, 0))
+    assert not index.is_open('nse', _at(monday, 9, 0))
+    assert index.next_close('NSE', _at(monday, 10, 0)) == _at(monday, 15, 30)
+    # Tuesday is the Muhurat session, Wednesday a holiday for NSE
+    assert index.next_open('NSE', _at(monday, 16, 0)) == _at(date(2026, 10, 20), 18, 0)
+    assert index.next_open('NSE', _at(date(2026, 10, 20), 19, 30)) == _at(date(2026, 10, 22), 9, 15)
+    assert index.next_open('NSE', _at(date(2026, 10, 1), 16, 0)) == _at(date(2026, 10, 5), 9, 15)
+
+    # The Muhurat MCX session is still open after midnight
+    assert index.is_open('MCX', _at(date(2026, 10, 21), 0, 10))
+    assert not index.is_open('MCX', _at(date(2026, 10, 21), 9, 30))
+    assert index.next_open('MCX', _at(date(2026, 10, 21), 0, 20)) == _at(date(2026, 10, 21), 17, 0)
+
+    assert loaded == [2026]
+    # Late December looks into the next year
+    assert index.next_open('NSE', _at(date(2026, 12, 31), 16, 0)) == _at(date(2027, 1, 1), 9, 15)
+    assert loaded == [2026, 2027]
+
+    assert index.session('NSE', date(2026, 10, 2)) is None
+    assert index.is_trading_day(date(2026, 10, 21)) and not index.is_trading_day(date(2026, 10, 21), 'NSE')
+    assert not index.is_trading_day(date(2026, 10, 24))
+
+
+def test_calendar_reload():
+    calls = []
+    index = MarketSessionIndex(year_loader=lambda year: calls.append(year) or _calendar(year))
+    index.is_open('NSE', _at(date(2026, 10, 19), 10, 0))
+    index.is_open('NSE', _at(date(2026, 10, 19), 11, 0))
+    assert calls == [2026]
+    index.invalidate()
+    index.is_open('NSE', _at(date(2026, 10, 19), 10, 0))
+    assert calls == [2026, 2026]
+
+
+def test_unavailable_calendar():
+    def failing(year):
+        raise RuntimeError('database down')
+
+    index = MarketSessionIndex(year_loader=failing)
+    assert not index.is_open('NSE', _at(date(2026, 10, 19), 10, 0))
+    assert index.next_open('NSE', _at(date(2026, 10, 19), 10, 0)) is None
+
+
+def test_boundary_events():
+    now = time.time()
+    today = datetime.fromtimestamp(now, IST).date()
+    windows = {
+        'NSE': (now + 0.2, now + 0.4),
+        'MCX': (now + 0.3, now + 5),
+    }
+
+    def loader(year):
+        if year != today.year:
+            return {}
+        return {today: [{'exchange': exchange, 'start_time': start * 1000, 'end_time': end * 1000}
+                        for exchange, (start, end) in windows.items()]}
+
+    index = MarketSessionIndex(year_loader=loader)
+    all_events, nse_events = [], []
+    done = threading.Event()
+
+    def on_nse(event):
+        nse_events.append(event)
+        if event['event'] == 'close':
+            done.set()
+
+    everything = index.subscribe(all_events.append)
+    index.subscribe(on_nse, exchanges=['nse'])
+    assert done.wait(5)
+    assert [(e['exchange'], e['event']) for e in nse_events] == [('NSE', 'open'), ('NSE', 'close')]
+    assert abs(nse_events[0]['timestamp'] - windows['NSE'][0]) < 0.001 and nse_events[0]['date'] == today.isoformat()
+    assert [(e['exchange'], e['event']) for e in all_events] == [('NSE', 'open'), ('MCX', 'open'), ('NSE', 'close')]
+
+    assert index.unsubscribe(everything) and not index.unsubscribe(everything)
+    assert index.get_stats()['subscribers'] == 1
+
+
+if __name__ == "__main__":
+    test_open_and_next_boundaries()
+    test_calendar_reload()
+    test_unavailable_calendar()
+    test_boundary_events()
+    print("All market session tests passed")
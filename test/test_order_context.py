@@ -0,0 +1,76 @@
+"""
+Tests for the per-user order context used by the place order fast path
+"""
+
+import os
+import secrets
+import sys
+import tempfile
+import types
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp(prefix='openalgo-order-context-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+# Keep the logs, latency and sandbox databases out of the repo's db/ folder too
+for _name in ('LOGS', 'LATENCY', 'SANDBOX'):
+    os.environ[f'{_name}_DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp_dir, _name.lower() + '.db')}"
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+
+from database import auth_db, settings_db
+from services import order_context_service
+
+auth_db.init_db()
+settings_db.init_db()
+
+# Stand-in broker order module, resolved through importlib like a real broker
+sys.modules['broker.ctxbroker.api.order_api'] = types.ModuleType('broker.ctxbroker.api.order_api')
+
+
+def _login(user):
+    api_key = secrets.token_hex(32)
+    auth_db.upsert_api_key(user, api_key)
+    auth_db.upsert_auth(user, 'token-' + user, 'ctxbroker')
+    return api_key
+
+
+def test_context_is_built_once_and_reused():
+    api_key = _login('ctx_user')
+    context = order_context_service.get_order_context(api_key)
+    assert context.broker == 'ctxbroker' and context.auth_token == 'token-ctx_user'
+    assert context.order_api is sys.modules['broker.ctxbroker.api.order_api']
+
+    hits = order_context_service.get_order_context_stats()['context_hits']
+    assert order_context_service.get_order_context(api_key) is context
+    assert order_context_service.get_order_context_stats()['context_hits'] == hits + 1
+    assert order_context_service.get_order_context(secrets.token_hex(32)) is None
+
+
+def test_changes_rebuild_the_context():
+    api_key = _login('mode_user')
+    context = order_context_service.get_order_context(api_key)
+
+    # The order mode is read per order, so the context carries no copy of it
+    assert not hasattr(context, 'order_mode') and not hasattr(context, 'analyze_mode')
+
+    auth_db.upsert_auth('mode_user', 'token-2', 'ctxbroker')
+    rebuilt = order_context_service.get_order_context(api_key)
+    assert rebuilt is not context and rebuilt.auth_token == 'token-2'
+
+    # Logout revokes the token: no context, so orders take the regular path
+    auth_db.upsert_auth('mode_user', '', 'ctxbroker', revoke=True)
+    assert order_context_service.get_order_context(api_key) is None
+
+
+def test_unknown_broker_module():
+    auth_db.upsert_auth('nobroker_user', 'token', 'no_such_broker')
+    assert order_context_service.build_order_context('nobroker_user') is None
+    assert order_context_service.get_order_context_stats()['build_failures'] >= 1
+
+
+if __name__ == "__main__":
+    test_context_is_built_once_and_reused()
+    test_changes_rebuild_the_context()
+    test_unknown_broker_module()
+    print("All order context tests passed")
@@ -0,0 +1,226 @@
+"""
+Tests for webhook order ingestion: token buckets, lane ordering and the
+durable order journal (dedupe, crash recovery)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.token_bucket import TokenBucket, parse_rate_limit
+from services.order_ingestion_service import OrderIngestionEngine, webhook_dedupe_key
+from services.order_journal import OrderJournal
+
+
+def test_parse_rate_limit():
+    assert parse_rate_limit("10 per second") == 10
+    assert parse_rate_limit("2 per second") == 2
+    assert parse_rate_limit("100 per minute") == 100 / 60
+    assert parse_rate_limit("60/minute") == 1
+    assert parse_rate_limit("5 per 2 seconds") == 2.5
+    assert parse_rate_limit("garbage", default=3) == 3
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 0.1
+
+
+def _journal_path():
+    return os.path.join(tempfile.mkdtemp(prefix='openalgo-journal-test-'), 'webhook_orders.db')
+
+
+class RecordingEngine(OrderIngestionEngine):
+    """Engine that records orders instead of calling the order services"""
+
+    def __init__(self, journal_path=None, session_loader=lambda day: None):
+        super().__init__(max_workers=4, journal_path=journal_path or _journal_path(), session_loader=session_loader)
+        self.placed = []
+        self.record_lock = threading.Lock()
+
+    # Plain JSON instead of encrypting the API key with the auth database key
+    def _encode(self, payload):
+        return json.dumps(payload)
+
+    def _decode(self, text):
+        return json.loads(text)
+
+    def _execute(self, job):
+        time.sleep(0.01)
+        with self.record_lock:
+            self.placed.append((job.payload['strategy'], job.payload['seq']))
+
+
+def _wait_until_drained(engine, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if engine.get_stats()['active_lanes'] == 0:
+            return
+        time.sleep(0.01)
+    raise AssertionError("Engine did not drain in time")
+
+
+def test_lanes_keep_fifo_order_per_strategy():
+    engine = RecordingEngine()
+    for seq in range(5):
+        for strategy in ('alpha', 'beta', 'gamma'):
+            engine.submit('placeorder', {'apikey': 'k1', 'strategy': strategy, 'seq': seq}, source='test')
+
+    _wait_until_drained(engine)
+    engine.shutdown(wait=True)
+
+    for strategy in ('alpha', 'beta', 'gamma'):
+        assert [seq for name, seq in engine.placed if name == strategy] == list(range(5))
+    assert engine.get_stats()['submitted'] == 15
+    assert engine.get_stats()['by_source'] == {'test': 15}
+
+
+class GatedEngine(RecordingEngine):
+    """Holds every lane's first order until all of them are in flight and the test releases them"""
+
+    def __init__(self, lanes):
+        super().__init__()
+        self.barrier = threading.Barrier(lanes, timeout=5)
+        self.release = threading.Event()
+        self.in_flight = 0
+
+    def _execute(self, job):
+        if job.payload['seq'] == 0:
+            # Only passes once every lane is executing at the same time
+            self.barrier.wait()
+            with self.record_lock:
+                self.in_flight += 1
+            self.release.wait(5)
+        super()._execute(job)
+
+
+def test_strategies_run_in_parallel():
+    engine = GatedEngine(lanes=4)
+    for strategy in ('a', 'b', 'c', 'd'):
+        for seq in range(5):
+            engine.submit('placeorder', {'apikey': strategy, 'strategy': strategy, 'seq': seq})
+
+    # submit() returned while the first orders are still held by the executor
+    assert engine.placed == []
+    deadline = time.time() + 5
+    while engine.in_flight < 4 and time.time() < deadline:
+        time.sleep(0.01)
+    assert engine.in_flight == 4 and not engine.barrier.broken
+    engine.release.set()
+
+    _wait_until_drained(engine)
+    engine.shutdown(wait=True)
+    assert len(engine.placed) == 20
+    for strategy in ('a', 'b', 'c', 'd'):
+        assert [seq for name, seq in engine.placed if name == strategy] == list(range(5))
+
+
+def test_duplicate_deliveries_are_dropped():
+    engine = RecordingEngine()
+    payload = {'apikey': 'k1', 'strategy': 'alpha', 'seq': 0}
+    assert engine.submit('placeorder', payload, dedupe_key='alert-1')
+    assert not engine.submit('placeorder', payload, dedupe_key='alert-1')
+    # A short window only catches repeats that arrive close together
+    assert engine.submit('placeorder', dict(payload, seq=1), dedupe_key='same-body', dedupe_window=60)
+    assert not engine.submit('placeorder', dict(payload, seq=1), dedupe_key='same-body', dedupe_window=60)
+
+    _wait_until_drained(engine)
+    engine.shutdown(wait=True)
+    assert engine.placed == [('alpha', 0), ('alpha', 1)]
+    stats = engine.get_stats()
+    assert stats['duplicates'] == 2 and stats['journal']['done'] == 2 and stats['queue_depth'] == 0
+
+
+def test_dedupe_needs_a_delivery_id():
+    payload = {'apikey': 'k1', 'symbol': 'SBIN', 'action': 'BUY'}
+    key, window = webhook_dedupe_key('tradingview', 'hook', 'alert-7', payload)
+    assert key == webhook_dedupe_key('tradingview', 'hook', 'alert-7', payload)[0] and window is None
+    # Identical orders without a delivery id (pyramiding, repeated alerts) are all placed by default
+    assert webhook_dedupe_key('tradingview', 'hook', None, payload) == (None, None)
+
+
+def test_lane_is_held_by_one_consumer():
+    journal = OrderJournal(_journal_path())
+    for seq in range(2):
+        journal.append('lane', 'placeorder', 'test', json.dumps({'seq': seq}))
+    first = journal.claim('lane')
+    # The next entry waits until the claim is acknowledged, keeping the lane in order
+    assert journal.claim('lane') is None
+    journal.complete(first.seq)
+    assert json.loads(journal.claim('lane').payload) == {'seq': 1}
+
+
+def test_recovery_replays_recent_orders():
+    path = _journal_path()
+    journal = OrderJournal(path)
+    now = time.time()
+
+    def add(strategy, seq, exchange='NSE', age=0):
+        return journal.append(f'k1:{strategy}', 'placeorder', 'test',
+                              json.dumps({'apikey': 'k1', 'strategy': strategy, 'seq': seq, 'exchange': exchange}),
+                              strategy=strategy, received_at=now - age)
+
+    # A crashed worker left one order claimed mid-flight and others pending
+    add('alpha', 0)
+    add('alpha', 1)
+    journal.claim('k1:alpha')
+    with journal._transaction() as conn:
+        conn.execute("UPDATE webhook_orders SET consumer = 'otherhost:1:gone'")
+    add('beta', 0, age=3600)
+    add('gamma', 0, exchange='MCX')
+
+    sessions = {'NSE': (now - 60, now + 60)}
+    engine = RecordingEngine(journal_path=path, session_loader=lambda day: sessions)
+    assert engine.recover() == {'released': 1, 'replayed': 2, 'expired': 2}
+    _wait_until_drained(engine)
+    engine.shutdown(wait=True)
+
+    assert engine.placed == [('alpha', 0), ('alpha', 1)]
+    stats = engine.get_stats()['journal']
+    assert stats['done'] == 2 and stats['expired'] == 2 and stats['pending'] == 0
+
+
+def test_live_consumers_keep_their_claims():
+    path = _journal_path()
+    journal = OrderJournal(path)
+    journal.append('lane', 'placeorder', 'test', json.dumps({'seq': 0}))
+    journal.append('other', 'placeorder', 'test', json.dumps({'seq': 0}))
+    journal.claim('lane')
+    journal.claim('other')
+    with journal._transaction() as conn:
+        # 'lane' is an order a live worker has been sending for an hour; 'other' a worker without a lease
+        conn.execute("UPDATE webhook_orders SET claimed_at = ?", (time.time() - 3600,))
+        conn.execute("UPDATE journal_consumers SET consumer = 'otherhost:1:alive'")
+        conn.execute("UPDATE webhook_orders SET consumer = 'otherhost:1:alive' WHERE lane = 'lane'")
+        conn.execute("UPDATE webhook_orders SET consumer = 'otherhost:2:gone' WHERE lane = 'other'")
+
+    # Another process (e.g. a restarted worker) only takes over the dead worker's order
+    assert OrderJournal(path).release_stale(60) == 1
+    assert [entry.lane for entry in journal.pending()] == ['other']
+
+    # Once the live worker stops renewing its lease its claim is released too
+    with journal._transaction() as conn:
+        conn.execute("UPDATE journal_consumers SET heartbeat = ?", (time.time() - 120,))
+    assert journal.release_stale(60) == 1
+
+
+if __name__ == "__main__":
+    test_parse_rate_limit()
+    test_token_bucket_burst_then_wait()
+    test_lanes_keep_fifo_order_per_strategy()
+    test_strategies_run_in_parallel()
+    test_duplicate_deliveries_are_dropped()
+    test_dedupe_needs_a_delivery_id()
+    test_lane_is_held_by_one_consumer()
+    test_recovery_replays_recent_orders()
+    test_live_consumers_keep_their_claims()
+    print("All order ingestion tests passed")
@@ -0,0 +1,104 @@
+"""
+Tests for the intraday P&L curve pipeline behind the PnL tracker
+"""
+
+import os
+import sys
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.pnl_tracker_service as pnl
+from services.pnl_tracker_service import IST, parse_trade_timestamps, pnl_rows
+
+
+def _minutes(start: str, count: int) -> pd.DatetimeIndex:
+    return pd.date_range(IST.localize(datetime.strptime(start, '%Y-%m-%d %H:%M')), periods=count, freq='1min')
+
+
+def test_vectorized_timestamp_parsing():
+    """Each broker format is parsed in one pass; time-only values use the fallback date"""
+    parsed = parse_trade_timestamps(
+        ["17-Dec-2025 10:54:03", "09:41:01 17-12-2025", "10:30:52", 1765950000, None, "junk"],
+        fallback_date=date(2025, 12, 17))
+    assert parsed[0] == IST.localize(datetime(2025, 12, 17, 10, 54, 3))
+    assert parsed[1] == IST.localize(datetime(2025, 12, 17, 9, 41, 1))
+    assert parsed[2] == IST.localize(datetime(2025, 12, 17, 10, 30, 52))
+    assert parsed[3] == pd.Timestamp(1765950000, unit='s', tz='UTC').tz_convert(IST)
+    assert pd.isna(parsed[4]) and pd.isna(parsed[5])
+
+
+def test_matrix_pnl_matches_position_windows():
+    """Open windows mark to market, closed windows hold their realized P&L afterwards"""
+    index = _minutes('2025-12-17 10:00', 5)
+    prices = np.array([[100.0, 50.0], [102.0, 49.0], [104.0, 48.0], [103.0, 47.0], [101.0, 46.0]])
+    windows = [
+        # Long 10 from 10:00, sold at 104.5 at 10:02:30
+        [{'start_time': index[0], 'end_time': index[2] + pd.Timedelta(seconds=30), 'qty': 10,
+          'price': 100.0, 'action': 'BUY', 'exit_price': 104.5}],
+        # Short 5 from 10:01, still open
+        [{'start_time': index[1], 'end_time': None, 'qty': 5, 'price': 49.0, 'action': 'SELL', 'exit_price': None}],
+    ]
+    total = pnl_rows(index, prices, windows)
+    short = [0, 0, 5, 10, 15]
+    long_leg = [0, 20, 40, 45, 45]
+    assert np.allclose(total, np.add(short, long_leg))
+
+    # Closed after the last candle: realized shows on the last candle
+    late = [[{'start_time': index[0], 'end_time': index[4] + pd.Timedelta(seconds=10), 'qty': 1,
+              'price': 100.0, 'action': 'BUY', 'exit_price': 110.0}], []]
+    assert np.allclose(pnl_rows(index, prices, late), [0, 2, 4, 3, 10])
+
+    # Computing only the tail gives the same rows as a full pass
+    assert np.allclose(pnl_rows(index, prices, windows, start_row=3), total[3:])
+
+
+def test_refresh_reuses_cached_minutes():
+    """A refresh with the same trades only recomputes from the last cached minute"""
+    today = datetime.now(IST).strftime('%Y-%m-%d')
+    index = _minutes(f'{today} 10:00', 30)
+    closes = pd.Series(np.linspace(100, 130, 30), index=index)
+    calls = []
+
+    def fake_history(**kwargs):
+        calls.append(kwargs['symbol'])
+        visible = closes[:fake_history.upto]
+        return True, {'data': [{'timestamp': int(ts.timestamp()), 'close': value}
+                               for ts, value in visible.items()]}, 200
+
+    trades = [{'symbol': 'SBIN', 'exchange': 'NSE', 'action': 'BUY', 'quantity': 2,
+               'average_price': 100.0, 'timestamp': f'{today} 10:00:00'}]
+    computed = []
+    original_rows, original_history, original_ttl = pnl.pnl_rows, pnl.get_history, pnl.candle_cache.ttl
+    pnl.get_history = fake_history
+    pnl.is_range_cached = lambda *args: True
+    pnl.candle_cache.ttl = 0
+    pnl.pnl_rows = lambda index, prices, windows, start_row=0: (
+        computed.append(len(index) - start_row) or original_rows(index, prices, windows, start_row))
+    try:
+        pnl.candle_cache.clear()
+        now = index[-1] + pd.Timedelta(minutes=5)
+        fake_history.upto = 20
+        first = pnl.get_intraday_pnl('tester', trades, {}, 'key', now=now)
+        fake_history.upto = 30
+        second = pnl.get_intraday_pnl('tester', trades, {}, 'key', now=now)
+    finally:
+        pnl.pnl_rows, pnl.get_history, pnl.candle_cache.ttl = original_rows, original_history, original_ttl
+        pnl.candle_cache.clear()
+
+    assert calls == ['SBIN', 'SBIN']
+    assert computed == [20, 11]
+    expected = (closes - 100.0) * 2
+    assert [point['value'] for point in second['pnl_series']][-30:] == [round(v, 2) for v in expected]
+    assert second['current_mtm'] == round(expected.iloc[-1], 2)
+    assert first['max_mtm'] == round(expected.iloc[19], 2)
+
+
+if __name__ == "__main__":
+    test_vectorized_timestamp_parsing()
+    test_matrix_pnl_matches_position_windows()
+    test_refresh_reuses_cached_minutes()
+    print("All PnL tracker service tests passed")
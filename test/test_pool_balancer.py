@@ -0,0 +1,95 @@
+"""
+Tests for WebSocket connection pool load tracking and rebalancing decisions
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.pool_balancer import AdapterLoad, AdapterSnapshot, Move, PoolBalancer
+
+
+def _load(rate: float, new_symbols: int = 0) -> AdapterLoad:
+    load = AdapterLoad()
+    load.rate = rate
+    load.new_symbols = new_symbols
+    return load
+
+
+def test_rates_and_group_matching():
+    """Sampling turns tick counts into rates, attributed per symbol from topics"""
+    load = AdapterLoad()
+    start = load._sampled_at
+    for _ in range(20):
+        load.mark('NSE_RELIANCE_LTP', {'ltp': 1})
+    for _ in range(10):
+        load.mark('ANGEL_NSE_INDEX_NIFTY_QUOTE', {'ltp': 1})
+    load.sample(start + 10)
+
+    assert load.ticks == 30
+    assert abs(load.rate - 1.5) < 1e-9  # half of 3 ticks/sec after one smoothed sample
+    rates = load.group_rates([('RELIANCE', 'NSE'), ('NIFTY', 'NSE_INDEX'), ('TCS', 'NSE')])
+    assert abs(rates[('RELIANCE', 'NSE')] - 1.0) < 1e-9
+    assert abs(rates[('NIFTY', 'NSE_INDEX')] - 0.5) < 1e-9
+    assert rates[('TCS', 'NSE')] == 0.0
+
+
+def test_choose_places_by_load():
+    """New symbols go to the connection with the lowest tick rate, not the first with room"""
+    balancer = PoolBalancer(max_symbols=100, max_rate=0, quiet_rate=0, max_moves=100)
+    assert balancer.choose([(10, _load(500)), (60, _load(20))]) == 1
+    # Full connections are skipped
+    assert balancer.choose([(100, _load(0)), (50, _load(300))]) == 1
+    assert balancer.choose([(100, _load(0)), (100, _load(0))]) is None
+    # Unsampled new symbols count at the pool's average rate per symbol
+    assert balancer.choose([(10, _load(70)), (10, _load(0, new_symbols=10)), (10, _load(25))]) == 2
+
+    capped = PoolBalancer(max_symbols=100, max_rate=200, quiet_rate=0, max_moves=100)
+    assert capped.choose([(10, _load(250)), (10, _load(210))]) is None
+
+
+def test_hotspot_moves_busiest_symbols():
+    """A connection far hotter than another sheds its busiest symbols toward the mean"""
+    balancer = PoolBalancer(max_symbols=100, max_rate=0, quiet_rate=0, max_moves=100)
+    hot = AdapterSnapshot(0, 3, 300.0, {('A', 'NSE'): (1, 200.0), ('B', 'NSE'): (1, 80.0), ('C', 'NSE'): (1, 20.0)})
+    cool = AdapterSnapshot(1, 1, 10.0, {('D', 'NSE'): (1, 10.0)})
+
+    moves = balancer.plan([hot, cool], quiet=False)
+    assert moves == [Move(('A', 'NSE'), 0, 1)]
+
+    # Two equally busy symbols: moving one evens the connections out
+    pair = AdapterSnapshot(0, 2, 100.0, {('A', 'NSE'): (1, 50.0), ('B', 'NSE'): (1, 50.0)})
+    idle = AdapterSnapshot(1, 0, 0.0, {})
+    assert balancer.plan([pair, idle], quiet=False) == [Move(('A', 'NSE'), 0, 1)]
+
+    balanced = AdapterSnapshot(1, 1, 200.0, {('D', 'NSE'): (1, 200.0)})
+    assert balancer.plan([hot, balanced], quiet=False) == []
+
+
+def test_consolidation_drains_sparse_connections():
+    """During quiet periods sparse connections are emptied into the others"""
+    balancer = PoolBalancer(max_symbols=100, max_rate=0, quiet_rate=50, max_moves=100)
+    first = AdapterSnapshot(0, 60, 5.0, {})
+    sparse = AdapterSnapshot(1, 3, 1.0, {('A', 'NFO'): (2, 0.5), ('B', 'NFO'): (1, 0.5)})
+    other = AdapterSnapshot(2, 80, 2.0, {})
+
+    assert balancer.is_quiet([first, sparse, other])
+    moves = balancer.plan([first, sparse, other])
+    assert {move.group for move in moves} == {('A', 'NFO'), ('B', 'NFO')}
+    assert all(move.source == 1 and move.target in (0, 2) for move in moves)
+
+    # No room elsewhere: nothing is drained
+    full = AdapterSnapshot(0, 99, 5.0, {})
+    assert balancer.plan([full, sparse, AdapterSnapshot(2, 99, 2.0, {})], quiet=True) == []
+
+    # Busy pools are not consolidated
+    assert balancer.plan([first, sparse, other], quiet=False) == []
+
+
+if __name__ == "__main__":
+    test_rates_and_group_matching()
+    test_choose_places_by_load()
+    test_hotspot_moves_busiest_symbols()
+    test_consolidation_drains_sparse_connections()
+    print("All pool balancer tests passed")
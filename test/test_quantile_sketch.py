@@ -0,0 +1,89 @@
+"""
+Tests for the mergeable quantile sketch and rollup accumulator
+"""
+
+import os
+import random
+import sys
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.quantile_sketch import QuantileSketch, RollupAccumulator, bucket_start
+
+
+def _latencies(n, seed):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(4, 0.6) for _ in range(n)]
+
+
+def test_quantiles_within_relative_accuracy():
+    values = _latencies(20000, seed=1)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = float(np.percentile(values, q * 100, method='lower'))
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    assert sketch.count == len(values)
+    assert abs(sketch.mean - sum(values) / len(values)) < 1e-6
+
+
+def test_merge_matches_single_sketch():
+    a_values = _latencies(5000, seed=2)
+    b_values = _latencies(5000, seed=3)
+    a, b, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in a_values:
+        a.add(value)
+        combined.add(value)
+    for value in b_values:
+        b.add(value)
+        combined.add(value)
+
+    merged = QuantileSketch.from_json(a.to_json()).merge(QuantileSketch.from_json(b.to_json()))
+    assert merged.count == combined.count
+    assert merged.min == combined.min and merged.max == combined.max
+    for q in (0.5, 0.99):
+        assert merged.quantile(q) == combined.quantile(q)
+
+
+def test_empty_and_zero_values():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.histogram() == ([], [])
+    assert QuantileSketch.from_json(None).count == 0
+
+    sketch.add(0)
+    sketch.add(0)
+    sketch.add(10)
+    assert sketch.quantile(0.5) == 0.0
+    assert abs(sketch.quantile(1.0) - 10) < 0.1
+    edges, counts = sketch.histogram(5)
+    assert len(edges) == 6 and sum(counts) == 3
+
+
+def test_accumulator_buckets_by_hour_and_key():
+    acc = RollupAccumulator(bucket_seconds=3600)
+    acc.record(('zerodha', 'PLACE'), {'total': 50}, when=datetime(2024, 1, 1, 9, 15), count=1)
+    acc.record(('zerodha', 'PLACE'), {'total': 70}, when=datetime(2024, 1, 1, 9, 45), count=1)
+    acc.record(('zerodha', 'PLACE'), {'total': 90}, when=datetime(2024, 1, 1, 10, 5), count=1)
+
+    pending = acc.drain()
+    nine = pending[(datetime(2024, 1, 1, 9), ('zerodha', 'PLACE'))]
+    assert nine.counters['count'] == 2
+    assert nine.sketches['total'].count == 2
+    assert (datetime(2024, 1, 1, 10), ('zerodha', 'PLACE')) in pending
+    assert len(acc) == 0
+    assert bucket_start(datetime(2024, 1, 1, 9, 59, 59), 3600) == datetime(2024, 1, 1, 9)
+
+
+if __name__ == "__main__":
+    test_quantiles_within_relative_accuracy()
+    test_merge_matches_single_sketch()
+    test_empty_and_zero_values()
+    test_accumulator_buckets_by_hour_and_key()
+    print("All quantile sketch tests passed")
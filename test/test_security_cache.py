@@ -0,0 +1,70 @@
+"""
+Tests for the in-memory IP ban table and sliding window trackers
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.security_cache import BanTable, SlidingWindowTracker
+
+
+def test_ban_table_expiry():
+    table = BanTable()
+    now = datetime.utcnow()
+    table.add('1.2.3.4', now + timedelta(hours=1))
+    table.add('5.6.7.8', None)
+
+    assert table.is_banned('1.2.3.4', now=now)
+    assert table.is_banned('5.6.7.8', now=now + timedelta(days=365))
+    assert not table.is_banned('1.2.3.4', now=now + timedelta(hours=2))
+    assert len(table) == 1
+    assert not table.is_banned('9.9.9.9')
+
+
+def test_ban_table_replace_and_staleness():
+    table = BanTable()
+    assert table.is_stale(30)
+    table.add('1.1.1.1', None)
+    table.replace([('2.2.2.2', None)])
+
+    assert not table.is_banned('1.1.1.1')
+    assert table.is_banned('2.2.2.2')
+    assert not table.is_stale(30)
+    table.remove('2.2.2.2')
+    assert not table.is_banned('2.2.2.2')
+
+
+def test_sliding_window_counts_and_expires():
+    tracker = SlidingWindowTracker(window_seconds=60)
+    assert tracker.record('ip', '/a', now=1000) == 1
+    assert tracker.record('ip', '/b', now=1030) == 2
+    assert tracker.record('ip', '/c', now=1070) == 2
+    assert tracker.count('ip', now=1200) == 0
+    assert tracker.prune(now=1200) == 1
+    assert len(tracker) == 0
+
+
+def test_drain_returns_pending_hits_once():
+    tracker = SlidingWindowTracker(window_seconds=60, max_details=2)
+    for path in ['/a', '/a', '/b', '/c']:
+        tracker.record('ip', path, now=1000)
+
+    pending = tracker.drain()
+    assert pending['ip'].count == 4
+    assert pending['ip'].details == ['/a', '/b']
+    assert pending['ip'].first_at == datetime.utcfromtimestamp(1000)
+    assert tracker.drain() == {}
+    # The window still remembers the hits after a drain
+    assert tracker.count('ip', now=1001) == 4
+
+
+if __name__ == "__main__":
+    test_ban_table_expiry()
+    test_ban_table_replace_and_staleness()
+    test_sliding_window_counts_and_expires()
+    test_drain_returns_pending_hits_once()
+    print("All security cache tests passed")
@@ -0,0 +1,221 @@
+"""
+Tests for the in-process strategy host: shared subscriptions, tick and bar
+routing, warm-up history and error handling
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bar_aggregator import BarAggregator
+from services.strategy_host import StrategyHost
+
+
+STRATEGY_SOURCE = '''
+import threading
+from services.strategy_host import Strategy
+
+class Recorder(Strategy):
+    symbols = [('NHPC', 'NSE')]
+    bar_intervals = ['1m']
+    warmup_bars = WARMUP
+
+    def on_start(self):
+        self.ticks = []
+        self.bars = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def on_tick(self, tick):
+        self.release.wait(5)
+        self.ticks.append(tick['ltp'])
+
+    def on_bar(self, bar):
+        self.bars.append(bar)
+'''
+
+
+class _MarketData:
+    """Shape of MarketDataService as used by the host"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.user_callbacks = []
+
+    def subscribe_to_updates(self, event_type, callback, filter_symbols=None):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def register_user_callback(self, username):
+        self.user_callbacks.append(username)
+        return True
+
+    def publish(self, symbol, exchange, ltp, timestamp):
+        for callback in self.callbacks:
+            callback({'symbol': symbol, 'exchange': exchange, 'mode': 2,
+                      'data': {'ltp': ltp, 'volume': 0, 'timestamp': timestamp}})
+
+
+def _write_strategy(source, warmup=0):
+    path = Path(tempfile.mkdtemp()) / 'recorder.py'
+    path.write_text(source.replace('WARMUP', str(warmup)))
+    return path
+
+
+class _Sessions:
+    """Shape of MarketSessionIndex as used by the host"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def subscribe(self, callback, exchanges=None):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def is_open(self, exchange, timestamp=None):
+        return exchange == 'NSE'
+
+    def publish(self, event, exchange):
+        for callback in self.callbacks:
+            callback({'event': event, 'exchange': exchange, 'timestamp': time.time(), 'date': '2026-10-19'})
+
+
+def _make_host(history_calls=None, subscribe_ok=True, sessions=None):
+    market_data = _MarketData()
+    aggregator = BarAggregator(intervals=['1m'], session_loader=lambda day: None)
+    subscribed, unsubscribed = [], []
+
+    def history(api_key, symbol, exchange, interval, start, end):
+        history_calls.append(symbol)
+        now = int(time.time()) // 60 * 60
+        # Two completed candles and the one still forming
+        return [{'timestamp': now - 120 + 60 * i, 'open': i, 'high': i, 'low': i, 'close': i, 'volume': 1}
+                for i in range(3)]
+
+    host = StrategyHost(
+        market_data=market_data, aggregator=aggregator,
+        subscribe=lambda user, key, symbols: (subscribed.append(symbols) or subscribe_ok, 'no websocket'),
+        unsubscribe=lambda user, key, symbols: unsubscribed.append(symbols),
+        history_loader=history, sessions=sessions
+    )
+    market_data.callbacks.append(aggregator.on_tick)
+    return host, market_data, subscribed, unsubscribed
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_shared_subscription_and_routing():
+    """Two strategies on one instrument share a subscription and both get ticks and bars"""
+    history_calls = []
+    host, market_data, subscribed, unsubscribed = _make_host(history_calls)
+    path = _write_strategy(STRATEGY_SOURCE, warmup=5)
+
+    first = host.start('s1', path, 'trader', 'key')
+    second = host.start('s2', path, 'trader', 'key')
+    assert subscribed == [[{'symbol': 'NHPC', 'exchange': 'NSE'}]]
+    assert market_data.user_callbacks == ['trader']
+    # Warm-up history is fetched once and the forming candle is dropped
+    assert history_calls == ['NHPC']
+    assert [bar['close'] for bar in first.ctx.bars('NHPC', 'NSE', '1m')] == [0, 1]
+
+    start = (int(time.time()) // 60 + 1) * 60
+    market_data.publish('NHPC', 'NSE', 10.0, start + 1)
+    market_data.publish('NHPC', 'NSE', 11.0, start + 61)
+    for runner in (first, second):
+        assert _wait_for(lambda: len(runner.strategy.bars) == 1 and len(runner.strategy.ticks) >= 1)
+        assert runner.strategy.bars[0]['close'] == 10.0 and runner.strategy.bars[0]['interval'] == '1m'
+    assert [bar['close'] for bar in first.ctx.bars('NHPC', 'NSE', '1m', limit=2)] == [1, 10.0]
+
+    # The subscription is released with the last strategy using it
+    assert host.stop('s1')
+    assert unsubscribed == []
+    assert host.stop('s2')
+    assert unsubscribed == [[{'symbol': 'NHPC', 'exchange': 'NSE'}]]
+    assert not first.is_running() and host.get_stats('s1') is None
+
+
+def test_slow_strategy_gets_latest_tick():
+    """Ticks queued behind a slow callback are conflated to the latest one"""
+    host, market_data, _, _ = _make_host([])
+    runner = host.start('slow', _write_strategy(STRATEGY_SOURCE), 'trader', 'key')
+    runner.strategy.release.clear()
+
+    now = time.time()
+    market_data.publish('NHPC', 'NSE', 1.0, now)
+    assert _wait_for(lambda: not runner._events)
+    for price in (2.0, 3.0, 4.0):
+        market_data.publish('NHPC', 'NSE', price, now)
+    runner.strategy.release.set()
+
+    assert _wait_for(lambda: runner.strategy.ticks == [1.0, 4.0])
+    assert runner.ctx.stats['conflated'] == 2
+    host.stop('slow')
+
+
+def test_failures():
+    """Bad files and failed subscriptions are reported; a repeatedly failing strategy stops itself"""
+    host, market_data, _, unsubscribed = _make_host([])
+    try:
+        host.start('none', _write_strategy('x = 1\n'), 'trader', 'key')
+        assert False, 'expected ValueError'
+    except ValueError as e:
+        assert 'exactly one Strategy subclass' in str(e)
+
+    failing_host, _, _, _ = _make_host([], subscribe_ok=False)
+    try:
+        failing_host.start('nofeed', _write_strategy(STRATEGY_SOURCE), 'trader', 'key')
+        assert False, 'expected RuntimeError'
+    except RuntimeError as e:
+        assert 'no websocket' in str(e)
+    assert failing_host.get_stats('nofeed') is None
+
+    broken = STRATEGY_SOURCE.replace("self.ticks.append(tick['ltp'])", "raise ValueError('bad tick')")
+    log = Path(tempfile.mkdtemp()) / 'broken.log'
+    handle = open(log, 'a', buffering=1)
+    runner = host.start('broken', _write_strategy(broken), 'trader', 'key', log_handle=handle)
+    runner.max_errors = 3
+    for i in range(3):
+        market_data.publish('NHPC', 'NSE', 1.0 + i, time.time())
+        assert _wait_for(lambda: runner.ctx.stats['errors'] == i + 1)
+    assert runner.wait(5) and 'consecutive errors' in runner.error
+    assert 'bad tick' in log.read_text() and handle.closed
+    assert unsubscribed == [[{'symbol': 'NHPC', 'exchange': 'NSE'}]]
+
+
+def test_session_events():
+    """Only strategies implementing on_session get the open/close events of their exchanges"""
+    sessions = _Sessions()
+    host, _, _, _ = _make_host([], sessions=sessions)
+    plain = host.start('plain', _write_strategy(STRATEGY_SOURCE), 'trader', 'key')
+    assert sessions.callbacks == []
+
+    source = STRATEGY_SOURCE + '''
+    def on_session(self, event):
+        self.sessions = getattr(self, 'sessions', []) + [(event['exchange'], event['event'])]
+'''
+    runner = host.start('session', _write_strategy(source), 'trader', 'key')
+    assert len(sessions.callbacks) == 1 and runner.ctx.is_market_open('NSE')
+    sessions.publish('close', 'MCX')
+    sessions.publish('open', 'NSE')
+    assert _wait_for(lambda: getattr(runner.strategy, 'sessions', None) == [('NSE', 'open')])
+    assert not hasattr(plain.strategy, 'sessions')
+    host.shutdown()
+
+
+if __name__ == "__main__":
+    test_shared_subscription_and_routing()
+    test_slow_strategy_gets_latest_tick()
+    test_failures()
+    test_session_events()
+    print("All strategy host tests passed")
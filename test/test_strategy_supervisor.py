@@ -0,0 +1,115 @@
+"""
+Tests for the Python strategy supervisor: log tailing and rotation,
+resource sampling and limits, and the warm interpreter pool
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.strategy_supervisor import (
+    StrategySupervisor, WarmInterpreterPool, read_log_chunk, read_log_tail, rotate_log
+)
+
+
+def _wait_for(condition, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_log_tail_chunks_and_rotation():
+    """Tailing returns whole lines from an offset and notices rotation"""
+    log = Path(tempfile.mkdtemp()) / 'abc_20250101_091500_IST.log'
+    log.write_text(''.join(f'line {i}\n' for i in range(100)))
+
+    tail = read_log_tail(log, max_bytes=30)
+    assert tail['truncated'] and tail['content'].startswith('line ') and tail['content'].endswith('line 99\n')
+    assert tail['offset'] == log.stat().st_size
+
+    # Appended output is returned from the offset; partial trailing lines wait for the next chunk
+    with open(log, 'a') as f:
+        f.write('new 1\nnew 2\npartial')
+    chunk = read_log_chunk(log, tail['offset'], max_bytes=15)
+    assert chunk['content'] == 'new 1\nnew 2\n' and not chunk['rotated']
+    chunk = read_log_chunk(log, chunk['offset'])
+    assert chunk['content'] == 'partial'
+
+    # Copy-truncate rotation keeps the old output and the tail restarts at 0
+    assert rotate_log(log, backups=2)
+    assert log.stat().st_size == 0 and 'partial' in Path(f'{log}.1').read_text()
+    with open(log, 'a') as f:
+        f.write('after rotation\n')
+    chunk = read_log_chunk(log, chunk['offset'])
+    assert chunk['rotated'] and chunk['content'] == 'after rotation\n'
+
+
+def test_usage_sampling_and_memory_limit():
+    """The monitor reports usage and flags a strategy above its memory cap"""
+    import subprocess
+    child = subprocess.Popen([sys.executable, '-c', 'import time; data = bytearray(40 * 1024 * 1024); time.sleep(30)'])
+    try:
+        supervisor = StrategySupervisor(cgroup_root='')
+        limits = supervisor.attach('hungry', child.pid, max_memory_mb=20, max_cpu_percent=0)
+        assert limits['enforced_by'] == 'monitor'
+
+        exceeded = []
+        assert _wait_for(lambda: exceeded.extend(supervisor.sample()) or exceeded)
+        assert exceeded[0][0] == 'hungry' and 'Memory limit exceeded' in exceeded[0][1]
+        usage = supervisor.get_usage('hungry')
+        assert usage['memory_mb'] > 20 and usage['peak_memory_mb'] >= usage['memory_mb']
+
+        # Reported once, not on every pass
+        assert supervisor.sample() == []
+        supervisor.detach('hungry')
+        assert supervisor.get_usage('hungry') is None
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_warm_pool_runs_script_with_env_and_log():
+    """A warm interpreter runs the script as __main__ with the strategy's env, output going to its log"""
+    workdir = Path(tempfile.mkdtemp())
+    script = workdir / 'strategy.py'
+    script.write_text(
+        "import os, sys\n"
+        "print('name', __name__)\n"
+        "print('env', os.environ.get('STRATEGY_PARAM'))\n"
+        "print('path0', sys.path[0])\n"
+        "sys.stderr.write('to stderr\\n')\n"
+    )
+    log = workdir / 'strategy.log'
+    log.write_text('=== header ===\n')
+
+    pool = WarmInterpreterPool(size=1)
+    try:
+        pool.fill()
+        assert _wait_for(lambda: len(pool._idle) == 1)
+        worker = pool.launch(script, log, {'STRATEGY_PARAM': 'warm', 'PATH': os.environ.get('PATH', '')}, workdir)
+        assert worker is not None
+        assert worker.wait(timeout=60) == 0
+
+        output = log.read_text()
+        assert output.startswith('=== header ===\n')
+        assert 'name __main__' in output and 'env warm' in output and 'to stderr' in output
+        assert f'path0 {workdir}' in output
+
+        # The pool replaces the worker it handed out
+        assert _wait_for(lambda: len(pool._idle) == 1 and pool._idle[0] is not worker)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_log_tail_chunks_and_rotation()
+    test_usage_sampling_and_memory_limit()
+    test_warm_pool_runs_script_with_env_and_log()
+    print("All strategy supervisor tests passed")
@@ -0,0 +1,132 @@
+"""
+Tests for batched, rate-limited Telegram alert delivery
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.telegram_alert_dispatcher import AlertDispatcher, TokenBucket, build_digests
+
+
+class _RetryAfter(Exception):
+    """Shape of telegram.error.RetryAfter"""
+
+    def __init__(self, seconds):
+        super().__init__('Flood control exceeded')
+        self.retry_after = timedelta(seconds=seconds)
+
+
+class _FakeBot:
+    def __init__(self, fail_for=(), flood_once=False):
+        self.sent = []
+        self.fail_for = set(fail_for)
+        self.flood_once = flood_once
+
+    async def send(self, chat_id, text):
+        if self.flood_once:
+            self.flood_once = False
+            raise _RetryAfter(0.05)
+        if chat_id in self.fail_for:
+            raise RuntimeError('chat not found')
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def test_digest_packing():
+    """One alert passes through unchanged; many are packed under the size limit"""
+    assert build_digests(['only']) == ['only']
+    digests = build_digests(['a' * 40] * 5, limit=100)
+    assert digests[0].startswith('📬 *5 alerts*')
+    assert all(len(d) <= 100 for d in digests)
+    assert sum(d.count('a' * 40) for d in digests) == 5
+
+
+def test_burst_from_threads_becomes_one_digest():
+    """Alerts submitted from worker threads within the window reach each chat as one message"""
+    bot = _FakeBot()
+    dispatcher = AlertDispatcher(bot.send, batch_window=0.1)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        threads = [threading.Thread(target=dispatcher.submit, args=(loop, 1, f'leg {i}')) for i in range(20)]
+        threads.append(threading.Thread(target=dispatcher.submit, args=(loop, 2, 'single')))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        await asyncio.sleep(0.3)
+
+    asyncio.run(scenario())
+    by_chat = {chat: text for chat, text, _ in bot.sent}
+    assert len(bot.sent) == 2
+    assert by_chat[1].startswith('📬 *20 alerts*') and all(f'leg {i}' in by_chat[1] for i in range(20))
+    assert by_chat[2] == 'single'
+    assert dispatcher.stats['digests'] == 1
+
+
+def test_per_chat_rate_limit_and_flood_control():
+    """Sends to one chat are spaced by the chat rate; RetryAfter is waited out and retried"""
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert [bucket.reserve() == 0 for _ in range(3)] == [True, True, False]
+
+    bot = _FakeBot()
+    dispatcher = AlertDispatcher(bot.send, chat_rate=20, chat_burst=1)
+
+    async def scenario(dispatcher):
+        return await asyncio.gather(*(dispatcher.send(7, f'm{i}') for i in range(3)))
+
+    assert asyncio.run(scenario(dispatcher)) == [True, True, True]
+    times = [sent_at for _, _, sent_at in bot.sent]
+    assert all(later - earlier >= 0.04 for earlier, later in zip(times, times[1:]))
+
+    # Flood control holds later sends to any chat for the requested time; the message is retried
+    bot = _FakeBot(flood_once=True)
+    dispatcher = AlertDispatcher(bot.send)
+
+    async def one_after_another():
+        return [await dispatcher.send(7, 'flooded'), await dispatcher.send(8, 'other chat')]
+
+    started = time.monotonic()
+    assert asyncio.run(one_after_another()) == [True, True]
+    assert [text for _, text, _ in bot.sent] == ['flooded', 'other chat']
+    assert all(sent_at - started >= 0.05 for _, _, sent_at in bot.sent)
+    assert dispatcher.stats['retry_after'] == 1
+
+
+def test_undelivered_alerts_are_kept():
+    """Failed sends and alerts still batching at shutdown go to on_undelivered"""
+    kept = []
+    bot = _FakeBot(fail_for={3})
+    dispatcher = AlertDispatcher(bot.send, on_undelivered=lambda chat, text: kept.append((chat, text)),
+                                 batch_window=10)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        dispatcher.submit(loop, 3, 'to a blocked chat')
+        dispatcher.submit(loop, 4, 'flushed on close')
+        await asyncio.sleep(0.01)
+        await dispatcher.close(timeout=1)
+
+    started = time.monotonic()
+    asyncio.run(scenario())
+    assert time.monotonic() - started < 5
+    assert kept == [(3, 'to a blocked chat')]
+    assert [text for _, text, _ in bot.sent] == ['flushed on close']
+
+    # A closed loop refuses new work so the caller can keep the alert
+    loop = asyncio.new_event_loop()
+    loop.close()
+    assert dispatcher.submit(loop, 4, 'late') is False
+
+
+if __name__ == "__main__":
+    test_digest_packing()
+    test_burst_from_threads_becomes_one_digest()
+    test_per_chat_rate_limit_and_flood_control()
+    test_undelivered_alerts_are_kept()
+    print("All Telegram alert dispatcher tests passed")
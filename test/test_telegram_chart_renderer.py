@@ -0,0 +1,157 @@
+"""
+Tests for the Telegram bot's off-loop chart renderer
+"""
+
+import os
+import sys
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.telegram_chart_renderer import ChartRenderer, ChartWorkerPool
+
+
+class _SlowRender:
+    """Stands in for Kaleido: blocks until released and counts renders"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, payload):
+        self.calls.append(payload['title'])
+        self.release.wait(5)
+        if payload['title'] == 'broken':
+            raise RuntimeError('kaleido crashed')
+        return f"png:{payload['title']}".encode()
+
+
+def _renderer(render, **kwargs):
+    return ChartRenderer(executor=ThreadPoolExecutor(max_workers=4), render_fn=render, **kwargs)
+
+
+def test_render_runs_off_the_event_loop_and_caches():
+    """The loop keeps running during a render; the same key is served from the cache"""
+    render = _SlowRender()
+    renderer = _renderer(render)
+
+    async def scenario():
+        task = asyncio.create_task(renderer.render(('SBIN', 'NSE', '5m', 5, 't1'), {'title': 'SBIN'}))
+        # Other work proceeds while the render is blocked
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        render.release.set()
+        first = await task
+        second = await renderer.render(('SBIN', 'NSE', '5m', 5, 't1'), {'title': 'SBIN'})
+        # A new last bar is a different chart
+        third = await renderer.render(('SBIN', 'NSE', '5m', 5, 't2'), {'title': 'SBIN'})
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == second == third == b'png:SBIN'
+    assert len(render.calls) == 2
+    assert renderer.stats['cache_hits'] == 1
+
+
+def test_identical_requests_share_one_render():
+    """Concurrent requests for the same chart wait on a single render"""
+    render = _SlowRender()
+    renderer = _renderer(render)
+
+    async def scenario():
+        tasks = [asyncio.create_task(renderer.render('key', {'title': 'NIFTY'})) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        render.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [b'png:NIFTY'] * 3
+    assert render.calls == ['NIFTY']
+    assert renderer.stats['shared'] == 2
+
+
+def test_pending_limit_and_failures():
+    """Requests beyond the pending limit are turned away; failed renders are not cached"""
+    render = _SlowRender()
+    renderer = _renderer(render, max_pending=2)
+
+    async def scenario():
+        tasks = [asyncio.create_task(renderer.render(name, {'title': name})) for name in ('A', 'broken')]
+        await asyncio.sleep(0.05)
+        rejected = await renderer.render('C', {'title': 'C'})
+        render.release.set()
+        return rejected, await asyncio.gather(*tasks)
+
+    rejected, (a, broken) = asyncio.run(scenario())
+    assert rejected is None and a == b'png:A' and broken is None
+    assert renderer.stats['rejected'] == 1 and renderer.stats['failures'] == 1
+    assert renderer.get_cached('A') == b'png:A' and renderer.get_cached('broken') is None
+
+
+def test_cache_evicts_least_recently_used():
+    """Only the newest cache_size charts are kept"""
+    render = _SlowRender()
+    render.release.set()
+    renderer = _renderer(render, cache_size=2)
+
+    async def scenario():
+        for name in ('A', 'B', 'A', 'C'):
+            await renderer.render(name, {'title': name})
+
+    asyncio.run(scenario())
+    assert renderer.get_cached('A') is not None and renderer.get_cached('C') is not None
+    assert renderer.get_cached('B') is None
+
+
+def test_worker_pool_runs_calls_in_dedicated_processes():
+    """Workers are separate interpreters started from the worker module, replaced when they die"""
+    pool = ChartWorkerPool(max_workers=1)
+    try:
+        pid = pool.submit(os.getpid).result(timeout=30)
+        assert pid != os.getpid()
+        assert pool.submit(len, b'png').result(timeout=30) == 3
+        try:
+            pool.submit(int, 'not a number').result(timeout=30)
+            assert False, 'worker errors should be raised'
+        except RuntimeError as e:
+            assert 'ValueError' in str(e)
+
+        # A dead worker fails only the call that was using it
+        os.kill(pid, 9)
+        try:
+            pool.submit(os.getpid).result(timeout=30)
+        except BrokenProcessPool:
+            pass
+        assert pool.submit(os.getpid).result(timeout=30) not in (pid, os.getpid())
+    finally:
+        pool.shutdown()
+
+
+def test_worker_pool_kills_renders_past_the_timeout():
+    """A hung render does not hold its pool thread; the worker is replaced"""
+    pool = ChartWorkerPool(max_workers=1, timeout=1)
+    try:
+        hung_pid = pool.submit(os.getpid).result(timeout=30)
+        started = time.monotonic()
+        try:
+            pool.submit(time.sleep, 60).result(timeout=30)
+            assert False, 'the hung call should time out'
+        except TimeoutError:
+            pass
+        assert time.monotonic() - started < 10
+        assert pool.submit(os.getpid).result(timeout=30) != hung_pid
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_render_runs_off_the_event_loop_and_caches()
+    test_identical_requests_share_one_render()
+    test_pending_limit_and_failures()
+    test_cache_evicts_least_recently_used()
+    test_worker_pool_runs_calls_in_dedicated_processes()
+    test_worker_pool_kills_renders_past_the_timeout()
+    print("All Telegram chart renderer tests passed")
@@ -0,0 +1,122 @@
+"""
+Tests for releasing broker feeds in the WebSocket proxy when clients
+unsubscribe or disconnect: a feed shared by several subscriptions (Bar mode
+rides on the Quote feed) stays subscribed until its last user is gone
+"""
+
+import asyncio
+import os
+import secrets
+import socket
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp_dir = tempfile.mkdtemp(prefix='openalgo-feed-release-test-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}")
+os.environ.setdefault('API_KEY_PEPPER', secrets.token_hex(32))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+os.environ.setdefault('ZMQ_PORT', str(_free_port()))
+
+from websocket_proxy.server import WebSocketProxy
+
+
+class RecordingAdapter:
+    def __init__(self):
+        self.calls = []
+
+    def subscribe(self, symbol, exchange, mode, depth_level=5):
+        self.calls.append(('subscribe', symbol, mode))
+        return {'status': 'success'}
+
+    def unsubscribe(self, symbol, exchange, mode):
+        self.calls.append(('unsubscribe', symbol, mode))
+        return {'status': 'success'}
+
+    def disconnect(self):
+        self.calls.append(('disconnect',))
+
+
+def _proxy(clients):
+    proxy = WebSocketProxy(port=_free_port())
+    adapter = RecordingAdapter()
+    proxy.broker_adapters['user1'] = adapter
+    proxy.user_broker_mapping['user1'] = 'fake'
+    for client_id in clients:
+        proxy.clients[client_id] = object()
+        proxy.user_mapping[client_id] = 'user1'
+    proxy.sent = []
+
+    async def send_message(client_id, message):
+        proxy.sent.append((client_id, message))
+
+    proxy.send_message = send_message
+    return proxy, adapter
+
+
+def _close(proxy):
+    proxy.socket.close(linger=0)
+    proxy.context.term()
+
+
+def _run(coroutine):
+    asyncio.run(coroutine)
+
+
+def test_bar_unsubscribe_keeps_quote_feed_of_other_client():
+    proxy, adapter = _proxy([1, 2])
+    try:
+        _check_bar_unsubscribe(proxy, adapter)
+    finally:
+        _close(proxy)
+
+
+def _check_bar_unsubscribe(proxy, adapter):
+    _run(proxy.subscribe_client(1, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 'Quote'}))
+    _run(proxy.subscribe_client(2, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 'Bar'}))
+
+    _run(proxy.unsubscribe_client(2, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 4}))
+    assert ('unsubscribe', 'SBIN', 2) not in adapter.calls
+    assert ('SBIN', 'NSE', 4) not in proxy.subscription_index
+    assert proxy.subscription_index[('SBIN', 'NSE', 2)] == {1}
+
+    _run(proxy.unsubscribe_client(1, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 2}))
+    assert adapter.calls[-1] == ('unsubscribe', 'SBIN', 2)
+    assert ('SBIN', 'NSE', 2) not in proxy.subscription_index
+
+
+def test_unsubscribe_all_and_disconnect_release_the_feed_once():
+    proxy, adapter = _proxy([1, 2])
+    try:
+        _check_unsubscribe_all(proxy, adapter)
+    finally:
+        _close(proxy)
+
+
+def _check_unsubscribe_all(proxy, adapter):
+    _run(proxy.subscribe_client(1, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 'Bar'}))
+    _run(proxy.subscribe_client(1, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 'Quote'}))
+    _run(proxy.subscribe_client(2, {'symbol': 'SBIN', 'exchange': 'NSE', 'mode': 'Bar'}))
+
+    _run(proxy.unsubscribe_client(1, {'type': 'unsubscribe_all'}))
+    assert [call for call in adapter.calls if call[0] == 'unsubscribe'] == []
+    assert proxy.subscription_index[('SBIN', 'NSE', 4)] == {2}
+
+    _run(proxy.cleanup_client(2))
+    assert [call for call in adapter.calls if call[0] == 'unsubscribe'] == [('unsubscribe', 'SBIN', 2)]
+    assert not proxy.subscription_index
+
+
+if __name__ == "__main__":
+    test_bar_unsubscribe_keeps_quote_feed_of_other_client()
+    test_unsubscribe_all_and_disconnect_release_the_feed_once()
+    print("All WebSocket feed release tests passed")
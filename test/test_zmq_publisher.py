@@ -0,0 +1,136 @@
+"""
+Tests for the shared ZeroMQ publisher used by pooled broker connections
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+
+import zmq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from websocket_proxy.connection_manager import SharedZmqPublisher
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _publish_from_threads(mode: str):
+    os.environ['ZMQ_PUBLISH_MODE'] = mode
+    publisher = SharedZmqPublisher()
+    try:
+        port = publisher.bind(_free_port())
+        subscriber = zmq.Context.instance().socket(zmq.SUB)
+        subscriber.setsockopt(zmq.SUBSCRIBE, b'')
+        subscriber.setsockopt(zmq.RCVTIMEO, 500)
+        subscriber.connect(f"tcp://127.0.0.1:{port}")
+        time.sleep(0.3)  # let the subscription reach the publisher
+
+        channels = [publisher.channel(f"adapter{i}") for i in range(4)]
+
+        def run(channel):
+            for i in range(200):
+                channel.publish(f"NSE_SYM{i}_LTP", {'ltp': i})
+
+        threads = [threading.Thread(target=run, args=(channel,)) for channel in channels]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        received = 0
+        try:
+            while True:
+                topic, payload = subscriber.recv_multipart()
+                received += 1
+        except zmq.Again:
+            pass
+        subscriber.close(linger=0)
+
+        stats = publisher.get_stats()
+        assert received == 800
+        for i in range(4):
+            assert stats[f"adapter{i}"]['published'] == 200
+            assert stats[f"adapter{i}"]['hwm_dropped'] == 0
+    finally:
+        publisher.cleanup()
+        os.environ.pop('ZMQ_PUBLISH_MODE', None)
+
+
+def test_device_mode_delivers_from_all_threads():
+    """Per-thread PUSH sockets feed one PUB socket without losing messages"""
+    _publish_from_threads('device')
+
+
+def test_direct_mode_delivers_from_all_threads():
+    """The locked single-socket mode still works"""
+    _publish_from_threads('direct')
+
+
+def test_thread_sockets_are_closed_after_their_thread_exits():
+    os.environ['ZMQ_PUBLISH_MODE'] = 'device'
+    publisher = SharedZmqPublisher()
+    try:
+        publisher.bind(_free_port())
+        channel = publisher.channel('adapter0')
+        threads = [threading.Thread(target=channel.publish, args=('NSE_SYM_LTP', {'ltp': i})) for i in range(3)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        # Each new thread's socket replaced the previous exited thread's
+        assert len(publisher._push_sockets) == 1
+        publisher.release_channel('adapter0')
+        assert publisher._push_sockets == {}
+
+        channel.publish('NSE_SYM_LTP', {'ltp': 0})
+        assert threading.current_thread() in publisher._push_sockets
+        publisher.release_thread_socket()
+        assert publisher._push_sockets == {}
+    finally:
+        publisher.cleanup()
+        os.environ.pop('ZMQ_PUBLISH_MODE', None)
+
+
+def test_device_mode_counts_pub_side_drops():
+    """Messages the forwarder cannot hand to a full subscriber queue count as dropped"""
+    os.environ['ZMQ_PUBLISH_MODE'] = 'device'
+    os.environ['ZMQ_SNDHWM'] = '10'
+    publisher = SharedZmqPublisher()
+    try:
+        port = publisher.bind(_free_port())
+        subscriber = zmq.Context.instance().socket(zmq.SUB)
+        subscriber.setsockopt(zmq.SUBSCRIBE, b'')
+        subscriber.setsockopt(zmq.RCVHWM, 10)
+        subscriber.connect(f"tcp://127.0.0.1:{port}")
+        time.sleep(0.3)
+
+        # The subscriber never reads, so its queue fills up
+        channel = publisher.channel('adapter0')
+        payload = {'depth': 'x' * 100000}
+        for _ in range(200):
+            channel.publish('NSE_SYM_DEPTH', payload)
+            time.sleep(0.001)
+        time.sleep(0.3)
+
+        stats = publisher.get_stats()['adapter0']
+        assert stats['hwm_dropped'] > 0
+        assert stats['published'] + stats['hwm_dropped'] == 200
+        subscriber.close(linger=0)
+    finally:
+        publisher.cleanup()
+        os.environ.pop('ZMQ_PUBLISH_MODE', None)
+        os.environ.pop('ZMQ_SNDHWM', None)
+
+
+if __name__ == "__main__":
+    test_device_mode_delivers_from_all_threads()
+    test_direct_mode_delivers_from_all_threads()
+    test_thread_sockets_are_closed_after_their_thread_exits()
+    test_device_mode_counts_pub_side_drops()
+    print("All ZMQ publisher tests passed")
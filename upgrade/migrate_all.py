@@ -49,6 +49,8 @@ MIGRATIONS = [
 
     # Performance migrations
     ('migrate_indexes.py', 'Database Performance Indexes'),
+    ('migrate_api_key_fingerprint.py', 'Indexed API Key Lookup'),
+    ('migrate_metrics_rollups.py', 'Latency & Traffic Dashboard Rollups'),
 ]
 
 def run_migration(script_name, description):
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Migration script for indexed API key lookup.
+
+This script:
+1. Adds 'api_key_fingerprint' column to api_keys table
+2. Creates a unique index on the fingerprint
+3. Backfills fingerprints for existing keys (HMAC-SHA256 of the decrypted key with API_KEY_PEPPER)
+
+Without fingerprints every cache miss in verify_api_key runs Argon2 against
+every stored key. After this migration a miss is one indexed lookup and at
+most one Argon2 verification.
+
+Usage:
+    python migrate_api_key_fingerprint.py
+"""
+
+import os
+import sys
+from sqlalchemy import create_engine, inspect, text
+
+# Set UTF-8 encoding for output to handle Unicode characters on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def get_database_url():
+    """Get database URL from environment"""
+    from dotenv import load_dotenv
+
+    # Get the project root directory (parent of upgrade folder)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    # Load .env from project root
+    load_dotenv(os.path.join(project_root, '.env'))
+
+    database_url = os.getenv('DATABASE_URL')
+
+    # Convert relative SQLite paths to absolute paths
+    if database_url and database_url.startswith('sqlite:///'):
+        relative_path = database_url.replace('sqlite:///', '', 1)
+        if not os.path.isabs(relative_path):
+            absolute_path = os.path.join(project_root, relative_path)
+            database_url = f'sqlite:///{absolute_path}'
+
+    return database_url
+
+def check_table_exists(engine, table_name):
+    """Check if a table exists"""
+    inspector = inspect(engine)
+    return table_name in inspector.get_table_names()
+
+def check_column_exists(engine, table_name, column_name):
+    """Check if a column exists in a table"""
+    inspector = inspect(engine)
+    columns = [col['name'] for col in inspector.get_columns(table_name)]
+    return column_name in columns
+
+def add_fingerprint_column(engine):
+    """Add api_key_fingerprint column to api_keys table"""
+    try:
+        if check_column_exists(engine, 'api_keys', 'api_key_fingerprint'):
+            logger.info("✓ api_key_fingerprint column already exists in api_keys table")
+            return True
+
+        logger.info("Adding api_key_fingerprint column to api_keys table...")
+        with engine.connect() as conn:
+            conn.execute(text("ALTER TABLE api_keys ADD COLUMN api_key_fingerprint VARCHAR(64)"))
+            conn.commit()
+
+        logger.info("✓ api_key_fingerprint column added successfully")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error adding api_key_fingerprint column: {e}")
+        return False
+
+def create_fingerprint_index(engine):
+    """Create unique index on api_key_fingerprint"""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_api_keys_fingerprint
+                ON api_keys(api_key_fingerprint)
+            """))
+            conn.commit()
+
+        logger.info("✓ idx_api_keys_fingerprint index ready")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error creating idx_api_keys_fingerprint index: {e}")
+        return False
+
+def backfill_fingerprints(engine):
+    """Compute fingerprints for keys that do not have one yet"""
+    try:
+        # Imported here so API_KEY_PEPPER is loaded from .env first
+        from database.auth_db import compute_api_key_fingerprint, decrypt_token
+
+        with engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT id, user_id, api_key_encrypted FROM api_keys
+                WHERE api_key_fingerprint IS NULL
+            """)).fetchall()
+
+            if not rows:
+                logger.info("✓ All API keys already have fingerprints")
+                return True
+
+            logger.info(f"Backfilling fingerprints for {len(rows)} API key(s)...")
+            updated = 0
+            for row_id, user_id, encrypted_key in rows:
+                api_key = decrypt_token(encrypted_key)
+                if not api_key:
+                    logger.warning(f"⚠ Could not decrypt API key for user {user_id}; it will be fingerprinted on next use")
+                    continue
+
+                conn.execute(
+                    text("UPDATE api_keys SET api_key_fingerprint = :fingerprint WHERE id = :id"),
+                    {'fingerprint': compute_api_key_fingerprint(api_key), 'id': row_id}
+                )
+                updated += 1
+            conn.commit()
+
+        logger.info(f"✓ Backfilled {updated} fingerprint(s)")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error backfilling fingerprints: {e}")
+        return False
+
+def main():
+    """Main migration function"""
+    print("="*60)
+    print("API Key Fingerprint Migration")
+    print("="*60)
+    print()
+
+    database_url = get_database_url()
+    if not database_url:
+        logger.error("DATABASE_URL not found in environment")
+        return False
+
+    try:
+        engine = create_engine(database_url)
+        logger.info("✓ Database connection established")
+    except Exception as e:
+        logger.error(f"✗ Failed to connect to database: {e}")
+        return False
+
+    if not check_table_exists(engine, 'api_keys'):
+        logger.info("✓ api_keys table not created yet - fingerprint column will be created with it")
+        return True
+
+    success = True
+
+    # Step 1: Add column
+    if not add_fingerprint_column(engine):
+        return False
+
+    # Step 2: Unique index
+    if not create_fingerprint_index(engine):
+        success = False
+
+    # Step 3: Backfill existing keys
+    if not backfill_fingerprints(engine):
+        success = False
+
+    print()
+    if success:
+        print("="*60)
+        print("✓ Migration completed successfully!")
+        print("="*60)
+    else:
+        print("="*60)
+        print("✗ Migration completed with errors")
+        print("="*60)
+        print("Please check the logs above for details")
+    print()
+
+    return success
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
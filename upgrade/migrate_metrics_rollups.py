@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Migration script for latency and traffic dashboard rollups.
+
+This script:
+1. Creates 'order_latency_rollups' in the latency DB and 'traffic_rollups' in the logs DB
+2. Backfills both from the existing order_latency / traffic_logs rows
+
+The latency and traffic dashboards read these hourly rollups (counters plus
+mergeable quantile sketches) instead of scanning every logged row. The app
+creates the tables on startup but only rolls up new rows, so the backfill
+recomputes everything from the raw tables once and marks the result with
+writer 'backfill'; later runs skip it.
+
+Usage:
+    python migrate_metrics_rollups.py
+"""
+
+import os
+import sys
+from sqlalchemy import inspect
+
+# Set UTF-8 encoding for output to handle Unicode characters on Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def load_environment():
+    """Load .env from project root so database URLs resolve like the app"""
+    from dotenv import load_dotenv
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    load_dotenv(os.path.join(project_root, '.env'))
+    os.chdir(project_root)
+
+def migrate_rollup_table(name, engine, session, rollup_model, source_table, rebuild):
+    """Create a rollup table if needed and backfill it once"""
+    try:
+        inspector = inspect(engine)
+        if source_table not in inspector.get_table_names():
+            logger.info(f"✓ {source_table} table not created yet - {name} rollups will be created with it")
+            return True
+
+        rollup_model.__table__.create(bind=engine, checkfirst=True)
+        logger.info(f"✓ {rollup_model.__tablename__} table ready")
+
+        if session.query(rollup_model).filter_by(writer='backfill').first() is not None:
+            logger.info(f"✓ {name} rollups already backfilled")
+            return True
+
+        logger.info(f"Backfilling {name} rollups from {source_table}...")
+        rows = rebuild()
+        logger.info(f"✓ Backfilled {name} rollups from {rows} row(s)")
+        return True
+
+    except Exception as e:
+        logger.error(f"✗ Error migrating {name} rollups: {e}")
+        return False
+    finally:
+        session.remove()
+
+def main():
+    """Main migration function"""
+    print("="*60)
+    print("Latency & Traffic Rollups Migration")
+    print("="*60)
+    print()
+
+    load_environment()
+
+    # Imported after .env is loaded so the engines use the configured URLs
+    from database.latency_db import latency_engine, latency_session, OrderLatencyRollup, rebuild_latency_rollups
+    from database.traffic_db import logs_engine, logs_session, TrafficRollup, rebuild_traffic_rollups
+
+    success = True
+
+    # Step 1: Latency DB
+    if not migrate_rollup_table('latency', latency_engine, latency_session, OrderLatencyRollup,
+                                'order_latency', rebuild_latency_rollups):
+        success = False
+
+    # Step 2: Logs DB
+    if not migrate_rollup_table('traffic', logs_engine, logs_session, TrafficRollup,
+                                'traffic_logs', rebuild_traffic_rollups):
+        success = False
+
+    print()
+    if success:
+        print("="*60)
+        print("✓ Migration completed successfully!")
+        print("="*60)
+    else:
+        print("="*60)
+        print("✗ Migration completed with errors")
+        print("="*60)
+        print("Please check the logs above for details")
+    print()
+
+    return success
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -4,6 +4,8 @@ from threading import Thread
 from utils.session import get_session_expiry_time, set_session_login_time
 from database.auth_db import upsert_auth, get_feed_token as db_get_feed_token
 from database.master_contract_status_db import init_broker_status, update_status
+from utils.httpx_client import prewarm_broker_connections_async
+from services.order_context_service import prime_order_context_async
 import importlib
 import re
 from utils.logging import get_logger
@@ -132,6 +134,7 @@ def handle_auth_success(auth_token, user_session_key, broker, feed_token=None, u
     - Sets session parameters
     - Stores auth token in the database
     - Initiates asynchronous master contract download
+    - Pre-warms the broker's HTTP connection pool
     """
     # Set session parameters
     session['logged_in'] = True
@@ -158,6 +161,10 @@ def handle_auth_success(auth_token, user_session_key, broker, feed_token=None, u
         init_broker_status(broker)
         thread = Thread(target=async_master_contract_download, args=(broker,))
         thread.start()
+        # Open DNS/TCP/TLS to the broker API now so the first order reuses it
+        prewarm_broker_connections_async(broker)
+        # Resolve the order fast path context so the first order skips it too
+        prime_order_context_async(user_session_key)
         return redirect(url_for('dashboard_bp.dashboard'))
     else:
         logger.error(f"Failed to upsert auth token for user {user_session_key}")
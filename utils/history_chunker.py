@@ -0,0 +1,173 @@
+"""
+Chunk planner and concurrent fetcher for broker historical data APIs.
+
+Broker historical endpoints cap the date span of a single request (for
+example 60 days of 1-minute candles). Brokers declare their limits on
+BrokerData and call fetch_history_chunks() instead of walking the range in
+a sequential while loop:
+
+    class BrokerData:
+        # Maximum days per historical request, per OpenAlgo interval
+        HISTORY_CHUNK_DAYS = {'1m': 60, '5m': 100, 'D': 2000}
+        # Historical API rate limit (requests per second)
+        HISTORY_RATE_LIMIT = 3
+
+        def get_history(self, symbol, exchange, interval, start_date, end_date):
+            chunks = plan_history_chunks(start_date, end_date, self.HISTORY_CHUNK_DAYS[interval])
+            frames = fetch_history_chunks('zerodha', chunks, fetch_chunk,
+                                          calls_per_second=self.HISTORY_RATE_LIMIT)
+            df = merge_history_chunks(frames, columns=['timestamp', 'open', ...])
+
+Chunks are fetched in parallel, paced by a per-broker rate limiter shared by
+every request in the process, and merged back in chronological order with
+boundary candles de-duplicated.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bound on parallel chunk requests for a single history call
+HISTORY_FETCH_WORKERS = int(os.getenv('HISTORY_FETCH_WORKERS', '4'))
+
+DateLike = Union[str, datetime, pd.Timestamp]
+Chunk = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+class HistoryRateLimiter:
+    """Thread-safe limiter that spaces historical API calls evenly"""
+
+    def __init__(self, calls_per_second: float):
+        self.min_interval = 1.0 / calls_per_second if calls_per_second > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Reserve the next call slot and sleep until it arrives"""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.min_interval
+        # Sleep outside the lock so other threads can reserve later slots
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+_rate_limiters: Dict[str, HistoryRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_history_rate_limiter(broker: str, calls_per_second: float) -> HistoryRateLimiter:
+    """Get the process-wide historical API rate limiter for a broker"""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(broker)
+        if limiter is None:
+            limiter = HistoryRateLimiter(calls_per_second)
+            _rate_limiters[broker] = limiter
+        return limiter
+
+
+def plan_history_chunks(start_date: DateLike, end_date: DateLike, chunk_days: int) -> List[Chunk]:
+    """
+    Split a date range into consecutive chunks of at most chunk_days days.
+
+    Args:
+        start_date: Start of the range (date string or datetime)
+        end_date: End of the range (date string or datetime)
+        chunk_days: Maximum calendar days per chunk (inclusive)
+
+    Returns:
+        List of (chunk_start, chunk_end) timestamps in chronological order.
+        Each chunk_end is the last day of its chunk; the next chunk starts on
+        the following day.
+    """
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+
+    start = pd.to_datetime(start_date)
+    end = pd.to_datetime(end_date)
+
+    chunks = []
+    current_start = start
+    while current_start <= end:
+        current_end = min(current_start + timedelta(days=chunk_days - 1), end)
+        chunks.append((current_start, current_end))
+        # Next chunk starts at midnight of the following day
+        current_start = (current_end + timedelta(days=1)).normalize()
+    return chunks
+
+
+def merge_history_chunks(frames: List[Optional[pd.DataFrame]], columns: List[str],
+                         key: str = 'timestamp') -> pd.DataFrame:
+    """
+    Merge chunk DataFrames in order, dropping duplicate boundary candles.
+
+    Args:
+        frames: Chunk results in chronological order (None/empty are skipped)
+        columns: Columns of the empty DataFrame returned when there is no data
+        key: Column used for ordering and de-duplication
+
+    Returns:
+        Combined DataFrame sorted by key
+    """
+    frames = [df for df in frames if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.drop_duplicates(subset=[key], keep='last').sort_values(key).reset_index(drop=True)
+
+
+def fetch_history_chunks(
+    broker: str,
+    chunks: List[Chunk],
+    fetch_chunk: Callable[[pd.Timestamp, pd.Timestamp], Optional[pd.DataFrame]],
+    calls_per_second: float,
+    max_workers: Optional[int] = None
+) -> List[Optional[pd.DataFrame]]:
+    """
+    Fetch chunks concurrently under the broker's historical rate limit.
+
+    Args:
+        broker: Broker name, used to share the rate limiter across requests
+        chunks: Output of plan_history_chunks()
+        fetch_chunk: Callable that fetches one (start, end) chunk
+        calls_per_second: Broker's historical API rate limit
+        max_workers: Parallel requests (defaults to HISTORY_FETCH_WORKERS)
+
+    Returns:
+        Chunk results in the same order as chunks. The first exception raised
+        by fetch_chunk is re-raised.
+    """
+    if not chunks:
+        return []
+
+    limiter = get_history_rate_limiter(broker, calls_per_second)
+
+    def run(chunk: Chunk):
+        limiter.wait()
+        logger.debug(f"Fetching {broker} history chunk {chunk[0]} to {chunk[1]}")
+        return fetch_chunk(*chunk)
+
+    if len(chunks) == 1:
+        return [run(chunks[0])]
+
+    workers = min(max_workers or HISTORY_FETCH_WORKERS, len(chunks))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{broker}-history") as executor:
+        futures = [executor.submit(run, chunk) for chunk in chunks]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
@@ -1,32 +1,222 @@
 """
 Shared httpx client module with connection pooling support for all broker APIs
 with automatic protocol negotiation (HTTP/2 when available, HTTP/1.1 fallback)
+
+Each broker gets its own connection pool, so one broker's slow or bursty API
+cannot exhaust the connections another broker's orders need. Callers inside
+broker/<name>/ get their broker's pool from get_httpx_client() without
+passing a name. Pools can be pre-warmed (DNS + TCP + TLS) at login so the
+first order does not pay for the handshake, and every pool keeps per-host
+counters for connection reuse, TLS handshakes and connection wait time.
+
+get_async_httpx_client() is the httpx.AsyncClient twin for async code.
 """
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, Optional
+
 import httpx
-from typing import Optional
 from utils.logging import get_logger
 
 # Set up logging
 logger = get_logger(__name__)
 
-# Global httpx client for connection pooling
-_httpx_client = None
+DEFAULT_POOL = 'default'
+
+# Connection limits per pool; <BROKER>_HTTP_MAX_CONNECTIONS etc. override one broker
+BROKER_HTTP_MAX_CONNECTIONS = int(os.getenv('BROKER_HTTP_MAX_CONNECTIONS', '50'))
+BROKER_HTTP_MAX_KEEPALIVE = int(os.getenv('BROKER_HTTP_MAX_KEEPALIVE', '20'))
+BROKER_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('BROKER_HTTP_KEEPALIVE_EXPIRY', '120'))
+
+# Seconds between keep-warm pings to a pool's hosts (0 = only warm at login)
+BROKER_HTTP_KEEPWARM_INTERVAL = float(os.getenv('BROKER_HTTP_KEEPWARM_INTERVAL', '0'))
+
+# Global httpx clients for connection pooling, one per broker
+_clients: Dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+# Async clients are bound to the event loop that created them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+
+_keepwarm_state = {'thread': None}
+
+
+class HostMetrics:
+    """Connection and timing counters for one host of one pool.
+
+    Updated from every request thread (and the async loops), so counters are
+    only changed and read while holding `lock`.
+    """
+
+    __slots__ = ('requests', 'errors', 'connections_opened', 'tls_handshakes',
+                 'connect_ms', 'tls_ms', 'wait_ms', 'total_ms', 'last_used', 'lock')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.connect_ms = 0.0
+        self.tls_ms = 0.0
+        self.wait_ms = 0.0
+        self.total_ms = 0.0
+        self.last_used = 0.0
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'connections_opened': self.connections_opened,
+            'reused': self.requests - self.connections_opened,
+            'reuse_rate': round((self.requests - self.connections_opened) / requests * 100, 2) if self.requests else 0.0,
+            'tls_handshakes': self.tls_handshakes,
+            'avg_connect_ms': round(self.connect_ms / self.connections_opened, 2) if self.connections_opened else 0.0,
+            'avg_tls_ms': round(self.tls_ms / self.tls_handshakes, 2) if self.tls_handshakes else 0.0,
+            'avg_wait_ms': round(self.wait_ms / requests, 2),
+            'avg_total_ms': round(self.total_ms / requests, 2),
+            'idle_seconds': round(time.time() - self.last_used, 1) if self.last_used else None,
+        }
+
+
+class PoolMetrics:
+    """Per-host metrics for one connection pool, fed by httpcore trace events"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hosts: Dict[str, HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    def host(self, host: str) -> HostMetrics:
+        metrics = self.hosts.get(host)
+        if metrics is None:
+            with self._lock:
+                metrics = self.hosts.setdefault(host, HostMetrics())
+        return metrics
+
+    def start(self, request: httpx.Request) -> None:
+        """Attach timing state and a trace callback to an outgoing request"""
+        state = {'start': time.perf_counter(), 'host': request.url.host}
+        request.extensions['pool_metrics'] = state
+        request.extensions['trace'] = self._tracer(state)
+
+    def start_async(self, request: httpx.Request) -> None:
+        state = {'start': time.perf_counter(), 'host': request.url.host}
+        request.extensions['pool_metrics'] = state
+        sync_trace = self._tracer(state)
+
+        async def trace(event_name, info):
+            sync_trace(event_name, info)
+
+        request.extensions['trace'] = trace
+
+    def _tracer(self, state: dict):
+        metrics = self.host(state['host'])
+
+        def trace(event_name: str, info: dict) -> None:
+            now = time.perf_counter()
+            if event_name == 'connection.connect_tcp.started':
+                state['connect_start'] = now
+                state.setdefault('wait_end', now)
+            elif event_name == 'connection.connect_tcp.complete':
+                with metrics.lock:
+                    metrics.connections_opened += 1
+                    metrics.connect_ms += (now - state.get('connect_start', now)) * 1000
+            elif event_name == 'connection.start_tls.started':
+                state['tls_start'] = now
+            elif event_name == 'connection.start_tls.complete':
+                with metrics.lock:
+                    metrics.tls_handshakes += 1
+                    metrics.tls_ms += (now - state.get('tls_start', now)) * 1000
+            elif event_name.endswith('send_request_headers.started'):
+                # Time until a connection was available (pool queueing, or the
+                # moment a new connection started to be opened)
+                state.setdefault('wait_end', now)
+
+        return trace
 
-def get_httpx_client() -> httpx.Client:
+    def finish(self, response: httpx.Response) -> Optional[float]:
+        """Record a completed request. Returns its duration in ms."""
+        state = response.request.extensions.get('pool_metrics')
+        if not state:
+            return None
+        now = time.perf_counter()
+        metrics = self.host(state['host'])
+        duration_ms = (now - state['start']) * 1000
+        with metrics.lock:
+            metrics.requests += 1
+            if response.status_code >= 500:
+                metrics.errors += 1
+            metrics.wait_ms += (state.get('wait_end', now) - state['start']) * 1000
+            metrics.total_ms += duration_ms
+            metrics.last_used = time.time()
+        return duration_ms
+
+    def to_dict(self) -> dict:
+        return {host: metrics.to_dict() for host, metrics in list(self.hosts.items())}
+
+
+_pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def _get_pool_metrics(pool: str) -> PoolMetrics:
+    metrics = _pool_metrics.get(pool)
+    if metrics is None:
+        metrics = _pool_metrics.setdefault(pool, PoolMetrics(pool))
+    return metrics
+
+
+def _caller_broker() -> Optional[str]:
+    """Broker name when the calling code (outside this module) lives in broker/<name>/..."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get('__name__') == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return None
+    parts = frame.f_globals.get('__name__', '').split('.')
+    if len(parts) >= 2 and parts[0] == 'broker':
+        return parts[1]
+    return None
+
+
+def _pool_name(broker: Optional[str]) -> str:
+    return (broker or DEFAULT_POOL).lower()
+
+
+def get_httpx_client(broker: Optional[str] = None) -> httpx.Client:
     """
     Returns an HTTP client with automatic protocol negotiation.
-    The client will use HTTP/2 when the server supports it, 
+    The client will use HTTP/2 when the server supports it,
     otherwise automatically falls back to HTTP/1.1.
-    
+
+    Args:
+        broker: Pool to use. Defaults to the calling broker module's name
+            (broker/<name>/...), or the shared default pool elsewhere.
+
     Returns:
         httpx.Client: A configured HTTP client with protocol auto-negotiation
     """
-    global _httpx_client
-    
-    if _httpx_client is None:
-        _httpx_client = _create_http_client()
-        logger.info("Created HTTP client with automatic protocol negotiation (HTTP/2 preferred, HTTP/1.1 fallback)")
-    return _httpx_client
+    pool = _pool_name(broker or _caller_broker())
+
+    client = _clients.get(pool)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(pool)
+            if client is None:
+                client = _create_http_client(pool)
+                _clients[pool] = client
+                logger.info(f"Created HTTP client pool '{pool}' with automatic protocol negotiation")
+    return client
 
 def request(
     method: str,
@@ -36,6 +226,9 @@ def request(
     """
     Make an HTTP request using the shared client with automatic protocol negotiation.
 
+    Broker API timing for latency monitoring is recorded by the client's
+    response hook.
+
     Args:
         method: HTTP method (GET, POST, etc.)
         url: URL to request
@@ -47,26 +240,9 @@ def request(
     Raises:
         httpx.HTTPError: If the request fails
     """
-    import time
-    from flask import g
-
-    client = get_httpx_client()
-
-    # Track actual broker API call time for latency monitoring
-    broker_api_start = time.time()
+    client = get_httpx_client(_caller_broker())
     response = client.request(method, url, **kwargs)
-    broker_api_end = time.time()
-
-    # Store broker API time in Flask's g object for latency tracking
-    if hasattr(g, 'latency_tracker'):
-        broker_api_time_ms = (broker_api_end - broker_api_start) * 1000
-        g.broker_api_time = broker_api_time_ms
-        logger.debug(f"Broker API call took {broker_api_time_ms:.2f}ms")
-
-    # Log the actual HTTP version used (info level for visibility)
-    if response.http_version:
-        logger.info(f"Request used {response.http_version} - URL: {url[:50]}...")
-
+    logger.debug(f"Request used {response.http_version} - URL: {url[:50]}...")
     return response
 
 # Shortcut methods for common HTTP methods
@@ -83,7 +259,71 @@ def delete(url: str, **kwargs) -> httpx.Response:
     return request('DELETE', url, **kwargs)
 
 
-def _create_http_client() -> httpx.Client:
+class _RedirectTransport(httpx.HTTPTransport):
+    """Transport that rewrites every request to a fixed base URL (used for mock brokers)"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.target = httpx.URL(base_url)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        original_host = request.url.host
+        request.url = request.url.copy_with(
+            scheme=self.target.scheme,
+            host=self.target.host,
+            port=self.target.port
+        )
+        request.headers['Host'] = request.url.netloc.decode('ascii')
+        request.headers['X-Original-Host'] = original_host
+        return super().handle_request(request)
+
+
+def _pool_limits(pool: str) -> httpx.Limits:
+    """Connection limits for a pool, with optional <POOL>_HTTP_* overrides"""
+    prefix = pool.upper()
+    return httpx.Limits(
+        max_keepalive_connections=int(os.getenv(f'{prefix}_HTTP_MAX_KEEPALIVE', BROKER_HTTP_MAX_KEEPALIVE)),
+        max_connections=int(os.getenv(f'{prefix}_HTTP_MAX_CONNECTIONS', BROKER_HTTP_MAX_CONNECTIONS)),
+        keepalive_expiry=float(os.getenv(f'{prefix}_HTTP_KEEPALIVE_EXPIRY', BROKER_HTTP_KEEPALIVE_EXPIRY))
+    )
+
+
+def _http2_enabled() -> bool:
+    # Detect if running in standalone mode (Docker/production) vs integrated mode (local dev)
+    # In standalone mode, disable HTTP/2 to avoid protocol negotiation issues
+    app_mode = os.environ.get('APP_MODE', 'integrated').strip().strip("'\"")
+    return app_mode != 'standalone'
+
+
+def _override_url() -> str:
+    # Benchmark/testing hook: send all broker traffic to a local mock broker
+    return os.environ.get('BROKER_HTTP_OVERRIDE_URL', '').strip().strip("'\"")
+
+
+_flask = {}
+
+
+def _record_broker_api_time(duration_ms: float) -> None:
+    """Store broker API time in Flask's g object for latency tracking"""
+    if not _flask:
+        try:
+            from flask import g, has_request_context
+            _flask.update(g=g, has_request_context=has_request_context)
+        except ImportError:
+            _flask['g'] = None
+    g = _flask.get('g')
+    if g is None:
+        return
+    try:
+        if _flask['has_request_context']() and hasattr(g, 'latency_tracker'):
+            g.broker_api_time = duration_ms
+            logger.debug(f"Broker API call took {duration_ms:.2f}ms")
+    except (RuntimeError, AttributeError):
+        # Not in Flask request context or g not available
+        pass
+
+
+def _create_http_client(pool: str = DEFAULT_POOL) -> httpx.Client:
     """
     Create a new HTTP client with automatic protocol negotiation and latency tracking.
     Enables both HTTP/2 and HTTP/1.1, letting httpx choose the best protocol.
@@ -91,55 +331,40 @@ def _create_http_client() -> httpx.Client:
     Returns:
         httpx.Client: A configured HTTP client with protocol auto-negotiation and timing hooks
     """
-    import os
-    import time
-    from flask import g
+    metrics = _get_pool_metrics(pool)
 
     # Event hooks for tracking broker API timing
     def log_request(request):
         """Hook called before request is sent"""
-        request.extensions['start_time'] = time.time()
+        metrics.start(request)
         logger.debug(f"Starting request to {request.url}")
 
     def log_response(response):
         """Hook called after response is received"""
         try:
-            start_time = response.request.extensions.get('start_time')
-            if start_time:
-                duration_ms = (time.time() - start_time) * 1000
-
-                # Store broker API time in Flask's g object for latency tracking
-                try:
-                    from flask import has_request_context
-                    if has_request_context() and hasattr(g, 'latency_tracker'):
-                        g.broker_api_time = duration_ms
-                        logger.debug(f"Broker API call took {duration_ms:.2f}ms")
-                except (RuntimeError, AttributeError):
-                    # Not in Flask request context or g not available
-                    pass
-
+            duration_ms = metrics.finish(response)
+            if duration_ms is not None:
+                _record_broker_api_time(duration_ms)
                 logger.debug(f"Request completed in {duration_ms:.2f}ms")
         except Exception as e:
             logger.error(f"Error in response hook: {e}")
 
     try:
-        # Detect if running in standalone mode (Docker/production) vs integrated mode (local dev)
-        # In standalone mode, disable HTTP/2 to avoid protocol negotiation issues
-        app_mode = os.environ.get('APP_MODE', 'integrated').strip().strip("'\"")
-        is_standalone = app_mode == 'standalone'
+        http2_enabled = _http2_enabled()
+        limits = _pool_limits(pool)
 
-        # Disable HTTP/2 in standalone/Docker environments to avoid protocol negotiation issues
-        http2_enabled = not is_standalone
+        override_url = _override_url()
+        transport = None
+        if override_url:
+            transport = _RedirectTransport(override_url, limits=limits)
+            logger.warning(f"BROKER_HTTP_OVERRIDE_URL is set - all broker requests go to {override_url}")
 
         client = httpx.Client(
+            transport=transport,
             http2=http2_enabled,  # Disable HTTP/2 in standalone mode, enable in integrated mode
             http1=True,  # Always enable HTTP/1.1 for compatibility
             timeout=120.0,  # Increased timeout for large historical data requests
-            limits=httpx.Limits(
-                max_keepalive_connections=20,  # Balanced for most broker APIs
-                max_connections=50,  # Reasonable max without overloading
-                keepalive_expiry=120.0  # 2 minutes - good balance
-            ),
+            limits=limits,
             # Add verify parameter to handle SSL/TLS issues in standalone mode
             verify=True,  # Can be set to False for debugging SSL issues (not recommended for production)
             # Add event hooks for latency tracking
@@ -149,10 +374,10 @@ def _create_http_client() -> httpx.Client:
             }
         )
 
-        if is_standalone:
-            logger.info("Running in standalone mode - HTTP/2 disabled for compatibility")
+        if http2_enabled:
+            logger.debug(f"HTTP pool '{pool}': HTTP/2 enabled, limits {limits}")
         else:
-            logger.info("Running in integrated mode - HTTP/2 enabled for optimal performance")
+            logger.debug(f"HTTP pool '{pool}': standalone mode - HTTP/2 disabled for compatibility")
 
         return client
 
@@ -161,14 +386,166 @@ def _create_http_client() -> httpx.Client:
         raise
 
 
+def create_async_httpx_client(pool: str = DEFAULT_POOL, **kwargs) -> httpx.AsyncClient:
+    """
+    Create an httpx.AsyncClient with the same protocol settings, limits and
+    per-host metrics as the sync pools. The caller owns the client and must
+    close it (aclose) on the event loop it was used on.
+
+    Args:
+        pool: Metrics/limits pool name (broker name, 'telegram', ...)
+        **kwargs: Overrides for httpx.AsyncClient arguments (e.g. timeout)
+    """
+    pool = _pool_name(pool)
+    metrics = _get_pool_metrics(pool)
+
+    async def on_request(request):
+        metrics.start_async(request)
+
+    async def on_response(response):
+        try:
+            metrics.finish(response)
+        except Exception as e:
+            logger.error(f"Error in async response hook: {e}")
+
+    limits = kwargs.pop('limits', None) or _pool_limits(pool)
+    options = {
+        'http2': _http2_enabled(),
+        'http1': True,
+        'timeout': 120.0,
+        'limits': limits,
+        'verify': True,
+        'event_hooks': {'request': [on_request], 'response': [on_response]},
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+def get_async_httpx_client(broker: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Async twin of get_httpx_client: a pooled httpx.AsyncClient for the
+    running event loop. Must be called from a coroutine.
+    """
+    pool = _pool_name(broker or _caller_broker())
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(pool)
+    if client is None or client.is_closed:
+        client = create_async_httpx_client(pool)
+        clients[pool] = client
+        logger.debug(f"Created async HTTP client pool '{pool}'")
+    return client
+
+
+async def cleanup_async_httpx_clients():
+    """Close the async clients created on the running event loop"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def get_broker_api_hosts(broker: str) -> list:
+    """
+    Hosts to pre-warm for a broker: the optional "API Hosts" list in
+    broker/<name>/plugin.json plus hosts this process already talked to.
+    """
+    hosts = []
+    plugin_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               'broker', broker, 'plugin.json')
+    try:
+        with open(plugin_path, 'r') as f:
+            hosts.extend(json.load(f).get('API Hosts', []))
+    except (OSError, ValueError):
+        pass
+
+    metrics = _pool_metrics.get(_pool_name(broker))
+    if metrics:
+        hosts.extend(metrics.hosts.keys())
+    return list(dict.fromkeys(hosts))
+
+
+def prewarm_broker_connections(broker: str, hosts: Optional[Iterable[str]] = None) -> int:
+    """
+    Resolve DNS and open TLS connections to a broker's API hosts so the
+    first order after login reuses a warm connection.
+
+    Returns:
+        Number of hosts that answered
+    """
+    pool = _pool_name(broker)
+    client = get_httpx_client(pool)
+    warmed = 0
+    for host in (hosts if hosts is not None else get_broker_api_hosts(broker)):
+        try:
+            # Any response will do; the point is the pooled keep-alive connection
+            client.request('HEAD', f'https://{host}/', timeout=5.0)
+            warmed += 1
+        except httpx.HTTPError as e:
+            logger.debug(f"Pre-warm of {host} for {broker} failed: {e}")
+    if warmed:
+        logger.debug(f"Pre-warmed {warmed} connection(s) for broker {broker}")
+    return warmed
+
+
+def prewarm_broker_connections_async(broker: str) -> None:
+    """Pre-warm in a background thread (used at login) and start keep-warm if configured"""
+    threading.Thread(target=prewarm_broker_connections, args=(broker,),
+                     name=f'httpx-prewarm-{broker}', daemon=True).start()
+    _start_keepwarm()
+
+
+def _keepwarm_loop():
+    """Ping hosts that have been idle long enough for their connection to be dropped"""
+    while True:
+        time.sleep(BROKER_HTTP_KEEPWARM_INTERVAL)
+        for pool, metrics in list(_pool_metrics.items()):
+            if pool not in _clients:
+                continue
+            idle = [host for host, m in list(metrics.hosts.items())
+                    if m.last_used and time.time() - m.last_used >= BROKER_HTTP_KEEPWARM_INTERVAL]
+            if idle:
+                try:
+                    prewarm_broker_connections(pool, idle)
+                except Exception as e:
+                    logger.debug(f"Keep-warm for pool {pool} failed: {e}")
+
+
+def _start_keepwarm():
+    if BROKER_HTTP_KEEPWARM_INTERVAL <= 0:
+        return
+    with _clients_lock:
+        if _keepwarm_state['thread'] is None:
+            thread = threading.Thread(target=_keepwarm_loop, name='httpx-keepwarm', daemon=True)
+            thread.start()
+            _keepwarm_state['thread'] = thread
+
+
+def get_http_pool_stats() -> dict:
+    """Per-pool limits and per-host connection metrics"""
+    stats = {}
+    for pool, metrics in list(_pool_metrics.items()):
+        client = _clients.get(pool)
+        limits = _pool_limits(pool)
+        stats[pool] = {
+            'active': client is not None and not client.is_closed,
+            'max_connections': limits.max_connections,
+            'max_keepalive_connections': limits.max_keepalive_connections,
+            'keepalive_expiry': limits.keepalive_expiry,
+            'hosts': metrics.to_dict(),
+        }
+    return stats
+
+
 def cleanup_httpx_client():
     """
-    Closes the global httpx client and releases its resources.
+    Closes the httpx clients and releases their resources.
     Should be called when the application is shutting down.
     """
-    global _httpx_client
-    
-    if _httpx_client is not None:
-        _httpx_client.close()
-        _httpx_client = None
-        logger.info("Closed HTTP client")
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        client.close()
+    if clients:
+        logger.info(f"Closed {len(clients)} HTTP client pool(s)")
@@ -0,0 +1,52 @@
+"""
+Flask-Limiter storage backed by the shared SQLite counters.
+
+Importing this module registers the `sqlite-shared://` scheme with the
+`limits` library. limiter.py uses it when RATE_LIMIT_STORAGE=shared so
+every gunicorn worker enforces the same fixed-window counters.
+"""
+
+import sqlite3
+
+from limits.storage import Storage
+
+from utils.shared_rate_limit import SharedCounterStore, RATE_LIMIT_SHARED_PATH
+
+SCHEME = 'sqlite-shared'
+
+
+class SharedSQLiteStorage(Storage):
+    """limits storage for the fixed-window strategy (sqlite-shared:///path/to/file.db)"""
+
+    STORAGE_SCHEME = [SCHEME]
+
+    def __init__(self, uri: str = None, wrap_exceptions: bool = False, **options):
+        path = uri[len(f'{SCHEME}:///'):] if uri else RATE_LIMIT_SHARED_PATH
+        self.store = SharedCounterStore(path or RATE_LIMIT_SHARED_PATH)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        return self.store.incr(key, expiry, elastic_expiry, amount)
+
+    def get(self, key: str) -> int:
+        return self.store.get(key)
+
+    def get_expiry(self, key: str) -> int:
+        return int(self.store.get_expiry(key))
+
+    def check(self) -> bool:
+        return self.store.check()
+
+    def reset(self) -> int:
+        return self.store.reset()
+
+    def clear(self, key: str) -> None:
+        self.store.clear(key)
+
+
+def get_storage_uri(path: str = RATE_LIMIT_SHARED_PATH) -> str:
+    return f'{SCHEME}:///{path}'
@@ -0,0 +1,188 @@
+"""
+Mergeable quantile sketches and time-bucketed rollups for latency metrics.
+
+QuantileSketch is a log-bucketed histogram (DDSketch style): every value is
+counted in the bucket whose bounds are within `relative_accuracy` of it, so
+any quantile is reported with that relative error no matter how many values
+were added. Two sketches merge by adding bucket counts, which makes them
+safe to pre-aggregate per broker, per order type and per time bucket and to
+combine later in any order.
+
+RollupAccumulator buffers counters and sketches per (time bucket, key) in
+memory until the owning database module drains and persists them.
+"""
+
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class QuantileSketch:
+    """Log-bucketed histogram with bounded relative error per quantile"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, count: int = 1) -> None:
+        if value is None or count <= 0:
+            return
+        value = float(value)
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Add other's counts into this sketch (both must use the same accuracy)"""
+        if other.count == 0:
+            return self
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _bin_value(self, index: int) -> float:
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def _buckets(self) -> Iterable[Tuple[float, int]]:
+        """(representative value, count) pairs in ascending order"""
+        if self.zero_count:
+            yield max(min(0.0, self.max), self.min), self.zero_count
+        for index in sorted(self.bins):
+            yield self._bin_value(index), self.bins[index]
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1); 0 for an empty sketch"""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def histogram(self, bin_count: int = 30) -> Tuple[List[float], List[int]]:
+        """Linear histogram between min and max, like numpy.histogram on the raw values"""
+        if self.count == 0:
+            return [], []
+        low, high = self.min, self.max
+        width = (high - low) / bin_count if high > low else 1
+        counts = [0] * bin_count
+        for value, count in self._buckets():
+            slot = int((min(max(value, low), high) - low) / width)
+            counts[min(slot, bin_count - 1)] += count
+        edges = [low + i * width for i in range(bin_count + 1)]
+        return edges, counts
+
+    def to_dict(self) -> dict:
+        return {
+            'a': self.relative_accuracy,
+            'b': {str(k): v for k, v in self.bins.items()},
+            'z': self.zero_count,
+            'n': self.count,
+            's': self.total,
+            'lo': self.min if self.count else None,
+            'hi': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'QuantileSketch':
+        sketch = cls(data.get('a', 0.01))
+        sketch.bins = {int(k): v for k, v in data.get('b', {}).items()}
+        sketch.zero_count = data.get('z', 0)
+        sketch.count = data.get('n', 0)
+        sketch.total = data.get('s', 0.0)
+        if sketch.count:
+            sketch.min = data['lo']
+            sketch.max = data['hi']
+        return sketch
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text: Optional[str]) -> 'QuantileSketch':
+        return cls.from_dict(json.loads(text)) if text else cls()
+
+
+@dataclass
+class RollupDelta:
+    """Counters and sketches accumulated for one (bucket, key) since the last drain"""
+    counters: Dict[str, float] = field(default_factory=dict)
+    sketches: Dict[str, QuantileSketch] = field(default_factory=dict)
+
+
+def bucket_start(when: datetime, bucket_seconds: int) -> datetime:
+    """Floor a naive UTC datetime to the start of its bucket"""
+    epoch = int((when - datetime(1970, 1, 1)).total_seconds())
+    return datetime.utcfromtimestamp(epoch - epoch % bucket_seconds)
+
+
+class RollupAccumulator:
+    """Thread-safe in-memory buffer of per-bucket counters and sketches"""
+
+    def __init__(self, bucket_seconds: int, relative_accuracy: float = 0.01):
+        self.bucket_seconds = bucket_seconds
+        self.relative_accuracy = relative_accuracy
+        self._pending: Dict[Tuple[datetime, Hashable], RollupDelta] = {}
+        self._lock = threading.Lock()
+        self._last_drain = time.monotonic()
+
+    def record(self, key: Hashable, values: Dict[str, float], when: Optional[datetime] = None,
+               **counters: float) -> None:
+        """Add one observation: values go into sketches, counters are summed"""
+        start = bucket_start(when or datetime.utcnow(), self.bucket_seconds)
+        with self._lock:
+            delta = self._pending.get((start, key))
+            if delta is None:
+                delta = self._pending[(start, key)] = RollupDelta()
+            for name, amount in counters.items():
+                delta.counters[name] = delta.counters.get(name, 0) + amount
+            for name, value in values.items():
+                sketch = delta.sketches.get(name)
+                if sketch is None:
+                    sketch = delta.sketches[name] = QuantileSketch(self.relative_accuracy)
+                sketch.add(value)
+
+    def due(self, interval: float) -> bool:
+        """True when there is pending data older than interval seconds"""
+        return bool(self._pending) and time.monotonic() - self._last_drain >= interval
+
+    def drain(self) -> Dict[Tuple[datetime, Hashable], RollupDelta]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_drain = time.monotonic()
+            return pending
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
@@ -16,7 +16,7 @@ class SecurityMiddleware:
         # Get real client IP (handles proxies)
         client_ip = get_real_ip_from_environ(environ)
 
-        # Check if IP is banned
+        # Check if IP is banned (in-memory ban table, no DB query)
         if IPBan.is_ip_banned(client_ip):
             # Return 403 Forbidden for banned IPs
             status = '403 Forbidden'
@@ -70,15 +70,10 @@ def revoke_user_tokens():
     if 'user' in session:
         username = session.get('user')
         try:
-            from database.auth_db import upsert_auth, auth_cache, feed_token_cache
-
-            # Clear cache entries first to prevent stale data access
-            cache_key_auth = f"auth-{username}"
-            cache_key_feed = f"feed-{username}"
-            if cache_key_auth in auth_cache:
-                del auth_cache[cache_key_auth]
-            if cache_key_feed in feed_token_cache:
-                del feed_token_cache[cache_key_feed]
+            from database.auth_db import upsert_auth, invalidate_user_tokens
+
+            # Clear this user's cache entries first to prevent stale data access
+            invalidate_user_tokens(username)
 
             # Clear symbol cache on logout/session expiry
             try:
@@ -0,0 +1,243 @@
+"""
+Rate limit state shared by every worker process on the host.
+
+With gunicorn running several workers, in-memory counters are per process,
+so a "10 per second" limit really allows 10 per second per worker. When
+RATE_LIMIT_STORAGE=shared, counters live in a small SQLite file (WAL mode)
+instead. Every check is a single short IMMEDIATE transaction on one row, so
+it is O(1) and atomic across processes.
+
+Two algorithms are provided:
+- Fixed-window counters (incr/get/get_expiry) backing Flask-Limiter, see
+  utils/limiter_storage.py
+- GCRA, used by SharedTokenBucket to pace order placement per user
+
+get_order_bucket() is the single place order throttles (basket, split and
+webhook orders) get their per-user bucket from, shared or not.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.logging import get_logger
+from utils.token_bucket import TokenBucket, parse_rate_limit
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'memory').lower()
+RATE_LIMIT_SHARED_PATH = os.getenv('RATE_LIMIT_SHARED_PATH', 'db/ratelimit.db')
+ORDER_RATE_LIMIT = os.getenv('ORDER_RATE_LIMIT', '10 per second')
+SMART_ORDER_RATE_LIMIT = os.getenv('SMART_ORDER_RATE_LIMIT', '2 per second')
+
+# Expired rows are swept every PURGE_EVERY writes
+PURGE_EVERY = 1000
+
+
+class SharedCounterStore:
+    """Fixed-window counters and GCRA state in a SQLite file shared between processes"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS counters '
+            '(key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS gcra (key TEXT PRIMARY KEY, tat REAL NOT NULL)')
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread, reopened after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _after_write(self, conn: sqlite3.Connection, now: float) -> None:
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute('DELETE FROM counters WHERE expires_at <= ?', (now,))
+            conn.execute('DELETE FROM gcra WHERE tat <= ?', (now,))
+
+    # Fixed window counters
+
+    def incr(self, key: str, expiry: float, elastic_expiry: bool = False, amount: int = 1) -> int:
+        """Add amount to key's counter, starting a new window if the old one expired"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT value, expires_at FROM counters WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] <= now:
+                value, expires_at = amount, now + expiry
+            else:
+                value = row[0] + amount
+                expires_at = now + expiry if elastic_expiry else row[1]
+            conn.execute(
+                'INSERT OR REPLACE INTO counters (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, expires_at)
+            )
+            self._after_write(conn, now)
+        return value
+
+    def get(self, key: str) -> int:
+        row = self._conn().execute('SELECT value, expires_at FROM counters WHERE key = ?', (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return 0
+        return row[0]
+
+    def get_expiry(self, key: str) -> float:
+        """Epoch seconds when key's window ends (now if there is no window)"""
+        now = time.time()
+        row = self._conn().execute('SELECT expires_at FROM counters WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] <= now:
+            return now
+        return row[0]
+
+    def clear(self, key: str) -> None:
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM counters WHERE key = ?', (key,))
+            conn.execute('DELETE FROM gcra WHERE key = ?', (key,))
+
+    def reset(self) -> int:
+        """Remove all state. Returns the number of keys removed."""
+        with self._transaction() as conn:
+            removed = conn.execute('DELETE FROM counters').rowcount
+            removed += conn.execute('DELETE FROM gcra').rowcount
+        return removed
+
+    def check(self) -> bool:
+        try:
+            self._conn().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    # GCRA (generic cell rate algorithm)
+
+    def gcra_acquire(self, key: str, interval: float, burst: float = 1, cost: float = 1,
+                     now: Optional[float] = None) -> float:
+        """
+        Take `cost` tokens from a bucket refilling one token every `interval` seconds.
+
+        Only the theoretical arrival time (TAT) is stored per key.
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds to wait before retrying
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            row = conn.execute('SELECT tat FROM gcra WHERE key = ?', (key,)).fetchone()
+            tat = max(row[0], now) if row else now
+            new_tat = tat + cost * interval
+            allow_at = new_tat - burst * interval
+            if now < allow_at:
+                return allow_at - now
+            conn.execute('INSERT OR REPLACE INTO gcra (key, tat) VALUES (?, ?)', (key, new_tat))
+            self._after_write(conn, now)
+        return 0.0
+
+
+class SharedTokenBucket:
+    """TokenBucket interface backed by GCRA state in a SharedCounterStore.
+
+    Falls back to a process-local TokenBucket if the shared file cannot be
+    used, so order pacing never turns off.
+    """
+
+    def __init__(self, store: SharedCounterStore, key: str, rate: float, capacity: Optional[float] = None):
+        self.store = store
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._fallback: Optional[TokenBucket] = None
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        if self._fallback is None:
+            try:
+                return self.store.gcra_acquire(self.key, 1.0 / self.rate, self.capacity, tokens)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared rate limit store unavailable ({e}); pacing {self.key} per process")
+                self._fallback = TokenBucket(self.rate, self.capacity)
+        return self._fallback.try_acquire(tokens)
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available, then take them"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+_store_lock = threading.Lock()
+_store: Optional[SharedCounterStore] = None
+
+
+def shared_storage_enabled() -> bool:
+    return RATE_LIMIT_STORAGE == 'shared'
+
+
+def get_shared_store() -> SharedCounterStore:
+    """Process-wide SharedCounterStore for RATE_LIMIT_SHARED_PATH"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SharedCounterStore(RATE_LIMIT_SHARED_PATH)
+    return _store
+
+
+_order_buckets = {}
+_order_buckets_lock = threading.Lock()
+
+
+def get_order_bucket(api_key: str, rate_class: str = 'regular'):
+    """
+    Per-user order pacing bucket for ORDER_RATE_LIMIT ('regular') or
+    SMART_ORDER_RATE_LIMIT ('smart').
+
+    Buckets hold a single token, so orders are spaced 1/rate apart like the
+    fixed delays they replace, and the spacing holds across every request of
+    the user (and across workers when RATE_LIMIT_STORAGE=shared).
+    """
+    # Never put the API key itself into the shared file
+    user_key = hashlib.sha256(str(api_key).encode()).hexdigest()[:32]
+    key = f"order:{rate_class}:{user_key}"
+
+    with _order_buckets_lock:
+        bucket = _order_buckets.get(key)
+        if bucket is None:
+            limit = SMART_ORDER_RATE_LIMIT if rate_class == 'smart' else ORDER_RATE_LIMIT
+            rate = parse_rate_limit(limit)
+            if shared_storage_enabled():
+                bucket = SharedTokenBucket(get_shared_store(), key, rate, capacity=1)
+            else:
+                bucket = TokenBucket(rate, capacity=1)
+            _order_buckets[key] = bucket
+        return bucket
@@ -0,0 +1,78 @@
+"""
+Thread-safe token bucket used to pace order submission per user.
+
+Rates are configured with the same strings Flask-Limiter uses in .env
+(e.g. ORDER_RATE_LIMIT="10 per second"), so the in-process throttles and the
+HTTP limits stay in step.
+"""
+
+import re
+import threading
+import time
+from typing import Optional
+
+_PERIOD_SECONDS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+
+def parse_rate_limit(limit: str, default: float = 10.0) -> float:
+    """
+    Convert a Flask-Limiter style string to requests per second.
+
+    Args:
+        limit: Limit string such as "10 per second", "100/minute" or "5 per 2 seconds"
+        default: Rate returned when the string cannot be parsed
+
+    Returns:
+        Allowed requests per second
+    """
+    match = re.match(r'^\s*(\d+)\s*(?:per|/)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$', str(limit or ''), re.IGNORECASE)
+    if not match:
+        return default
+
+    count = int(match.group(1))
+    multiplier = int(match.group(2) or 1)
+    period = _PERIOD_SECONDS[match.group(3).lower()] * multiplier
+    return count / period
+
+
+class TokenBucket:
+    """Token bucket with a refill rate in tokens per second and a burst capacity"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens if available.
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds to wait before retrying
+        """
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until tokens are available, then take them"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
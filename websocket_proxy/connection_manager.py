@@ -5,18 +5,25 @@ Handles multiple WebSocket connections per broker to overcome symbol limits.
 Each broker typically limits symbols per WebSocket session (e.g., Angel: 1000, Zerodha: 3000).
 This module manages connection pooling transparently without modifying broker adapters.
 
+Subscriptions are placed by load (tick rate), and a background pass moves
+symbols off hot connections and consolidates sparse ones during quiet
+periods; see pool_balancer.py.
+
 Configuration:
     MAX_SYMBOLS_PER_WEBSOCKET: Maximum symbols per single WebSocket connection (default: 1000)
     MAX_WEBSOCKET_CONNECTIONS: Maximum WebSocket connections per user/broker (default: 3)
+    WEBSOCKET_REBALANCE_INTERVAL and related settings: see pool_balancer.py
 """
 
 import os
 import json
 import threading
+import time
 import zmq
 from typing import Dict, List, Optional, Any, Tuple, Callable
 from collections import defaultdict
 from utils.logging import get_logger
+from .pool_balancer import AdapterLoad, AdapterSnapshot, Move, PoolBalancer, get_rebalance_interval
 
 logger = get_logger(__name__)
 
@@ -50,11 +57,98 @@ def get_max_websocket_connections() -> int:
     return int(os.getenv('MAX_WEBSOCKET_CONNECTIONS', DEFAULT_MAX_WEBSOCKET_CONNECTIONS))
 
 
+def get_zmq_publish_mode() -> str:
+    """'device' (per-thread PUSH sockets into one forwarder) or 'direct' (one locked PUB socket)"""
+    return os.getenv('ZMQ_PUBLISH_MODE', 'device').lower()
+
+
+def get_zmq_sndhwm() -> int:
+    """High water mark (queued messages) for the publisher sockets"""
+    return int(os.getenv('ZMQ_SNDHWM', '1000'))
+
+
+def get_zmq_hwm_policy() -> str:
+    """'drop' a message when the high water mark is reached, or 'block' the adapter thread"""
+    return os.getenv('ZMQ_HWM_POLICY', 'drop').lower()
+
+
+def get_zmq_send_timeout_ms() -> int:
+    """Longest an adapter thread blocks at the high water mark with the 'block' policy"""
+    return int(os.getenv('ZMQ_SEND_TIMEOUT_MS', '100'))
+
+
+class PublishStats:
+    """
+    Publish latency (encode + send) and high water mark drops for one channel.
+    pub_dropped counts messages the device forwarder could not hand to the
+    PUB socket after they were accepted by the channel's PUSH socket.
+    """
+
+    __slots__ = ('published', 'dropped', 'pub_dropped', 'total_us', 'max_us')
+
+    def __init__(self):
+        self.published = 0
+        self.dropped = 0
+        self.pub_dropped = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def record(self, started: float, sent: bool):
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        if sent:
+            self.published += 1
+        else:
+            self.dropped += 1
+        self.total_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+
+    def to_dict(self) -> dict:
+        attempts = self.published + self.dropped
+        return {
+            'published': self.published - self.pub_dropped,
+            'hwm_dropped': self.dropped + self.pub_dropped,
+            'avg_publish_us': round(self.total_us / attempts, 1) if attempts else 0.0,
+            'max_publish_us': round(self.max_us, 1),
+        }
+
+
+class PublisherChannel:
+    """
+    One adapter's handle on the SharedZmqPublisher.
+    Messages are JSON encoded in the calling thread, outside any lock.
+    """
+
+    def __init__(self, publisher: 'SharedZmqPublisher', name: str):
+        self.publisher = publisher
+        self.name = name
+        self.route = name.encode('utf-8')
+        self.stats = PublishStats()
+
+    def publish(self, topic: str, data: dict):
+        started = time.perf_counter()
+        frames = [topic.encode('utf-8'), json.dumps(data).encode('utf-8')]
+        self.stats.record(started, self.publisher._send(frames, self.route))
+
+
 class SharedZmqPublisher:
     """
     Shared ZeroMQ publisher that can be used by multiple adapter instances.
     Ensures all connections publish to the same ZeroMQ socket, so the WebSocketProxy
     receives data from all connections on a single port.
+
+    In 'device' mode (default) every publishing thread gets its own PUSH
+    socket connected over inproc to a forwarder thread that owns the PUB
+    socket, so adapter threads never wait on each other. A thread's socket is
+    closed by release_thread_socket(), or once the thread has exited, when
+    another thread opens one or a channel is released. 'direct' mode sends
+    on the PUB socket under a lock, with JSON encoding done outside it.
+
+    Configuration:
+        ZMQ_PUBLISH_MODE: 'device' or 'direct' (default: device)
+        ZMQ_SNDHWM: High water mark per socket (default: 1000)
+        ZMQ_HWM_POLICY: 'drop' or 'block' at the high water mark (default: drop)
+        ZMQ_SEND_TIMEOUT_MS: Longest block with the 'block' policy before dropping (default: 100)
     """
 
     _instance = None
@@ -75,13 +169,27 @@ class SharedZmqPublisher:
 
         self._initialized = True
         self.logger = get_logger("shared_zmq_publisher")
+        self.publish_mode = get_zmq_publish_mode()
+        self.hwm = get_zmq_sndhwm()
+        self.drop_on_hwm = get_zmq_hwm_policy() != 'block'
+        self.send_timeout_ms = get_zmq_send_timeout_ms()
+
         self.context = zmq.Context()
         self.socket = self.context.socket(zmq.PUB)
         self.socket.setsockopt(zmq.LINGER, 1000)
-        self.socket.setsockopt(zmq.SNDHWM, 1000)
+        self.socket.setsockopt(zmq.SNDHWM, self.hwm)
         self.zmq_port = None
         self._bound = False
-        self._publish_lock = threading.Lock()
+        self._publish_lock = threading.Lock()  # Guards the PUB socket in direct mode
+
+        # Device mode: thread-local PUSH sockets feeding a forwarder thread
+        self._inproc_address = f"inproc://shared-zmq-publisher-{id(self)}"
+        self._local = threading.local()
+        self._push_sockets: Dict[threading.Thread, Any] = {}
+        self._device_thread: Optional[threading.Thread] = None
+
+        self.channels: Dict[str, PublisherChannel] = {}
+        self._default_channel = PublisherChannel(self, 'default')
 
     def bind(self, port: Optional[int] = None) -> int:
         """
@@ -104,11 +212,7 @@ class SharedZmqPublisher:
             if port:
                 try:
                     self.socket.bind(f"tcp://*:{port}")
-                    self.zmq_port = port
-                    self._bound = True
-                    os.environ["ZMQ_PORT"] = str(port)
-                    self.logger.info(f"Shared ZMQ publisher bound to port {port}")
-                    return port
+                    return self._on_bound(port)
                 except zmq.ZMQError as e:
                     self.logger.warning(f"Failed to bind to port {port}: {e}")
 
@@ -117,46 +221,188 @@ class SharedZmqPublisher:
             for attempt_port in range(default_port, default_port + 100):
                 try:
                     self.socket.bind(f"tcp://*:{attempt_port}")
-                    self.zmq_port = attempt_port
-                    self._bound = True
-                    os.environ["ZMQ_PORT"] = str(attempt_port)
-                    self.logger.info(f"Shared ZMQ publisher bound to port {attempt_port}")
-                    return attempt_port
+                    return self._on_bound(attempt_port)
                 except zmq.ZMQError:
                     continue
 
             raise RuntimeError("Could not bind shared ZMQ publisher to any port")
 
+    def _on_bound(self, port: int) -> int:
+        self.zmq_port = port
+        os.environ["ZMQ_PORT"] = str(port)
+        if self.publish_mode == 'device':
+            self._start_device()
+        self._bound = True
+        self.logger.info(f"Shared ZMQ publisher bound to port {port} ({self.publish_mode} mode)")
+        return port
+
+    def _start_device(self):
+        """Start the forwarder thread (inproc PULL -> PUB) and wait until it accepts connections"""
+        ready = threading.Event()
+        self._device_thread = threading.Thread(
+            target=self._run_device, args=(ready,), name="zmq-publisher-device", daemon=True
+        )
+        self._device_thread.start()
+        ready.wait(timeout=5)
+
+    def _run_device(self, ready: threading.Event):
+        # The PUB socket is used only by this thread from here on. NODROP makes
+        # a full subscriber queue raise zmq.Again so the drop can be counted.
+        self.socket.setsockopt(zmq.XPUB_NODROP, 1)
+        if not self.drop_on_hwm:
+            self.socket.setsockopt(zmq.SNDTIMEO, self.send_timeout_ms)
+        send_flags = zmq.NOBLOCK if self.drop_on_hwm else 0
+        pull = self.context.socket(zmq.PULL)
+        pull.setsockopt(zmq.LINGER, 0)
+        pull.setsockopt(zmq.RCVHWM, self.hwm)
+        pull.bind(self._inproc_address)
+        control = self.context.socket(zmq.PAIR)
+        control.setsockopt(zmq.LINGER, 0)
+        control.bind(f"{self._inproc_address}-control")
+        poller = zmq.Poller()
+        poller.register(pull, zmq.POLLIN)
+        poller.register(control, zmq.POLLIN)
+        ready.set()
+        try:
+            while True:
+                events = dict(poller.poll())
+                if control in events and control.recv() == b'TERMINATE':
+                    break
+                if pull not in events:
+                    continue
+                # Forward what is queued, up to one HWM worth before checking control again
+                for _ in range(self.hwm):
+                    try:
+                        route, *frames = pull.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    try:
+                        self.socket.send_multipart(frames, flags=send_flags)
+                    except zmq.Again:
+                        self._count_pub_drop(route)
+        except zmq.ContextTerminated:
+            pass
+        except zmq.ZMQError as e:
+            self.logger.error(f"ZMQ publisher device stopped: {e}")
+        finally:
+            pull.close()
+            control.close()
+
+    def _count_pub_drop(self, route: bytes):
+        name = route.decode('utf-8')
+        channel = self._default_channel if name == self._default_channel.name else self.channels.get(name)
+        if channel is not None:
+            channel.stats.pub_dropped += 1
+
+    def _thread_socket(self):
+        """This thread's PUSH socket into the forwarder"""
+        sock = getattr(self._local, 'socket', None)
+        if sock is None:
+            self._close_dead_thread_sockets()
+            sock = self.context.socket(zmq.PUSH)
+            sock.setsockopt(zmq.LINGER, 0)
+            sock.setsockopt(zmq.SNDHWM, self.hwm)
+            if not self.drop_on_hwm:
+                sock.setsockopt(zmq.SNDTIMEO, self.send_timeout_ms)
+            sock.connect(self._inproc_address)
+            self._local.socket = sock
+            with self._lock:
+                self._push_sockets[threading.current_thread()] = sock
+        return sock
+
+    def release_thread_socket(self):
+        """Close the calling thread's PUSH socket; adapters call this when their publishing thread stops"""
+        sock = getattr(self._local, 'socket', None)
+        if sock is None:
+            return
+        self._local.socket = None
+        with self._lock:
+            self._push_sockets.pop(threading.current_thread(), None)
+        sock.close(linger=0)
+
+    def _close_dead_thread_sockets(self) -> int:
+        """Close the PUSH sockets of threads that exited without releasing them"""
+        with self._lock:
+            dead = [thread for thread in self._push_sockets if not thread.is_alive()]
+            sockets = [self._push_sockets.pop(thread) for thread in dead]
+        for sock in sockets:
+            sock.close(linger=0)
+        return len(sockets)
+
+    def _send(self, frames: List[bytes], route: bytes = b'default') -> bool:
+        """Send encoded frames. Returns False if the message was dropped."""
+        if not self._bound:
+            self.logger.error("Cannot publish: ZMQ socket not bound")
+            return False
+
+        try:
+            if self._device_thread is None:
+                # PUB sockets never block; messages over the HWM are dropped by ZeroMQ
+                with self._publish_lock:
+                    self.socket.send_multipart(frames)
+                return True
+            flags = zmq.NOBLOCK if self.drop_on_hwm else 0
+            self._thread_socket().send_multipart([route] + frames, flags=flags)
+            return True
+        except zmq.Again:
+            # High water mark reached (or the 'block' timeout expired)
+            return False
+        except Exception as e:
+            self.logger.error(f"Error publishing to ZMQ: {e}")
+            return False
+
+    def channel(self, name: str) -> PublisherChannel:
+        """Publishing handle with its own latency and drop counters"""
+        with self._lock:
+            channel = self.channels.get(name)
+            if channel is None:
+                channel = self.channels[name] = PublisherChannel(self, name)
+            return channel
+
+    def release_channel(self, name: str):
+        with self._lock:
+            self.channels.pop(name, None)
+        self._close_dead_thread_sockets()
+
     def publish(self, topic: str, data: dict):
         """
         Publish market data to ZeroMQ subscribers.
-        Thread-safe publishing.
+        Thread-safe; adapters in a ConnectionPool publish through their own channel().
 
         Args:
             topic: Topic string for subscriber filtering
             data: Market data dictionary
         """
-        if not self._bound:
-            self.logger.error("Cannot publish: ZMQ socket not bound")
-            return
+        self._default_channel.publish(topic, data)
 
-        with self._publish_lock:
-            try:
-                self.socket.send_multipart([
-                    topic.encode('utf-8'),
-                    json.dumps(data).encode('utf-8')
-                ])
-            except Exception as e:
-                self.logger.error(f"Error publishing to ZMQ: {e}")
+    def get_stats(self) -> dict:
+        """Publish latency and drop counters per channel"""
+        with self._lock:
+            channels = list(self.channels.values())
+        stats = {channel.name: channel.stats.to_dict() for channel in channels}
+        stats['default'] = self._default_channel.stats.to_dict()
+        return stats
 
     def cleanup(self):
         """Clean up ZeroMQ resources"""
         try:
+            if self._device_thread is not None:
+                control = self.context.socket(zmq.PAIR)
+                control.setsockopt(zmq.LINGER, 0)
+                control.connect(f"{self._inproc_address}-control")
+                control.send(b'TERMINATE')
+                control.close()
+                self._device_thread.join(timeout=2)
+                self._device_thread = None
+            self._bound = False
+            with self._lock:
+                push_sockets, self._push_sockets = self._push_sockets, {}
+            for sock in push_sockets.values():
+                sock.close(linger=0)
             if self.socket:
                 self.socket.close(linger=0)
             if self.context:
                 self.context.term()
-            self._bound = False
             self._initialized = False
             SharedZmqPublisher._instance = None
         except Exception as e:
@@ -169,7 +415,10 @@ class ConnectionPool:
 
     Automatically creates new connections when symbol limits are reached,
     up to the configured maximum. Distributes subscriptions across connections
-    and aggregates data from all connections through a shared ZeroMQ publisher.
+    by tick rate and aggregates data from all connections through a shared
+    ZeroMQ publisher. A background thread samples per-connection load and
+    migrates symbols between connections (subscribe on the new connection
+    before unsubscribing the old one, so the feed has no gap).
 
     Usage:
         pool = ConnectionPool(
@@ -212,9 +461,21 @@ class ConnectionPool:
         # Connection tracking
         self.adapters: List[Any] = []  # List of adapter instances
         self.adapter_symbol_counts: List[int] = []  # Symbols per adapter
+        self.adapter_loads: List[AdapterLoad] = []  # Tick rate and lag per adapter
 
         # Subscription tracking: (symbol, exchange, mode) -> adapter_index
         self.subscription_map: Dict[Tuple[str, str, int], int] = {}
+        self.subscription_depth: Dict[Tuple[str, str, int], int] = {}
+
+        # Load-based placement and rebalancing
+        self.balancer = PoolBalancer(self.max_symbols)
+        self.rebalance_interval = get_rebalance_interval()
+        self.sample_interval = 5.0
+        self.migrations = 0
+        self.connections_closed = 0
+        self._balancer_stop = threading.Event()
+        self._channel_seq = 0
+        self._balancer_thread: Optional[threading.Thread] = None
 
         # Shared ZeroMQ publisher
         self.shared_publisher = SharedZmqPublisher()
@@ -244,6 +505,8 @@ class ConnectionPool:
     def _create_adapter(self) -> Any:
         """
         Create a new adapter instance configured to use the shared ZeroMQ publisher.
+        Its AdapterLoad and publisher channel are stored on adapter._pool_load
+        and adapter._publish_channel.
 
         Returns:
             New adapter instance
@@ -259,12 +522,18 @@ class ConnectionPool:
             # Create adapter instance
             # BaseBrokerWebSocketAdapter will detect the context and skip ZMQ socket creation
             adapter = self.adapter_class()
+            load = AdapterLoad()
+            self._channel_seq += 1
+            channel = self.shared_publisher.channel(f"{self.broker_name}:{self.user_id}:{self._channel_seq}")
 
             # Override the adapter's publish method to use shared publisher
             def shared_publish(topic: str, data: dict):
-                self.shared_publisher.publish(topic, data)
+                load.mark(topic, data)
+                channel.publish(topic, data)
 
             adapter.publish_market_data = shared_publish
+            adapter._pool_load = load
+            adapter._publish_channel = channel
 
             # Mark that this adapter uses shared ZMQ (to skip individual cleanup)
             adapter._uses_shared_zmq = True
@@ -277,9 +546,15 @@ class ConnectionPool:
             _pooled_creation_context.active = False
             _pooled_creation_context.shared_publisher = None
 
+    def _add_adapter(self, adapter: Any) -> int:
+        self.adapters.append(adapter)
+        self.adapter_symbol_counts.append(0)
+        self.adapter_loads.append(adapter._pool_load)
+        return len(self.adapters) - 1
+
     def _get_adapter_with_capacity(self) -> Tuple[int, Any]:
         """
-        Get an adapter with available capacity, or create a new one.
+        Get the least loaded adapter with available capacity, or create a new one.
 
         Returns:
             Tuple of (adapter_index, adapter_instance)
@@ -288,13 +563,18 @@ class ConnectionPool:
             RuntimeError: If max connections reached and all are full
         """
         with self.lock:
-            # Find adapter with capacity
-            for idx, count in enumerate(self.adapter_symbol_counts):
-                if count < self.max_symbols:
-                    return idx, self.adapters[idx]
+            idx = self.balancer.choose(list(zip(self.adapter_symbol_counts, self.adapter_loads)))
+            if idx is not None:
+                return idx, self.adapters[idx]
 
             # Need new adapter
             if len(self.adapters) >= self.max_connections:
+                # Every connection is over the tick rate target; fall back to symbol capacity
+                with_room = [i for i, count in enumerate(self.adapter_symbol_counts) if count < self.max_symbols]
+                if with_room:
+                    idx = min(with_room, key=lambda i: self.adapter_loads[i].rate)
+                    return idx, self.adapters[idx]
+
                 total_symbols = sum(self.adapter_symbol_counts)
                 raise RuntimeError(
                     f"Maximum capacity reached: {self.max_connections} connections × "
@@ -303,12 +583,12 @@ class ConnectionPool:
                 )
 
             # Create new adapter
-            prev_conn_symbols = self.adapter_symbol_counts[-1] if self.adapter_symbol_counts else 0
             total_symbols = sum(self.adapter_symbol_counts)
+            total_rate = sum(load.rate for load in self.adapter_loads)
             self.logger.info(
                 f"[POOL] Creating NEW connection {len(self.adapters) + 1}/{self.max_connections} "
-                f"for {self.broker_name} (previous connection full: {prev_conn_symbols}/{self.max_symbols} symbols, "
-                f"total subscribed: {total_symbols})"
+                f"for {self.broker_name} (existing connections full: {total_symbols} symbols, "
+                f"{total_rate:.0f} ticks/sec)"
             )
 
             adapter = self._create_adapter()
@@ -317,10 +597,7 @@ class ConnectionPool:
             adapter.initialize(self.broker_name, self.user_id)
             adapter.connect()
 
-            self.adapters.append(adapter)
-            self.adapter_symbol_counts.append(0)
-
-            return len(self.adapters) - 1, adapter
+            return self._add_adapter(adapter), adapter
 
     def initialize(self, broker_name: str = None, user_id: str = None, auth_data: dict = None) -> dict:
         """
@@ -353,8 +630,7 @@ class ConnectionPool:
                 if result and not result.get('success', True):
                     return result
 
-                self.adapters.append(adapter)
-                self.adapter_symbol_counts.append(0)
+                self._add_adapter(adapter)
                 self.initialized = True
 
                 self.logger.info(f"ConnectionPool initialized for {self.broker_name}")
@@ -385,6 +661,7 @@ class ConnectionPool:
                     if result and not result.get('success', True):
                         return result
                     self.connected = True
+                    self._start_balancer()
                     return {'success': True, 'message': 'Connected'}
                 else:
                     return {'success': False, 'error': 'No adapters available'}
@@ -426,7 +703,9 @@ class ConnectionPool:
 
                 if result.get('status') == 'success':
                     self.subscription_map[sub_key] = adapter_idx
+                    self.subscription_depth[sub_key] = depth_level
                     self.adapter_symbol_counts[adapter_idx] += 1
+                    self.adapter_loads[adapter_idx].new_symbols += 1
                     symbols_on_conn = self.adapter_symbol_counts[adapter_idx]
                     total_symbols = sum(self.adapter_symbol_counts)
 
@@ -505,6 +784,7 @@ class ConnectionPool:
 
                 if result.get('status') == 'success':
                     del self.subscription_map[sub_key]
+                    self.subscription_depth.pop(sub_key, None)
                     self.adapter_symbol_counts[adapter_idx] -= 1
 
                     self.logger.debug(
@@ -543,12 +823,14 @@ class ConnectionPool:
                     adapter.unsubscribe_all()
 
             self.subscription_map.clear()
+            self.subscription_depth.clear()
             self.adapter_symbol_counts = [0] * len(self.adapters)
 
             self.logger.info("[POOL] Unsubscribed from all symbols")
 
     def disconnect(self):
         """Disconnect all adapters and clean up"""
+        self._stop_balancer()
         with self.lock:
             # Log PEAK usage (not current, since unsubscribes may have already happened)
             self.logger.info(f"[POOL] ========== DISCONNECTING POOL ==========")
@@ -560,21 +842,16 @@ class ConnectionPool:
 
             for idx, adapter in enumerate(self.adapters):
                 try:
-                    # Skip ZMQ cleanup for adapters using shared publisher
-                    if hasattr(adapter, '_uses_shared_zmq') and adapter._uses_shared_zmq:
-                        # Temporarily disable ZMQ cleanup
-                        original_cleanup = adapter.cleanup_zmq
-                        adapter.cleanup_zmq = lambda: None
-
-                    adapter.disconnect()
-
+                    self._disconnect_adapter(adapter)
                     self.logger.debug(f"Disconnected connection {idx + 1}")
                 except Exception as e:
                     self.logger.error(f"Error disconnecting adapter {idx + 1}: {e}")
 
             self.adapters.clear()
             self.adapter_symbol_counts.clear()
+            self.adapter_loads.clear()
             self.subscription_map.clear()
+            self.subscription_depth.clear()
             self.connected = False
             self.initialized = False
 
@@ -585,6 +862,166 @@ class ConnectionPool:
 
             self.logger.info("[POOL] ConnectionPool disconnected successfully")
 
+    def _disconnect_adapter(self, adapter: Any):
+        # Skip ZMQ cleanup for adapters using shared publisher
+        if getattr(adapter, '_uses_shared_zmq', False):
+            adapter.cleanup_zmq = lambda: None
+        channel = getattr(adapter, '_publish_channel', None)
+        try:
+            adapter.disconnect()
+        finally:
+            if channel is not None:
+                # Also closes the PUSH sockets of adapter threads that have stopped
+                self.shared_publisher.release_channel(channel.name)
+
+    # Load sampling and rebalancing
+
+    def _start_balancer(self):
+        if self._balancer_thread is not None and self._balancer_thread.is_alive():
+            return
+        self._balancer_stop.clear()
+        self._balancer_thread = threading.Thread(
+            target=self._balancer_loop,
+            name=f"pool-balancer-{self.broker_name}",
+            daemon=True
+        )
+        self._balancer_thread.start()
+
+    def _stop_balancer(self):
+        self._balancer_stop.set()
+        thread = self._balancer_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.sample_interval + 1)
+        self._balancer_thread = None
+
+    def _balancer_loop(self):
+        """Sample tick rates every few seconds and rebalance every rebalance_interval"""
+        since_rebalance = 0.0
+        while not self._balancer_stop.wait(self.sample_interval):
+            try:
+                self.sample_loads()
+                since_rebalance += self.sample_interval
+                if self.rebalance_interval > 0 and since_rebalance >= self.rebalance_interval:
+                    since_rebalance = 0.0
+                    self.rebalance()
+            except Exception as e:
+                self.logger.error(f"[POOL] Rebalance error: {e}")
+
+    def sample_loads(self):
+        """Update the smoothed tick rate of every connection"""
+        with self.lock:
+            loads = list(self.adapter_loads)
+        for load in loads:
+            load.sample()
+
+    def _snapshots(self) -> List[AdapterSnapshot]:
+        groups_by_adapter: Dict[int, Dict[Tuple[str, str], int]] = defaultdict(lambda: defaultdict(int))
+        for (symbol, exchange, _mode), idx in self.subscription_map.items():
+            groups_by_adapter[idx][(symbol, exchange)] += 1
+
+        snapshots = []
+        for idx, load in enumerate(self.adapter_loads):
+            sizes = groups_by_adapter.get(idx, {})
+            rates = load.group_rates(sizes.keys())
+            snapshots.append(AdapterSnapshot(
+                index=idx,
+                symbols=self.adapter_symbol_counts[idx],
+                rate=load.rate,
+                groups={group: (size, rates[group]) for group, size in sizes.items()}
+            ))
+        return snapshots
+
+    def rebalance(self, quiet: Optional[bool] = None) -> dict:
+        """
+        Run one rebalance pass: move busy symbols off a hot connection, or
+        during quiet periods drain sparse connections and close them.
+
+        Returns:
+            Dict with the number of symbol groups moved and connections closed
+        """
+        with self.lock:
+            if len(self.adapters) < 2:
+                return {'moved': 0, 'closed': 0}
+
+            snapshots = self._snapshots()
+            if quiet is None:
+                quiet = self.balancer.is_quiet(snapshots)
+            moves = self.balancer.plan(snapshots, quiet)
+
+            moved = sum(1 for move in moves if self._migrate(move))
+            closed = self._close_empty_adapters() if quiet else 0
+
+            if moved or closed:
+                self.logger.info(
+                    f"[POOL] Rebalanced {self.broker_name}: moved {moved} symbol group(s), "
+                    f"closed {closed} connection(s) | symbols per connection: {self.adapter_symbol_counts}"
+                )
+            return {'moved': moved, 'closed': closed}
+
+    def _migrate(self, move: Move) -> bool:
+        """
+        Move every subscription of one instrument to another connection.
+        The target subscribes before the source unsubscribes, so there is no gap
+        (ticks may be published twice while both are subscribed).
+        """
+        symbol, exchange = move.group
+        keys = [key for key, idx in self.subscription_map.items()
+                if idx == move.source and key[0] == symbol and key[1] == exchange]
+        if not keys:
+            return False
+        source, target = self.adapters[move.source], self.adapters[move.target]
+
+        added = []
+        for key in keys:
+            try:
+                result = target.subscribe(key[0], key[1], key[2], self.subscription_depth.get(key, 5))
+            except Exception as e:
+                result = {'status': 'error', 'message': str(e)}
+            if result.get('status') != 'success':
+                self.logger.warning(
+                    f"[POOL] Could not move {symbol}.{exchange} to connection {move.target + 1}: "
+                    f"{result.get('message')}"
+                )
+                for added_key in added:
+                    try:
+                        target.unsubscribe(*added_key)
+                    except Exception as e:
+                        self.logger.error(f"[POOL] Error rolling back {added_key}: {e}")
+                return False
+            added.append(key)
+
+        for key in keys:
+            try:
+                source.unsubscribe(*key)
+            except Exception as e:
+                self.logger.error(f"[POOL] Error unsubscribing {key} from connection {move.source + 1}: {e}")
+            self.subscription_map[key] = move.target
+
+        self.adapter_symbol_counts[move.source] -= len(keys)
+        self.adapter_symbol_counts[move.target] += len(keys)
+        self.migrations += 1
+        return True
+
+    def _close_empty_adapters(self) -> int:
+        """Disconnect connections (other than the first) that carry no symbols"""
+        closed = 0
+        for idx in range(len(self.adapters) - 1, 0, -1):
+            if self.adapter_symbol_counts[idx] > 0:
+                continue
+            adapter = self.adapters.pop(idx)
+            self.adapter_symbol_counts.pop(idx)
+            self.adapter_loads.pop(idx)
+            for key, adapter_idx in self.subscription_map.items():
+                if adapter_idx > idx:
+                    self.subscription_map[key] = adapter_idx - 1
+            try:
+                self._disconnect_adapter(adapter)
+            except Exception as e:
+                self.logger.error(f"[POOL] Error closing connection {idx + 1}: {e}")
+            closed += 1
+        self.connections_closed += closed
+        return closed
+
     def get_stats(self) -> dict:
         """
         Get pool statistics.
@@ -605,11 +1042,16 @@ class ConnectionPool:
                 'total_subscriptions': total_symbols,
                 'max_capacity': max_capacity,
                 'capacity_used_percent': (total_symbols / max_capacity * 100) if max_capacity > 0 else 0,
+                'tick_rate': round(sum(load.rate for load in self.adapter_loads), 2),
+                'migrations': self.migrations,
+                'connections_closed': self.connections_closed,
                 'connections': [
                     {
                         'index': idx + 1,
                         'symbols': count,
-                        'capacity_percent': (count / self.max_symbols * 100)
+                        'capacity_percent': (count / self.max_symbols * 100),
+                        **self.adapter_loads[idx].to_dict(),
+                        **self.adapters[idx]._publish_channel.stats.to_dict()
                     }
                     for idx, count in enumerate(self.adapter_symbol_counts)
                 ]
@@ -0,0 +1,272 @@
+"""
+Load tracking and placement decisions for ConnectionPool.
+
+AdapterLoad counts the ticks each broker connection publishes (per topic)
+and the feed lag reported by tick timestamps. Counting is a dict increment
+on the publish path; rates are computed when the pool samples its loads.
+
+PoolBalancer turns sampled loads into decisions:
+- where a new subscription goes (least loaded connection by tick rate,
+  not just by symbol count)
+- which symbol groups move when one connection runs much hotter than
+  another
+- which sparse connections get drained into the others during quiet
+  periods so they can be closed
+
+It never touches adapters itself, so the decisions are easy to test.
+
+Configuration:
+    WEBSOCKET_REBALANCE_INTERVAL: Seconds between rebalance passes, 0 disables migrations (default: 60)
+    WEBSOCKET_QUIET_TICK_RATE: Pool ticks/sec at or below which sparse connections are consolidated (default: 50)
+    WEBSOCKET_MAX_TICKS_PER_CONNECTION: Ticks/sec above which a connection takes no new symbols, 0 = no limit (default: 0)
+    WEBSOCKET_REBALANCE_MAX_MOVES: Maximum symbol groups migrated per pass (default: 100)
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# (symbol, exchange): subscriptions of one instrument always move together
+Group = Tuple[str, str]
+
+# Weight of the newest sample in the smoothed rates
+RATE_SMOOTHING = 0.5
+LAG_SMOOTHING = 0.1
+
+# Topic rates below this (ticks/sec) are forgotten
+MIN_TOPIC_RATE = 0.01
+
+
+def get_rebalance_interval() -> float:
+    return float(os.getenv('WEBSOCKET_REBALANCE_INTERVAL', '60'))
+
+
+def get_quiet_tick_rate() -> float:
+    return float(os.getenv('WEBSOCKET_QUIET_TICK_RATE', '50'))
+
+
+def get_max_ticks_per_connection() -> float:
+    return float(os.getenv('WEBSOCKET_MAX_TICKS_PER_CONNECTION', '0'))
+
+
+def get_rebalance_max_moves() -> int:
+    return int(os.getenv('WEBSOCKET_REBALANCE_MAX_MOVES', '100'))
+
+
+class AdapterLoad:
+    """Tick counters and lag for one broker connection"""
+
+    __slots__ = ('topic_counts', 'topic_rates', 'rate', 'ticks', 'lag_ms',
+                 'last_tick', 'new_symbols', '_sampled_at')
+
+    def __init__(self):
+        self.topic_counts: Dict[str, int] = {}
+        self.topic_rates: Dict[str, float] = {}
+        self.rate = 0.0
+        self.ticks = 0
+        self.lag_ms = 0.0
+        self.last_tick = 0.0
+        # Symbols added since the last sample, not yet reflected in rate
+        self.new_symbols = 0
+        self._sampled_at = time.monotonic()
+
+    def mark(self, topic: str, data) -> None:
+        """Count one published tick (called on the publish path)"""
+        counts = self.topic_counts
+        counts[topic] = counts.get(topic, 0) + 1
+        now = time.time()
+        self.last_tick = now
+        timestamp = data.get('timestamp') if isinstance(data, dict) else None
+        # Only epoch milliseconds are comparable; some feeds send seconds or strings
+        if isinstance(timestamp, (int, float)) and timestamp > 1e12:
+            self.lag_ms += (now * 1000 - timestamp - self.lag_ms) * LAG_SMOOTHING
+
+    def sample(self, now: Optional[float] = None) -> float:
+        """Fold the counts since the last sample into smoothed rates. Returns the rate."""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._sampled_at
+        if elapsed <= 0:
+            return self.rate
+        counts, self.topic_counts = self.topic_counts, {}
+        self._sampled_at = now
+
+        rates = {}
+        for topic in set(counts) | set(self.topic_rates):
+            current = counts.get(topic, 0) / elapsed
+            rate = self.topic_rates.get(topic, 0.0) * (1 - RATE_SMOOTHING) + current * RATE_SMOOTHING
+            if rate >= MIN_TOPIC_RATE:
+                rates[topic] = rate
+        self.topic_rates = rates
+
+        total = sum(counts.values())
+        self.ticks += total
+        self.rate = self.rate * (1 - RATE_SMOOTHING) + (total / elapsed) * RATE_SMOOTHING
+        self.new_symbols = 0
+        return self.rate
+
+    def group_rates(self, groups: Iterable[Group]) -> Dict[Group, float]:
+        """
+        Ticks/sec per (symbol, exchange), matched from topics like
+        EXCHANGE_SYMBOL_MODE or BROKER_EXCHANGE_SYMBOL_MODE.
+        """
+        by_name = {f"{exchange}_{symbol}": (symbol, exchange) for symbol, exchange in groups}
+        rates = dict.fromkeys(by_name.values(), 0.0)
+        for topic, rate in self.topic_rates.items():
+            name = topic.rsplit('_', 1)[0]
+            group = by_name.get(name)
+            if group is None and '_' in name:
+                group = by_name.get(name.split('_', 1)[1])
+            if group is not None:
+                rates[group] += rate
+        return rates
+
+    def to_dict(self) -> dict:
+        return {
+            'tick_rate': round(self.rate, 2),
+            'ticks': self.ticks,
+            'lag_ms': round(self.lag_ms, 1),
+            'last_tick_age': round(time.time() - self.last_tick, 1) if self.last_tick else None,
+        }
+
+
+@dataclass
+class AdapterSnapshot:
+    """Load of one connection at planning time"""
+    index: int
+    symbols: int
+    rate: float
+    groups: Dict[Group, Tuple[int, float]] = field(default_factory=dict)  # group -> (subscriptions, rate)
+
+
+class Move(NamedTuple):
+    group: Group
+    source: int
+    target: int
+
+
+class PoolBalancer:
+    """Placement, hot-spot rebalancing and consolidation for one pool"""
+
+    def __init__(
+        self,
+        max_symbols: int,
+        max_rate: Optional[float] = None,
+        quiet_rate: Optional[float] = None,
+        max_moves: Optional[int] = None,
+        sparse_fraction: float = 0.5,
+        imbalance_ratio: float = 2.0,
+        min_rebalance_rate: float = 5.0
+    ):
+        self.max_symbols = max_symbols
+        self.max_rate = get_max_ticks_per_connection() if max_rate is None else max_rate
+        self.quiet_rate = get_quiet_tick_rate() if quiet_rate is None else quiet_rate
+        self.max_moves = get_rebalance_max_moves() if max_moves is None else max_moves
+        self.sparse_fraction = sparse_fraction
+        self.imbalance_ratio = imbalance_ratio
+        self.min_rebalance_rate = min_rebalance_rate
+
+    def choose(self, loads: List[Tuple[int, AdapterLoad]]) -> Optional[int]:
+        """
+        Index of the connection a new subscription should go to, or None
+        when every connection is full (by symbols or by tick rate).
+
+        Args:
+            loads: (symbol count, load) per connection
+        """
+        total_symbols = sum(count for count, _ in loads)
+        total_rate = sum(load.rate for _, load in loads)
+        per_symbol = total_rate / total_symbols if total_symbols else 0.0
+
+        best, best_score = None, None
+        for idx, (count, load) in enumerate(loads):
+            if count >= self.max_symbols:
+                continue
+            # Symbols added since the last sample are assumed to tick at the pool average
+            projected = load.rate + load.new_symbols * per_symbol
+            if self.max_rate and projected >= self.max_rate:
+                continue
+            score = (projected, count)
+            if best_score is None or score < best_score:
+                best, best_score = idx, score
+        return best
+
+    def is_quiet(self, snapshots: List[AdapterSnapshot]) -> bool:
+        return sum(s.rate for s in snapshots) <= self.quiet_rate
+
+    def plan(self, snapshots: List[AdapterSnapshot], quiet: Optional[bool] = None) -> List[Move]:
+        """Migrations for one rebalance pass"""
+        if len(snapshots) < 2:
+            return []
+        if quiet is None:
+            quiet = self.is_quiet(snapshots)
+        free = {s.index: self.max_symbols - s.symbols for s in snapshots}
+        rate = {s.index: s.rate for s in snapshots}
+
+        moves: List[Move] = []
+        drained = set()
+        if quiet:
+            moves = self._plan_consolidation(snapshots, free, rate, drained)
+        if not moves:
+            moves = self._plan_hotspot([s for s in snapshots if s.index not in drained], free, rate)
+        return moves
+
+    def _plan_consolidation(self, snapshots, free, rate, drained) -> List[Move]:
+        """Empty the sparsest connections (never the first) into the others"""
+        moves: List[Move] = []
+        sparse_limit = self.max_symbols * self.sparse_fraction
+        for source in sorted(snapshots[1:], key=lambda s: s.symbols):
+            if source.symbols == 0 or source.symbols > sparse_limit:
+                continue
+            targets = [s.index for s in snapshots if s.index != source.index and s.index not in drained]
+            if sum(free[i] for i in targets) < source.symbols:
+                break
+            if len(moves) + len(source.groups) > self.max_moves:
+                break
+
+            trial_free, trial_rate = dict(free), dict(rate)
+            planned = []
+            # Largest groups first so they still find room
+            for group, (size, group_rate) in sorted(source.groups.items(), key=lambda g: -g[1][0]):
+                fits = [i for i in targets if trial_free[i] >= size]
+                if not fits:
+                    planned = None
+                    break
+                target = min(fits, key=lambda i: trial_rate[i])
+                planned.append(Move(group, source.index, target))
+                trial_free[target] -= size
+                trial_rate[target] += group_rate
+            if planned is None:
+                continue
+
+            moves.extend(planned)
+            free.update(trial_free)
+            rate.update(trial_rate)
+            free[source.index] = 0  # nothing moves onto a connection being drained
+            drained.add(source.index)
+        return moves
+
+    def _plan_hotspot(self, snapshots, free, rate) -> List[Move]:
+        """Move the busiest symbols from the hottest to the coolest connection"""
+        if len(snapshots) < 2:
+            return []
+        hot = max(snapshots, key=lambda s: rate[s.index])
+        cool = min(snapshots, key=lambda s: rate[s.index])
+        hot_rate, cool_rate = rate[hot.index], rate[cool.index]
+        if hot_rate < self.min_rebalance_rate or hot_rate <= self.imbalance_ratio * cool_rate:
+            return []
+
+        target_shift = (hot_rate - cool_rate) / 2
+        shifted = 0.0
+        moves: List[Move] = []
+        for group, (size, group_rate) in sorted(hot.groups.items(), key=lambda g: -g[1][1]):
+            if group_rate <= 0 or shifted >= target_shift or len(moves) >= self.max_moves:
+                break
+            # Only moves that narrow the gap between the two connections
+            if group_rate >= 2 * (target_shift - shifted) or free[cool.index] < size:
+                continue
+            moves.append(Move(group, hot.index, cool.index))
+            free[cool.index] -= size
+            free[hot.index] += size
+            shifted += group_rate
+        return moves
@@ -19,6 +19,7 @@ from sqlalchemy import text
 from database.auth_db import verify_api_key
 from .broker_factory import create_broker_adapter
 from .base_adapter import BaseBrokerWebSocketAdapter
+from services.bar_aggregator import BAR_MODE, get_bar_aggregator
 
 # Initialize logger
 logger = get_logger("websocket_proxy")
@@ -76,6 +77,11 @@ class WebSocketProxy:
         # PERFORMANCE OPTIMIZATION 3: Pre-compute mode mappings
         self.MODE_MAP = {"LTP": 1, "QUOTE": 2, "DEPTH": 3}
 
+        # Completed OHLCV bars are pushed from the bar aggregator (BAR mode)
+        self.bar_aggregator = None
+        self.bar_listener_id = None
+        self.loop = None
+
         # ZeroMQ context for subscribing to broker adapters
         self.context = zmq.asyncio.Context()
         self.socket = self.context.socket(zmq.SUB)
@@ -97,6 +103,11 @@ class WebSocketProxy:
             
             # Get the current event loop
             loop = aio.get_running_loop()
+            self.loop = loop
+
+            # Completed bars arrive on the aggregator's threads and are sent from this loop
+            self.bar_aggregator = get_bar_aggregator()
+            self.bar_listener_id = self.bar_aggregator.add_listener(self.on_bar_completed)
             
             # Create the ZMQ listener task
             zmq_task = loop.create_task(self.zmq_listener())
@@ -170,6 +181,10 @@ class WebSocketProxy:
         """Stop the WebSocket server and clean up all resources"""
         logger.info("Stopping WebSocket server...")
         self.running = False
+
+        if self.bar_aggregator and self.bar_listener_id is not None:
+            self.bar_aggregator.remove_listener(self.bar_listener_id)
+            self.bar_listener_id = None
         
         try:
             # Close the WebSocket server first (this releases the port)
@@ -300,19 +315,14 @@ class WebSocketProxy:
                     exchange = sub_info.get('exchange')
                     mode = sub_info.get('mode')
 
-                    # OPTIMIZATION: Remove from subscription index
-                    sub_key = (symbol, exchange, mode)
-                    if sub_key in self.subscription_index:
-                        self.subscription_index[sub_key].discard(client_id)
-                        # Clean up empty entries
-                        if not self.subscription_index[sub_key]:
-                            del self.subscription_index[sub_key]
+                    # The client is gone even if the broker unsubscribe fails
+                    self.discard_subscription(client_id, symbol, exchange, mode)
 
                     # Get the user's broker adapter
                     user_id = self.user_mapping.get(client_id)
                     if user_id and user_id in self.broker_adapters:
                         adapter = self.broker_adapters[user_id]
-                        adapter.unsubscribe(symbol, exchange, mode)
+                        self.release_feed(client_id, adapter, symbol, exchange, mode)
                 except json.JSONDecodeError as e:
                     logger.exception(f"Error parsing subscription: {sub_json}, Error: {e}")
                 except Exception as e:
@@ -615,7 +625,8 @@ class WebSocketProxy:
         mode_mapping = {
             "LTP": 1,
             "Quote": 2, 
-            "Depth": 3
+            "Depth": 3,
+            "Bar": BAR_MODE
         }
         
         # Convert string mode to numeric if needed
@@ -653,7 +664,7 @@ class WebSocketProxy:
                 continue  # Skip invalid symbols
                 
             # Subscribe to market data
-            response = adapter.subscribe(symbol, exchange, mode, depth_level)
+            response = adapter.subscribe(symbol, exchange, self.adapter_mode(mode), depth_level)
             
             if response.get("status") == "success":
                 # Store the subscription
@@ -768,7 +779,7 @@ class WebSocketProxy:
                     mode = sub.get("mode")
                     
                     if symbol and exchange:
-                        response = adapter.unsubscribe(symbol, exchange, mode)
+                        response = self.release_feed(client_id, adapter, symbol, exchange, mode)
                         
                         if response.get("status") == "success":
                             successful_unsubscriptions.append({
@@ -799,7 +810,7 @@ class WebSocketProxy:
                     continue  # Skip invalid symbols
                 
                 # Unsubscribe from market data
-                response = adapter.unsubscribe(symbol, exchange, mode)
+                response = self.release_feed(client_id, adapter, symbol, exchange, mode)
                 
                 if response.get("status") == "success":
                     # Try to remove subscription
@@ -857,6 +868,81 @@ class WebSocketProxy:
             "broker": broker_name
         })
     
+    @staticmethod
+    def adapter_mode(mode):
+        """Broker feed mode behind a client mode: bars are built from Quote ticks (they carry volume)"""
+        if mode == BAR_MODE or mode == "Bar":
+            return 2
+        return mode
+
+    def discard_subscription(self, client_id, symbol, exchange, mode):
+        """Remove a client from the subscription index"""
+        sub_key = (symbol, exchange, mode)
+        if sub_key in self.subscription_index:
+            self.subscription_index[sub_key].discard(client_id)
+            # Clean up empty entries
+            if not self.subscription_index[sub_key]:
+                del self.subscription_index[sub_key]
+
+    def release_feed(self, client_id, adapter, symbol, exchange, mode):
+        """
+        Drop a client's subscription and unsubscribe the broker feed behind it,
+        unless another subscription of the same user still uses that feed (a
+        Bar subscription and a Quote subscription share the Quote feed).
+
+        Returns:
+            The adapter's unsubscribe response, or a success response when the
+            feed is kept for other subscribers
+        """
+        user_id = self.user_mapping.get(client_id)
+        feed_mode = self.adapter_mode(mode)
+        still_used = False
+        for client_mode in {1, 2, 3, BAR_MODE, mode}:
+            if self.adapter_mode(client_mode) != feed_mode:
+                continue
+            for other_id in self.subscription_index.get((symbol, exchange, client_mode), ()):
+                if (other_id, client_mode) != (client_id, mode) and self.user_mapping.get(other_id) == user_id:
+                    still_used = True
+                    break
+            if still_used:
+                break
+
+        if still_used:
+            response = {"status": "success", "message": "Feed kept for other subscriptions"}
+        else:
+            response = adapter.unsubscribe(symbol, exchange, feed_mode)
+        if response.get("status") == "success":
+            self.discard_subscription(client_id, symbol, exchange, mode)
+        return response
+
+    def on_bar_completed(self, bar):
+        """Bar aggregator listener; may run on any thread"""
+        if not self.running or self.loop is None:
+            return
+        if (bar['symbol'], bar['exchange'], BAR_MODE) not in self.subscription_index:
+            return
+        aio.run_coroutine_threadsafe(self.send_bar(bar), self.loop)
+
+    async def send_bar(self, bar):
+        """Send a completed bar to clients subscribed in BAR mode"""
+        symbol, exchange = bar['symbol'], bar['exchange']
+        client_ids = self.subscription_index.get((symbol, exchange, BAR_MODE), set()).copy()
+        send_tasks = []
+        for client_id in client_ids:
+            user_id = self.user_mapping.get(client_id)
+            if client_id not in self.clients or not user_id:
+                continue
+            send_tasks.append(self.send_message(client_id, {
+                "type": "market_data",
+                "symbol": symbol,
+                "exchange": exchange,
+                "mode": BAR_MODE,
+                "data": bar,
+                "broker": self.user_broker_mapping.get(user_id)
+            }))
+        if send_tasks:
+            await aio.gather(*send_tasks, return_exceptions=True)
+
     async def send_message(self, client_id, message):
         """
         Send a message to a client
@@ -965,6 +1051,16 @@ class WebSocketProxy:
                     logger.warning(f"Invalid mode in topic: {mode_str}")
                     continue
 
+                # Build bars for BAR mode clients straight from the feed. A tick that also
+                # reaches the aggregator through MarketDataService adds no volume twice
+                if mode != 3 and self.bar_aggregator and (symbol, exchange, BAR_MODE) in self.subscription_index:
+                    self.bar_aggregator.on_tick({
+                        "symbol": symbol,
+                        "exchange": exchange,
+                        "mode": mode,
+                        "data": market_data
+                    })
+
                 # OPTIMIZATION: Message throttling for high-frequency updates
                 # Skip if we sent the same message too recently (reduces CPU on fast updates)
                 sub_key = (symbol, exchange, mode)